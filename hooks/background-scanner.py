@@ -15,10 +15,17 @@ import shutil
 import subprocess
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to sys.path for hooks imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Constants
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB max for secret scanning
+SECRET_SCAN_MAX_HITS = 20  # Stop reporting after this many hits per file
+SECRET_SCAN_BUDGET_MS = 200  # Stop scanning a file after this long
+SCAN_CACHE_FILE = Path.home() / ".claude" / "security" / "secret-scan-cache.json"
+SCAN_CACHE_MAX_ENTRIES = 512
 
 
 # =============================================================================
@@ -154,51 +161,111 @@ Run `{' '.join(cmd)}` for details.
     return None
 
 
+def _load_scan_cache() -> Dict:
+    try:
+        return json.loads(SCAN_CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_scan_cache(cache: Dict) -> None:
+    import os
+
+    while len(cache) > SCAN_CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)))  # Oldest insertion first
+    try:
+        SCAN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = SCAN_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache), encoding="utf-8")
+        os.replace(tmp, SCAN_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def scan_file_cached(path: Path) -> Tuple[List, bool]:
+    """
+    Stream-scan a file for secrets, reusing the cached hits of unchanged files.
+
+    The cache is keyed by resolved path and validated by (size, mtime). When
+    only the mtime moved, the sha256 decides (from the shared digest cache in
+    hooks/file_digest.py), so touched-but-identical files are not rescanned.
+    Entries cached within RACY_SECONDS of the file's mtime are also checked by
+    sha256: a same-size rewrite in the same mtime tick keeps the mtime. Scans
+    cut short by the time budget are not cached.
+
+    Returns:
+        ([[secret_type, line, column], ...], truncated)
+    """
+    import time
+
+    from hooks.file_digest import RACY_SECONDS, file_digest, save_digests
+    from hooks.secret_scanner import scan_file
+
+    stat = path.stat()
+    key = str(path.resolve())
+    cache = _load_scan_cache()
+    entry = cache.pop(key, None)
+    sha = None
+    racy = time.time() - stat.st_mtime_ns / 1e9 < RACY_SECONDS
+    if isinstance(entry, dict) and entry.get("size") == stat.st_size and "hits" in entry:
+        if entry.get("mtime_ns") == stat.st_mtime_ns and not entry.get("racy"):
+            cache[key] = entry
+            return entry["hits"], entry.get("truncated", False)
+        sha = file_digest(path)
+        if entry.get("sha256") == sha:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["racy"] = racy
+            cache[key] = entry
+            _save_scan_cache(cache)
+            save_digests()
+            return entry["hits"], entry.get("truncated", False)
+
+    result = scan_file(path, max_hits=SECRET_SCAN_MAX_HITS, budget_ms=SECRET_SCAN_BUDGET_MS)
+    hits = [list(hit) for hit in result.hits]
+    if not result.truncated or len(result.hits) >= SECRET_SCAN_MAX_HITS:
+        cache[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha or file_digest(path),
+            "hits": hits,
+            "truncated": result.truncated,
+            "racy": racy,
+        }
+        _save_scan_cache(cache)
+        save_digests()
+    return hits, result.truncated
+
+
 def run_secret_scan(file_path: str, project_root: str) -> Optional[str]:
     """
-    Quick pattern-based secret scan on a file.
+    Pattern-based secret scan over the whole file (streamed in chunks).
+
+    Uses the same compiled pattern bank as security-gate. The entropy stage is
+    skipped: source files are full of hashes and base64 blobs.
 
     Returns:
         Optional[str]: Warning message if secrets detected
     """
     try:
         path = Path(file_path)
-        # Skip files larger than 10MB to prevent memory exhaustion
+        # Skip huge files (data dumps, logs) - the scan budget would cut them short anyway
         if path.stat().st_size > MAX_FILE_SIZE:
             return None
-        content = path.read_text(encoding="utf-8", errors="ignore")
+        hits, truncated = scan_file_cached(path)
     except Exception:
         return None
 
-    # Simple pattern detection (not exhaustive - just common cases)
-    # Use atomic groups and possessive quantifiers where possible to prevent ReDoS
-    suspicious_patterns = [
-        ("API key", r"api[_-]?key\s*[:=]\s*['\"]?[\w\-]{20,40}"),
-        ("Secret key", r"secret[_-]?key\s*[:=]\s*['\"]?[\w\-]{20,40}"),
-        ("Password", r"password\s*[:=]\s*['\"]?[\w\-]{8,32}"),
-        ("Token", r"token\s*[:=]\s*['\"]?[\w\-]{20,40}"),
-        ("AWS key", r"AKIA[0-9A-Z]{16}"),
-        ("Private key", r"-----BEGIN (?:RSA |EC )?PRIVATE KEY-----"),
-    ]
-
-    import re
-    found_secrets = []
-
-    # Use timeout wrapper for regex to prevent ReDoS
-    for name, pattern in suspicious_patterns:
-        try:
-            # Limit search to prevent catastrophic backtracking
-            if re.search(pattern, content[:5000], re.IGNORECASE, timeout=0.1) if hasattr(re, 'search') else re.search(pattern, content[:5000], re.IGNORECASE):
-                found_secrets.append(name)
-        except (re.error, TimeoutError):
-            # Regex timeout or error - skip this pattern
-            continue
+    found_secrets = list(dict.fromkeys(secret_type for secret_type, _, _ in hits))
+    locations = "\n".join(f"  - line {line}, col {column}: {secret_type}" for secret_type, line, column in hits)
+    if truncated:
+        locations += "\n  - (scan stopped early; more may follow)"
 
     if found_secrets:
         return f"""
 🔐 Secret Scan: Potential secrets detected in {Path(file_path).name}
 
 Found patterns: {', '.join(found_secrets)}
+{locations}
 
 Please verify these are not actual secrets. If they are:
 1. Move to .env file
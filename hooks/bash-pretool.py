@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Bash PreToolUse Pipeline - Every Bash pre-check in one process.
+
+Replaces five separate PreToolUse:Bash hooks (each of which started an
+interpreter, re-read stdin and re-parsed the same hook JSON) with ordered
+stages over one shared context:
+
+  1. bypass-permissions   scripts/guards.py evaluate_bypass_permissions
+  2. fs-guard             scripts/guards.py _fs_guard_bash
+  3. sandbox              hooks/sandbox-boundary.py pretool_bash_sandbox
+  4. security-gate        hooks/security-gate.py evaluate_bash_command
+  5. git-teammate         hooks/git.py evaluate_teammate_git_commit
+  6. git-build-id         hooks/git.py evaluate_build_id
+  7. git-env-encryption   hooks/git.py evaluate_env_encryption
+  8. git-commit-review    hooks/git.py evaluate_commit_review (writes commit.md)
+
+The first deny stops the pipeline. "ask" reasons from all stages are merged
+into one prompt. A stage that crashes is skipped (hooks never block on
+internal errors). Exactly one hookSpecificOutput is printed, or none.
+
+The combined verdict of stages 1-4 is cached across processes by
+hooks/verdict_cache.py, so a repeated command skips every detector. On a hit
+only the security-gate audit line is written again. The git stages always run.
+
+The sandbox stage returns the legacy {"result": "error"} payload, which
+Claude Code never treated as a permission decision; it stays advisory here.
+
+Usage:
+  python bash-pretool.py    # PreToolUse: Bash (reads hook JSON from stdin)
+"""
+
+import importlib.util
+import json
+import re
+import sys
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Optional
+
+# Add parent directory to sys.path for hooks/scripts imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hooks.git import (
+    evaluate_build_id,
+    evaluate_commit_review,
+    evaluate_env_encryption,
+    evaluate_teammate_git_commit,
+    find_git_root_from_cwd,
+)
+from scripts.guards import _fs_guard_bash, evaluate_bypass_permissions
+
+
+def _load_hook(module_name: str, filename: str):
+    """Import a hyphenated hook script (security-gate.py, sandbox-boundary.py)."""
+    spec = importlib.util.spec_from_file_location(module_name, Path(__file__).parent / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+security_gate = _load_hook("security_gate", "security-gate.py")
+sandbox_boundary = _load_hook("sandbox_boundary", "sandbox-boundary.py")
+
+
+# =============================================================================
+# Stdin Timeout - Prevent hanging on missing stdin
+# =============================================================================
+
+from hooks.compat import setup_stdin_timeout, cancel_stdin_timeout
+from hooks.hook_trace import traced
+
+# Armed after the imports above (each of them re-arms its own 5s alarm)
+setup_stdin_timeout(5, debug_label="bash-pretool.py")
+
+
+# =============================================================================
+# Shared Context
+# =============================================================================
+
+GIT_COMMIT_RE = re.compile(r"^git\s+commit\b")
+
+
+class BashContext:
+    """Parsed hook input shared by all stages (tokens and git root computed once)."""
+
+    def __init__(self, hook_input: dict):
+        self.hook_input = hook_input
+        self.tool_input = hook_input.get("tool_input", {}) or {}
+        self.command = self.tool_input.get("command", "") or ""
+        self.cwd = hook_input.get("cwd", ".") or "."
+        self.security_outcome = None  # (threat, action) once security-gate ran
+        self.stage_failed = False
+
+    @cached_property
+    def tokens(self) -> list[str]:
+        """shlex tokens of the command."""
+        return sandbox_boundary.split_command(self.command)
+
+    @cached_property
+    def is_git_commit(self) -> bool:
+        return bool(GIT_COMMIT_RE.match(self.command))
+
+    @cached_property
+    def repo_root(self) -> Optional[Path]:
+        """Git root of cwd (one `git rev-parse` per invocation)."""
+        return find_git_root_from_cwd(self.cwd)
+
+
+# =============================================================================
+# Stages
+# =============================================================================
+
+def stage_bypass_permissions(ctx: BashContext) -> Optional[dict]:
+    return evaluate_bypass_permissions(ctx.hook_input)
+
+
+def stage_fs_guard(ctx: BashContext) -> Optional[dict]:
+    return _fs_guard_bash(ctx.tool_input)
+
+
+def stage_sandbox(ctx: BashContext) -> Optional[dict]:
+    sandbox_boundary.pretool_bash_sandbox(ctx.tool_input, ctx.cwd, words=ctx.tokens)
+    return None  # Advisory only - see module docstring
+
+
+def stage_security_gate(ctx: BashContext) -> Optional[dict]:
+    threat, action = security_gate.run_security_checks(ctx.command)
+    security_gate.log_bash_outcome(ctx.command, threat, action)
+    ctx.security_outcome = (threat, action)
+    return security_gate.bash_decision(threat, action)
+
+
+def stage_git_teammate(ctx: BashContext) -> Optional[dict]:
+    if not ctx.is_git_commit:
+        return None
+    return evaluate_teammate_git_commit(ctx.command)
+
+
+def stage_git_build_id(ctx: BashContext) -> Optional[dict]:
+    if not ctx.is_git_commit or not ctx.repo_root:
+        return None
+    return evaluate_build_id(ctx.command, ctx.repo_root)
+
+
+def stage_git_env_encryption(ctx: BashContext) -> Optional[dict]:
+    if not ctx.is_git_commit or not ctx.repo_root:
+        return None
+    return evaluate_env_encryption(ctx.repo_root)
+
+
+def stage_git_commit_review(ctx: BashContext) -> Optional[dict]:
+    if not ctx.is_git_commit:
+        return None
+    return evaluate_commit_review(ctx.command, ctx.cwd)
+
+
+STAGES: list[tuple[str, Callable[[BashContext], Optional[dict]]]] = [
+    ("bypass-permissions", stage_bypass_permissions),
+    ("fs-guard", stage_fs_guard),
+    ("sandbox", stage_sandbox),
+    ("security-gate", stage_security_gate),
+    ("git-teammate", stage_git_teammate),
+    ("git-build-id", stage_git_build_id),
+    ("git-env-encryption", stage_git_env_encryption),
+    ("git-commit-review", stage_git_commit_review),
+]
+
+# Stages whose verdict depends only on the verdict-cache key (no repo state)
+DETECTOR_STAGES = STAGES[:4]
+GIT_STAGES = STAGES[4:]
+
+
+# =============================================================================
+# Pipeline
+# =============================================================================
+
+def _decision(reason: Optional[str], decision: str) -> dict:
+    """Build a single PreToolUse hookSpecificOutput."""
+    output = {
+        "hookEventName": "PreToolUse",
+        "permissionDecision": decision,
+    }
+    if reason:
+        output["permissionDecisionReason"] = reason
+    return {"hookSpecificOutput": output}
+
+
+def _run_stages(verdict: dict, stages, ctx: BashContext) -> None:
+    """Fold stage results into verdict: {"deny": reason|None, "asks": [...], "allowed": bool}."""
+    for _name, stage in stages:
+        if verdict["deny"] is not None:
+            return
+        try:
+            result = stage(ctx)
+        except Exception:
+            ctx.stage_failed = True
+            continue  # Stage failure must not block the command
+        if not result:
+            continue
+
+        output = result.get("hookSpecificOutput", {})
+        decision = output.get("permissionDecision", "")
+        reason = output.get("permissionDecisionReason", "")
+        if decision in ("deny", "block"):
+            verdict["deny"] = reason
+        elif decision == "ask":
+            if reason not in verdict["asks"]:
+                verdict["asks"].append(reason)
+        elif decision == "allow":
+            verdict["allowed"] = True
+
+
+def _run_detectors(verdict: dict, ctx: BashContext) -> None:
+    """Run DETECTOR_STAGES, or replay their cached verdict for a repeated command."""
+    cache = key = None
+    try:
+        from hooks import verdict_cache
+
+        if verdict_cache.enabled():
+            cache = verdict_cache.VerdictCache()
+            key = cache.key(ctx.command, ctx.hook_input.get("permission_mode", ""), ctx.cwd)
+            cached = cache.get(key)
+            if cached is not None:
+                verdict.update(cached["verdict"])
+                if cached.get("security"):
+                    security_gate.log_bash_outcome(ctx.command, *cached["security"])
+                return
+    except Exception:
+        cache = None  # The cache is an optimization only
+
+    _run_stages(verdict, DETECTOR_STAGES, ctx)
+    if cache is None or ctx.stage_failed:
+        return
+    try:
+        # Secret-bearing commands are never cached (not even their hash)
+        if security_gate.detect_secret_leak(ctx.command) is None:
+            cache.put(key, {"verdict": verdict, "security": ctx.security_outcome})
+    except Exception:
+        pass
+
+
+def run_pipeline(hook_input: dict, stages=None) -> Optional[dict]:
+    """
+    Run stages in order and merge their decisions.
+
+    With the default stage list the detector stages go through the verdict
+    cache; an explicit `stages` list always runs uncached.
+
+    Returns:
+        deny (first one wins) > ask (reasons merged) > allow > None.
+    """
+    ctx = BashContext(hook_input)
+    if hook_input.get("tool_name", "") != "Bash" or not ctx.command:
+        return None
+
+    verdict = {"deny": None, "asks": [], "allowed": False}
+    if stages is not None:
+        _run_stages(verdict, stages, ctx)
+    else:
+        _run_detectors(verdict, ctx)
+        _run_stages(verdict, GIT_STAGES, ctx)
+
+    if verdict["deny"] is not None:
+        return _decision(verdict["deny"], "deny")
+    if verdict["asks"]:
+        return _decision("\n\n".join(r for r in verdict["asks"] if r), "ask")
+    if verdict["allowed"]:
+        return _decision(None, "allow")
+    return None
+
+
+@traced("bash-pretool.py")
+def main() -> None:
+    """PreToolUse:Bash entry point."""
+    try:
+        # Limit stdin read to prevent memory exhaustion (same limit as security-gate)
+        raw_input = sys.stdin.buffer.read(security_gate.MAX_STDIN_SIZE).decode("utf-8", errors="replace")
+        cancel_stdin_timeout()
+        if len(raw_input) >= security_gate.MAX_STDIN_SIZE:
+            print(json.dumps(_decision("Command input exceeds size limit (1MB)", "deny")))
+            sys.exit(0)
+        hook_input = json.loads(raw_input)
+    except (json.JSONDecodeError, OSError):
+        sys.exit(0)
+
+    if not isinstance(hook_input, dict):
+        sys.exit(0)
+
+    result = run_pipeline(hook_input)
+    if result:
+        print(json.dumps(result))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
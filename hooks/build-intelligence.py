@@ -20,6 +20,11 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+# Add parent directory to sys.path for hooks imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hooks.hook_trace import traced
+
 # =============================================================================
 # Configuration
 # =============================================================================
@@ -212,6 +217,7 @@ def hook_handler() -> None:
 # Main Entry Point
 # =============================================================================
 
+@traced("build-intelligence.py")
 def main() -> None:
     """Main entry point."""
     if len(sys.argv) < 2:
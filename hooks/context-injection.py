@@ -20,6 +20,10 @@ from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.ralph_phase import load_state
+
 
 # =============================================================================
 # Configuration
@@ -36,14 +40,14 @@ MAX_CONTEXT_CHARS = 500  # Keep injected context concise
 
 
 def read_ralph_state() -> Optional[dict]:
-    """Read Ralph state file if it exists."""
+    """Read Ralph state (state.json snapshot plus its state journal) if it exists."""
     state_path = Path(RALPH_STATE_FILE)
     if not state_path.exists():
         return None
 
     try:
-        return json.loads(state_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
+        return load_state(state_path)
+    except (ValueError, OSError):
         return None
 
 
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+File Digest - Streamed file hashing with a persistent cross-hook digest cache.
+
+Hooks that fingerprint files (change-tracker receipts, the background secret
+scanner, sync-workflows drift checks) share one cache at
+~/.claude/.cache/file-digests.json, keyed by resolved path and validated by
+(size, mtime_ns, inode). An unchanged file costs one stat; a changed one is
+hashed in 1 MiB blocks, so memory stays flat for large bundles and lockfiles.
+
+Two kinds of digest:
+    sha256  Cryptographic, for audit receipts (the format they always used)
+    fast    Equality checks only: xxh3_64 when the optional xxhash package is
+            installed, blake2b-128 otherwise
+
+Lookups only touch memory. A hook run writes its new digests once, through
+save_digests() at its end (and at interpreter exit); save() re-reads the
+file and merges this process's entries into it, so a long-lived process
+(hookd) never overwrites entries other processes saved meanwhile, and it
+reloads the file whenever another process has replaced it.
+
+Entries whose mtime is within RACY_SECONDS of the moment they were hashed are
+"racy" (a same-size rewrite in the same mtime tick would go unnoticed) and are
+re-hashed on their next lookup. Files under CACHE_MIN_BYTES are hashed
+directly; reading the cache would cost more than the hash.
+
+Environment:
+    CLAUDE_FILE_DIGEST_CACHE    Cache file override
+
+Usage:
+    from hooks.file_digest import fast_digest, file_digest, save_digests
+
+    receipt["sha256"] = file_digest(path)
+    if fast_digest(source) != fast_digest(dest): ...
+    save_digests()  # End of the hook run
+
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+BLOCK_BYTES = 1024 * 1024
+CACHE_MIN_BYTES = 64 * 1024
+CACHE_MAX_ENTRIES = 4096
+RACY_SECONDS = 2.0
+
+
+def _xxhash():
+    """The xxhash module, or None when it is not installed (imported lazily)."""
+    try:
+        import xxhash
+    except ImportError:
+        return None
+    return xxhash
+
+
+def fast_algorithm() -> str:
+    return "xxh3_64" if _xxhash() is not None else "blake2b-128"
+
+
+def cache_path() -> Path:
+    override = os.environ.get("CLAUDE_FILE_DIGEST_CACHE")
+    if override:
+        return Path(override)
+    home = os.environ.get("CLAUDE_HOME") or os.path.join(os.path.expanduser("~"), ".claude")
+    return Path(home) / ".cache" / "file-digests.json"
+
+
+def _new_hasher(algorithm: str):
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "xxh3_64":
+        return _xxhash().xxh3_64()
+    if algorithm == "blake2b-128":
+        return hashlib.blake2b(digest_size=16)
+    raise ValueError(f"Unknown digest algorithm: {algorithm}")
+
+
+def hash_file(path: Path, algorithm: str = "sha256") -> str:
+    """Hex digest of a file, read in BLOCK_BYTES blocks. Raises OSError."""
+    hasher = _new_hasher(algorithm)
+    with open(path, "rb") as f:
+        while block := f.read(BLOCK_BYTES):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _file_key(path: Path) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class DigestCache:
+    """JSON-backed {path: entry} map, insertion-ordered for LRU eviction."""
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path if path is not None else cache_path()
+        self.max_entries = max_entries
+        self._entries: Optional[dict] = None
+        self._loaded: Optional[tuple] = None  # Identity of the cache file _entries was read from
+        self._changed: dict = {}  # Entries recorded since the last save
+
+    def _read(self) -> dict:
+        self._loaded = _file_key(self.path)
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def entries(self) -> dict:
+        """Current entries; re-read when another process replaced the file, keeping unsaved ones."""
+        if self._entries is None or _file_key(self.path) != self._loaded:
+            entries = self._read()
+            for key, entry in self._changed.items():
+                entries.pop(key, None)
+                entries[key] = entry
+            self._entries = entries
+        return self._entries
+
+    def digest(self, path: Path, algorithm: str) -> str:
+        """Digest of path via the cache; hashes and records it on a miss. Raises OSError."""
+        stat = os.stat(path)
+        if stat.st_size < CACHE_MIN_BYTES:
+            return hash_file(path, algorithm)
+
+        key = str(Path(path).resolve())
+        entries = self.entries()
+        entry = entries.pop(key, None)
+        identity = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+        if not isinstance(entry, dict) or entry.get("id") != identity or entry.get("racy"):
+            entry = {"id": identity}
+        value = entry.get(algorithm)
+        if value is None:
+            value = hash_file(path, algorithm)
+            entry[algorithm] = value
+            entry["racy"] = time.time() - stat.st_mtime_ns / 1e9 < RACY_SECONDS
+            self._changed[key] = entry
+        entries[key] = entry  # Most recently used last
+        return value
+
+    def save(self) -> None:
+        """Merge the entries recorded since the last save into the file as it is now."""
+        if not self._changed:
+            return
+        entries = self._read()
+        for key, entry in self._changed.items():
+            entries.pop(key, None)
+            entries[key] = entry
+        while len(entries) > self.max_entries:
+            entries.pop(next(iter(entries)))
+        self._entries = entries
+        self._changed = {}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entries, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._loaded = _file_key(self.path)
+        except OSError:
+            pass  # Cache only: the digest is still correct
+
+
+_cache: Optional[DigestCache] = None
+
+
+def _shared_cache() -> DigestCache:
+    global _cache
+    if _cache is None or _cache.path != cache_path():
+        if _cache is None:
+            atexit.register(save_digests)
+        else:
+            _cache.save()
+        _cache = DigestCache()
+    return _cache
+
+
+def save_digests() -> None:
+    """Write the digests recorded since the last save (call once at the end of a hook run)."""
+    if _cache is not None:
+        _cache.save()
+
+
+def file_digest(path: Path, algorithm: str = "sha256") -> str:
+    """Cached hex digest of a file (sha256 by default); saved by save_digests(). Raises OSError."""
+    return _shared_cache().digest(path, algorithm)
+
+
+def fast_digest(path: Path) -> str:
+    """Cached non-cryptographic digest for equality checks (xxh3_64 or blake2b-128)."""
+    return file_digest(path, fast_algorithm())
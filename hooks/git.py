@@ -34,6 +34,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 # =============================================================================
 
 from hooks.compat import setup_stdin_timeout, cancel_stdin_timeout
+from hooks.hook_trace import traced
 
 setup_stdin_timeout(5, debug_label="git.py")
 
@@ -218,39 +219,46 @@ def commit_review() -> None:
     if not re.match(r"^git\s+commit\b", command):
         sys.exit(0)
 
-    # Extract message - improved HEREDOC and -m flag parsing
+    print(json.dumps(evaluate_commit_review(command, hook_input.get("cwd", "."))))
+    sys.exit(0)
+
+
+def extract_commit_message(command: str) -> str:
+    """Extract the commit message from a git commit command ("" if none)."""
     # Handle HEREDOC with optional quotes and proper escaping
     heredoc_match = re.search(r'cat\s*<<\s*[\'"]?EOF[\'"]?\s*\n(.*?)\nEOF', command, re.DOTALL)
     if heredoc_match:
-        msg = heredoc_match.group(1).strip()
-    else:
-        # Handle -m flag with single/double quotes, including escaped quotes
-        # Use non-greedy match and handle escaped quotes
-        msg_match = re.search(r'-m\s+(["\'])((?:(?!\1).|\\.)*)\1', command, re.DOTALL)
-        if msg_match:
-            msg = msg_match.group(2)
-            # Unescape any escaped quotes
-            msg = msg.replace(r'\"', '"').replace(r"\'", "'")
-        else:
-            msg = "(No commit message provided - please add one)"
+        return heredoc_match.group(1).strip()
+    # Handle -m flag with single/double quotes, including escaped quotes
+    # Use non-greedy match and handle escaped quotes
+    msg_match = re.search(r'-m\s+(["\'])((?:(?!\1).|\\.)*)\1', command, re.DOTALL)
+    if msg_match:
+        # Unescape any escaped quotes
+        return msg_match.group(2).replace(r'\"', '"').replace(r"\'", "'")
+    return ""
 
-    # Get project directory
-    project_dir = hook_input.get("cwd", ".")
+
+def evaluate_commit_review(command: str, project_dir: str) -> dict:
+    """
+    Write .claude/commit.md for a git commit command.
+
+    Returns:
+        "ask" hookSpecificOutput on success, "deny" if the file can't be written.
+    """
+    msg = extract_commit_message(command) or "(No commit message provided - please add one)"
     commit_file = Path(project_dir) / ".claude" / "commit.md"
 
     # Error handling for mkdir/write failures
     try:
         commit_file.parent.mkdir(parents=True, exist_ok=True)
     except (OSError, PermissionError) as e:
-        output = {
+        return {
             "hookSpecificOutput": {
                 "hookEventName": "PreToolUse",
                 "permissionDecision": "deny",
                 "permissionDecisionReason": f"Failed to create .claude directory: {e}"
             }
         }
-        print(json.dumps(output))
-        sys.exit(0)
 
     commit_content = f"""# Edit your commit message below
 # Lines starting with # will be ignored
@@ -264,25 +272,21 @@ def commit_review() -> None:
         from hooks.transaction import atomic_write_text
         atomic_write_text(commit_file, commit_content, fsync=True)
     except (OSError, PermissionError) as e:
-        output = {
+        return {
             "hookSpecificOutput": {
                 "hookEventName": "PreToolUse",
                 "permissionDecision": "deny",
                 "permissionDecisionReason": f"Failed to write commit file: {e}"
             }
         }
-        print(json.dumps(output))
-        sys.exit(0)
 
-    output = {
+    return {
         "hookSpecificOutput": {
             "hookEventName": "PreToolUse",
             "permissionDecision": "ask",
             "permissionDecisionReason": "Commit message saved to .claude/commit.md - Edit if needed, then confirm."
         }
     }
-    print(json.dumps(output))
-    sys.exit(0)
 
 
 # =============================================================================
@@ -323,28 +327,56 @@ def get_relative_path(file_path: str, repo_root: Path) -> str:
         return file_path
 
 
-def detect_action_type(file_path: str) -> str:
-    """Detect whether this is a create, modify, or delete action."""
+def git_status_snapshot(repo_root: Path, paths: list[str] | None = None) -> dict[str, str]:
+    """
+    Map repo-relative paths (forward slashes) to their porcelain XY status.
+
+    One `git status --porcelain -z` call covers every path, so callers look up
+    any number of files without spawning a process each. Clean tracked files
+    are absent from the map. Renames are recorded under the new path.
+    """
+    cmd = ["git", "status", "--porcelain=v1", "-z", "--untracked-files=all"]
+    if paths:
+        cmd += ["--", *paths]
     try:
-        repo_root = find_git_root(file_path)
-        if not repo_root:
-            return "modify"
-        result = subprocess.run(
-            ["git", "status", "--porcelain", file_path],
-            cwd=repo_root,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode == 0:
-            status = result.stdout.strip()
-            if status.startswith("A ") or status.startswith("??"):
-                return "create"
-            elif status.startswith("D "):
-                return "delete"
-        return "modify"
+        result = subprocess.run(cmd, cwd=repo_root, capture_output=True, timeout=5)
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return {}
+    if result.returncode != 0:
+        return {}
+
+    status: dict[str, str] = {}
+    records = result.stdout.decode("utf-8", errors="replace").split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if len(record) < 4:
+            continue
+        xy, path = record[:2], record[3:]
+        status[path] = xy
+        if "R" in xy or "C" in xy:
+            i += 1  # -z puts the rename/copy source in the next record
+    return status
+
+
+def action_from_status(status: dict[str, str], relative_path: str) -> str:
+    """create/modify/delete for a path, given a git_status_snapshot() map."""
+    xy = status.get(relative_path.replace("\\", "/"), "")
+    if xy == "??" or xy[:1] == "A":
+        return "create"
+    if "D" in xy:
+        return "delete"
+    return "modify"
+
+
+def detect_action_type(file_path: str) -> str:
+    """Detect whether this is a create, modify, or delete action."""
+    repo_root = find_git_root(file_path)
+    if not repo_root:
         return "modify"
+    relative_path = get_relative_path(file_path, repo_root)
+    return action_from_status(git_status_snapshot(repo_root, [relative_path]), relative_path)
 
 
 def get_action_verb(action_type: str) -> str:
@@ -466,70 +498,66 @@ def format_file_list(files: list[str], max_display: int = 5) -> str:
         return f"{shown} +{remaining} more"
 
 
-def update_commit_md(repo_root: Path, relative_path: str, action_type: str, description: str = "") -> None:
-    """
-    Update commit.md with contextual, grouped entries.
-
-    Preserves ## Ready section while updating ## Pending section.
+TRACKED_SIDECAR = "commit-tracked.json"
+TRACKED_MARKER = "<!-- tracked: see commit-tracked.json -->"
+LEGACY_TRACKED_RE = re.compile(r"<!-- tracked: (.+?) -->")
 
-    Format:
-    # Pending Changes
 
-    ## Pending
-    - Added authentication API (login, logout, callback)
-    - Updated UI components (button, badge)
-    - Removed deprecated middleware
+def _file_stamp(path: Path) -> list[int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
 
-    <!-- tracked: path1, path2 -->
 
-    ## Ready
-    (User's final bullet points preserved here)
+def load_tracked_paths(commit_file: Path) -> tuple[set[str], dict]:
     """
-    commit_file = repo_root / ".claude" / "commit.md"
-    commit_file.parent.mkdir(parents=True, exist_ok=True)
-
-    # Track which paths are already recorded
-    tracked_paths: set[str] = set()
-    ready_section: str = ""
-
-    # Parse existing commit.md to recover tracked paths and Ready section
-    if commit_file.exists():
-        content = commit_file.read_text(encoding="utf-8", errors="replace")
-
-        # Extract tracked paths from special comment markers
-        for match in re.finditer(r"<!-- tracked: (.+?) -->", content):
-            for path in match.group(1).split(","):
-                tracked_paths.add(path.strip())
-
-        # Extract ## Ready section (everything after ## Ready header)
-        ready_match = re.search(r"^## Ready\s*\n(.*)", content, re.MULTILINE | re.DOTALL)
-        if ready_match:
-            ready_section = ready_match.group(1).strip()
-
-    # Skip if already tracked
-    if relative_path in tracked_paths:
-        return
-
-    # Add to tracked
-    tracked_paths.add(relative_path)
-
-    # Build verb_categories from all tracked paths (rebuild from scratch for consistency)
+    Tracked paths for commit.md, plus the sidecar state they came from.
+
+    The sidecar (.claude/commit-tracked.json) holds the tracked set, the last
+    rendered Pending lines and the stamp commit.md had after that render.
+    While the stamp matches, commit.md is not read at all. If commit.md was
+    edited since (e.g. the Ready section), the set stays valid as long as the
+    tracked marker is still there; a commit.md without it was cleared, so
+    tracking starts over. Files written before the sidecar existed are
+    migrated once from their `<!-- tracked: a, b -->` comment.
+    """
+    sidecar = commit_file.parent / TRACKED_SIDECAR
+    try:
+        state = json.loads(sidecar.read_text(encoding="utf-8"))
+        if not isinstance(state, dict):
+            state = {}
+    except (OSError, ValueError):
+        state = {}
+
+    stamp = _file_stamp(commit_file)
+    if stamp is None:
+        return set(), {}
+    if state and state.get("commit_md") == stamp:
+        return set(state.get("paths", [])), state
+
+    content = commit_file.read_text(encoding="utf-8", errors="replace")
+    if TRACKED_MARKER in content and state:
+        state = {**state, "commit_md": None}  # Edited by hand: force a re-render
+        return set(state.get("paths", [])), state
+    tracked: set[str] = set()
+    for match in LEGACY_TRACKED_RE.finditer(content):
+        for path in match.group(1).split(","):
+            if path.strip():
+                tracked.add(path.strip())
+    return tracked, {}
+
+
+def render_pending(tracked_paths: set[str], status: dict[str, str]) -> list[str]:
+    """Grouped `- Verb description` lines for the ## Pending section."""
     verb_categories: dict[str, dict[str, list[str]]] = {}
-    for path in tracked_paths:
-        # Detect action type from git status
-        p_action = detect_action_type(str(repo_root / path))
-        p_verb = get_action_verb(p_action)
+    for path in sorted(tracked_paths):
+        p_verb = get_action_verb(action_from_status(status, path))
         p_category, _ = categorize_file(path)
+        verb_categories.setdefault(p_verb, {}).setdefault(p_category, []).append(path)
 
-        if p_verb not in verb_categories:
-            verb_categories[p_verb] = {}
-        if p_category not in verb_categories[p_verb]:
-            verb_categories[p_verb][p_category] = []
-        verb_categories[p_verb][p_category].append(path)
-
-    # Build new content
-    new_content = ["# Pending Changes", "", "## Pending"]
-
+    lines = []
     # Order: Added > Fixed > Updated > Improved > Changed > Removed
     verb_order = ["Added", "Fixed", "Updated", "Improved", "Changed", "Removed"]
 
@@ -550,25 +578,91 @@ def update_commit_md(repo_root: Path, relative_path: str, action_type: str, desc
             else:
                 entry_text = desc_template
 
-            new_content.append(f"- {verb} {entry_text}")
+            lines.append(f"- {verb} {entry_text}")
+    return lines
 
-    # Add tracking comment (hidden, for parsing)
-    new_content.append("")
-    new_content.append(f"<!-- tracked: {', '.join(sorted(tracked_paths))} -->")
-    new_content.append("")
 
-    # Preserve ## Ready section
-    new_content.append("## Ready")
-    if ready_section:
-        new_content.append(ready_section)
-    else:
-        new_content.append("(User writes their final bullet points here)")
+def update_commit_md(
+    repo_root: Path,
+    relative_path: str,
+    action_type: str,
+    description: str = "",
+    status: dict[str, str] | None = None,
+) -> None:
+    """
+    Update commit.md with contextual, grouped entries.
+
+    Preserves ## Ready section while updating ## Pending section. Actions of
+    all tracked paths come from one git status snapshot (pass `status` to
+    reuse the caller's), and commit.md is only rewritten when the grouped
+    Pending lines change.
+
+    Format:
+    # Pending Changes
+
+    ## Pending
+    - Added authentication API (login, logout, callback)
+    - Updated UI components (button, badge)
+    - Removed deprecated middleware
+
+    <!-- tracked: see commit-tracked.json -->
+
+    ## Ready
+    (User's final bullet points preserved here)
+    """
+    commit_file = repo_root / ".claude" / "commit.md"
+    commit_file.parent.mkdir(parents=True, exist_ok=True)
+
+    tracked_paths, state = load_tracked_paths(commit_file)
+
+    # Skip if already tracked
+    if relative_path in tracked_paths:
+        return
+
+    # Add to tracked
+    tracked_paths.add(relative_path)
 
-    new_content.append("")
+    if status is None:
+        status = git_status_snapshot(repo_root)
+    pending = render_pending(tracked_paths, status)
 
     try:
         from hooks.transaction import atomic_write_text
-        atomic_write_text(commit_file, "\n".join(new_content), fsync=True)
+
+        if pending != state.get("pending") or state.get("commit_md") is None:
+            ready_section = ""
+            if commit_file.exists():
+                content = commit_file.read_text(encoding="utf-8", errors="replace")
+                # Extract ## Ready section (everything after ## Ready header)
+                ready_match = re.search(r"^## Ready\s*\n(.*)", content, re.MULTILINE | re.DOTALL)
+                if ready_match:
+                    ready_section = ready_match.group(1).strip()
+
+            new_content = ["# Pending Changes", "", "## Pending", *pending]
+
+            # Add tracking marker (hidden; the paths live in the sidecar)
+            new_content.append("")
+            new_content.append(TRACKED_MARKER)
+            new_content.append("")
+
+            # Preserve ## Ready section
+            new_content.append("## Ready")
+            if ready_section:
+                new_content.append(ready_section)
+            else:
+                new_content.append("(User writes their final bullet points here)")
+
+            new_content.append("")
+            atomic_write_text(commit_file, "\n".join(new_content), fsync=True)
+
+        atomic_write_text(
+            commit_file.parent / TRACKED_SIDECAR,
+            json.dumps({
+                "paths": sorted(tracked_paths),
+                "pending": pending,
+                "commit_md": _file_stamp(commit_file),
+            }),
+        )
     except Exception:
         # Silent fail - don't block PostToolUse hooks
         pass
@@ -582,17 +676,16 @@ def log_receipt(repo_root: Path, relative_path: str, action_type: str) -> None:
     """
     Log file change receipt with SHA-256 hash for audit trail.
 
-    Creates immutable audit record in .claude/receipts.json:
+    Appends an audit record to the .claude/receipts.jsonl journal (one
+    lock-free line; hooks/receipt_journal.py folds it into an append-only
+    archive and read_receipts() gives the full array view):
     - SHA-256 hash of file content
     - Timestamp (ISO 8601 UTC)
     - Action type (added/modified/removed)
     - Relative path
     """
-    import hashlib
-    from hooks.transaction import transactional_update
-
-    receipts_file = repo_root / ".claude" / "receipts.json"
-    receipts_file.parent.mkdir(parents=True, exist_ok=True)
+    from hooks.file_digest import file_digest, save_digests
+    from hooks.receipt_journal import ReceiptJournal
 
     # Validate path is within repo to prevent path traversal
     file_path = (repo_root / relative_path).resolve()
@@ -600,13 +693,13 @@ def log_receipt(repo_root: Path, relative_path: str, action_type: str) -> None:
         # Path traversal attempt - skip this file silently
         return
 
-    # Compute SHA-256 hash of file content
+    # Compute SHA-256 hash of file content (streamed; reused while the file is unchanged)
     if file_path.exists() and action_type != "removed":
         try:
-            content = file_path.read_bytes()
-            file_hash = hashlib.sha256(content).hexdigest()
+            file_hash = file_digest(file_path)
         except OSError:
             file_hash = "ERROR_READING_FILE"
+        save_digests()  # One receipt per hook run
     else:
         file_hash = "DELETED" if action_type == "removed" else "FILE_NOT_FOUND"
 
@@ -618,21 +711,8 @@ def log_receipt(repo_root: Path, relative_path: str, action_type: str) -> None:
         "sha256": file_hash,
     }
 
-    def append_receipt(current):
-        if not isinstance(current, list):
-            current = []
-        current.append(receipt)
-        return current
-
     try:
-        transactional_update(
-            receipts_file,
-            append_receipt,
-            timeout=5.0,
-            retries=3,
-            fsync=True,
-            default=[]
-        )
+        ReceiptJournal(repo_root / ".claude").append(receipt)
     except Exception:
         pass  # Silent fail - don't block commits
 
@@ -673,11 +753,13 @@ def change_tracker() -> None:
         if pattern in normalized_path:
             sys.exit(0)
 
-    action_type = detect_action_type(file_path)
+    # One status snapshot serves this file and every path already tracked
+    status = git_status_snapshot(repo_root)
+    action_type = action_from_status(status, relative_path)
     description = tool_input.get("description", "")
 
     try:
-        update_commit_md(repo_root, relative_path, action_type, description)
+        update_commit_md(repo_root, relative_path, action_type, description, status)
         # Add receipt audit trail
         log_receipt(repo_root, relative_path, action_type)
     except OSError:
@@ -1321,19 +1403,35 @@ def check_env_encryption() -> None:
     if not repo_root:
         return
 
+    result = evaluate_env_encryption(repo_root)
+    if result:
+        print(json.dumps(result))
+        sys.exit(0)
+
+    # All .env files are encrypted (or none staged), allow commit
+    return
+
+
+def evaluate_env_encryption(repo_root: Path) -> dict | None:
+    """
+    Scan staged .env files in repo_root for dotenvx encryption.
+
+    Returns:
+        Deny hookSpecificOutput if unencrypted .env files are staged, else None.
+    """
     # Check if package.json has env:encrypt script (dotenvx configured)
     package_json = repo_root / "package.json"
     if not package_json.exists():
-        return
+        return None
 
     try:
         pkg = json.loads(package_json.read_text(encoding="utf-8", errors="replace"))
         scripts = pkg.get("scripts", {})
         if "env:encrypt" not in scripts:
             # No dotenvx configured, skip check
-            return
+            return None
     except (json.JSONDecodeError, OSError):
-        return
+        return None
 
     # Get staged files
     try:
@@ -1345,10 +1443,10 @@ def check_env_encryption() -> None:
             timeout=5,
         )
         if result.returncode != 0:
-            return
+            return None
         staged_files = result.stdout.strip().split("\n")
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-        return
+        return None
 
     # Check staged .env files for encryption
     # Improved pattern: matches .env, .env.*, .env.backup, env/.env, etc.
@@ -1379,18 +1477,15 @@ def check_env_encryption() -> None:
 
     if unencrypted_envs:
         files_list = ", ".join(unencrypted_envs)
-        output = {
+        return {
             "hookSpecificOutput": {
                 "hookEventName": "PreToolUse",
                 "permissionDecision": "deny",
                 "permissionDecisionReason": f"BLOCKED: Unencrypted .env files staged: {files_list}. Run `pnpm env:encrypt` first, then re-stage the encrypted files."
             }
         }
-        print(json.dumps(output))
-        sys.exit(0)
 
-    # All .env files are encrypted (or none staged), allow commit
-    return
+    return None
 
 
 def check_teammate_git_commit(hook_input: dict) -> None:
@@ -1406,20 +1501,26 @@ def check_teammate_git_commit(hook_input: dict) -> None:
     Detection: CLAUDE_CODE_TASK_LIST_ID env var is set when running in a team context.
     Exception: main session (no CLAUDE_CODE_TASK_LIST_ID) may use raw git commit freely.
     """
-    command = hook_input.get("tool_input", {}).get("command", "")
+    result = evaluate_teammate_git_commit(hook_input.get("tool_input", {}).get("command", ""))
+    if result:
+        print(json.dumps(result))
+        sys.exit(0)
+
 
+def evaluate_teammate_git_commit(command: str) -> dict | None:
+    """Return a block decision for raw git commit in a team context, else None."""
     # Only intercept git commit commands
     if not re.match(r"^git\s+commit\b", command):
-        return
+        return None
 
     # Check if we're in a teammate/subagent context
     # CLAUDE_CODE_TASK_LIST_ID is set when running inside an agent team
     task_list_id = os.environ.get("CLAUDE_CODE_TASK_LIST_ID", "")
     if not task_list_id:
         # Main session — allow raw git commit
-        return
+        return None
 
-    output = {
+    return {
         "hookSpecificOutput": {
             "hookEventName": "PreToolUse",
             "permissionDecision": "block",
@@ -1434,8 +1535,6 @@ def check_teammate_git_commit(hook_input: dict) -> None:
             ),
         }
     }
-    print(json.dumps(output))
-    sys.exit(0)
 
 
 def check_build_id(hook_input: dict) -> None:
@@ -1460,6 +1559,14 @@ def check_build_id(hook_input: dict) -> None:
     if not repo_root:
         return
 
+    result = evaluate_build_id(command, repo_root)
+    if result:
+        print(json.dumps(result))
+        sys.exit(0)
+
+
+def evaluate_build_id(command: str, repo_root: Path) -> dict | None:
+    """Return a deny decision for a main/master commit without 'Build N:', else None."""
     try:
         result = subprocess.run(
             ["git", "branch", "--show-current"],
@@ -1470,36 +1577,28 @@ def check_build_id(hook_input: dict) -> None:
         )
         branch = result.stdout.strip() if result.returncode == 0 else ""
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-        return
+        return None
 
     # Only enforce on main/master
     if branch not in ("main", "master"):
-        return
+        return None
 
     # Extract commit message from command
-    heredoc_match = re.search(r'cat\s*<<\s*[\'"]?EOF[\'"]?\s*\n(.*?)\nEOF', command, re.DOTALL)
-    if heredoc_match:
-        msg = heredoc_match.group(1).strip()
-    else:
-        msg_match = re.search(r'-m\s+(["\'])((?:(?!\1).|\\.)*)\1', command, re.DOTALL)
-        if msg_match:
-            msg = msg_match.group(2).replace(r'\"', '"').replace(r"\'", "'")
-        else:
-            msg = ""
+    msg = extract_commit_message(command)
 
     if not msg:
-        return
+        return None
 
     # Check first line (subject) for Build ID prefix
     subject = msg.split("\n")[0].strip()
 
     # Allow bot commits (changelog automation)
     if subject.startswith("chore: bump to") or subject.startswith("chore(release)"):
-        return
+        return None
 
     # Enforce Build ID
     if not re.match(r"^Build \d+:", subject):
-        output = {
+        return {
             "hookSpecificOutput": {
                 "hookEventName": "PreToolUse",
                 "permissionDecision": "deny",
@@ -1514,10 +1613,11 @@ def check_build_id(hook_input: dict) -> None:
                 ),
             }
         }
-        print(json.dumps(output))
-        sys.exit(0)
+
+    return None
 
 
+@traced("git.py")
 def main() -> None:
     """Main entry point with mode dispatch."""
     if len(sys.argv) < 2:
@@ -1547,19 +1647,23 @@ def main() -> None:
         command = hook_input.get("tool_input", {}).get("command", "")
         if not re.match(r"^git\s+commit\b", command):
             sys.exit(0)
-        # It's a git commit — run all checks by re-injecting stdin
-        import io
-        raw = json.dumps(hook_input)
-        # Check 0: Block raw git commit from Ralph teammates (must run first)
-        check_teammate_git_commit(hook_input)
-        # Check 1: Build ID on main/master
-        check_build_id(hook_input)
-        # Check 2: .env encryption
-        sys.stdin = io.StringIO(raw)
-        check_env_encryption()
-        # Check 3: Commit review (save to commit.md)
-        sys.stdin = io.StringIO(raw)
-        commit_review()
+        # It's a git commit — resolve the repo once and run checks in order
+        repo_root = find_git_root_from_cwd(hook_input.get("cwd", "."))
+        checks = [
+            # Check 0: Block raw git commit from Ralph teammates (must run first)
+            lambda: evaluate_teammate_git_commit(command),
+            # Check 1: Build ID on main/master
+            lambda: evaluate_build_id(command, repo_root) if repo_root else None,
+            # Check 2: .env encryption
+            lambda: evaluate_env_encryption(repo_root) if repo_root else None,
+            # Check 3: Commit review (save to commit.md)
+            lambda: evaluate_commit_review(command, hook_input.get("cwd", ".")),
+        ]
+        for check in checks:
+            result = check()
+            if result:
+                print(json.dumps(result))
+                sys.exit(0)
     elif mode == "ai-log":
         # Git AI Standard v3.0 subcommands
         cmd_ai_log()
@@ -3,32 +3,37 @@
 Guards Hook - Redirects to scripts/guards.py (resolved relative to this file).
 
 This stub exists for backward compatibility only.
-All logic now lives in scripts/guards.py.
+All logic now lives in scripts/guards.py; the handler is dispatched
+in-process (no second interpreter) via scripts.guards.HANDLERS.
 """
 
-import subprocess
 import sys
 from pathlib import Path
 
+# Add parent directory to sys.path for scripts imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
 def main() -> None:
-    """Redirect to scripts/guards.py with all original arguments."""
+    """Dispatch to the scripts/guards.py handler for sys.argv[1]."""
+    if len(sys.argv) < 2:
+        sys.exit(0)
+
+    # Importing arms scripts/guards.py's own 5s stdin alarm (exit 0 on expiry),
+    # the same budget it had as a child process.
     try:
-        result = subprocess.run(
-            [sys.executable, str(Path(__file__).resolve().parent.parent / "scripts" / "guards.py")] + sys.argv[1:],
-            input=sys.stdin.buffer.read() if not sys.stdin.isatty() else b"",
-            capture_output=True,
-            timeout=30,  # 30 second timeout for guards operations
-        )
-    except subprocess.TimeoutExpired:
+        from scripts.guards import HANDLERS
+    except (ImportError, OSError):
         sys.exit(0)
-    except (FileNotFoundError, PermissionError):
+
+    handler = HANDLERS.get(sys.argv[1])
+    if handler is None:
         sys.exit(0)
 
-    if result.stdout:
-        sys.stdout.buffer.write(result.stdout)
-    if result.stderr:
-        sys.stderr.buffer.write(result.stderr)
-    sys.exit(result.returncode)
+    # The handler reads stdin and calls sys.exit() itself; its exit code is ours
+    handler()
+    sys.exit(0)
+
 
 if __name__ == "__main__":
     main()
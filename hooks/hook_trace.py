@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Hook Trace - Per-invocation spans for hook entry points in a fixed-size mmap ring.
+
+Each traced hook main() records one span:
+
+    event / tool     hook_event_name and tool_name from the hook's stdin JSON
+    handler          "<script> <mode>" (e.g. "guards.py fs-guard")
+    startup_ms       interpreter start -> main() (Linux /proc; null when warm in hookd)
+    parse_ms         main() -> stdin fully read
+    handler_ms       stdin read -> main() returned/exited
+    procs            subprocesses started (subprocess.Popen / os.system / posix_spawn)
+    files / writes   distinct non-import files opened / opened for writing
+    decision         permissionDecision / decision from stdout JSON, else "block"
+                     for exit 2, "error" for other non-zero exits, else "none"
+
+Spans are packed into ~/.claude/debug/hook-trace.ring: a 64-byte header plus
+SLOT_COUNT slots of SLOT_SIZE bytes, written through mmap under a short file
+lock. The file never grows; the oldest spans are overwritten.
+
+Usage (library):
+    from hooks.hook_trace import traced
+
+    @traced("guards.py")
+    def main() -> None: ...
+
+Usage (CLI):
+    python hook_trace.py top [--minutes 15] [--limit 15] [--by handler|event] [--json]
+    python hook_trace.py tail [-n 20]
+    python hook_trace.py clear
+
+Env vars:
+    CLAUDE_HOOK_TRACE=0         Disable tracing
+    CLAUDE_HOOK_TRACE_FILE      Ring file path (default: $CLAUDE_HOME/debug/hook-trace.ring)
+"""
+
+import functools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+MAGIC = b"HKTR"
+VERSION = 1
+HEADER_SIZE = 64
+SLOT_SIZE = 512
+SLOT_COUNT = 4096
+RING_SIZE = HEADER_SIZE + SLOT_SIZE * SLOT_COUNT  # ~2 MiB
+
+SPAWN_EVENTS = {"subprocess.Popen", "os.system", "os.posix_spawn", "os.spawn"}
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT
+IMPORT_SUFFIXES = (".py", ".pyc", ".pyd", ".so", ".pth")
+
+# Set by hookd's server: spans served from a warm process have no start-up cost
+_warm = False
+_first_span = True
+_audit_installed = False
+_active = None  # The Span currently collecting audit events
+
+
+def ring_path() -> Path:
+    """Ring file location (CLAUDE_HOOK_TRACE_FILE, else $CLAUDE_HOME/debug)."""
+    override = os.environ.get("CLAUDE_HOOK_TRACE_FILE")
+    if override:
+        return Path(override)
+    home = os.environ.get("CLAUDE_HOME")
+    return (Path(home) if home else Path.home() / ".claude") / "debug" / "hook-trace.ring"
+
+
+def enabled() -> bool:
+    return os.environ.get("CLAUDE_HOOK_TRACE", "1") != "0"
+
+
+def mark_warm() -> None:
+    """Called by long-lived hosts (hookd serve): later spans report startup_ms=None."""
+    global _warm
+    _warm = True
+
+
+def _process_age_ms() -> float | None:
+    """Milliseconds since this process started (Linux only)."""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            # Field 22 (starttime, clock ticks since boot) - comm may contain spaces
+            start_ticks = int(f.read().rsplit(b")", 1)[1].split()[19])
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, (uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+# =============================================================================
+# Span collection
+# =============================================================================
+
+def _audit(event: str, args: tuple) -> None:
+    span = _active
+    if span is None:
+        return
+    if event == "open":
+        path, mode, flags = (tuple(args) + (None, None, None))[:3]
+        span.opened(path, mode, flags)
+    elif event in SPAWN_EVENTS:
+        span.procs += 1
+
+
+class _StreamProbe:
+    """Transparent proxy that reports what a hook reads from stdin / writes to stdout."""
+
+    def __init__(self, stream, on_data):
+        self._stream = stream
+        self._on_data = on_data
+
+    def read(self, *args):
+        data = self._stream.read(*args)
+        self._on_data(data)
+        return data
+
+    def readline(self, *args):
+        data = self._stream.readline(*args)
+        self._on_data(data)
+        return data
+
+    def write(self, data):
+        self._on_data(data)
+        return self._stream.write(data)
+
+    @property
+    def buffer(self):
+        return _StreamProbe(self._stream.buffer, self._on_data)
+
+    def __iter__(self):
+        return iter(self._stream)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class Span:
+    """One hook invocation. Timestamps are perf_counter seconds."""
+
+    MAX_CAPTURE = 16384
+
+    def __init__(self, handler: str):
+        self.handler = handler
+        self.ts = time.time()
+        self.start = time.perf_counter()
+        self.startup_ms = None
+        self.stdin_done = None
+        self.stdin_parts: list = []
+        self.stdout_parts: list = []
+        self.stdout_len = 0
+        self.procs = 0
+        self.files: set = set()
+        self.writes: set = set()
+
+    def opened(self, path, mode, flags) -> None:
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        if not isinstance(path, str) or path.endswith(IMPORT_SUFFIXES):
+            return
+        if path.startswith(("/proc/", "/dev/", "/sys/", sys.prefix, sys.base_prefix)):
+            return
+        self.files.add(path)
+        writing = any(c in mode for c in "wax+") if isinstance(mode, str) else False
+        if writing or (isinstance(flags, int) and flags & WRITE_FLAGS):
+            self.writes.add(path)
+
+    def on_stdin(self, data) -> None:
+        self.stdin_parts.append(data)
+        self.stdin_done = time.perf_counter()
+
+    def on_stdout(self, data) -> None:
+        if self.stdout_len < self.MAX_CAPTURE:
+            self.stdout_parts.append(data)
+            self.stdout_len += len(data)
+
+    def _joined(self, parts: list) -> str:
+        return "".join(p.decode("utf-8", "replace") if isinstance(p, bytes) else str(p) for p in parts)
+
+    def decision(self, exit_code) -> str:
+        text = self._joined(self.stdout_parts).strip()
+        if text:
+            try:
+                output = json.loads(text)
+                specific = output.get("hookSpecificOutput") or {}
+                found = specific.get("permissionDecision") or output.get("decision")
+                if found:
+                    return str(found)
+            except (ValueError, AttributeError):
+                pass
+        if exit_code == 2:
+            return "block"
+        if exit_code not in (0, None):
+            return "error"
+        return "none"
+
+    def record(self, exit_code) -> dict:
+        end = time.perf_counter()
+        event = tool = None
+        try:
+            hook_input = json.loads(self._joined(self.stdin_parts) or "null")
+            if isinstance(hook_input, dict):
+                event = hook_input.get("hook_event_name")
+                tool = hook_input.get("tool_name")
+        except ValueError:
+            pass
+        read_at = self.stdin_done if self.stdin_done is not None else self.start
+        return {
+            "ts": round(self.ts, 3),
+            "pid": os.getpid(),
+            "event": event,
+            "tool": tool,
+            "handler": self.handler,
+            "startup_ms": None if self.startup_ms is None else round(self.startup_ms, 2),
+            "parse_ms": round((read_at - self.start) * 1000, 2),
+            "handler_ms": round((end - read_at) * 1000, 2),
+            "total_ms": round((end - self.start) * 1000, 2),
+            "procs": self.procs,
+            "files": len(self.files),
+            "writes": len(self.writes),
+            "paths": sorted(self.writes)[:3],
+            "decision": self.decision(exit_code),
+            "exit": exit_code if isinstance(exit_code, int) else (0 if exit_code is None else 1),
+        }
+
+
+def traced(script: str):
+    """Decorator for hook main(): record a span into the ring (never raises)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            global _active, _audit_installed, _first_span
+            if not enabled() or _active is not None:
+                return func(*args, **kwargs)
+
+            mode = sys.argv[1] if len(sys.argv) > 1 else ""
+            span = Span(f"{script} {mode}".strip())
+            if _first_span and not _warm:
+                span.startup_ms = _process_age_ms()
+            _first_span = False
+            if not _audit_installed:
+                sys.addaudithook(_audit)
+                _audit_installed = True
+
+            saved = (sys.stdin, sys.stdout)
+            sys.stdin = _StreamProbe(sys.stdin, span.on_stdin)
+            sys.stdout = _StreamProbe(sys.stdout, span.on_stdout)
+            _active = span
+            exit_code = 0
+            try:
+                return func(*args, **kwargs)
+            except SystemExit as e:
+                exit_code = e.code
+                raise
+            except BaseException:
+                exit_code = 1
+                raise
+            finally:
+                _active = None
+                if sys.stdin is not None and isinstance(sys.stdin, _StreamProbe):
+                    sys.stdin = saved[0]
+                if sys.stdout is not None and isinstance(sys.stdout, _StreamProbe):
+                    sys.stdout = saved[1]
+                try:
+                    write_span(span.record(exit_code))
+                except Exception:
+                    pass  # Tracing must never affect the hook
+        return wrapper
+    return decorator
+
+
+# =============================================================================
+# Ring file
+# =============================================================================
+
+def _lock(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _encode(record: dict) -> bytes:
+    """JSON-encode a span to fit one slot (drops paths, then truncates strings)."""
+    limit = SLOT_SIZE - 10
+    data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    if len(data) > limit:
+        record = dict(record, paths=[])
+        data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    if len(data) > limit:
+        record = {k: (v[:48] if isinstance(v, str) else v) for k, v in record.items()}
+        data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    return data[:limit]
+
+
+def write_span(record: dict, path: Path | None = None) -> None:
+    """Append one span to the ring, creating/resetting the file if needed."""
+    import mmap
+    import struct
+
+    path = path or ring_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = _encode(record)
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        _lock(fd)
+        try:
+            if os.fstat(fd).st_size != RING_SIZE:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, RING_SIZE)
+            with mmap.mmap(fd, RING_SIZE) as ring:
+                magic, version, seq = struct.unpack_from("<4sIQ", ring, 0)
+                if magic != MAGIC or version != VERSION:
+                    ring[:] = bytes(RING_SIZE)
+                    seq = 0
+                offset = HEADER_SIZE + (seq % SLOT_COUNT) * SLOT_SIZE
+                struct.pack_into("<QH", ring, offset, seq + 1, len(payload))
+                ring[offset + 10:offset + 10 + len(payload)] = payload
+                struct.pack_into("<4sIQ", ring, 0, MAGIC, VERSION, seq + 1)
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def read_spans(path: Path | None = None) -> list[dict]:
+    """All spans currently in the ring, oldest first."""
+    import struct
+
+    path = path or ring_path()
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return []
+    if len(data) != RING_SIZE or data[:4] != MAGIC:
+        return []
+
+    spans = []
+    for slot in range(SLOT_COUNT):
+        offset = HEADER_SIZE + slot * SLOT_SIZE
+        seq, length = struct.unpack_from("<QH", data, offset)
+        # A slot is valid only for the sequence number that maps onto it
+        if seq == 0 or (seq - 1) % SLOT_COUNT != slot or length > SLOT_SIZE - 10:
+            continue
+        try:
+            span = json.loads(data[offset + 10:offset + 10 + length])
+        except ValueError:
+            continue
+        spans.append((seq, span))
+    return [span for _, span in sorted(spans, key=lambda item: item[0])]
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def aggregate(spans: list[dict], by: str = "handler") -> list[dict]:
+    """Group spans and rank groups slowest-first by p95 total_ms."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from hooks.hookd import percentile
+
+    groups: dict[str, list[dict]] = {}
+    for span in spans:
+        if by == "event":
+            key = span.get("event") or "?"
+            if span.get("tool"):
+                key = f"{key}:{span['tool']}"
+        else:
+            key = span.get("handler") or "?"
+        groups.setdefault(key, []).append(span)
+
+    def mean(values: list) -> float | None:
+        values = [v for v in values if v is not None]
+        return round(sum(values) / len(values), 2) if values else None
+
+    rows = []
+    for key, members in groups.items():
+        totals = sorted(s.get("total_ms", 0.0) for s in members)
+        decisions: dict[str, int] = {}
+        for s in members:
+            decisions[s.get("decision", "none")] = decisions.get(s.get("decision", "none"), 0) + 1
+        rows.append({
+            "key": key,
+            "calls": len(members),
+            "p50_ms": round(percentile(totals, 50), 2),
+            "p95_ms": round(percentile(totals, 95), 2),
+            "max_ms": round(totals[-1], 2),
+            "startup_ms": mean([s.get("startup_ms") for s in members]),
+            "parse_ms": mean([s.get("parse_ms") for s in members]),
+            "handler_ms": mean([s.get("handler_ms") for s in members]),
+            "procs": mean([s.get("procs") for s in members]),
+            "files": mean([s.get("files") for s in members]),
+            "decisions": decisions,
+        })
+    rows.sort(key=lambda r: (r["p95_ms"], r["max_ms"]), reverse=True)
+    return rows
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def cmd_top(minutes: float, limit: int, by: str, as_json: bool) -> None:
+    cutoff = time.time() - minutes * 60
+    spans = [s for s in read_spans() if s.get("ts", 0) >= cutoff]
+    rows = aggregate(spans, by)[:limit]
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(f"No hook spans in the last {minutes:g} minutes ({ring_path()}).")
+        return
+
+    width = max(len(r["key"]) for r in rows)
+    print(f"Slowest hooks, last {minutes:g} min ({len(spans)} spans)")
+    print(f"{by.title():<{width}}  {'calls':>5}  {'p50':>7}  {'p95':>7}  {'max':>7}  "
+          f"{'start':>6}  {'parse':>6}  {'handler':>7}  {'procs':>5}  {'files':>5}  decisions")
+    for r in rows:
+        decisions = " ".join(f"{k}={v}" for k, v in sorted(r["decisions"].items()))
+        print(f"{r['key']:<{width}}  {r['calls']:>5}  {r['p50_ms']:>7.1f}  {r['p95_ms']:>7.1f}  "
+              f"{r['max_ms']:>7.1f}  {_fmt(r['startup_ms']):>6}  {_fmt(r['parse_ms']):>6}  "
+              f"{_fmt(r['handler_ms']):>7}  {_fmt(r['procs']):>5}  {_fmt(r['files']):>5}  {decisions}")
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the hook trace ring buffer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    top = sub.add_parser("top", help="Slowest handlers over the last N minutes")
+    top.add_argument("--minutes", type=float, default=15)
+    top.add_argument("--limit", type=int, default=15)
+    top.add_argument("--by", choices=("handler", "event"), default="handler")
+    top.add_argument("--json", action="store_true")
+
+    tail = sub.add_parser("tail", help="Most recent spans as JSON lines")
+    tail.add_argument("-n", type=int, default=20)
+
+    sub.add_parser("clear", help="Delete the ring file")
+
+    args = parser.parse_args()
+    if args.command == "top":
+        cmd_top(args.minutes, args.limit, args.by, args.json)
+    elif args.command == "tail":
+        for span in read_spans()[-args.n:]:
+            print(json.dumps(span))
+    elif args.command == "clear":
+        ring_path().unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,705 @@
+#!/usr/bin/env python3
+"""
+Hook Daemon - Warm, long-lived hook server with a thin stdin/stdout client.
+
+Every hook in settings.json used to cold-start its own interpreter and re-import
+its module (asyncio, portalocker, regex tables, ...). hookd keeps those modules
+loaded in one resident process and serves hook invocations over a Unix domain
+socket. The client half of this file only imports json/os/socket/sys, forwards
+the hook JSON plus argv/cwd/env, and replays the daemon's stdout/stderr/exit
+code. If the daemon is not running the client executes the hook in-process,
+so hooks keep working exactly as before.
+
+Usage:
+  python hookd.py run [--timeout S] <script> [args...]   # Hook client (settings.json entry)
+  python hookd.py start                    # SessionStart: spawn daemon if absent
+  python hookd.py serve                    # Run daemon in the foreground
+  python hookd.py stop                     # Ask the daemon to exit
+  python hookd.py stats                    # Per-hook latency (count/p50/p95/p99)
+  python hookd.py ping                     # Exit 0 if the daemon is alive
+
+<script> is resolved relative to CLAUDE_HOME (e.g. scripts/guards.py) and must
+live inside it. Requests are served one at a time because handlers use
+process-global state (sys.stdin, cwd, os.environ); only fast, blocking hooks
+should be routed through the daemon.
+
+A request queued behind a slow one must not outlast Claude Code's hook
+timeout, or a security hook would be killed before its deny arrives. The
+client waits at most --timeout seconds (default DEFAULT_RUN_TIMEOUT; keep it
+well below the hook's settings.json timeout) for the daemon to accept the
+request, and otherwise runs the hook in-process. Accepting is a handshake:
+the daemon sends ACCEPT, the client echoes it only if it is still waiting,
+and the daemon starts the hook only after the echo. Once the client has
+echoed it waits for the result and never falls back, so the hook never runs
+twice; a daemon that declines replies {"expired": true} and the client runs
+the hook itself, so it is never skipped either.
+
+The daemon reloads its hook modules when any module it has imported from
+CLAUDE_HOME changes on disk (helpers included: a warm security gate must not
+keep running old rules), or when a request's HOME / CLAUDE_* / RALPH_*
+environment differs from the one they were imported under, since hooks
+read constants from it at import.
+
+Env vars:
+  CLAUDE_HOOKD_IDLE_SECONDS  Idle shutdown after N seconds (default: 1800)
+  CLAUDE_HOOKD_DISABLE=1     Client always runs hooks in-process
+
+Platforms without AF_UNIX (Windows) always use the in-process path.
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+CLAUDE_ROOT = Path(__file__).resolve().parent.parent
+RUN_DIR = CLAUDE_ROOT / "run"
+SOCKET_PATH = RUN_DIR / "hookd.sock"
+STATS_FILE = CLAUDE_ROOT / "debug" / "hookd-stats.json"
+
+CONNECT_TIMEOUT = 0.2  # Seconds - a missing daemon must cost ~nothing
+DEFAULT_REQUEST_TIMEOUT = 30.0
+DEFAULT_RUN_TIMEOUT = 2.0  # Client wait for ACCEPT before running the hook itself
+ACCEPT_ECHO_TIMEOUT = 1.0  # Daemon wait for the client's echo of ACCEPT
+ACCEPT = b"\x06"
+DEFAULT_IDLE_SECONDS = 1800
+LATENCY_SAMPLES = 2048  # Per-hook ring of recent handler durations
+
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+
+# =============================================================================
+# Wire Protocol - one JSON line each way; the reply ends at socket shutdown
+# =============================================================================
+
+def _encode_bytes(data: bytes) -> str:
+    """Encode raw bytes as a JSON-safe str (round-trips invalid UTF-8)."""
+    return data.decode("utf-8", errors="surrogateescape")
+
+
+def _decode_bytes(text: str) -> bytes:
+    """Inverse of _encode_bytes."""
+    return text.encode("utf-8", errors="surrogateescape")
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    """Read from sock until the peer shuts down its write side."""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _recv_line(sock: socket.socket) -> bytes:
+    """Read one request line (or up to EOF, for peers that shut down instead)."""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def _request(
+    payload: dict,
+    timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    socket_path: Path | None = None,
+) -> dict | None:
+    """Send one request to the daemon. Returns None if it is unreachable."""
+    socket_path = socket_path or SOCKET_PATH
+    if not HAS_UNIX_SOCKETS or not socket_path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(socket_path))
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        raw = _recv_all(sock)
+        return json.loads(raw.decode("utf-8")) if raw else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def _request_run(payload: dict, deadline: float, socket_path: Path | None = None) -> dict | None:
+    """
+    Send a run request. Returns None if the daemon did not accept it by the
+    deadline (the hook has not run and the caller must run it). After the
+    accept handshake the hook may be running, so failures return {}.
+    """
+    socket_path = socket_path or SOCKET_PATH
+    if not HAS_UNIX_SOCKETS or not socket_path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(socket_path))
+            sock.settimeout(max(0.001, deadline - time.time()))
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            if sock.recv(1) != ACCEPT:
+                return None  # Declined, or the daemon went away
+            sock.sendall(ACCEPT)
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            return None
+        try:
+            sock.settimeout(DEFAULT_REQUEST_TIMEOUT)
+            raw = _recv_all(sock)
+            return json.loads(raw.decode("utf-8")) if raw else {}
+        except (OSError, ValueError):
+            return {}
+    finally:
+        sock.close()
+
+
+# =============================================================================
+# Script Resolution
+# =============================================================================
+
+def resolve_script(script: str) -> Path | None:
+    """Resolve a hook script path and confine it to CLAUDE_ROOT."""
+    path = Path(script)
+    if not path.is_absolute():
+        path = CLAUDE_ROOT / path
+    try:
+        path = path.resolve()
+        path.relative_to(CLAUDE_ROOT)
+    except (OSError, ValueError):
+        return None
+    if path.suffix != ".py" or not path.is_file():
+        return None
+    return path
+
+
+def _under_root(path: str | None) -> bool:
+    return bool(path) and path.startswith(str(CLAUDE_ROOT) + os.sep)
+
+
+def _mtime_ns(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def hook_key(script: Path, args: list[str]) -> str:
+    """Stable latency-counter key, e.g. 'guards.py fs-guard'."""
+    return " ".join([script.name] + args[:1])
+
+
+# =============================================================================
+# Client
+# =============================================================================
+
+def _run_in_process(script: Path, args: list[str], stdin_data: bytes | None = None) -> None:
+    """Execute the hook exactly as `python <script> <args>` would (no daemon)."""
+    import runpy
+
+    if stdin_data is not None:
+        import io
+        sys.stdin = io.TextIOWrapper(io.BytesIO(stdin_data), encoding="utf-8", errors="replace")
+    sys.argv = [str(script)] + args
+    sys.path.insert(0, str(script.parent))
+    runpy.run_path(str(script), run_name="__main__")
+
+
+def client_run(argv: list[str]) -> None:
+    """Forward one hook invocation to the daemon, falling back to in-process."""
+    if not argv:
+        sys.exit(0)
+
+    timeout = DEFAULT_RUN_TIMEOUT
+    if argv[0] == "--timeout" and len(argv) > 2:
+        try:
+            timeout = float(argv[1])
+        except ValueError:
+            pass
+        argv = argv[2:]
+
+    script = resolve_script(argv[0])
+    if script is None:
+        sys.exit(0)  # Unknown hook - never block Claude Code
+    args = argv[1:]
+
+    daemon_up = (
+        HAS_UNIX_SOCKETS
+        and os.environ.get("CLAUDE_HOOKD_DISABLE", "") not in ("1", "true", "yes")
+        and SOCKET_PATH.exists()
+    )
+    if not daemon_up:
+        _run_in_process(script, args)
+        return
+
+    stdin_data = b"" if sys.stdin is None or sys.stdin.isatty() else sys.stdin.buffer.read()
+    deadline = time.time() + timeout
+    response = _request_run({
+        "op": "run",
+        "script": str(script),
+        "args": args,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "stdin": _encode_bytes(stdin_data),
+        "deadline": deadline,
+    }, deadline)
+
+    if response is None or response.get("expired"):
+        # Daemon absent, busy past our deadline or declined: the hook has not run.
+        # stdin is already consumed, so replay it
+        _run_in_process(script, args, stdin_data)
+        return
+
+    if response.get("stdout"):
+        sys.stdout.buffer.write(_decode_bytes(response["stdout"]))
+        sys.stdout.flush()
+    if response.get("stderr"):
+        sys.stderr.buffer.write(_decode_bytes(response["stderr"]))
+        sys.stderr.flush()
+    sys.exit(int(response.get("code", 0)))
+
+
+def client_start() -> None:
+    """Spawn a detached daemon unless one is already answering."""
+    if not HAS_UNIX_SOCKETS:
+        sys.exit(0)
+    if _request({"op": "ping"}, timeout=1.0):
+        sys.exit(0)
+
+    import subprocess
+
+    RUN_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=str(CLAUDE_ROOT),
+            start_new_session=True,
+            close_fds=True,
+        )
+    except OSError:
+        pass  # Hooks keep working in-process
+    sys.exit(0)
+
+
+# =============================================================================
+# Daemon
+# =============================================================================
+
+class HookServer:
+    """Single-threaded hook executor with warm module cache and latency counters."""
+
+    def __init__(
+        self,
+        socket_path: Path = SOCKET_PATH,
+        idle_seconds: float | None = None,
+        stats_file: Path | None = STATS_FILE,
+    ):
+        self.socket_path = socket_path
+        self.stats_file = stats_file
+        if idle_seconds is None:
+            try:
+                idle_seconds = float(os.environ.get("CLAUDE_HOOKD_IDLE_SECONDS", DEFAULT_IDLE_SECONDS))
+            except ValueError:
+                idle_seconds = DEFAULT_IDLE_SECONDS
+        self.idle_seconds = idle_seconds
+        self.started_at = time.time()
+        self.last_activity = time.monotonic()
+        self._modules: dict[str, tuple[float, object]] = {}
+        self._sources: dict[str, int | None] = {}  # Module file -> mtime_ns when imported
+        self._imported_count = 0  # len(sys.modules) when _sources was taken
+        self._import_env: tuple | None = None
+        self._latency: dict[str, "deque[float]"] = {}
+        self._counts: dict[str, dict[str, int]] = {}
+        self._running = False
+
+    # -------------------------------------------------------------------------
+    # Module cache
+    # -------------------------------------------------------------------------
+
+    def _snapshot_sources(self) -> None:
+        """Record every module file under CLAUDE_ROOT that hooks have imported."""
+        import types
+
+        modules = [module for _, module in self._modules.values()]
+        for module in list(sys.modules.values()) + modules:
+            if not _under_root(getattr(module, "__file__", None)):
+                continue
+            # Hooks also load helpers without registering them (bash-pretool's _load_hook)
+            for candidate in (module, *vars(module).values()):
+                if isinstance(candidate, types.ModuleType):
+                    path = getattr(candidate, "__file__", None)
+                    if path not in self._sources and _under_root(path) and path != __file__:
+                        self._sources[path] = _mtime_ns(path)
+        self._imported_count = len(sys.modules)
+
+    def refresh_modules(self, env: dict) -> bool:
+        """Drop every hook module if a source file or the import-time environment changed."""
+        env_key = tuple(sorted(
+            (k, v) for k, v in env.items() if k == "HOME" or k.startswith(("CLAUDE_", "RALPH_"))
+        ))
+        if self._import_env is None:
+            self._import_env = env_key
+        stale = env_key != self._import_env or any(
+            _mtime_ns(path) != mtime for path, mtime in self._sources.items()
+        )
+        if not stale:
+            return False
+
+        trace = sys.modules.get("hooks.hook_trace")
+        warm = getattr(trace, "_warm", False)
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if name != "__main__" and path != __file__ and _under_root(path):
+                del sys.modules[name]
+        self._modules.clear()
+        self._sources.clear()
+        self._imported_count = -1  # Re-snapshot after the next request
+        self._import_env = env_key
+        if warm:
+            from hooks import hook_trace
+            hook_trace.mark_warm()
+        return True
+
+    def load_module(self, script: Path):
+        """Import script once; re-import when its mtime changes."""
+        import importlib.util
+
+        from hooks.compat import cancel_stdin_timeout
+
+        key = str(script)
+        mtime = script.stat().st_mtime
+        cached = self._modules.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        name = "_hookd_" + script.stem.replace("-", "_")
+        spec = importlib.util.spec_from_file_location(name, script)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except SystemExit:
+            pass  # Module-level hooks (no main) exit during import
+        finally:
+            # Hook modules arm a stdin alarm at import; the daemon must not die from it
+            cancel_stdin_timeout()
+        self._modules[key] = (mtime, module)
+        return module
+
+    # -------------------------------------------------------------------------
+    # Request execution
+    # -------------------------------------------------------------------------
+
+    def accept(self, request: dict, conn: socket.socket | None = None) -> bool:
+        """True if the client is still waiting for this request (see the module docstring)."""
+        deadline = request.get("deadline")
+        if isinstance(deadline, (int, float)) and time.time() > deadline:
+            return False
+        if conn is None:
+            return True
+        try:
+            conn.sendall(ACCEPT)
+            conn.settimeout(ACCEPT_ECHO_TIMEOUT)
+            echoed = conn.recv(1) == ACCEPT
+            conn.settimeout(DEFAULT_REQUEST_TIMEOUT)
+            return echoed
+        except OSError:
+            return False  # The client gave up and closed the socket
+
+    def execute(self, request: dict, conn: socket.socket | None = None) -> dict:
+        """Run one hook with the caller's argv/cwd/env/stdin; capture its output."""
+        import io
+        import traceback
+
+        from hooks.compat import cancel_stdin_timeout
+
+        script = resolve_script(request.get("script", ""))
+        if script is None:
+            return {"code": 0, "stdout": "", "stderr": ""}
+        args = [str(a) for a in request.get("args", [])]
+        key = hook_key(script, args)
+
+        if not self.accept(request, conn):
+            # The client has given up waiting and runs the hook in-process
+            self._bump(key, "expired")
+            return {"expired": True}
+
+        stdin = io.TextIOWrapper(
+            io.BytesIO(_decode_bytes(request.get("stdin", ""))), encoding="utf-8", errors="replace"
+        )
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", errors="replace")
+        stderr = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", errors="replace")
+
+        saved_env = dict(os.environ)
+        saved_cwd = os.getcwd()
+        saved_argv = sys.argv
+        saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+        code = 0
+        started = time.perf_counter()
+        try:
+            env = request.get("env")
+            if isinstance(env, dict):
+                os.environ.clear()
+                os.environ.update({str(k): str(v) for k, v in env.items()})
+            try:
+                os.chdir(request.get("cwd") or saved_cwd)
+            except OSError:
+                pass
+            sys.argv = [str(script)] + args
+            sys.stdin, sys.stdout, sys.stderr = stdin, stdout, stderr
+
+            self.refresh_modules(os.environ)
+            module = self.load_module(script)
+            main = getattr(module, "main", None)
+            if callable(main):
+                main()
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=stderr)
+                code = 1
+        except Exception:
+            # Hooks must never crash Claude Code: report, but exit 0
+            traceback.print_exc(file=stderr)
+            code = 0
+            self._bump(key, "errors")
+        finally:
+            cancel_stdin_timeout()
+            sys.stdin, sys.stdout, sys.stderr = saved_streams
+            sys.argv = saved_argv
+            os.environ.clear()
+            os.environ.update(saved_env)
+            try:
+                os.chdir(saved_cwd)
+            except OSError:
+                pass
+
+        if len(sys.modules) != self._imported_count:
+            self._snapshot_sources()  # Also catches imports made inside main()
+        self.record_latency(key, (time.perf_counter() - started) * 1000)
+        stdout.flush()
+        stderr.flush()
+        return {
+            "code": code,
+            "stdout": _encode_bytes(stdout.buffer.getvalue()),
+            "stderr": _encode_bytes(stderr.buffer.getvalue()),
+        }
+
+    # -------------------------------------------------------------------------
+    # Latency counters
+    # -------------------------------------------------------------------------
+
+    def _bump(self, key: str, counter: str) -> None:
+        counts = self._counts.setdefault(key, {"calls": 0, "errors": 0})
+        counts[counter] = counts.get(counter, 0) + 1
+
+    def record_latency(self, key: str, elapsed_ms: float) -> None:
+        from collections import deque
+
+        samples = self._latency.get(key)
+        if samples is None:
+            samples = self._latency[key] = deque(maxlen=LATENCY_SAMPLES)
+        samples.append(elapsed_ms)
+        self._bump(key, "calls")
+
+    def stats(self) -> dict:
+        """Per-hook latency summary over the retained samples."""
+        hooks = {}
+        for key, samples in sorted(self._latency.items()):
+            ordered = sorted(samples)
+            hooks[key] = {
+                "calls": self._counts.get(key, {}).get("calls", 0),
+                "errors": self._counts.get(key, {}).get("errors", 0),
+                "expired": self._counts.get(key, {}).get("expired", 0),
+                "p50_ms": round(percentile(ordered, 50), 3),
+                "p95_ms": round(percentile(ordered, 95), 3),
+                "p99_ms": round(percentile(ordered, 99), 3),
+                "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+            }
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "modules": len(self._modules),
+            "hooks": hooks,
+        }
+
+    def dump_stats(self) -> None:
+        """Persist the latency summary so it survives idle shutdown."""
+        if self.stats_file is None:
+            return
+        try:
+            from hooks.transaction import atomic_write_json
+            atomic_write_json(self.stats_file, self.stats(), fsync=False)
+        except Exception:
+            pass
+
+    # -------------------------------------------------------------------------
+    # Socket loop
+    # -------------------------------------------------------------------------
+
+    def _bind(self) -> socket.socket | None:
+        """Bind the listening socket, clearing a stale one left by a crash."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.chmod(self.socket_path.parent, 0o700)
+        except OSError:
+            pass
+        if self.socket_path.exists():
+            if _request({"op": "ping"}, timeout=1.0, socket_path=self.socket_path):
+                return None  # Another daemon owns the socket
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                return None
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+        server.listen(64)
+        server.settimeout(min(30.0, max(1.0, self.idle_seconds / 10)))
+        return server
+
+    def handle(self, request: dict, conn: socket.socket | None = None) -> dict:
+        """Dispatch one decoded request (conn is used for the run handshake)."""
+        op = request.get("op", "run")
+        if op == "run":
+            return self.execute(request, conn)
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "stats":
+            return self.stats()
+        if op == "shutdown":
+            self._running = False
+            return {"ok": True}
+        return {"error": f"unknown op: {op}"}
+
+    def serve_forever(self) -> None:
+        server = self._bind()
+        if server is None:
+            return
+
+        self._running = True
+        try:
+            while self._running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    if time.monotonic() - self.last_activity > self.idle_seconds:
+                        break  # Idle shutdown
+                    continue
+                except OSError:
+                    break
+
+                self.last_activity = time.monotonic()
+                with conn:
+                    try:
+                        conn.settimeout(DEFAULT_REQUEST_TIMEOUT)
+                        request = json.loads(_recv_line(conn).decode("utf-8") or "{}")
+                        response = self.handle(request, conn)
+                        conn.sendall(json.dumps(response).encode("utf-8"))
+                    except (OSError, ValueError):
+                        pass
+                self.last_activity = time.monotonic()
+        finally:
+            server.close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+            self.dump_stats()
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    import math
+
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def serve() -> None:
+    """Run the daemon in the foreground (used by `start`)."""
+    if not HAS_UNIX_SOCKETS:
+        print("hookd: Unix domain sockets are not available on this platform", file=sys.stderr)
+        sys.exit(0)
+    sys.path.insert(0, str(CLAUDE_ROOT))
+    os.chdir(CLAUDE_ROOT)
+
+    from hooks import hook_trace
+    hook_trace.mark_warm()  # Served hooks skip interpreter start-up
+
+    HookServer().serve_forever()
+
+
+# =============================================================================
+# CLI Commands
+# =============================================================================
+
+def cmd_stats() -> None:
+    """Print per-hook latency from the live daemon (or the last dump)."""
+    stats = _request({"op": "stats"}, timeout=2.0)
+    source = "live"
+    if stats is None:
+        try:
+            stats = json.loads(STATS_FILE.read_text(encoding="utf-8"))
+            source = f"snapshot {STATS_FILE}"
+        except (OSError, ValueError):
+            print("hookd: daemon not running and no stats snapshot found.")
+            return
+
+    print(f"Hook daemon latency ({source}, pid {stats.get('pid')}, uptime {stats.get('uptime_s')}s)")
+    print("-" * 78)
+    print(f"{'hook':36} {'calls':>7} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'errors':>6}")
+    for key, h in stats.get("hooks", {}).items():
+        print(
+            f"{key[:36]:36} {h['calls']:>7} {h['p50_ms']:>8.2f} "
+            f"{h['p95_ms']:>8.2f} {h['p99_ms']:>8.2f} {h['errors']:>6}"
+        )
+
+
+def main() -> None:
+    """Main entry point with mode dispatch."""
+    if len(sys.argv) < 2:
+        sys.exit(0)
+
+    mode = sys.argv[1]
+    if mode == "run":
+        client_run(sys.argv[2:])
+    elif mode == "start":
+        client_start()
+    elif mode == "serve":
+        serve()
+    elif mode == "stop":
+        _request({"op": "shutdown"}, timeout=2.0)
+    elif mode == "stats":
+        cmd_stats()
+    elif mode == "ping":
+        sys.exit(0 if _request({"op": "ping"}, timeout=1.0) else 1)
+    else:
+        # Unknown mode - exit gracefully to avoid hook errors
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
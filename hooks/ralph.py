@@ -3,7 +3,9 @@
 Ralph Hook Wrapper - Thin wrapper that delegates to scripts/ralph.py.
 
 This module reads stdin (hook input JSON), determines the hook mode from
-sys.argv[1], and forwards to the main Ralph script for processing.
+sys.argv[1], and calls the matching scripts/ralph.py hook handler in-process
+via scripts.ralph_hooks.run_hook - no second interpreter, and scripts.ralph is
+only imported when a Ralph session exists.
 
 Usage:
     python ralph.py stop             # Stop hook (orchestrator)
@@ -13,10 +15,8 @@ Usage:
     python ralph.py subagent-stop    # SubagentStop hook
 """
 
-import os
-import subprocess
+import json
 import sys
-import threading
 from pathlib import Path
 
 # Add parent directory to sys.path for hooks imports
@@ -24,12 +24,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from hooks.compat import setup_stdin_timeout, cancel_stdin_timeout
 
-SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
-RALPH_SCRIPT = SCRIPTS_DIR / "ralph.py"
-
 
 def main() -> None:
-    """Delegate to scripts/ralph.py with hook-{mode} command."""
+    """Run scripts/ralph.py hook-{mode} in this process."""
     setup_stdin_timeout(25, debug_label="ralph.py")
 
     if len(sys.argv) < 2:
@@ -44,7 +41,7 @@ def main() -> None:
 
     hook_command = f"hook-{mode}"
 
-    # Determine subprocess timeout based on mode
+    # Handler time budget per mode (was the subprocess timeout)
     sub_timeout = {
         "stop": 25,
         "session-start": 8,
@@ -53,58 +50,30 @@ def main() -> None:
         "subagent-stop": 8,
     }.get(mode, 15)
 
-    # Read stdin with timeout protection using threading
-    stdin_data = None
-
-    def read_stdin():
-        nonlocal stdin_data
-        try:
-            stdin_data = sys.stdin.buffer.read().decode('utf-8', errors='replace')
-        except Exception:
-            stdin_data = ""
-
-    reader = threading.Thread(target=read_stdin, daemon=True)
-    reader.start()
-    reader.join(timeout=sub_timeout - 2)  # Leave 2s for subprocess
-
-    if stdin_data is None:
-        # Stdin read timed out
-        sys.exit(0)
-
-    cancel_stdin_timeout()
+    # Read stdin under the alarm; expiry exits 0 (leave 2s for the handler)
+    setup_stdin_timeout(sub_timeout - 2, debug_label=f"ralph.py {mode} stdin")
+    try:
+        stdin_data = sys.stdin.buffer.read().decode('utf-8', errors='replace')
+    except Exception:
+        stdin_data = ""
 
-    # Call scripts/ralph.py hook-{mode}
+    # Import + handler share the old subprocess budget; expiry exits 0
+    setup_stdin_timeout(sub_timeout, debug_label=f"ralph.py {hook_command}")
     try:
-        result = subprocess.run(
-            [sys.executable, str(RALPH_SCRIPT), hook_command],
-            input=stdin_data,
-            capture_output=True,
-            text=True,
-            timeout=sub_timeout,
-        )
-    except subprocess.TimeoutExpired:
-        # Log timeout for debugging
-        try:
-            debug_log = Path.home() / ".claude" / "debug" / "ralph-subprocess-timeout.log"
-            debug_log.parent.mkdir(parents=True, exist_ok=True)
-            with open(debug_log, "a") as f:
-                f.write(f"[{mode}] Subprocess timeout after {sub_timeout}s\n")
-        except Exception:
-            pass
-        sys.exit(0)  # Don't block Claude Code
-    except (FileNotFoundError, PermissionError) as e:
-        # Log script execution errors
-        # Can't find/run script — exit gracefully
+        from scripts.ralph_hooks import run_hook
+
+        result = run_hook(hook_command, stdin_data)
+    except SystemExit:
+        raise
+    except Exception as e:
+        # Hook commands must NEVER crash with non-zero exit (same as scripts/ralph.py)
+        print(json.dumps({"error": str(e), "hook_safe_exit": True}), file=sys.stderr)
         sys.exit(0)
+    finally:
+        cancel_stdin_timeout()
 
-    # Forward stdout/stderr
-    if result.stdout:
-        print(result.stdout, end="")
-    if result.stderr:
-        print(result.stderr, end="", file=sys.stderr)
-
-    # Preserve exit code
-    sys.exit(result.returncode)
+    print(json.dumps(result))
+    sys.exit(0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Receipt Journal - Append-only JSONL journal for change-tracker file receipts.
+
+Layout of a repo's .claude/ directory:
+
+    receipts.jsonl              Journal: one receipt per line (O_APPEND, no lock)
+    receipts.jsonl.<ns>         Sealed journal waiting to be folded into the archive
+    receipts.archive.jsonl      Archive: every folded receipt, one per line
+    receipts.fold               Archive size before the fold in progress (crash recovery)
+    receipts.json               Receipts written before the journal existed (read-only)
+    receipts.chain              Hash-chain head of the archive (chain mode only)
+    receipts.lock               Held while compacting and for chained appends
+
+An append is a single os.write() of one line to an O_APPEND file, which
+lands whole for lines under PIPE_BUF, so concurrent agents never wait on each
+other. When the journal passes compact_bytes, the writer that noticed it
+compacts: sealed journals that have been quiet for SEAL_GRACE seconds are
+appended to the archive (so a writer that opened a journal just before it
+was sealed still lands in a file that is read), then the journal is sealed
+by a rename. A fold costs the size of the sealed journal, never the size of
+the history: nothing is rewritten. read_receipts() returns the old array
+view: receipts.json, archive, sealed journals, then the journal.
+
+Chain mode (CLAUDE_RECEIPT_CHAIN=1) adds "chain" = sha256(previous chain +
+canonical receipt) to every receipt. Finding the previous link reads only
+the journal tail, but appends then take the lock so the chain cannot fork.
+verify() recomputes the chain in one streaming pass.
+
+Usage:
+    from hooks.receipt_journal import ReceiptJournal, read_receipts
+
+    ReceiptJournal(repo_root / ".claude").append({"path": ..., "sha256": ...})
+    receipts = read_receipts(repo_root / ".claude")
+
+CLI:
+    python receipt_journal.py compact <claude-dir>   # Fold sealed journals now
+    python receipt_journal.py verify <claude-dir>    # Check the hash chain
+    python receipt_journal.py export <claude-dir>    # Print the array view
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hooks.compat import file_lock, file_unlock
+
+COMPACT_BYTES = 256 * 1024
+SEAL_GRACE = 2.0
+TAIL_BYTES = 8192
+
+JOURNAL_NAME = "receipts.jsonl"
+ARCHIVE_NAME = "receipts.archive.jsonl"
+FOLD_NAME = "receipts.fold"
+SNAPSHOT_NAME = "receipts.json"
+CHAIN_HEAD_NAME = "receipts.chain"
+LOCK_NAME = "receipts.lock"
+
+
+def chain_link(prev: str, receipt: dict) -> str:
+    """Chain value of a receipt: sha256 over the previous link and the receipt without its own link."""
+    body = {key: value for key, value in receipt.items() if key != "chain"}
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256((prev + canonical).encode("utf-8")).hexdigest()
+
+
+class ReceiptJournal:
+    """Lock-free appends to a JSONL journal, compacted into an append-only archive."""
+
+    def __init__(
+        self,
+        directory: Path,
+        compact_bytes: int = COMPACT_BYTES,
+        chain: Optional[bool] = None,
+        seal_grace: float = SEAL_GRACE,
+    ):
+        self.directory = Path(directory)
+        self.compact_bytes = compact_bytes
+        self.chain = os.environ.get("CLAUDE_RECEIPT_CHAIN") == "1" if chain is None else chain
+        self.seal_grace = seal_grace
+        self.journal = self.directory / JOURNAL_NAME
+        self.archive = self.directory / ARCHIVE_NAME
+        self.fold_marker = self.directory / FOLD_NAME
+        self.snapshot = self.directory / SNAPSHOT_NAME
+        self.chain_head = self.directory / CHAIN_HEAD_NAME
+
+    @contextmanager
+    def _locked(self):
+        fd = os.open(str(self.directory / LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            file_lock(fd)
+            try:
+                yield
+            finally:
+                file_unlock(fd)
+        finally:
+            os.close(fd)
+
+    def sealed(self) -> list[Path]:
+        """Sealed journals, oldest first."""
+        found = []
+        for path in self.directory.glob(f"{JOURNAL_NAME}.*"):
+            suffix = path.name[len(JOURNAL_NAME) + 1:]
+            if suffix.isdigit():
+                found.append((int(suffix), path))
+        return [path for _, path in sorted(found)]
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def _write_line(self, receipt: dict) -> int:
+        line = (json.dumps(receipt, separators=(",", ":")) + "\n").encode("utf-8")
+        fd = os.open(str(self.journal), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+            return os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+    def append(self, receipt: dict) -> None:
+        """Append one receipt; compacts when the journal is full. Raises OSError."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.chain:
+            with self._locked():
+                receipt = {**receipt, "chain": chain_link(self._last_link(), receipt)}
+                size = self._write_line(receipt)
+        else:
+            size = self._write_line(receipt)
+        if size >= self.compact_bytes:
+            self.compact(force=False)
+
+    def _last_link(self) -> str:
+        """Chain value of the newest chained receipt (journal tail, sealed journals, then head file)."""
+        for path in (self.journal, *reversed(self.sealed())):
+            try:
+                with open(path, "rb") as f:
+                    f.seek(0, os.SEEK_END)
+                    f.seek(max(0, f.tell() - TAIL_BYTES))
+                    lines = f.read().decode("utf-8", errors="replace").splitlines()
+            except OSError:
+                continue
+            for line in reversed(lines):
+                try:
+                    link = json.loads(line).get("chain")
+                except (ValueError, AttributeError):
+                    continue
+                if link:
+                    return link
+        try:
+            return self.chain_head.read_text(encoding="ascii").strip()
+        except OSError:
+            return ""
+
+    # -------------------------------------------------------------------------
+    # Compaction
+    # -------------------------------------------------------------------------
+
+    def compact(self, force: bool = True) -> int:
+        """
+        Fold quiet sealed journals into the archive, then seal the journal.
+
+        With force=False the journal is sealed only if it is still over
+        compact_bytes once the lock is held. Returns the receipts folded.
+        """
+        with self._locked():
+            folded = self._fold_sealed()
+            try:
+                size = self.journal.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size and (force or size >= self.compact_bytes):
+                os.rename(self.journal, self.journal.with_name(f"{JOURNAL_NAME}.{time.time_ns()}"))
+        return folded
+
+    def _fold_sealed(self) -> int:
+        self._recover_fold()
+        now = time.time()
+        ready = []
+        for path in self.sealed():
+            try:
+                if now - path.stat().st_mtime < self.seal_grace:
+                    break  # Keep order: never fold past a journal that may still be written
+            except FileNotFoundError:
+                continue
+            ready.append(path)
+
+        added = 0
+        for path in ready:
+            added += self._fold(path)
+        return added
+
+    def _fold(self, path: Path) -> int:
+        """Append one sealed journal to the archive and drop it. Call with the lock held."""
+        receipts = list(self._read_journal(path))
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in receipts).encode("utf-8")
+        fd = os.open(str(self.archive), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            self.fold_marker.write_text(f"{path.name} {os.fstat(fd).st_size}", encoding="ascii")
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        link = next((r["chain"] for r in reversed(receipts) if r.get("chain")), "")
+        if link:
+            self.chain_head.write_text(link, encoding="ascii")
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        self.fold_marker.unlink()
+        return len(receipts)
+
+    def _recover_fold(self) -> None:
+        """Undo a fold cut short by a crash, so its journal is not archived twice."""
+        try:
+            name, size = self.fold_marker.read_text(encoding="ascii").split()
+        except (OSError, ValueError):
+            return
+        if (self.directory / name).exists():
+            with open(self.archive, "r+b") as f:
+                f.truncate(int(size))
+        self.fold_marker.unlink()
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def _load_snapshot(self) -> list:
+        try:
+            data = json.loads(self.snapshot.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        return data if isinstance(data, list) else []
+
+    @staticmethod
+    def _read_journal(path: Path) -> Iterator[dict]:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    try:
+                        receipt = json.loads(line)
+                    except ValueError:
+                        continue  # Torn line from a crashed writer
+                    if isinstance(receipt, dict):
+                        yield receipt
+        except OSError:
+            return
+
+    def records(self) -> Iterator[dict]:
+        """Every receipt oldest first: receipts.json, archive, sealed journals, journal."""
+        yield from self._load_snapshot()
+        yield from self._read_journal(self.archive)
+        for path in self.sealed():
+            yield from self._read_journal(path)
+        yield from self._read_journal(self.journal)
+
+    def verify(self) -> tuple[bool, int]:
+        """
+        Recompute the hash chain. Returns (ok, receipts checked); on failure the
+        count is the position of the first receipt whose link does not match.
+        Receipts written before chain mode was enabled carry no link and are skipped.
+        """
+        prev = ""
+        checked = 0
+        for position, receipt in enumerate(self.records()):
+            link = receipt.get("chain")
+            if not link:
+                continue
+            if link != chain_link(prev, receipt):
+                return False, position
+            prev = link
+            checked += 1
+        return True, checked
+
+
+def read_receipts(directory: Path) -> list[dict]:
+    """The receipts as the JSON array receipts.json used to hold (compatibility view)."""
+    return list(ReceiptJournal(directory).records())
+
+
+def main() -> None:
+    if len(sys.argv) < 3 or sys.argv[1] not in ("compact", "verify", "export"):
+        print("Usage: receipt_journal.py compact|verify|export <claude-dir>")
+        sys.exit(1)
+    journal = ReceiptJournal(Path(sys.argv[2]))
+    if sys.argv[1] == "compact":
+        journal.seal_grace = 0.0
+        folded = journal.compact()
+        folded += journal.compact()  # Fold the journal sealed by the first pass too
+        print(f"Folded {folded} receipt(s) into {journal.archive}")
+    elif sys.argv[1] == "verify":
+        ok, count = journal.verify()
+        print(f"Chain OK ({count} linked receipts)" if ok else f"Chain broken at receipt {count}")
+        sys.exit(0 if ok else 1)
+    else:
+        print(json.dumps(read_receipts(journal.directory), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -199,13 +199,24 @@ def check_executable(command: str) -> Dict[str, any]:
 # Hook Handler
 # =============================================================================
 
-def pretool_bash_sandbox(tool_input: Dict, cwd: str) -> Optional[Dict]:
+def split_command(command: str) -> List[str]:
+    """Tokenize a command with shlex so quoted paths with spaces stay whole."""
+    import shlex
+    try:
+        return shlex.split(command)
+    except ValueError:
+        # Malformed quotes - fall back to simple split
+        return command.split()
+
+
+def pretool_bash_sandbox(tool_input: Dict, cwd: str, words: Optional[List[str]] = None) -> Optional[Dict]:
     """
     PreToolUse hook for Bash - block commands violating sandbox boundaries.
 
     Args:
         tool_input: Tool input containing command
         cwd: Current working directory
+        words: Pre-tokenized command (shlex), reused by bash-pretool.py
 
     Returns:
         Optional[Dict]: Error result if violation detected, None otherwise
@@ -221,14 +232,9 @@ def pretool_bash_sandbox(tool_input: Dict, cwd: str) -> Optional[Dict]:
         }
 
     # Check for file operations outside project
-    import shlex
     if any(keyword in command for keyword in ["cd ", "mv ", "cp ", "rm ", ">", ">>"]):
-        # Use shlex to properly parse quoted paths with spaces
-        try:
-            words = shlex.split(command)
-        except ValueError:
-            # Malformed quotes - fall back to simple split
-            words = command.split()
+        if words is None:
+            words = split_command(command)
         for word in words:
             if "/" in word or "\\" in word:
                 file_check = check_file_access(word, cwd)
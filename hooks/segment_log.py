@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Segment Log - Append-only JSONL log split into fixed-size segment files.
+
+Layout of a log directory (e.g. ~/.claude/security/audit/):
+
+    active.jsonl            Segment currently appended to (O_APPEND, no lock)
+    seg-00000042.jsonl.gz   Sealed segments (gzip'd in the background)
+    manifest.json           {"next_seq", "active_since", "segments": [...]}
+    .lock                   Held only while rotating / compressing
+
+The hook path only ever appends one line. When the active segment passes
+segment_bytes, rotation renames it to seg-<seq>.jsonl (O(1), no data read),
+records it in the manifest, drops segments beyond the retention policy (count
+or age, decided from the manifest alone) and spawns a detached compressor.
+Readers pick segments by their time range from the manifest.
+
+Usage:
+    from hooks.segment_log import SegmentedLog
+
+    log = SegmentedLog(SECURITY_DIR / "audit", legacy_file=SECURITY_DIR / "audit.jsonl")
+    log.append({"timestamp": ..., "decision": "allowed"})
+    recent = log.tail(20)
+    for record in log.records(since=time.time() - 86400): ...
+
+CLI:
+    python segment_log.py compress <dir>    # gzip sealed segments (spawned on rotation)
+    python segment_log.py info <dir>        # Show manifest
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+SEGMENT_BYTES = 1024 * 1024
+MAX_SEGMENTS = 50
+MAX_AGE_DAYS = 90
+
+ACTIVE_NAME = "active.jsonl"
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+
+
+def _lock(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class SegmentedLog:
+    """Append-only JSONL log with O(1) rotation, retention and lazy compression."""
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_bytes: int = SEGMENT_BYTES,
+        max_segments: Optional[int] = MAX_SEGMENTS,
+        max_age_days: Optional[float] = MAX_AGE_DAYS,
+        compress: bool = True,
+        legacy_file: Optional[Path] = None,
+    ):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.max_age_days = max_age_days
+        self.compress = compress
+        self.legacy_file = legacy_file
+        self.active = self.directory / ACTIVE_NAME
+        self.manifest_path = self.directory / MANIFEST_NAME
+
+    # -------------------------------------------------------------------------
+    # Manifest
+    # -------------------------------------------------------------------------
+
+    def manifest(self) -> dict:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and isinstance(data.get("segments"), list):
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"next_seq": 1, "active_since": None, "segments": []}
+
+    def _save_manifest(self, manifest: dict) -> None:
+        tmp = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    @contextmanager
+    def _locked(self):
+        """Hold the directory's rotation lock (appends never take it)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.directory / LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            _lock(fd)
+            try:
+                yield
+            finally:
+                _unlock(fd)
+        finally:
+            os.close(fd)
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def append(self, record: dict) -> None:
+        """Append one record; rotate if the active segment is full. Raises OSError."""
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        try:
+            fd = os.open(str(self.active), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        except FileNotFoundError:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd = os.open(str(self.active), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+        if size >= self.segment_bytes or (self.legacy_file is not None and self.legacy_file.exists()):
+            self.rotate(force=False)
+
+    def rotate(self, force: bool = True) -> bool:
+        """
+        Seal the active segment (rename only) and apply retention.
+
+        With force=False the segment is sealed only if it is still over
+        segment_bytes once the lock is held (another writer may have rotated).
+        Returns True if a segment was sealed (or a legacy file adopted).
+        """
+        now = time.time()
+        sealed = False
+        with self._locked():
+            manifest = self.manifest()
+            sealed = self._adopt_legacy(manifest)
+            try:
+                size = self.active.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size and (force or size >= self.segment_bytes):
+                seq = manifest["next_seq"]
+                name = f"seg-{seq:08d}.jsonl"
+                os.rename(self.active, self.directory / name)
+                manifest["segments"].append({
+                    "seq": seq,
+                    "file": name,
+                    "first_ts": manifest.get("active_since"),
+                    "last_ts": now,
+                    "bytes": size,
+                })
+                manifest["next_seq"] = seq + 1
+                manifest["active_since"] = now
+                sealed = True
+            self._apply_retention(manifest, now)
+            self._save_manifest(manifest)
+        if sealed and self.compress:
+            self._spawn_compressor()
+        return sealed
+
+    def _adopt_legacy(self, manifest: dict) -> bool:
+        """Move a pre-segmentation single-file log (and its .old) in as sealed segments."""
+        legacy = self.legacy_file
+        adopted = False
+        if legacy is None:
+            return adopted
+        for source in (legacy.with_suffix(legacy.suffix + ".old"), legacy):
+            try:
+                stat = source.stat()
+            except FileNotFoundError:
+                continue
+            seq = manifest["next_seq"]
+            name = f"seg-{seq:08d}.jsonl"
+            os.rename(source, self.directory / name)
+            manifest["segments"].append({
+                "seq": seq, "file": name, "first_ts": None,
+                "last_ts": stat.st_mtime, "bytes": stat.st_size,
+            })
+            manifest["next_seq"] = seq + 1
+            adopted = True
+        return adopted
+
+    def _apply_retention(self, manifest: dict, now: float) -> None:
+        segments = manifest["segments"]
+        keep = segments
+        if self.max_age_days is not None:
+            cutoff = now - self.max_age_days * 86400
+            keep = [s for s in keep if (s.get("last_ts") or now) >= cutoff]
+        if self.max_segments is not None and len(keep) > self.max_segments:
+            keep = keep[len(keep) - self.max_segments:]
+        for segment in segments:
+            if segment not in keep:
+                try:
+                    (self.directory / segment["file"]).unlink()
+                except FileNotFoundError:
+                    pass
+        manifest["segments"] = keep
+
+    def _spawn_compressor(self) -> None:
+        import subprocess
+
+        try:
+            subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), "compress", str(self.directory)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+                close_fds=True,
+            )
+        except OSError:
+            pass  # Segments stay uncompressed until the next rotation
+
+    def compress_sealed(self) -> int:
+        """Gzip every sealed, uncompressed segment. Returns the number compressed."""
+        done = 0
+        with self._locked():
+            manifest = self.manifest()
+            for segment in manifest["segments"]:
+                if segment["file"].endswith(".gz"):
+                    continue
+                source = self.directory / segment["file"]
+                target = source.with_name(source.name + ".gz")
+                tmp = target.with_name(target.name + ".tmp")
+                try:
+                    with open(source, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as dst:
+                        while block := src.read(1024 * 1024):
+                            dst.write(block)
+                    os.replace(tmp, target)
+                    source.unlink()
+                except FileNotFoundError:
+                    continue
+                segment["file"] = target.name
+                done += 1
+            if done:
+                self._save_manifest(manifest)
+        return done
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def segment_paths(self, since: Optional[float] = None) -> list[Path]:
+        """Segment files newest first (active included), skipping those ending before `since`."""
+        paths = [self.active]
+        for segment in reversed(self.manifest()["segments"]):
+            last_ts = segment.get("last_ts")
+            if since is not None and last_ts is not None and last_ts < since:
+                break  # Sealed in order: everything older ends earlier still
+            paths.append(self.directory / segment["file"])
+        if self.legacy_file is not None and self.legacy_file.exists():
+            paths.append(self.legacy_file)  # Not yet adopted (no rotation since upgrade)
+        return paths
+
+    @staticmethod
+    def _read_lines(path: Path) -> list[str]:
+        try:
+            if path.suffix == ".gz":
+                with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+                    return f.readlines()
+            with open(path, encoding="utf-8", errors="replace") as f:
+                return f.readlines()
+        except (OSError, EOFError):
+            return []
+
+    def records(self, since: Optional[float] = None) -> Iterator[dict]:
+        """
+        Records newest first, reading only segments that can overlap `since`.
+
+        Segment selection is coarse (per file); callers still filter records
+        by their own timestamp field.
+        """
+        for path in self.segment_paths(since):
+            for line in reversed(self._read_lines(path)):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+    def tail(self, n: int) -> list[dict]:
+        """Last n records, oldest first (reads only as many segments as needed)."""
+        out = []
+        for record in self.records():
+            out.append(record)
+            if len(out) >= n:
+                break
+        return out[::-1]
+
+
+def main() -> None:
+    if len(sys.argv) < 3 or sys.argv[1] not in ("compress", "info"):
+        print("Usage: segment_log.py compress|info <dir>")
+        sys.exit(1)
+    log = SegmentedLog(Path(sys.argv[2]))
+    if sys.argv[1] == "compress":
+        log.compress_sealed()
+    else:
+        print(json.dumps(log.manifest(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
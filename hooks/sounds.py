@@ -28,6 +28,7 @@ if str(_PARENT) not in sys.path:
     sys.path.insert(0, str(_PARENT))
 
 from hooks.compat import play_sound as _play_sound
+from hooks.hook_trace import traced
 
 SOUNDS_DIR = Path(__file__).parent / "sounds"
 
@@ -168,6 +169,7 @@ def handle_post_tool():
         pass
 
 
+@traced("sounds.py")
 def main():
     if len(sys.argv) < 2:
         sys.exit(0)
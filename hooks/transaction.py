@@ -111,8 +111,9 @@ def atomic_write_json(
         )
         tmp_path = Path(tmp_file.name)
 
-        # Write JSON to temp file
-        json.dump(data, tmp_file, indent=2)
+        # Write JSON to temp file (one write: json.dump's per-chunk writes go through
+        # NamedTemporaryFile's wrapper and dominate on large documents)
+        tmp_file.write(json.dumps(data, indent=2))
         tmp_file.flush()
 
         # Force OS flush to disk for durability
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Verdict Cache - Cross-process cache of Bash pre-check verdicts in a fixed-size hash table file.
+
+bash-pretool.py runs bypass-permissions, fs-guard, sandbox and security-gate
+for every Bash command, although agents repeat the same commands (`git status`,
+`pnpm build`, `pytest -q`) all session. The combined verdict of those stages is
+a pure function of:
+
+    command, permission_mode, CLAUDE_BYPASS_PERMISSIONS, NIGHTSHIFT_AGENT,
+    NIGHTSHIFT_WORKTREE, cwd                                    -> entry key
+    the detector sources (security-gate.py, sandbox-boundary.py,
+    guards.py, secret_scanner.py, bash-pretool.py)              -> ruleset
+
+so a repeat command can reuse it. The ruleset fingerprint is (size, mtime) of
+the detector sources; editing any of them invalidates every entry. Only a
+hash of the command is stored, and commands that carry a secret are never
+stored at all.
+
+Table file: $CLAUDE_HOME/.cache/verdict-cache.bin - a 64-byte header (magic,
+version, ruleset fingerprint) plus BUCKETS x WAYS slots of SLOT_SIZE bytes.
+Each bucket is a small LRU (least recently used way is evicted). Lookups are
+two lock-free preads validated by a CRC; stores take a short file lock and
+write through mmap.
+
+Usage:
+    from hooks.verdict_cache import VerdictCache
+
+    cache = VerdictCache()
+    key = cache.key(command, permission_mode, cwd)
+    verdict = cache.get(key)          # dict or None
+    cache.put(key, verdict)
+
+CLI:
+    python verdict_cache.py stats
+    python verdict_cache.py clear
+
+Env vars:
+    CLAUDE_VERDICT_CACHE=0          Disable the cache
+    CLAUDE_VERDICT_CACHE_FILE       Table path override
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+MAGIC = b"VRDC"
+VERSION = 1
+HEADER_SIZE = 64
+SLOT_SIZE = 512
+BUCKETS = 1024
+WAYS = 4
+TABLE_SIZE = HEADER_SIZE + BUCKETS * WAYS * SLOT_SIZE  # ~2 MiB
+MAX_AGE_SECONDS = 24 * 3600
+
+# Slot: key(16) last_used(f64) stored_at(f64) crc32(u32) length(u16) payload
+SLOT_HEADER = struct.Struct("<16sddIH")
+MAX_PAYLOAD = SLOT_SIZE - SLOT_HEADER.size
+
+CLAUDE_ROOT = Path(__file__).resolve().parent.parent
+RULESET_FILES = (
+    "hooks/security-gate.py",
+    "hooks/sandbox-boundary.py",
+    "hooks/secret_scanner.py",
+    "hooks/bash-pretool.py",
+    "hooks/verdict_cache.py",
+    "scripts/guards.py",
+)
+PROFILE_ENV = ("CLAUDE_BYPASS_PERMISSIONS", "NIGHTSHIFT_AGENT", "NIGHTSHIFT_WORKTREE")
+
+
+def cache_path() -> str:
+    """Table file location (strings, not pathlib: this runs on every Bash call)."""
+    override = os.environ.get("CLAUDE_VERDICT_CACHE_FILE")
+    if override:
+        return override
+    home = os.environ.get("CLAUDE_HOME") or os.path.join(os.path.expanduser("~"), ".claude")
+    return os.path.join(home, ".cache", "verdict-cache.bin")
+
+
+def enabled() -> bool:
+    return os.environ.get("CLAUDE_VERDICT_CACHE", "1") != "0"
+
+
+def ruleset_fingerprint(root: Path = CLAUDE_ROOT) -> bytes:
+    """16-byte fingerprint of the detector sources (stat only, no reads)."""
+    base = str(root)
+    parts = []
+    for name in RULESET_FILES:
+        try:
+            st = os.stat(f"{base}/{name}")
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:-")
+    return hashlib.sha256(";".join(parts).encode()).digest()[:16]
+
+
+def _lock(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class VerdictCache:
+    """Fixed-size, bucketed LRU hash table shared by all hook processes."""
+
+    def __init__(self, path: Optional[Path] = None, ruleset: Optional[bytes] = None):
+        self.path = str(path) if path else cache_path()
+        self.ruleset = ruleset if ruleset is not None else ruleset_fingerprint()
+
+    @staticmethod
+    def key(command: str, permission_mode: str, cwd: str) -> bytes:
+        profile = [os.environ.get(name, "") for name in PROFILE_ENV]
+        material = json.dumps([command, permission_mode or "", cwd, profile])
+        return hashlib.sha256(material.encode("utf-8", "surrogatepass")).digest()[:16]
+
+    @staticmethod
+    def _bucket_offset(key: bytes) -> int:
+        bucket = int.from_bytes(key[:4], "little") % BUCKETS
+        return HEADER_SIZE + bucket * WAYS * SLOT_SIZE
+
+    def _header_ok(self, table) -> bool:
+        if len(table) < 24:
+            return False
+        magic, version = struct.unpack_from("<4sI", table, 0)
+        return magic == MAGIC and version == VERSION and table[8:24] == self.ruleset
+
+    def get(self, key: bytes) -> Optional[dict]:
+        """Cached verdict for key, or None (miss, stale ruleset, expired, torn slot)."""
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except OSError:
+            return None
+        try:
+            # Two preads (header + one bucket) are cheaper than mapping 2 MiB per lookup
+            if not self._header_ok(os.pread(fd, 24, 0)):
+                return None
+            base = self._bucket_offset(key)
+            bucket = os.pread(fd, WAYS * SLOT_SIZE, base)
+            if len(bucket) != WAYS * SLOT_SIZE:
+                return None
+            now = time.time()
+            for way in range(WAYS):
+                offset = way * SLOT_SIZE
+                slot_key, _, stored_at, crc, length = SLOT_HEADER.unpack_from(bucket, offset)
+                if slot_key != key or length > MAX_PAYLOAD:
+                    continue
+                start = offset + SLOT_HEADER.size
+                payload = bucket[start:start + length]
+                if zlib.crc32(key + payload) != crc or now - stored_at > MAX_AGE_SECONDS:
+                    return None
+                os.pwrite(fd, struct.pack("<d", now), base + offset + 16)  # LRU touch
+                return json.loads(payload)
+        except (OSError, ValueError, struct.error):
+            return None
+        finally:
+            os.close(fd)
+        return None
+
+    def put(self, key: bytes, verdict: dict) -> bool:
+        """Store a verdict (replacing the bucket's LRU way). False if it does not fit."""
+        import mmap
+
+        payload = json.dumps(verdict, separators=(",", ":")).encode("utf-8")
+        if len(payload) > MAX_PAYLOAD:
+            return False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            _lock(fd)
+            try:
+                if os.fstat(fd).st_size != TABLE_SIZE:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, TABLE_SIZE)
+                with mmap.mmap(fd, TABLE_SIZE) as table:
+                    if not self._header_ok(table):
+                        # New ruleset: every entry is stale
+                        table[:] = bytes(TABLE_SIZE)
+                        struct.pack_into("<4sI16s", table, 0, MAGIC, VERSION, self.ruleset)
+                    base = self._bucket_offset(key)
+                    victim, oldest = base, None
+                    for way in range(WAYS):
+                        offset = base + way * SLOT_SIZE
+                        slot_key, last_used = struct.unpack_from("<16sd", table, offset)
+                        if slot_key == key:
+                            victim = offset
+                            break
+                        if oldest is None or last_used < oldest:
+                            victim, oldest = offset, last_used
+                    now = time.time()
+                    table[victim:victim + SLOT_SIZE] = bytes(SLOT_SIZE)
+                    start = victim + SLOT_HEADER.size
+                    table[start:start + len(payload)] = payload
+                    SLOT_HEADER.pack_into(
+                        table, victim, key, now, now, zlib.crc32(key + payload), len(payload))
+            finally:
+                _unlock(fd)
+        finally:
+            os.close(fd)
+        return True
+
+    def stats(self) -> dict:
+        """Entry count and header state (CLI)."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return {"path": self.path, "entries": 0, "current_ruleset": False}
+        entries = 0
+        if len(data) == TABLE_SIZE:
+            for offset in range(HEADER_SIZE, TABLE_SIZE, SLOT_SIZE):
+                if data[offset:offset + 16] != bytes(16):
+                    entries += 1
+        return {
+            "path": self.path,
+            "entries": entries,
+            "capacity": BUCKETS * WAYS,
+            "current_ruleset": len(data) == TABLE_SIZE and self._header_ok(data),
+        }
+
+
+def main() -> None:
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        print(json.dumps(VerdictCache().stats(), indent=2))
+    elif command == "clear":
+        Path(cache_path()).unlink(missing_ok=True)
+    else:
+        print("Usage: verdict_cache.py stats|clear")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
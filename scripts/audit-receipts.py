@@ -3,16 +3,27 @@
 Receipt Audit Trail CLI - View and manage Ralph agent audit receipts.
 
 Usage:
-    audit-receipts.py list [--agent AGENT] [--action ACTION] [--limit N]
+    audit-receipts.py list [--agent AGENT] [--action ACTION] [--session ID]
+                           [--since WHEN] [--until WHEN] [--limit N] [--json]
     audit-receipts.py show <receipt-id>
-    audit-receipts.py report [--by-agent|--by-phase|--by-time]
+    audit-receipts.py report [--by-agent|--by-phase|--by-time|--group-by KEYS]
+                             [--agent AGENT] [--action ACTION] [--session ID]
+                             [--since WHEN] [--until WHEN] [--json]
     audit-receipts.py cleanup [--before DATE] [--dry-run]
 
 Commands:
     list      List receipts with optional filtering
     show      Show detailed receipt by ID
     report    Generate summary reports
-    cleanup   Delete old receipts
+    cleanup   Delete old receipt log segments
+
+Receipts are read from the segmented log written by receipt_log.py; list,
+show and report filter on its sidecar index (see receipt_query.py) and parse
+only the receipts they print. Import older per-file receipts with:
+    python receipt_log.py import
+
+WHEN is an ISO date/time or a relative age such as 12h or 7d.
+--group-by takes a comma-separated list of: agent, action, session, hour, day.
 
 Examples:
     # List all receipts for agent-3
@@ -24,6 +35,9 @@ Examples:
     # Generate report by agent
     audit-receipts.py report --by-agent
 
+    # Error rates and run durations per agent per hour for the last day, as JSON
+    audit-receipts.py report --group-by agent,hour --since 1d --json
+
     # Cleanup receipts older than 7 days
     audit-receipts.py cleanup --before 7d
 """
@@ -31,51 +45,85 @@ Examples:
 import argparse
 import json
 import sys
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Optional
-from collections import defaultdict
+from typing import Optional
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts import receipt_log
+from scripts.receipt_query import GROUP_KEYS, ReceiptQuery
 
-RECEIPTS_DIR = Path.home() / ".claude" / "ralph" / "receipts"
+RECEIPTS_DIR = receipt_log.RECEIPTS_DIR
 
 
-def load_receipt(receipt_path: Path) -> Optional[dict[str, Any]]:
-    """Load and parse a receipt JSON file."""
-    try:
-        return json.loads(receipt_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
+def _open_query() -> Optional[ReceiptQuery]:
+    """Query over the receipt log, or None (with a hint) when there is nothing to read."""
+    log = receipt_log.ReceiptLog(receipt_log.LOG_DIR)
+    if not log.segments():
+        if receipt_log.legacy_receipts_exist():
+            print("Only per-file receipts found; run: python receipt_log.py import", file=sys.stderr)
+        else:
+            print("No receipts found.", file=sys.stderr)
+        return None
+    if receipt_log.legacy_receipts_exist():
+        print("Note: per-file receipts remain unimported; run: python receipt_log.py import\n",
+              file=sys.stderr)
+    return ReceiptQuery(log)
+
+
+def parse_when(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds for '7d', '12h' or an ISO date/time (UTC if naive). Raises ValueError."""
+    if not value:
         return None
+    units = {"d": "days", "h": "hours", "m": "minutes"}
+    if value[-1] in units and value[:-1].isdigit():
+        delta = timedelta(**{units[value[-1]]: int(value[:-1])})
+        return (datetime.now(timezone.utc) - delta).timestamp()
+    when = datetime.fromisoformat(value)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+def _format_ts(ts: float, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
+    if not ts:
+        return "unknown"
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(fmt)
 
 
 def list_receipts(
     agent_filter: Optional[str] = None,
     action_filter: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    session_filter: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    as_json: bool = False,
 ) -> None:
-    """List receipts with optional filtering."""
-    if not RECEIPTS_DIR.exists():
-        print("No receipts directory found.")
+    """List receipts with optional filtering (index only, newest first)."""
+    query = _open_query()
+    if query is None:
+        if as_json:
+            print("[]")
         return
 
-    receipts = []
-    for path in sorted(RECEIPTS_DIR.glob("*.json"), reverse=True):
-        receipt = load_receipt(path)
-        if not receipt:
-            continue
-
-        # Apply filters
-        if agent_filter and receipt.get("agent_id") != agent_filter:
-            continue
-        if action_filter and receipt.get("action") != action_filter:
-            continue
-
-        receipts.append((path, receipt))
-
-        if len(receipts) >= limit:
+    entries = []
+    for entry in query.entries(agent=agent_filter, action=action_filter, session=session_filter,
+                               since=since, until=until, newest_first=True):
+        entries.append(entry)
+        if len(entries) >= limit:
             break
 
-    if not receipts:
+    if as_json:
+        print(json.dumps([
+            {"id": e.id, "timestamp": _format_ts(e.ts, "%Y-%m-%dT%H:%M:%S+00:00"),
+             "agent_id": e.agent_id, "action": e.action, "session_id": e.session_id}
+            for e in entries
+        ], indent=2))
+        return
+
+    if not entries:
         print("No receipts found matching criteria.")
         return
 
@@ -83,50 +131,35 @@ def list_receipts(
     print(f"{'Timestamp':<20} {'Agent':<12} {'Action':<18} {'Receipt ID':<10}")
     print("-" * 80)
 
-    # Print receipts
-    for path, receipt in receipts:
-        timestamp = receipt.get("timestamp", "unknown")
-        # Format timestamp for readability
-        try:
-            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-            timestamp_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-        except (ValueError, AttributeError):
-            timestamp_str = timestamp[:19] if len(timestamp) > 19 else timestamp
-
-        agent_id = receipt.get("agent_id", "unknown")
-        action = receipt.get("action", "unknown")
-        receipt_id = receipt.get("id", "unknown")[:8]  # Short ID
-
-        print(f"{timestamp_str:<20} {agent_id:<12} {action:<18} {receipt_id}")
+    for entry in entries:
+        print(f"{_format_ts(entry.ts):<20} {entry.agent_id:<12} {entry.action:<18} {entry.id[:8]}")
 
-    print(f"\nShowing {len(receipts)} receipt(s)")
+    print(f"\nShowing {len(entries)} receipt(s)")
 
 
 def show_receipt(receipt_id: str) -> None:
-    """Show detailed receipt information."""
-    if not RECEIPTS_DIR.exists():
-        print("No receipts directory found.")
+    """Show detailed receipt information (only the matching receipt is parsed)."""
+    query = _open_query()
+    if query is None:
         return
+    log = query.log
 
     # Find receipt by ID (support both full and short IDs)
-    matching_receipts = []
-    for path in RECEIPTS_DIR.glob("*.json"):
-        receipt = load_receipt(path)
-        if not receipt:
-            continue
-        if receipt.get("id", "").startswith(receipt_id):
-            matching_receipts.append(receipt)
-
-    if not matching_receipts:
+    matching = log.find(receipt_id)
+
+    if not matching:
         print(f"No receipt found with ID: {receipt_id}")
         return
 
-    if len(matching_receipts) > 1:
+    if len(matching) > 1:
         print(f"Multiple receipts match ID: {receipt_id}")
         print("Use a longer ID prefix to narrow results.")
         return
 
-    receipt = matching_receipts[0]
+    receipt = log.read(matching[0])
+    if receipt is None:
+        print(f"Receipt {receipt_id} is indexed but unreadable (segment missing or damaged)")
+        return
 
     # Format output
     print("=" * 80)
@@ -143,36 +176,77 @@ def show_receipt(receipt_id: str) -> None:
     print("=" * 80)
 
 
+def _print_grouped(rows: list[dict], keys: list[str]) -> None:
+    """Table of aggregate rows: group columns, then count/errors/error rate/durations."""
+    header = "".join(f"{key.capitalize():<20}" for key in keys)
+    print(f"{header}{'Count':>7} {'Errors':>7} {'Err %':>7} {'Runs':>6} {'Avg s':>9} {'Max s':>9}")
+    print("-" * 80)
+    for row in rows:
+        cells = "".join(f"{str(row[key]):<20}" for key in keys)
+        avg = "-" if row["avg_duration_s"] is None else f"{row['avg_duration_s']:.1f}"
+        longest = "-" if row["max_duration_s"] is None else f"{row['max_duration_s']:.1f}"
+        print(f"{cells}{row['count']:>7} {row['errors']:>7} {row['error_rate'] * 100:>6.1f}% "
+              f"{row['runs']:>6} {avg:>9} {longest:>9}")
+
+
 def generate_report(
     by_agent: bool = False,
     by_phase: bool = False,
-    by_time: bool = False
+    by_time: bool = False,
+    group_by: Optional[list[str]] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    as_json: bool = False,
+    **filters: Optional[str],
 ) -> None:
-    """Generate summary reports."""
-    if not RECEIPTS_DIR.exists():
-        print("No receipts directory found.")
+    """
+    Generate summary reports from the index (no receipt bodies are read).
+
+    filters: agent/action/session values passed through to ReceiptQuery.aggregate.
+    """
+    query = _open_query()
+    if query is None:
+        if as_json:
+            empty = [] if group_by else {"total": 0, "by_agent_action": [], "by_hour": []}
+            print(json.dumps(empty, indent=2))
         return
 
-    receipts = []
-    for path in RECEIPTS_DIR.glob("*.json"):
-        receipt = load_receipt(path)
-        if receipt:
-            receipts.append(receipt)
+    if group_by:
+        rows = query.aggregate(group_by, since=since, until=until, **filters)
+        if as_json:
+            print(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            print("No receipts found.")
+            return
+        print(f"Receipt Audit Report - Total: {sum(r['count'] for r in rows)} receipt(s)")
+        print("=" * 80)
+        _print_grouped(rows, group_by)
+        print("=" * 80)
+        return
+
+    # Classic reports: one streaming pass keyed by (agent, action) and hour
+    rows = query.aggregate(["agent", "action"], since=since, until=until, **filters)
+    if by_time or as_json:
+        hourly = query.aggregate(["hour"], since=since, until=until, **filters)
+    total = sum(r["count"] for r in rows)
 
-    if not receipts:
+    if as_json:
+        print(json.dumps({"total": total, "by_agent_action": rows, "by_hour": hourly}, indent=2))
+        return
+
+    if not total:
         print("No receipts found.")
         return
 
-    print(f"Receipt Audit Report - Total: {len(receipts)} receipt(s)")
+    print(f"Receipt Audit Report - Total: {total} receipt(s)")
     print("=" * 80)
 
     if by_agent:
         # Group by agent_id
         by_agent_data: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
-        for receipt in receipts:
-            agent = receipt.get("agent_id", "unknown")
-            action = receipt.get("action", "unknown")
-            by_agent_data[agent][action] += 1
+        for row in rows:
+            by_agent_data[row["agent"]][row["action"]] += row["count"]
 
         print("\nReport by Agent:")
         print("-" * 80)
@@ -186,9 +260,8 @@ def generate_report(
     elif by_phase:
         # Group by action type (phase)
         by_phase_data: dict[str, int] = defaultdict(int)
-        for receipt in receipts:
-            action = receipt.get("action", "unknown")
-            by_phase_data[action] += 1
+        for row in rows:
+            by_phase_data[row["action"]] += row["count"]
 
         print("\nReport by Action Type:")
         print("-" * 80)
@@ -198,21 +271,10 @@ def generate_report(
 
     elif by_time:
         # Group by time range (hourly buckets)
-        by_time_data: dict[str, int] = defaultdict(int)
-        for receipt in receipts:
-            timestamp = receipt.get("timestamp", "")
-            try:
-                dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                hour_bucket = dt.strftime("%Y-%m-%d %H:00")
-                by_time_data[hour_bucket] += 1
-            except (ValueError, AttributeError):
-                by_time_data["unknown"] += 1
-
         print("\nReport by Time (hourly):")
         print("-" * 80)
-        for time_bucket in sorted(by_time_data.keys()):
-            count = by_time_data[time_bucket]
-            print(f"{time_bucket:<20} {count:>4}")
+        for row in hourly:
+            print(f"{row['hour']:<20} {row['count']:>4}")
 
     else:
         # Default: summary stats
@@ -221,9 +283,8 @@ def generate_report(
 
         # Count by action
         action_counts: dict[str, int] = defaultdict(int)
-        for receipt in receipts:
-            action = receipt.get("action", "unknown")
-            action_counts[action] += 1
+        for row in rows:
+            action_counts[row["action"]] += row["count"]
 
         for action in sorted(action_counts.keys()):
             count = action_counts[action]
@@ -232,9 +293,8 @@ def generate_report(
         # Count by agent
         print("\nBy Agent:")
         agent_counts: dict[str, int] = defaultdict(int)
-        for receipt in receipts:
-            agent = receipt.get("agent_id", "unknown")
-            agent_counts[agent] += 1
+        for row in rows:
+            agent_counts[row["agent"]] += row["count"]
 
         for agent in sorted(agent_counts.keys()):
             count = agent_counts[agent]
@@ -244,67 +304,34 @@ def generate_report(
 
 
 def cleanup_receipts(before_date: Optional[str] = None, dry_run: bool = False) -> None:
-    """Delete old receipts."""
-    if not RECEIPTS_DIR.exists():
-        print("No receipts directory found.")
+    """Delete sealed log segments whose receipts are all older than the cutoff."""
+    if not before_date:
+        print("Specify --before (e.g. '7d', '2025-01-01').")
         return
 
-    # Parse before_date
-    cutoff_date = None
-    if before_date:
-        # Support formats: "7d", "2025-01-01", etc.
-        if before_date.endswith("d"):
-            # Relative days
-            try:
-                days = int(before_date[:-1])
-                cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-            except ValueError:
-                print(f"Invalid date format: {before_date}")
-                return
-        else:
-            # Absolute date
-            try:
-                cutoff_date = datetime.fromisoformat(before_date)
-                if cutoff_date.tzinfo is None:
-                    cutoff_date = cutoff_date.replace(tzinfo=timezone.utc)
-            except ValueError:
-                print(f"Invalid date format: {before_date}")
-                return
-
-    receipts_to_delete = []
-    for path in RECEIPTS_DIR.glob("*.json"):
-        receipt = load_receipt(path)
-        if not receipt:
-            continue
-
-        # Check timestamp
-        timestamp = receipt.get("timestamp", "")
-        try:
-            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-            if cutoff_date and dt < cutoff_date:
-                receipts_to_delete.append(path)
-        except (ValueError, AttributeError):
-            # Invalid timestamp - optionally delete
-            pass
-
-    if not receipts_to_delete:
+    # Support formats: "7d", "2025-01-01", etc.
+    try:
+        cutoff = parse_when(before_date)
+    except ValueError:
+        print(f"Invalid date format: {before_date}")
+        return
+
+    log = receipt_log.ReceiptLog(receipt_log.LOG_DIR)
+    dropped = log.drop_before(cutoff, dry_run=dry_run)
+
+    if not dropped:
         print("No receipts to delete.")
         return
 
-    print(f"Found {len(receipts_to_delete)} receipt(s) to delete")
+    total = sum(count for _, count in dropped)
+    print(f"Found {total} receipt(s) in {len(dropped)} segment(s) to delete")
 
     if dry_run:
         print("\n[DRY RUN] Would delete:")
-        for path in receipts_to_delete:
-            print(f"  {path.name}")
+        for seq, count in dropped:
+            print(f"  {log.segment_path(seq).name} ({count} receipts)")
     else:
-        for path in receipts_to_delete:
-            try:
-                path.unlink()
-            except OSError:
-                print(f"Failed to delete: {path.name}")
-
-        print(f"Deleted {len(receipts_to_delete)} receipt(s)")
+        print(f"Deleted {total} receipt(s)")
 
 
 def main() -> None:
@@ -319,8 +346,6 @@ def main() -> None:
 
     # List command
     list_parser = subparsers.add_parser("list", help="List receipts")
-    list_parser.add_argument("--agent", help="Filter by agent ID")
-    list_parser.add_argument("--action", help="Filter by action type")
     list_parser.add_argument("--limit", type=int, default=50, help="Limit results (default: 50)")
 
     # Show command
@@ -333,6 +358,15 @@ def main() -> None:
     report_group.add_argument("--by-agent", action="store_true", help="Group by agent")
     report_group.add_argument("--by-phase", action="store_true", help="Group by phase/action")
     report_group.add_argument("--by-time", action="store_true", help="Group by time")
+    report_group.add_argument("--group-by", help=f"Comma-separated keys: {', '.join(GROUP_KEYS)}")
+
+    for sub in (list_parser, report_parser):
+        sub.add_argument("--agent", help="Filter by agent ID")
+        sub.add_argument("--action", help="Filter by action type")
+        sub.add_argument("--session", help="Filter by session ID")
+        sub.add_argument("--since", help="Only receipts at or after WHEN (e.g. '1d', '2025-01-01')")
+        sub.add_argument("--until", help="Only receipts before WHEN")
+        sub.add_argument("--json", action="store_true", help="Print JSON instead of a table")
 
     # Cleanup command
     cleanup_parser = subparsers.add_parser("cleanup", help="Delete old receipts")
@@ -345,12 +379,23 @@ def main() -> None:
         parser.print_help()
         sys.exit(1)
 
+    since = until = None
+    if args.command in ("list", "report"):
+        try:
+            since, until = parse_when(args.since), parse_when(args.until)
+        except ValueError as e:
+            parser.error(f"Invalid date: {e}")
+
     if args.command == "list":
-        list_receipts(args.agent, args.action, args.limit)
+        list_receipts(args.agent, args.action, args.limit, args.session, since, until, args.json)
     elif args.command == "show":
         show_receipt(args.receipt_id)
     elif args.command == "report":
-        generate_report(args.by_agent, args.by_phase, args.by_time)
+        group_by = [key.strip() for key in args.group_by.split(",") if key.strip()] if args.group_by else None
+        if group_by and any(key not in GROUP_KEYS for key in group_by):
+            parser.error(f"--group-by keys must be among: {', '.join(GROUP_KEYS)}")
+        generate_report(args.by_agent, args.by_phase, args.by_time, group_by, since, until, args.json,
+                        agent=args.agent, action=args.action, session=args.session)
     elif args.command == "cleanup":
         cleanup_receipts(args.before, args.dry_run)
 
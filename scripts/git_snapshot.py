@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Git Snapshot - Cached git state for the statusline, refreshed part by part.
+
+The statusline redraws constantly while agents work, and `git status` on a
+large repository costs hundreds of milliseconds. Each part of the git section
+is cached per repository in ~/.claude/.git-snapshots.json and keyed on the
+files that determine it, so a redraw with nothing changed costs a few stats:
+
+    part        value                           key
+    head        branch, commit_hash             .git/HEAD, the branch ref, packed-refs
+    remote      remote_url                      config
+    upstream    ahead_behind                    commit_hash, refs/remotes/origin/<branch>, packed-refs
+    status      (staged, modified, untracked)   .git/index, commit_hash, STATUS_TTL
+
+File keys are (mtime_ns, size, inode), or None for a missing file. Editing a
+tracked file or creating an untracked one does not touch the index, so the
+status part also expires after STATUS_TTL seconds. Only parts whose key
+changed are re-run; remote, upstream and status run in parallel.
+
+Tracked changes come from `git status --porcelain --untracked-files=no`. The
+untracked scan runs alongside it within UNTRACKED_BUDGET seconds; when it
+runs over, the last known untracked count is kept rather than stalling the
+redraw.
+
+Linked worktrees are followed through their `gitdir:` file and `commondir`.
+snapshot() returns None when no .git is found above cwd, and the caller falls
+back to running git directly.
+
+Usage:
+    from scripts.git_snapshot import snapshot
+
+    data = snapshot(cwd)  # {"git_dir", "branch", "commit_hash", "remote_url",
+                          #  "ahead_behind", "status_counts"} or None
+"""
+
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+CACHE_PATH = Path.home() / ".claude" / ".git-snapshots.json"
+CACHE_MAX_REPOS = 64
+STATUS_TTL = 5.0
+UNTRACKED_BUDGET = 0.5
+GIT_TIMEOUT = 3.0
+
+
+def _git(cwd: str, *args: str, timeout: float = GIT_TIMEOUT) -> Optional[str]:
+    """Stdout of a git command without trailing whitespace, '' on failure, None if it ran out of time."""
+    try:
+        r = subprocess.run(
+            ["git", "-C", cwd, *args],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    except OSError:
+        return ""
+    return r.stdout.rstrip() if r.returncode == 0 else ""  # Keep porcelain's leading columns
+
+
+def _file_key(path: Path) -> Optional[list]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def find_git_dir(cwd: str) -> Optional[tuple[Path, Path, Path]]:
+    """(worktree root, git dir, common dir) of the repository containing cwd, or None."""
+    try:
+        current = Path(cwd).resolve()
+    except (OSError, RuntimeError):
+        return None
+    for root in (current, *current.parents):
+        dot_git = root / ".git"
+        if dot_git.is_dir():
+            git_dir = dot_git
+        elif dot_git.is_file():
+            try:
+                line = dot_git.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            if not line.startswith("gitdir:"):
+                return None
+            git_dir = (root / line[len("gitdir:"):].strip()).resolve()
+        else:
+            continue
+        try:
+            common = (git_dir / (git_dir / "commondir").read_text(encoding="utf-8").strip()).resolve()
+        except OSError:
+            common = git_dir
+        return root, git_dir, common
+    return None
+
+
+def _read_branch(git_dir: Path) -> Optional[str]:
+    """Branch named by HEAD ('' when detached), or None if HEAD is unreadable."""
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else ""
+
+
+# =============================================================================
+# Cache file
+# =============================================================================
+
+def _load_cache() -> dict:
+    try:
+        data = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_cache(cache: dict) -> None:
+    while len(cache) > CACHE_MAX_REPOS:
+        cache.pop(next(iter(cache)))
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_PATH.with_name(f"{CACHE_PATH.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        pass  # Cache only: the snapshot is still current for this redraw
+
+
+# =============================================================================
+# Parts
+# =============================================================================
+
+def _count_tracked(output: str) -> tuple[int, int]:
+    staged = modified = 0
+    for line in output.splitlines():
+        if len(line) < 2:
+            continue
+        if line[0] not in (" ", "?", "!"):
+            staged += 1
+        if line[1] not in (" ", "?", "!"):
+            modified += 1
+    return staged, modified
+
+
+def _refresh_status(cwd: str, previous: Optional[dict]) -> Optional[list]:
+    """[staged, modified, untracked]; untracked is carried over if its scan runs over budget."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        tracked = pool.submit(_git, cwd, "status", "--porcelain", "--untracked-files=no")
+        others = pool.submit(
+            _git, cwd, "ls-files", "--others", "--exclude-standard", "--directory",
+            "--no-empty-directory", timeout=UNTRACKED_BUDGET,
+        )
+        tracked_out, others_out = tracked.result(), others.result()
+    if tracked_out is None:
+        return None  # Keep the previous counts rather than showing a clean tree
+    staged, modified = _count_tracked(tracked_out)
+    if others_out is None:
+        counts = (previous or {}).get("counts") or [0, 0, 0]
+        untracked = counts[2]
+    else:
+        untracked = len(others_out.splitlines())
+    return [staged, modified, untracked]
+
+
+def _refresh_upstream(cwd: str, branch: str) -> str:
+    if not branch:
+        return ""
+    if not _git(cwd, "rev-parse", "--verify", "--quiet", f"refs/remotes/origin/{branch}"):
+        return ""
+    return _git(cwd, "rev-list", "--left-right", "--count", f"origin/{branch}...HEAD") or ""
+
+
+def snapshot(cwd: str, now: Optional[float] = None) -> Optional[dict]:
+    """git_batch-shaped results for cwd from the snapshot cache, or None outside a found repo."""
+    found = find_git_dir(cwd)
+    if found is None:
+        return None
+    root, git_dir, common = found
+    branch = _read_branch(git_dir)
+    if branch is None:
+        return None
+    now = time.time() if now is None else now
+
+    cache = _load_cache()
+    repo_key = str(root)
+    entry = cache.pop(repo_key, None)
+    if not isinstance(entry, dict):
+        entry = {}
+    dirty = False
+
+    packed = _file_key(common / "packed-refs")
+    head_key = [
+        _file_key(git_dir / "HEAD"),
+        _file_key(common / "refs" / "heads" / branch) if branch else None,
+        packed,
+    ]
+    head = entry.get("head")
+    if not isinstance(head, dict) or head.get("key") != head_key:
+        head = {"key": head_key, "commit_hash": _git(cwd, "rev-parse", "--short", "HEAD") or ""}
+        entry["head"] = head
+        dirty = True
+    commit_hash = head["commit_hash"]
+
+    remote_key = [_file_key(common / "config")]
+    upstream_key = [
+        branch,
+        commit_hash,
+        _file_key(common / "refs" / "remotes" / "origin" / branch) if branch else None,
+        packed,
+    ]
+    status_key = [_file_key(git_dir / "index"), commit_hash]
+
+    remote = entry.get("remote")
+    upstream = entry.get("upstream")
+    status = entry.get("status")
+    stale_remote = not isinstance(remote, dict) or remote.get("key") != remote_key
+    stale_upstream = not isinstance(upstream, dict) or upstream.get("key") != upstream_key
+    stale_status = (
+        not isinstance(status, dict)
+        or status.get("key") != status_key
+        or now - status.get("at", 0) >= STATUS_TTL
+    )
+
+    if stale_remote or stale_upstream or stale_status:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            remote_f = pool.submit(_git, cwd, "config", "--get", "remote.origin.url") if stale_remote else None
+            upstream_f = pool.submit(_refresh_upstream, cwd, branch) if stale_upstream else None
+            status_f = pool.submit(
+                _refresh_status, cwd, status if isinstance(status, dict) else None
+            ) if stale_status else None
+            if remote_f is not None:
+                remote = {"key": remote_key, "remote_url": remote_f.result() or ""}
+                entry["remote"] = remote
+            if upstream_f is not None:
+                upstream = {"key": upstream_key, "ahead_behind": upstream_f.result()}
+                entry["upstream"] = upstream
+            if status_f is not None:
+                counts = status_f.result()
+                if counts is not None:
+                    # git status refreshes the index's stat data, so key on the index it left
+                    status_key = [_file_key(git_dir / "index"), commit_hash]
+                    status = {"key": status_key, "at": now, "counts": counts}
+                    entry["status"] = status
+        dirty = True
+
+    cache[repo_key] = entry  # Most recently used last
+    if dirty:
+        _save_cache(cache)
+
+    counts = status.get("counts") if isinstance(status, dict) else None
+    return {
+        "git_dir": str(git_dir),
+        "branch": branch,
+        "commit_hash": commit_hash,
+        "remote_url": remote.get("remote_url", ""),
+        "ahead_behind": upstream.get("ahead_behind", ""),
+        "status": "",
+        "status_counts": tuple(counts) if counts else (0, 0, 0),
+    }
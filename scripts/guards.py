@@ -32,6 +32,8 @@ from pathlib import Path
 # sys.path needed when invoked as hook: python scripts/guards.py
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from hooks.hook_trace import traced
+
 # =============================================================================
 # Stdin Timeout - Prevent hanging on missing stdin (cross-platform)
 # =============================================================================
@@ -200,12 +202,13 @@ def plan_guardian() -> None:
     if not state_path.exists():
         sys.exit(0)
 
+    from scripts.ralph_phase import load_state
+
     try:
-        with open(state_path) as f:
-            state = json.load(f)
-        if not state.get("guardianEnabled", False):
+        state = load_state(state_path)
+        if not state or not state.get("guardianEnabled", False):
             sys.exit(0)
-    except (json.JSONDecodeError, OSError):
+    except (ValueError, OSError):
         sys.exit(0)
 
     # Check if plan digest exists
@@ -1127,9 +1130,12 @@ def ralph_enforcer() -> None:
     state_path = cwd / ".claude" / "ralph" / "state.json"
     state_path.parent.mkdir(parents=True, exist_ok=True)
 
+    from scripts.ralph_phase import state_journal_path
+
     try:
         with open(state_path, "w") as f:
             json.dump(state, f, indent=2)
+        state_journal_path(state_path).unlink(missing_ok=True)  # Deltas of the previous session
     except OSError:
         pass
 
@@ -1306,9 +1312,23 @@ def bypass_permissions_guard() -> None:
     except json.JSONDecodeError:
         sys.exit(0)
 
+    result = evaluate_bypass_permissions(hook_input)
+    if result:
+        print(json.dumps(result))
+    sys.exit(0)
+
+
+def evaluate_bypass_permissions(hook_input: dict) -> dict | None:
+    """
+    Decide a Bash command under bypass-permissions mode without side effects.
+
+    Returns:
+        A deny hookSpecificOutput dict, or None to pass through (allowed, or
+        bypass mode not active).
+    """
     tool_name = hook_input.get("tool_name", "")
     if tool_name != "Bash":
-        sys.exit(0)
+        return None
 
     # Check if bypass-permissions mode is active
     permission_mode = hook_input.get("permission_mode", "")
@@ -1321,7 +1341,7 @@ def bypass_permissions_guard() -> None:
 
     if not is_bypass_mode:
         # Not in bypass mode, pass through
-        sys.exit(0)
+        return None
 
     # Detect profile: nightshift agents get broad dev permissions
     is_nightshift = os.environ.get("NIGHTSHIFT_AGENT", "").lower() in ("true", "1", "yes")
@@ -1331,22 +1351,21 @@ def bypass_permissions_guard() -> None:
     command = tool_input.get("command", "")
 
     if not command:
-        sys.exit(0)
+        return None
 
-    def _deny(reason: str):
-        """Helper: emit deny decision and exit."""
-        print(json.dumps({
+    def _deny(reason: str) -> dict:
+        """Helper: build deny decision."""
+        return {
             "hookSpecificOutput": {
                 "hookEventName": "PreToolUse",
                 "permissionDecision": "deny",
                 "permissionDecisionReason": reason
             }
-        }))
-        sys.exit(0)
+        }
 
-    def _deny_tty_confirm(command_preview: str):
+    def _deny_tty_confirm(command_preview: str) -> dict:
         """Helper: block but instruct Claude to use AskUserQuestion then retry with TTY_CONFIRMED=1 prefix."""
-        print(json.dumps({
+        return {
             "hookSpecificOutput": {
                 "hookEventName": "PreToolUse",
                 "permissionDecision": "deny",
@@ -1357,8 +1376,7 @@ def bypass_permissions_guard() -> None:
                     f"3. If user denies, do NOT retry."
                 )
             }
-        }))
-        sys.exit(0)
+        }
 
     # ── Universal blocklist (both profiles) ──────────────────────────
     # Commands that are NEVER allowed in bypass mode regardless of profile
@@ -1388,7 +1406,7 @@ def bypass_permissions_guard() -> None:
 
     for pattern in universal_blocklist:
         if re.search(pattern, command, re.IGNORECASE):
-            _deny(f"🚫 Bypass-permissions: BLOCKED destructive command")
+            return _deny(f"🚫 Bypass-permissions: BLOCKED destructive command")
 
     # ── Branch protection (both profiles) ────────────────────────────
     # Never allow push/checkout/operations targeting main or *-dev branches
@@ -1408,7 +1426,7 @@ def bypass_permissions_guard() -> None:
                 if re.match(r"^git\s+push\b", command, re.IGNORECASE) and \
                    re.search(r"\S+-night-dev\b", command):
                     break
-                _deny(f"🚫 Bypass-permissions: BLOCKED operation on protected branch (main/*-dev)")
+                return _deny(f"🚫 Bypass-permissions: BLOCKED operation on protected branch (main/*-dev)")
 
     # ═══════════════════════════════════════════════════════════════════
     # PROFILE: Nightshift (broad dev permissions)
@@ -1419,7 +1437,7 @@ def bypass_permissions_guard() -> None:
 
         # Block Docker container operations (build is OK, run/exec risky)
         if re.match(r"^docker\s+(run|exec|attach|cp)\b", command, re.IGNORECASE):
-            _deny("🚫 Nightshift: Docker run/exec not allowed (use Docker in dev worktree only)")
+            return _deny("🚫 Nightshift: Docker run/exec not allowed (use Docker in dev worktree only)")
 
         # Block operations outside nightshift worktree
         # Nightshift worktrees are at D:/source/{repo}/{repo}-night-dev/
@@ -1434,7 +1452,7 @@ def bypass_permissions_guard() -> None:
                     claude_home = str(_claude_home.resolve()).replace("\\", "/").lower()
                     # Allow paths within worktree or ~/.claude
                     if not (resolved.startswith(wt_resolved) or resolved.startswith(claude_home)):
-                        _deny(f"🚫 Nightshift: Path outside worktree boundary: {p[:100]}")
+                        return _deny(f"🚫 Nightshift: Path outside worktree boundary: {p[:100]}")
                 except (OSError, ValueError):
                     pass
 
@@ -1545,10 +1563,10 @@ def bypass_permissions_guard() -> None:
 
         for pattern in nightshift_allowlist + shared_readonly:
             if re.match(pattern, command, re.IGNORECASE):
-                sys.exit(0)
+                return None
 
         # Nightshift: block unknown commands (conservative)
-        _deny(f"🚫 Nightshift guard: Command not in dev allowlist\n\nCommand: {command[:200]}")
+        return _deny(f"🚫 Nightshift guard: Command not in dev allowlist\n\nCommand: {command[:200]}")
 
     # ═══════════════════════════════════════════════════════════════════
     # PROFILE: default (restrictive — read-only + python)
@@ -1590,10 +1608,10 @@ def bypass_permissions_guard() -> None:
             if tty_confirmed:
                 # User already confirmed via AskUserQuestion — allow through
                 # (universal blocklist + branch protection already checked above)
-                sys.exit(0)
+                return None
             else:
                 # Block and instruct Claude to confirm with user first
-                _deny_tty_confirm(core_cmd)
+                return _deny_tty_confirm(core_cmd)
 
     # Default allowlist for bypass-permissions mode
     default_allowlist = [
@@ -1625,68 +1643,55 @@ def bypass_permissions_guard() -> None:
     for pattern in default_allowlist:
         # Match against both full command and cd-stripped version
         if re.match(pattern, command, re.IGNORECASE) or re.match(pattern, core_cmd, re.IGNORECASE):
-            sys.exit(0)
+            return None
 
     # Default: block unknown commands
-    _deny(f"🚫 Bypass-permissions guard BLOCKED: Command not in allowlist\n\nAllowed: python scripts, git read-only, ls, cat, etc.\nFor dev tooling, use NIGHTSHIFT_AGENT=1\n\nCommand: {command[:200]}")
+    return _deny(f"🚫 Bypass-permissions guard BLOCKED: Command not in allowlist\n\nAllowed: python scripts, git read-only, ls, cat, etc.\nFor dev tooling, use NIGHTSHIFT_AGENT=1\n\nCommand: {command[:200]}")
 
 
 # =============================================================================
 # Main Entry Point
 # =============================================================================
 
+def _ralph_agent_tracker_redirect() -> None:
+    """DEPRECATED: Moved to scripts/ralph.py agent-tracker (dispatched in-process)."""
+    from scripts.ralph_hooks import agent_tracker
+    agent_tracker()
+
+
+# Mode -> handler table (also used by hooks/guards.py to dispatch in-process)
+HANDLERS = {
+    # protect_files() removed - was causing TTY issues
+    "protect": lambda: sys.exit(0),
+    "guardian": plan_guardian,
+    "plan-comments": plan_comments,
+    "plan-write-check": plan_write_check,
+    "skill-parser": skill_parser,
+    "insights-reminder": insights_reminder,
+    "ralph-enforcer": ralph_enforcer,
+    "ralph-agent-tracker": _ralph_agent_tracker_redirect,
+    "skill-interceptor": skill_interceptor,
+    "skill-validator": skill_validator,
+    "plan-rename-tracker": track_plan_rename,
+    "auto-ralph": auto_ralph_hook,
+    "quality-deprecation": quality_deprecation_hook,
+    "fs-guard": fs_guard,
+    "bypass-permissions-guard": bypass_permissions_guard,
+}
+
+
+@traced("guards.py")
 def main() -> None:
     """Main entry point with mode dispatch."""
     if len(sys.argv) < 2:
         # Missing args - exit gracefully to avoid hook errors
         sys.exit(0)
 
-    mode = sys.argv[1]
-    if mode == "protect":
-        # protect_files() removed - was causing TTY issues
-        sys.exit(0)
-    elif mode == "guardian":
-        plan_guardian()
-    elif mode == "plan-comments":
-        plan_comments()
-    elif mode == "plan-write-check":
-        plan_write_check()
-    elif mode == "skill-parser":
-        skill_parser()
-    elif mode == "insights-reminder":
-        insights_reminder()
-    elif mode == "ralph-enforcer":
-        ralph_enforcer()
-    elif mode == "ralph-agent-tracker":
-        # DEPRECATED: Moved to scripts/ralph.py agent-tracker
-        # Redirect to new location for backward compatibility
-        import subprocess as _sp
-        _ralph_script = str(_claude_home / "scripts" / "ralph.py")
-        _result = _sp.run(
-            [sys.executable, _ralph_script, "agent-tracker"],
-            input=sys.stdin.buffer.read() if not sys.stdin.isatty() else b"",
-            capture_output=True
-        )
-        if _result.stdout:
-            sys.stdout.buffer.write(_result.stdout)
-        sys.exit(_result.returncode)
-    elif mode == "skill-interceptor":
-        skill_interceptor()
-    elif mode == "skill-validator":
-        skill_validator()
-    elif mode == "plan-rename-tracker":
-        track_plan_rename()
-    elif mode == "auto-ralph":
-        auto_ralph_hook()
-    elif mode == "quality-deprecation":
-        quality_deprecation_hook()
-    elif mode == "fs-guard":
-        fs_guard()
-    elif mode == "bypass-permissions-guard":
-        bypass_permissions_guard()
-    else:
+    handler = HANDLERS.get(sys.argv[1])
+    if handler is None:
         # Unknown mode - exit gracefully to avoid hook errors
         sys.exit(0)
+    handler()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Hook Latency Benchmark - Replay recorded hook payloads through settings.json hooks.
+
+Builds a throwaway CLAUDE home (copies of hooks/, scripts/, skills/, agents/ and
+settings.json under a temp $HOME), replays every payload in the corpus through
+each blocking command that settings.json registers for that event/matcher, and
+reports wall time, interpreter startup share and file I/O per hook and per
+event. Nothing touches the real ~/.claude and no network is needed.
+
+Usage:
+    hook-bench.py [--runs N] [--warmup N] [--corpus PATH] [--settings PATH]
+                  [--event EVENT] [--hook SUBSTR] [--budgets PATH] [--no-budgets]
+                  [--daemon] [--include-async] [--json] [--save PATH]
+
+Metrics:
+    p50/p95/p99   Wall time (ms) of the full shell command, nearest-rank
+    startup%      Bare `python -c pass` p50 as a share of the hook's p50
+    io KiB        read+write bytes per run from /proc/self/io (Linux only),
+                  minus the stdin payload and captured stdout/stderr
+    event p*      Per payload, the slowest matching hook (Claude Code runs
+                  matching hooks in parallel)
+
+Corpus:
+    JSONL, one {"event": "PreToolUse", "payload": {...}} per line (or a
+    directory of such files). "{project}" and "{home}" in payload strings
+    expand to the temp project dir / temp $HOME. session_id, cwd,
+    transcript_path and hook_event_name are filled in when missing.
+    An optional "git": {"branch": "feature/x", "staged": {".env": "..."}}
+    puts the scratch project on that branch with those files staged while
+    the record runs (default: branch main, nothing staged), so git.py's
+    commit checks see the state they gate on.
+
+Budgets (exit 1 when exceeded):
+    {"default": {"p95_ms": 1500},
+     "hooks": {"hooks/hookd.py run hooks/bash-pretool.py": {"p95_ms": 600}},
+     "events": {"PreToolUse:Bash": {"p95_ms": 600}}}
+
+Examples:
+    # Gate a guards.py / security-gate.py / git.py change
+    hook-bench.py --runs 20
+
+    # Only the Bash pipeline, machine-readable
+    hook-bench.py --event PreToolUse --hook bash-pretool --json
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CLAUDE_ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = CLAUDE_ROOT / "scripts" / "hook-bench"
+DEFAULT_CORPUS = BENCH_DIR / "corpus.jsonl"
+DEFAULT_BUDGETS = BENCH_DIR / "budgets.json"
+
+# Copied into the temp CLAUDE home (hooks resolve siblings relative to themselves)
+HOME_ENTRIES = ("hooks", "scripts", "skills", "agents", "output-styles", "settings.json")
+HOOK_PREFIX = "python ${USERPROFILE:-$HOME}/.claude/"
+
+# Field each event's matcher is tested against (others ignore the matcher)
+MATCHER_FIELDS = {
+    "PreToolUse": "tool_name",
+    "PostToolUse": "tool_name",
+    "PermissionRequest": "tool_name",
+    "UserPromptSubmit": "prompt",
+    "SessionStart": "source",
+    "PreCompact": "trigger",
+    "Notification": "notification_type",
+}
+
+# Appends "<rchar> <wchar>" for every interpreter that exits normally
+SITECUSTOMIZE = '''
+import atexit
+import os
+
+
+def _hook_bench_io():
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        with open(os.environ["HOOK_BENCH_IO_LOG"], "a") as f:
+            f.write(f"{counters['rchar']} {counters['wchar']}\\n")
+    except (OSError, KeyError, ValueError):
+        pass
+
+
+if os.environ.get("HOOK_BENCH_IO_LOG"):
+    atexit.register(_hook_bench_io)
+'''
+
+sys.path.insert(0, str(CLAUDE_ROOT))
+from hooks.hookd import percentile
+
+
+# =============================================================================
+# Corpus & Settings
+# =============================================================================
+
+def load_corpus(path: Path) -> list[dict]:
+    """Load {"event", "payload"} records from a JSONL file or directory of them."""
+    files = sorted(path.glob("*.json*")) if path.is_dir() else [path]
+    records = []
+    for file in files:
+        for line in file.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "event" in record and isinstance(record.get("payload"), dict):
+                records.append(record)
+    return records
+
+
+def hook_id(command: str) -> str:
+    """Short display name: the command relative to ~/.claude, without hookd's client --timeout."""
+    name = command[len(HOOK_PREFIX):] if command.startswith(HOOK_PREFIX) else command
+    return re.sub(r"^(hooks/hookd\.py run) --timeout \S+", r"\1", name)
+
+
+def matcher_matches(matcher: str | None, event: str, payload: dict) -> bool:
+    """Apply a settings.json matcher to a payload (tool names match whole, prompts as prefix)."""
+    if not matcher or matcher == "*" or event not in MATCHER_FIELDS:
+        return True
+    value = str(payload.get(MATCHER_FIELDS[event], ""))
+    try:
+        if event == "UserPromptSubmit":
+            return re.match(matcher, value) is not None
+        return re.fullmatch(matcher, value) is not None
+    except re.error:
+        return matcher == value
+
+
+def select_hooks(settings: dict, event: str, payload: dict, include_async: bool = False) -> list[dict]:
+    """Return the settings.json hook entries that fire for this payload."""
+    selected = []
+    for group in settings.get("hooks", {}).get(event, []):
+        if not matcher_matches(group.get("matcher"), event, payload):
+            continue
+        for hook in group.get("hooks", []):
+            if hook.get("type", "command") != "command":
+                continue
+            if hook.get("async") and not include_async:
+                continue
+            selected.append(hook)
+    return selected
+
+
+def runnable(command: str) -> bool:
+    """Only python hooks are benchmarked (node/external tools are not available offline)."""
+    return command.split(" ", 1)[0] in ("python", "python3")
+
+
+def expand(value, mapping: dict):
+    """Recursively substitute {project}/{home} placeholders in payload strings."""
+    if isinstance(value, str):
+        for key, replacement in mapping.items():
+            value = value.replace("{" + key + "}", replacement)
+        return value
+    if isinstance(value, dict):
+        return {k: expand(v, mapping) for k, v in value.items()}
+    if isinstance(value, list):
+        return [expand(v, mapping) for v in value]
+    return value
+
+
+# =============================================================================
+# Sandbox
+# =============================================================================
+
+class BenchHome:
+    """Temp $HOME with a copied CLAUDE home, a git project dir and an I/O probe."""
+
+    def __init__(self, settings_path: Path, daemon: bool = False):
+        self.root = Path(tempfile.mkdtemp(prefix="hook-bench-"))
+        self.home = self.root / "home"
+        self.claude = self.home / ".claude"
+        self.project = self.root / "project"
+        self.io_log = self.root / "io.log"
+        self.daemon = daemon
+
+        self.claude.mkdir(parents=True)
+        ignore = shutil.ignore_patterns("__pycache__", "*.pyc", "test_*.py")
+        for name in HOME_ENTRIES:
+            source = CLAUDE_ROOT / name
+            if source.is_dir():
+                shutil.copytree(source, self.claude / name, ignore=ignore)
+            elif source.exists():
+                shutil.copy2(source, self.claude / name)
+        if settings_path.resolve() != (CLAUDE_ROOT / "settings.json").resolve():
+            shutil.copy2(settings_path, self.claude / "settings.json")
+
+        site = self.root / "site"
+        site.mkdir()
+        (site / "sitecustomize.py").write_text(SITECUSTOMIZE, encoding="utf-8")
+
+        (self.project / "src").mkdir(parents=True)
+        (self.project / "src" / "app.py").write_text("x = 1\n", encoding="utf-8")
+        self.transcript = self.project / "transcript.jsonl"
+        self.transcript.write_text("", encoding="utf-8")
+        self._git("init", "-q")
+        self._git("symbolic-ref", "HEAD", "refs/heads/main")
+        self._git("add", "-A")
+        self._git("-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", "init")
+        self._git_state: dict = {}
+        self._staged: list[Path] = []
+
+        env = {k: v for k, v in os.environ.items() if not k.startswith(("CLAUDE_", "RALPH_"))}
+        env.pop("USERPROFILE", None)
+        env.update({
+            "HOME": str(self.home),
+            "CLAUDE_HOME": str(self.claude),
+            "CLAUDE_PROJECT_DIR": str(self.project),
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(site), os.environ.get("PYTHONPATH")])),
+            "HOOK_BENCH_IO_LOG": str(self.io_log),
+            "GIT_CONFIG_NOSYSTEM": "1",
+        })
+        if not daemon:
+            env["CLAUDE_HOOKD_DISABLE"] = "1"
+        self.env = env
+
+    def _git(self, *args: str) -> None:
+        subprocess.run(["git", *args], cwd=self.project, capture_output=True, check=False)
+
+    def set_git_state(self, state: dict | None) -> None:
+        """Check out state["branch"] (default main) and stage state["staged"] files, replacing the last state."""
+        state = state or {}
+        if state == self._git_state:
+            return
+        self._git("reset", "-q")
+        for path in self._staged:
+            path.unlink(missing_ok=True)
+        self._staged = []
+        self._git("checkout", "-q", "-B", state.get("branch", "main"))
+        for name, content in state.get("staged", {}).items():
+            path = self.project / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+            self._staged.append(path)
+            self._git("add", "--", name)
+        self._git_state = state
+
+    def __enter__(self) -> "BenchHome":
+        if self.daemon:
+            self.run_command(f"{HOOK_PREFIX}hooks/hookd.py start", b"", timeout=10)
+            time.sleep(0.5)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.daemon:
+            self.run_command(f"{HOOK_PREFIX}hooks/hookd.py stop", b"", timeout=10)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def payload_for(self, event: str, payload: dict) -> dict:
+        """Fill in the fields Claude Code always sends, pointing at the sandbox."""
+        data = expand(payload, {"project": str(self.project), "home": str(self.home)})
+        data.setdefault("session_id", "hook-bench")
+        data.setdefault("transcript_path", str(self.transcript))
+        data.setdefault("permission_mode", "default")
+        data["cwd"] = str(self.project)
+        data["hook_event_name"] = event
+        return data
+
+    def run_command(self, command: str, stdin: bytes, timeout: float) -> dict:
+        """Run one hook command through the shell; return wall ms, exit code and I/O bytes."""
+        self.io_log.write_text("", encoding="utf-8")
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                command, shell=True, input=stdin, capture_output=True,
+                cwd=self.project, env=self.env, timeout=timeout,
+            )
+            code, stdout, stderr = proc.returncode, proc.stdout, proc.stderr
+        except subprocess.TimeoutExpired as e:
+            code, stdout, stderr = "timeout", e.stdout or b"", e.stderr or b""
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        io_bytes = None
+        counters = self.io_log.read_text(encoding="utf-8").split()
+        if counters:
+            total = sum(int(n) for n in counters)
+            io_bytes = max(0, total - len(stdin) - len(stdout) - len(stderr))
+        return {"ms": wall_ms, "code": code, "io_bytes": io_bytes}
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+    }
+
+
+def run_bench(
+    corpus: list[dict],
+    settings_path: Path,
+    runs: int = 10,
+    warmup: int = 1,
+    event_filter: str | None = None,
+    hook_filter: str | None = None,
+    include_async: bool = False,
+    daemon: bool = False,
+) -> dict:
+    """Replay corpus through settings.json hooks; return the report dict."""
+    settings = json.loads(settings_path.read_text(encoding="utf-8"))
+    hooks: dict[str, dict] = {}
+    events: dict[str, list[float]] = {}
+    skipped: set[str] = set()
+
+    with BenchHome(settings_path, daemon=daemon) as sandbox:
+        startup = [
+            sandbox.run_command("python -c pass", b"", timeout=10)["ms"]
+            for _ in range(max(runs, 3))
+        ]
+        startup_p50 = percentile(sorted(startup), 50)
+
+        for record in corpus:
+            event = record["event"]
+            if event_filter and event != event_filter:
+                continue
+            sandbox.set_git_state(record.get("git"))
+            payload = sandbox.payload_for(event, record["payload"])
+            stdin = json.dumps(payload).encode("utf-8")
+            matcher_value = payload.get(MATCHER_FIELDS.get(event, ""), "")
+            event_key = f"{event}:{matcher_value}" if event in ("PreToolUse", "PostToolUse") else event
+
+            selected = []
+            for hook in select_hooks(settings, event, payload, include_async):
+                name = hook_id(hook["command"])
+                if hook_filter and hook_filter not in name:
+                    continue
+                if not runnable(hook["command"]):
+                    skipped.add(name)
+                    continue
+                selected.append((name, hook))
+            if not selected:
+                continue
+
+            for iteration in range(warmup + runs):
+                slowest = 0.0
+                for name, hook in selected:
+                    result = sandbox.run_command(hook["command"], stdin, timeout=hook.get("timeout", 60))
+                    slowest = max(slowest, result["ms"])
+                    if iteration < warmup:
+                        continue
+                    stats = hooks.setdefault(name, {"samples": [], "io": [], "errors": 0})
+                    stats["samples"].append(result["ms"])
+                    if result["io_bytes"] is not None:
+                        stats["io"].append(result["io_bytes"])
+                    if result["code"] not in (0, 2):
+                        stats["errors"] += 1
+                if iteration >= warmup:
+                    events.setdefault(event_key, []).append(slowest)
+
+    report = {
+        "runs": runs,
+        "startup_p50_ms": round(startup_p50, 2),
+        "hooks": {},
+        "events": {key: summarize(samples) for key, samples in sorted(events.items())},
+        "skipped": sorted(skipped),
+    }
+    for name, stats in sorted(hooks.items()):
+        entry = summarize(stats["samples"])
+        entry["startup_share"] = round(min(1.0, startup_p50 / entry["p50_ms"]), 3) if entry["p50_ms"] else None
+        entry["io_bytes"] = int(sum(stats["io"]) / len(stats["io"])) if stats["io"] else None
+        entry["errors"] = stats["errors"]
+        report["hooks"][name] = entry
+    return report
+
+
+def check_budgets(report: dict, budgets: dict) -> list[str]:
+    """Return one message per exceeded budget (hooks fall back to "default")."""
+    failures = []
+    default = budgets.get("default", {})
+    for section in ("hooks", "events"):
+        configured = budgets.get(section, {})
+        for name, stats in report[section].items():
+            limits = configured.get(name, default if section == "hooks" else {})
+            for metric, limit in limits.items():
+                actual = stats.get(metric)
+                if actual is not None and actual > limit:
+                    failures.append(f"{section[:-1]} {name}: {metric} {actual:.1f} > budget {limit}")
+    return failures
+
+
+def print_report(report: dict) -> None:
+    print(f"Interpreter startup p50: {report['startup_p50_ms']:.1f} ms  (runs per payload: {report['runs']})")
+    print()
+    width = max([len(n) for n in report["hooks"]] + [4])
+    print(f"{'Hook':<{width}}  {'n':>4}  {'p50':>8}  {'p95':>8}  {'p99':>8}  {'startup%':>8}  {'io KiB':>8}")
+    for name, s in report["hooks"].items():
+        share = f"{s['startup_share'] * 100:.0f}%" if s["startup_share"] is not None else "-"
+        io = f"{s['io_bytes'] / 1024:.1f}" if s["io_bytes"] is not None else "-"
+        errors = f"  ({s['errors']} errors)" if s["errors"] else ""
+        print(f"{name:<{width}}  {s['n']:>4}  {s['p50_ms']:>8.1f}  {s['p95_ms']:>8.1f}  {s['p99_ms']:>8.1f}  {share:>8}  {io:>8}{errors}")
+    print()
+    width = max([len(n) for n in report["events"]] + [5])
+    print(f"{'Event':<{width}}  {'n':>4}  {'p50':>8}  {'p95':>8}  {'p99':>8}")
+    for name, s in report["events"].items():
+        print(f"{name:<{width}}  {s['n']:>4}  {s['p50_ms']:>8.1f}  {s['p95_ms']:>8.1f}  {s['p99_ms']:>8.1f}")
+    if report["skipped"]:
+        print()
+        print("Skipped (not a python hook): " + ", ".join(report["skipped"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded hook payloads through settings.json hooks and report latency.",
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Measured runs per payload (default: 10)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per payload (default: 1)")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="JSONL file or directory")
+    parser.add_argument("--settings", type=Path, default=CLAUDE_ROOT / "settings.json")
+    parser.add_argument("--event", help="Only replay payloads for this event")
+    parser.add_argument("--hook", help="Only run hooks whose command contains this string")
+    parser.add_argument("--budgets", type=Path, default=DEFAULT_BUDGETS)
+    parser.add_argument("--no-budgets", action="store_true", help="Report only; never fail")
+    parser.add_argument("--daemon", action="store_true", help="Start hookd in the sandbox (warm path)")
+    parser.add_argument("--include-async", action="store_true", help="Also run async hooks")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--save", type=Path, help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run_bench(
+        load_corpus(args.corpus),
+        args.settings,
+        runs=args.runs,
+        warmup=args.warmup,
+        event_filter=args.event,
+        hook_filter=args.hook,
+        include_async=args.include_async,
+        daemon=args.daemon,
+    )
+
+    failures = []
+    if not args.no_budgets and args.budgets.exists():
+        failures = check_budgets(report, json.loads(args.budgets.read_text(encoding="utf-8")))
+    report["budget_failures"] = failures
+
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if failures:
+            print()
+            print("BUDGET EXCEEDED:")
+            for failure in failures:
+                print(f"  {failure}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
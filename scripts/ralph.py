@@ -22,7 +22,6 @@ Usage:
     ralph.py hook-subagent-stop      - Handle SubagentStop hook (reads stdin)
 """
 
-import asyncio
 import sys
 import json
 import os
@@ -34,12 +33,13 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Optional
 from dataclasses import dataclass, field, asdict
+from functools import cached_property
 
 # Import compat utilities (sys.path needed when invoked as hook: python scripts/ralph.py)
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from scripts.compat import file_lock, file_unlock, get_claude_home, setup_stdin_timeout, IS_WINDOWS
+from hooks.hook_trace import traced
 from enum import Enum
-from zoneinfo import ZoneInfo
 
 # Ralph library functions (merged from ralph_lib.py)
 
@@ -203,346 +203,48 @@ Begin working now.
 """
 
 
-# =============================================================================
-# Work-Stealing Queue Data Models
-# =============================================================================
+# Work-stealing queue lives in scripts/ralph_queue.py; re-exported for existing importers
+from scripts.ralph_queue import (  # noqa: F401
+    QueueTask,
+    TaskQueue,
+    TaskQueueParser,
+    WorkStealingQueue,
+    claim_next_task,
+    mark_task_complete,
+    open_queue,
+    release_task,
+)
 
-@dataclass
-class QueueTask:
-    """Task in the work-stealing queue."""
-    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
-    description: str = ""
-    status: str = "pending"
-    blocked_by: list = field(default_factory=list)
-    claimed_by: Optional[str] = None
-    iterations: int = 0
-    started_at: Optional[str] = None
-    completed_at: Optional[str] = None
 
-    def to_dict(self) -> dict:
-        return {
-            "id": self.id, "description": self.description, "status": self.status,
-            "blockedBy": self.blocked_by, "claimed_by": self.claimed_by,
-            "iterations": self.iterations, "started_at": self.started_at,
-            "completed_at": self.completed_at,
-        }
+# hooks.transaction pulls in portalocker; defer it until a write actually happens
+def atomic_write_json(*args, **kwargs):
+    """Deferred hooks.transaction.atomic_write_json."""
+    from hooks.transaction import atomic_write_json as _atomic_write_json
+    return _atomic_write_json(*args, **kwargs)
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "QueueTask":
-        return cls(
-            id=data["id"], description=data.get("description", ""),
-            status=data.get("status", "pending"), blocked_by=data.get("blockedBy", []),
-            claimed_by=data.get("claimed_by"), iterations=data.get("iterations", 0),
-            started_at=data.get("started_at"), completed_at=data.get("completed_at"),
-        )
 
-
-@dataclass
-class TaskQueue:
-    """Work-stealing task queue tied to a plan file (JSON and Markdown)."""
-    plan_id: str
-    plan_file: str
-    created_at: str
-    tasks: list = field(default_factory=list)
-
-    def to_dict(self) -> dict:
-        return {
-            "plan_id": self.plan_id, "plan_file": self.plan_file,
-            "created_at": self.created_at,
-            "tasks": [t.to_dict() if isinstance(t, QueueTask) else t for t in self.tasks],
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "TaskQueue":
-        return cls(
-            plan_id=data["plan_id"], plan_file=data["plan_file"],
-            created_at=data["created_at"],
-            tasks=[QueueTask.from_dict(t) if isinstance(t, dict) else t for t in data.get("tasks", [])],
-        )
-
-    def to_markdown(self) -> str:
-        """Generate markdown representation of task queue."""
-        completed = [t for t in self.tasks if t.status == "completed"]
-        in_progress = [t for t in self.tasks if t.status == "in_progress"]
-        pending = [t for t in self.tasks if t.status == "pending"]
-
-        lines = [
-            "---", f"plan_id: {self.plan_id}", f"created: {self.created_at}",
-            f"total_tasks: {len(self.tasks)}", f"completed: {len(completed)}", "---",
-            "", f"# Task Queue: {self.plan_id}", "",
-        ]
-
-        if completed:
-            lines.append("## Completed")
-            for task in completed:
-                agent_info = f" ({task.claimed_by})" if task.claimed_by else ""
-                lines.append(f"- [x] Task {task.id}: {task.description}{agent_info}")
-            lines.append("")
-
-        if in_progress:
-            lines.append("## In Progress")
-            for task in in_progress:
-                agent_info = f" ({task.claimed_by})" if task.claimed_by else ""
-                lines.append(f"- [/] Task {task.id}: {task.description}{agent_info}")
-            lines.append("")
-
-        if pending:
-            lines.append("## Pending")
-            for task in pending:
-                blocked_info = f" (blocked by: {', '.join(task.blocked_by)})" if task.blocked_by else ""
-                lines.append(f"- [ ] Task {task.id}: {task.description}{blocked_info}")
-            lines.append("")
-
-        return "\n".join(lines)
-
-    @classmethod
-    def from_markdown(cls, content: str, plan_id: str = None, plan_file: str = None) -> "TaskQueue":
-        """Parse markdown task queue into TaskQueue object."""
-        import re
-
-        lines = content.split("\n")
-        in_frontmatter = False
-        frontmatter = {}
-        tasks_section = []
-
-        for line in lines:
-            if line.strip() == "---":
-                if not in_frontmatter:
-                    in_frontmatter = True
-                    continue
-                else:
-                    in_frontmatter = False
-                    continue
-            if in_frontmatter:
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    frontmatter[key.strip()] = value.strip()
-            else:
-                tasks_section.append(line)
-
-        extracted_plan_id = plan_id or frontmatter.get("plan_id", "unknown")
-        extracted_plan_file = plan_file or frontmatter.get("plan_file", "")
-        created_at = frontmatter.get("created", datetime.now().isoformat())
-
-        tasks = []
-        task_pattern = re.compile(r"^-\s+\[([ x/])\]\s+Task\s+(\d+):\s+(.+?)(?:\s+\(([^)]+)\))?(?:\s+\(blocked by:\s+([^)]+)\))?$")
-
-        for line in tasks_section:
-            match = task_pattern.match(line.strip())
-            if match:
-                checkbox, task_id, description, claimed_by, blocked_by = match.groups()
-                if checkbox == "x":
-                    status = "completed"
-                elif checkbox == "/":
-                    status = "in_progress"
-                else:
-                    status = "pending"
-                blocked_list = [b.strip() for b in blocked_by.split(",")] if blocked_by else []
-                tasks.append(QueueTask(
-                    id=task_id, description=description.strip(),
-                    status=status, claimed_by=claimed_by, blocked_by=blocked_list,
-                ))
-
-        return cls(plan_id=extracted_plan_id, plan_file=extracted_plan_file, created_at=created_at, tasks=tasks)
+def transactional_update(*args, **kwargs):
+    """Deferred hooks.transaction.transactional_update."""
+    from hooks.transaction import transactional_update as _transactional_update
+    return _transactional_update(*args, **kwargs)
 
 
-# =============================================================================
-# Work-Stealing Queue
-# =============================================================================
-
-class WorkStealingQueue:
-    """File-based work-stealing queue with atomic task claiming.
-
-    Location: {project}/.claude/task-queue-{plan-id}.json or .md
-    Uses file locking to prevent race conditions.
-    """
-
-    QUEUE_DIR = ".claude"
-    LOCK_SUFFIX = ".lock"
-
-    def __init__(self, plan_id: str, plan_file: str, base_dir: Optional[Path] = None, format: str = "markdown"):
-        self.plan_id = plan_id
-        self.plan_file = plan_file
-        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
-        self.format = format
-
-        ext = ".md" if format == "markdown" else ".json"
-        self.queue_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}{ext}"
-        self.lock_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}{self.LOCK_SUFFIX}"
-
-    def _ensure_dir(self) -> None:
-        self.queue_path.parent.mkdir(parents=True, exist_ok=True)
-
-    def _acquire_lock(self) -> int:
-        self._ensure_dir()
-        fd = os.open(str(self.lock_path), os.O_CREAT | os.O_RDWR)
-        file_lock(fd)
-        return fd
-
-    def _release_lock(self, fd: int) -> None:
-        file_unlock(fd)
-        os.close(fd)
-
-    def load(self) -> TaskQueue:
-        if self.queue_path.exists():
-            try:
-                if self.format == "markdown":
-                    content = self.queue_path.read_text(encoding="utf-8")
-                    return TaskQueue.from_markdown(content, self.plan_id, self.plan_file)
-                else:
-                    with open(self.queue_path) as f:
-                        return TaskQueue.from_dict(json.load(f))
-            except (json.JSONDecodeError, KeyError, ValueError):
-                pass
-        return TaskQueue(plan_id=self.plan_id, plan_file=self.plan_file, created_at=datetime.now().isoformat(), tasks=[])
-
-    def save(self, queue: TaskQueue) -> None:
-        self._ensure_dir()
-        if self.format == "markdown":
-            self.queue_path.write_text(queue.to_markdown(), encoding="utf-8")
-        else:
-            with open(self.queue_path, "w") as f:
-                json.dump(queue.to_dict(), f, indent=2)
-
-    def claim_next_task(self, agent_id: str) -> Optional[QueueTask]:
-        """Atomically claim the next available task."""
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-            completed_ids = {t.id for t in queue.tasks if t.status == "completed"}
-            for task in queue.tasks:
-                if task.status != "pending" or task.claimed_by:
-                    continue
-                if not all(b in completed_ids for b in task.blocked_by):
-                    continue
-                task.claimed_by = agent_id
-                task.status = "in_progress"
-                task.started_at = datetime.now().isoformat()
-                task.iterations += 1
-                self.save(queue)
-                return task
-            return None
-        finally:
-            self._release_lock(fd)
-
-    def complete_task(self, task_id: str) -> bool:
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-            for task in queue.tasks:
-                if task.id == task_id:
-                    task.status = "completed"
-                    task.completed_at = datetime.now().isoformat()
-                    self.save(queue)
-                    return True
-            return False
-        finally:
-            self._release_lock(fd)
-
-    def mark_task_complete(self, task_id: str, agent_id: str) -> bool:
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-            for task in queue.tasks:
-                if task.id == task_id:
-                    task.status = "completed"
-                    task.completed_at = datetime.now().isoformat()
-                    self.save(queue)
-                    return True
-            return False
-        finally:
-            self._release_lock(fd)
-
-    def release_task(self, task_id: str) -> bool:
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-            for task in queue.tasks:
-                if task.id == task_id:
-                    task.status = "pending"
-                    task.claimed_by = None
-                    self.save(queue)
-                    return True
-            return False
-        finally:
-            self._release_lock(fd)
-
-    def add_task(self, task_id: str, description: str = "", blocked_by: list = None) -> QueueTask:
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-            task = QueueTask(id=task_id, description=description, status="pending", blocked_by=blocked_by or [])
-            queue.tasks.append(task)
-            self.save(queue)
-            return task
-        finally:
-            self._release_lock(fd)
-
-    def get_status(self) -> dict:
-        queue = self.load()
-        status_counts = {"pending": 0, "in_progress": 0, "completed": 0}
-        for task in queue.tasks:
-            status_counts[task.status] = status_counts.get(task.status, 0) + 1
-        return {"plan_id": queue.plan_id, "total_tasks": len(queue.tasks), **status_counts}
-
-    def reclaim_stale_tasks(self, timeout_seconds: int = 300) -> list:
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-            reclaimed = []
-            now = datetime.now()
-            for task in queue.tasks:
-                if task.status != "in_progress" or not task.started_at:
-                    continue
-                try:
-                    started = datetime.fromisoformat(task.started_at)
-                    if (now - started).total_seconds() > timeout_seconds:
-                        task.status = "pending"
-                        task.claimed_by = None
-                        reclaimed.append(task.id)
-                except (ValueError, TypeError):
-                    continue
-            if reclaimed:
-                self.save(queue)
-            return reclaimed
-        finally:
-            self._release_lock(fd)
-
-
-# Convenience functions for work-stealing queue
-def claim_next_task(agent_id: str, plan_id: str, plan_file: str, base_dir: Optional[Path] = None) -> Optional[QueueTask]:
-    """Atomic task claiming with file lock."""
-    return WorkStealingQueue(plan_id, plan_file, base_dir).claim_next_task(agent_id)
-
-
-def release_task(task_id: str, plan_id: str, plan_file: str, base_dir: Optional[Path] = None) -> bool:
-    """Release uncompleted task back to queue."""
-    return WorkStealingQueue(plan_id, plan_file, base_dir).release_task(task_id)
-
-
-def mark_task_complete(task_id: str, agent_id: str, plan_id: str, plan_file: str, base_dir: Optional[Path] = None) -> bool:
-    """Mark task as done."""
-    return WorkStealingQueue(plan_id, plan_file, base_dir).mark_task_complete(task_id, agent_id)
-
-
-# Import transaction primitives from hooks
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from hooks.transaction import atomic_write_json, transactional_update
-
-# Optional Redis import for real-time context injection
-try:
-    from redis import Redis
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
-    Redis = None  # type: ignore
-
 # =============================================================================
 # Redis Hybrid Context Injection
 # =============================================================================
 
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
+
+
+def _redis_client():
+    """Return a Redis client, or None when redis-py is not installed (imported lazily)."""
+    try:
+        from redis import Redis
+    except ImportError:
+        return None
+    return Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+
 CONTEXT_FILE_PATH = Path.home() / ".claude" / "ralph" / "pending-context.md"
 
 # =============================================================================
@@ -564,6 +266,29 @@ VERIFY_FIX_EFFORT: dict[str, str] = {
 # =============================================================================
 
 RECEIPTS_DIR = Path.home() / ".claude" / "ralph" / "receipts"
+RALPH_CHECKPOINT = Path.home() / ".claude" / "ralph" / "checkpoint.json"
+
+# (checkpoint mtime_ns, size) -> session_id, so a burst of receipts reads checkpoint.json once
+_receipt_session: tuple[tuple[int, int], str] | None = None
+
+
+def _checkpoint_session_id() -> str:
+    """Session id from ~/.claude/ralph/checkpoint.json, re-read only when the file changes."""
+    global _receipt_session
+    try:
+        stat = RALPH_CHECKPOINT.stat()
+    except OSError:
+        return "unknown"
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _receipt_session is None or _receipt_session[0] != key:
+        try:
+            state = json.loads(RALPH_CHECKPOINT.read_text(encoding="utf-8"))
+            session_id = state.get("session_id", "unknown")
+        except (json.JSONDecodeError, OSError, AttributeError):
+            session_id = "unknown"
+        _receipt_session = (key, session_id)
+    return _receipt_session[1]
+
 
 def write_receipt(
     agent_id: str,
@@ -585,7 +310,8 @@ def write_receipt(
         session_id: Ralph session ID (auto-detected if None)
 
     Returns:
-        True if receipt written successfully, False otherwise.
+        True if the receipt was appended to the receipt log (see
+        scripts/receipt_log.py), False otherwise.
 
     Receipt Format:
         {
@@ -602,41 +328,24 @@ def write_receipt(
         >>> write_receipt("agent-1", "agent_error", {"error": "timeout", "retry": 2})
     """
     try:
-        # Ensure receipts directory exists
-        RECEIPTS_DIR.mkdir(parents=True, exist_ok=True)
-
         # Auto-detect session_id from checkpoint if not provided
         if session_id is None:
-            checkpoint = Path.home() / ".claude" / "ralph" / "checkpoint.json"
-            if checkpoint.exists():
-                try:
-                    state = json.loads(checkpoint.read_text(encoding="utf-8"))
-                    session_id = state.get("session_id", "unknown")
-                except (json.JSONDecodeError, OSError):
-                    session_id = "unknown"
-            else:
-                session_id = "unknown"
+            session_id = _checkpoint_session_id()
 
-        # Generate receipt
-        timestamp = datetime.now(timezone.utc).isoformat()
         receipt = {
             "id": str(uuid.uuid4()),
-            "timestamp": timestamp,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "agent_id": agent_id,
             "action": action,
             "details": details,
             "session_id": session_id,
         }
 
-        # Write to timestamped JSON file
-        # Format: 20260206_120000_agent-1_file-edit.json
-        time_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-        # Sanitize action for filename (replace underscores with hyphens)
-        action_safe = action.replace("_", "-")
-        filename = f"{time_str}_{agent_id}_{action_safe}.json"
-        receipt_path = RECEIPTS_DIR / filename
-
-        receipt_path.write_text(json.dumps(receipt, indent=2), encoding="utf-8")
+        # Written now: hook processes may leave via os._exit, and hookd never exits
+        from scripts.receipt_log import get_receipt_log
+        log = get_receipt_log()
+        log.append(receipt)
+        log.flush()
         return True
 
     except (OSError, TypeError, ValueError):
@@ -662,9 +371,9 @@ def inject_context(context: str, agent_id: str | None = None) -> bool:
         >>> inject_context("Use the singleton pattern for the cache")  # broadcast
     """
     # Try Redis first for real-time delivery
-    if REDIS_AVAILABLE:
+    redis = _redis_client()
+    if redis is not None:
         try:
-            redis = Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
             channel = f"ralph:context:{agent_id or 'all'}"
             redis.publish(channel, context)
             redis.close()
@@ -698,9 +407,9 @@ def receive_context(agent_id: str, timeout: float = 0.1) -> str | None:
         Context string if available, None otherwise.
     """
     # Try Redis first
-    if REDIS_AVAILABLE:
+    redis = _redis_client()
+    if redis is not None:
         try:
-            redis = Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
             pubsub = redis.pubsub()
             pubsub.subscribe(f"ralph:context:{agent_id}", "ralph:context:all")
             message = pubsub.get_message(timeout=timeout)
@@ -1114,449 +823,6 @@ class RalphState:
             plan_verification_retries=data.get("plan_verification_retries", 0),
         )
 
-# =============================================================================
-# Work-Stealing Queue
-# =============================================================================
-
-@dataclass
-class QueueTask:
-    """Task in the work-stealing queue."""
-    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
-    description: str = ""  # Task description for markdown format
-    status: str = "pending"
-    blocked_by: list = field(default_factory=list)
-    claimed_by: Optional[str] = None
-    iterations: int = 0
-    started_at: Optional[str] = None
-    completed_at: Optional[str] = None
-
-    def to_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "description": self.description,
-            "status": self.status,
-            "blockedBy": self.blocked_by,
-            "claimed_by": self.claimed_by,
-            "iterations": self.iterations,
-            "started_at": self.started_at,
-            "completed_at": self.completed_at
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "QueueTask":
-        return cls(
-            id=data["id"],
-            description=data.get("description", ""),
-            status=data.get("status", "pending"),
-            blocked_by=data.get("blockedBy", []),
-            claimed_by=data.get("claimed_by"),
-            iterations=data.get("iterations", 0),
-            started_at=data.get("started_at"),
-            completed_at=data.get("completed_at")
-        )
-
-@dataclass
-class TaskQueue:
-    """Work-stealing task queue tied to a plan file (supports JSON and Markdown)."""
-    plan_id: str
-    plan_file: str
-    created_at: str
-    tasks: list = field(default_factory=list)
-
-    def to_dict(self) -> dict:
-        return {
-            "plan_id": self.plan_id,
-            "plan_file": self.plan_file,
-            "created_at": self.created_at,
-            "tasks": [t.to_dict() if isinstance(t, QueueTask) else t for t in self.tasks]
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "TaskQueue":
-        return cls(
-            plan_id=data["plan_id"],
-            plan_file=data["plan_file"],
-            created_at=data["created_at"],
-            tasks=[QueueTask.from_dict(t) if isinstance(t, dict) else t for t in data.get("tasks", [])]
-        )
-    
-    def to_markdown(self) -> str:
-        """
-        Generate markdown representation of task queue.
-        
-        Format:
-        ---
-        plan_id: feature-auth
-        created: 2026-02-04T10:00:00Z
-        total_tasks: 5
-        completed: 2
-        ---
-        
-        # Task Queue: feature-auth
-        
-        ## ✅ Completed
-        - [x] Task 1: Description (agent-abc123)
-        
-        ## 🔄 In Progress
-        - [/] Task 2: Description (agent-def456)
-        
-        ## ⏳ Pending
-        - [ ] Task 3: Description
-        """
-        completed = [t for t in self.tasks if t.status == "completed"]
-        in_progress = [t for t in self.tasks if t.status == "in_progress"]
-        pending = [t for t in self.tasks if t.status == "pending"]
-        
-        lines = [
-            "---",
-            f"plan_id: {self.plan_id}",
-            f"created: {self.created_at}",
-            f"total_tasks: {len(self.tasks)}",
-            f"completed: {len(completed)}",
-            "---",
-            "",
-            f"# Task Queue: {self.plan_id}",
-            ""
-        ]
-        
-        if completed:
-            lines.append("## ✅ Completed")
-            for task in completed:
-                agent_info = f" ({task.claimed_by})" if task.claimed_by else ""
-                lines.append(f"- [x] Task {task.id}: {task.description}{agent_info}")
-            lines.append("")
-        
-        if in_progress:
-            lines.append("## 🔄 In Progress")
-            for task in in_progress:
-                agent_info = f" ({task.claimed_by})" if task.claimed_by else ""
-                lines.append(f"- [/] Task {task.id}: {task.description}{agent_info}")
-            lines.append("")
-
-class TaskQueueParser:
-    """
-    Parser for markdown task lists with priority-based format.
-    
-    Supports formats:
-    - [ ] P1: Description - blocked by: task-name
-    - [x] P2: Description - completed
-    - [ ] P3: Description - depends on: task-name
-    
-    Features:
-    - Priority extraction (P1/P2/P3)
-    - Status parsing (pending/in_progress/completed)
-    - Dependency detection (blocked by/depends on)
-    - Plan file parsing
-    - Round-trip conversion (markdown <-> QueueTask)
-    """
-    
-    @staticmethod
-    def parse_markdown(content: str) -> list[QueueTask]:
-        """
-        Parse markdown content into list of QueueTask objects.
-        
-        Supports priority labels (P1/P2/P3) and dependency syntax.
-        
-        Args:
-            content: Markdown task list content
-            
-        Returns:
-            List of QueueTask objects
-        """
-        import re
-
-        tasks = []
-        lines = content.strip().split("\n")
-        
-        # Pattern: - [checkbox] P1: Description - blocked by: task-name
-        # Supports em-dash (\u2014), en-dash (\u2013), and hyphen as separators
-        task_pattern = re.compile(
-            r"^-\s+\[([ x/])\]\s+(?:P[123]:\s+)?(.+?)(?:\s+[\u2014\u2013-]\s+(?:blocked by|depends on):\s+(.+))?$",
-            re.IGNORECASE
-        )
-        
-        for line in lines:
-            stripped = line.strip()
-            match = task_pattern.match(stripped)
-            if not match:
-                continue
-            
-            checkbox, description, dependencies = match.groups()
-            
-            # Determine status from checkbox
-            if checkbox == "x":
-                status = "completed"
-            elif checkbox == "/":
-                status = "in_progress"
-            else:
-                status = "pending"
-            
-            # Parse blocked_by list
-            blocked_list = []
-            if dependencies:
-                blocked_list = [d.strip() for d in dependencies.split(",")]
-            
-            tasks.append(QueueTask(
-                description=description.strip(),
-                status=status,
-                blocked_by=blocked_list
-            ))
-        
-        return tasks
-
-class WorkStealingQueue:
-    """
-    File-based work-stealing queue with atomic task claiming.
-
-    Location: {project}/.claude/task-queue-{plan-id}.json
-
-    Uses file locking to prevent race conditions when multiple
-    agents attempt to claim tasks simultaneously.
-    """
-
-    QUEUE_DIR = ".claude"
-    LOCK_SUFFIX = ".lock"
-
-    def __init__(self, plan_id: str, plan_file: str, base_dir: Optional[Path] = None, format: str = "markdown"):
-        self.plan_id = plan_id
-        self.plan_file = plan_file
-        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
-        self.format = format  # "json" or "markdown"
-        
-        if format == "markdown":
-            self.queue_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}.md"
-        else:
-            self.queue_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}.json"
-        
-        self.lock_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}{self.LOCK_SUFFIX}"
-
-    def _ensure_dir(self) -> None:
-        """Ensure queue directory exists."""
-        self.queue_path.parent.mkdir(parents=True, exist_ok=True)
-
-    def _acquire_lock(self) -> int:
-        """Acquire file lock for atomic operations."""
-        self._ensure_dir()
-        fd = os.open(str(self.lock_path), os.O_CREAT | os.O_RDWR)
-        file_lock(fd)
-        return fd
-
-    def _release_lock(self, fd: int) -> None:
-        """Release file lock."""
-        file_unlock(fd)
-        os.close(fd)
-
-    def load(self) -> TaskQueue:
-        """Load queue from file (JSON or Markdown), creating if needed."""
-        if self.queue_path.exists():
-            try:
-                if self.format == "markdown":
-                    content = self.queue_path.read_text(encoding="utf-8")
-                    return TaskQueue.from_markdown(content, self.plan_id, self.plan_file)
-                else:
-                    with open(self.queue_path) as f:
-                        return TaskQueue.from_dict(json.load(f))
-            except (json.JSONDecodeError, KeyError, ValueError):
-                pass
-
-        # Create new queue
-        return TaskQueue(
-            plan_id=self.plan_id,
-            plan_file=self.plan_file,
-            created_at=datetime.now().isoformat(),
-            tasks=[]
-        )
-
-    def save(self, queue: TaskQueue) -> None:
-        """Save queue to file (JSON or Markdown)."""
-        self._ensure_dir()
-        
-        if self.format == "markdown":
-            content = queue.to_markdown()
-            self.queue_path.write_text(content, encoding="utf-8")
-        else:
-            atomic_write_json(self.queue_path, queue.to_dict(), fsync=True)
-
-    def claim_next_task(self, agent_id: str) -> Optional[QueueTask]:
-        """
-        Atomically claim the next available task.
-
-        A task is available if:
-        - status == "pending"
-        - claimed_by is None
-        - all blockedBy tasks are completed
-
-        Args:
-            agent_id: ID of the agent claiming the task.
-
-        Returns:
-            The claimed QueueTask, or None if no tasks available.
-        """
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-
-            # Build set of completed task IDs
-            completed_ids = {t.id for t in queue.tasks if t.status == "completed"}
-
-            for task in queue.tasks:
-                if task.status != "pending" or task.claimed_by:
-                    continue
-
-                # Check if all blockers are complete
-                blockers_done = all(b in completed_ids for b in task.blocked_by)
-                if not blockers_done:
-                    continue
-
-                # Claim the task
-                task.claimed_by = agent_id
-                task.status = "in_progress"
-                task.started_at = datetime.now().isoformat()
-                task.iterations += 1
-
-                self.save(queue)
-                return task
-
-            return None
-
-        finally:
-            self._release_lock(fd)
-
-    def complete_task(self, task_id: str) -> bool:
-        """
-        Mark a task as completed.
-
-        Args:
-            task_id: ID of the task to complete.
-
-        Returns:
-            True if task was found and completed, False otherwise.
-        """
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-
-            for task in queue.tasks:
-                if task.id == task_id:
-                    task.status = "completed"
-                    task.completed_at = datetime.now().isoformat()
-                    self.save(queue)
-                    return True
-
-            return False
-
-        finally:
-            self._release_lock(fd)
-
-    def release_task(self, task_id: str) -> bool:
-        """
-        Release a task back to pending (e.g., on agent failure).
-
-        Args:
-            task_id: ID of the task to release.
-
-        Returns:
-            True if task was found and released, False otherwise.
-        """
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-
-            for task in queue.tasks:
-                if task.id == task_id:
-                    task.status = "pending"
-                    task.claimed_by = None
-                    self.save(queue)
-                    return True
-
-            return False
-
-        finally:
-            self._release_lock(fd)
-
-    def add_task(self, task_id: str, blocked_by: list | None = None) -> QueueTask:
-        """
-        Add a new task to the queue.
-
-        Args:
-            task_id: Unique task identifier.
-            blocked_by: List of task IDs that must complete first.
-
-        Returns:
-            The created QueueTask.
-        """
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-
-            task = QueueTask(
-                id=task_id,
-                status="pending",
-                blocked_by=blocked_by or []
-            )
-            queue.tasks.append(task)
-            self.save(queue)
-            return task
-
-        finally:
-            self._release_lock(fd)
-
-    def get_status(self) -> dict:
-        """Get queue status summary."""
-        queue = self.load()
-
-        status_counts = {"pending": 0, "in_progress": 0, "completed": 0}
-        for task in queue.tasks:
-            status_counts[task.status] = status_counts.get(task.status, 0) + 1
-
-        return {
-            "plan_id": queue.plan_id,
-            "total_tasks": len(queue.tasks),
-            **status_counts
-        }
-
-    def reclaim_stale_tasks(self, timeout_seconds: int = 300) -> list[str]:
-        """
-        Auto-unclaim in_progress tasks older than timeout.
-
-        Crashed agent's work gets re-assigned to next available agent.
-
-        Args:
-            timeout_seconds: Max age in seconds before reclaiming (default 5 min).
-
-        Returns:
-            List of reclaimed task IDs.
-        """
-        fd = self._acquire_lock()
-        try:
-            queue = self.load()
-            reclaimed = []
-            now = datetime.now()
-
-            for task in queue.tasks:
-                if task.status != "in_progress" or not task.started_at:
-                    continue
-                try:
-                    started = datetime.fromisoformat(task.started_at)
-                    # Normalize to naive datetime to avoid mixed tz comparison
-                    if started.tzinfo is not None:
-                        started = started.replace(tzinfo=None)
-                    age = (now - started).total_seconds()
-                    if age > timeout_seconds:
-                        task.status = "pending"
-                        task.claimed_by = None
-                        reclaimed.append(task.id)
-                except (ValueError, TypeError):
-                    continue
-
-            if reclaimed:
-                self.save(queue)
-
-            return reclaimed
-
-        finally:
-            self._release_lock(fd)
-
 # =============================================================================
 # Agent Inbox (Hybrid Gamma Inter-Agent Communication)
 # =============================================================================
@@ -2096,6 +1362,8 @@ def record_daily_cost(cost_usd: float) -> None:
     Args:
         cost_usd: Cost in USD for this agent run.
     """
+    from zoneinfo import ZoneInfo
+
     cet = ZoneInfo("Europe/Berlin")
     today = datetime.now(cet).strftime("%Y-%m-%d")
     cost_dir = _get_daily_cost_dir()
@@ -2138,49 +1406,14 @@ class ComplexityConfig:
     complexity_score: float
     complexity_label: str
 
-def calculate_complexity(task_description: str) -> float:
-    """
-    Calculate complexity score for a task description.
-    
-    Scoring factors:
-    - Base keywords: "refactor", "architecture", "system", "migrate" (+0.5 each)
-    - Scope indicators: "all", "entire", "full", "complete" (+0.3 each)
-    - File count mentions: "multiple files", "across" (+0.4 each)
-    - Simple indicators: "typo", "fix", "add button", "update text" (-0.5 each)
-    - Word count: long descriptions tend to be more complex (+0.1 per 20 words)
-    
-    Returns:
-        float: Complexity score (0-5 range typical)
-    """
-    if not task_description:
-        return 1.0
-    
-    score = 1.0  # Base score
-    lower_task = task_description.lower()
-    
-    # High complexity keywords
-    high_keywords = ["refactor", "architecture", "system", "migrate", "redesign", 
-                     "rewrite", "overhaul", "integrate", "framework"]
-    score += sum(0.5 for kw in high_keywords if kw in lower_task)
-    
-    # Scope indicators
-    scope_keywords = ["all", "entire", "full", "complete", "comprehensive", "throughout"]
-    score += sum(0.3 for kw in scope_keywords if kw in lower_task)
-    
-    # Multi-file indicators
-    multi_file = ["multiple files", "across", "codebase", "project-wide", "global"]
-    score += sum(0.4 for kw in multi_file if kw in lower_task)
-    
-    # Simple task indicators (reduce score)
-    simple_keywords = ["typo", "fix typo", "add button", "update text", "change color",
-                      "rename", "small fix", "quick"]
-    score -= sum(0.5 for kw in simple_keywords if kw in lower_task)
-    
-    # Word count factor (longer = more complex)
-    word_count = len(task_description.split())
-    score += (word_count // 20) * 0.1
-    
-    return max(0.5, min(5.0, score))  # Clamp between 0.5 and 5.0
+# Complexity scoring lives in scripts/ralph_scheduler.py (task cost weights); re-exported here
+from scripts.ralph_scheduler import calculate_complexity  # noqa: E402,F401
+from scripts.ralph_phase import (  # noqa: E402
+    append_state_delta,
+    checkpoint_state,
+    load_state,
+    state_journal_path,
+)
 
 class RalphProtocol:
     """
@@ -2198,6 +1431,8 @@ class RalphProtocol:
 
     # Legacy flat structure (for migration)
     LEGACY_STATE_FILE = ".claude/ralph-state.json"
+    # State fields whose change checkpoints state.json instead of journaling a delta
+    CHECKPOINT_KEYS = frozenset({"session_id", "task", "phase", "started_at", "completed_at"})
     LEGACY_ACTIVITY_LOG = ".claude/ralph-activity.log"
     LEGACY_CHECKPOINT_DIR = ".claude/ralph-checkpoints"
 
@@ -2225,7 +1460,6 @@ class RalphProtocol:
         self.activity_log_path = self.base_dir / self.ACTIVITY_LOG
         self.checkpoint_dir = self.base_dir / self.CHECKPOINT_DIR
         self.progress_path = self.base_dir / self.PROGRESS_FILE
-        self._state_lock = asyncio.Lock()  # Prevent concurrent state access
         self._loop_start_time: Optional[datetime] = None
         self._completed_count = 0
         self._failed_count = 0
@@ -2248,6 +1482,12 @@ class RalphProtocol:
         # Initialize struggle detection
         self._struggle_detector = StruggleDetector(self.base_dir)
 
+    @cached_property
+    def _state_lock(self):
+        """Lock preventing concurrent state access (asyncio imported on first use)."""
+        import asyncio
+        return asyncio.Lock()
+
     def _migrate_legacy_files(self) -> None:
         """Migrate legacy flat structure to nested .claude/ralph/."""
         # Core Ralph file migrations
@@ -2293,7 +1533,7 @@ class RalphProtocol:
 
     def read_state(self) -> Optional[RalphState]:
         """
-        Read and parse the current Ralph state from JSON.
+        Read the current Ralph state: the state.json snapshot plus its journal tail.
 
         Returns:
             RalphState object if state exists, None otherwise.
@@ -2302,16 +1542,21 @@ class RalphProtocol:
             return None
 
         try:
-            with open(self.state_path, 'r') as f:
-                data = json.load(f)
+            data = load_state(self.state_path)
+            if data is None:
+                return None
             return RalphState.from_dict(data)
-        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        except (OSError, KeyError, TypeError, ValueError) as e:
             self.log_activity(f"Error reading state: {e}", level="ERROR")
             return None
 
     def write_state(self, state: RalphState) -> bool:
         """
-        Write Ralph state to JSON file with config backup rotation.
+        Persist Ralph state.
+
+        Changes to the session, task or phase checkpoint a new state.json
+        (with config backup rotation and fsync). Anything else - heartbeats,
+        agent status, counters - is appended to the state journal as a delta.
 
         Args:
             state: RalphState object to persist.
@@ -2323,16 +1568,32 @@ class RalphProtocol:
             # Ensure .claude directory exists
             self.state_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Backup before overwrite (keep last 3)
-            self._backup_config()
-
             # Add integrity marker for state.json
             state_data = state.to_dict()
             state_data["integrity_marker"] = "claude_ralph_state_v1"
-            atomic_write_json(self.state_path, state_data, fsync=True)
-            self.log_activity(f"State written: {state.session_id}")
+
+            try:
+                current = load_state(self.state_path)
+            except ValueError:
+                current = None
+            changes = {
+                key: value for key, value in state_data.items()
+                if current is None or current.get(key) != value
+            }
+            if not changes:
+                return True
+
+            if (
+                current is None
+                or self.CHECKPOINT_KEYS & changes.keys()
+                or not append_state_delta(self.state_path, changes)
+            ):
+                # Backup before overwrite (keep last 3)
+                self._backup_config()
+                checkpoint_state(self.state_path, state_data, replace=True)
+                self.log_activity(f"State written: {state.session_id}")
             return True
-        except IOError as e:
+        except (IOError, TypeError, ValueError) as e:
             self.log_activity(f"Error writing state: {e}", level="ERROR")
             return False
 
@@ -3133,11 +2394,12 @@ class RalphProtocol:
             self.log_activity("Exit allowed: Batch subagent (lifecycle managed by orchestrator)")
             return {"decision": "approve", "reason": "Batch subagent - orchestrator manages lifecycle"}
 
-        # Read raw state file to check all fields
+        # Read raw state (snapshot + journal) to check all fields
         try:
-            with open(self.state_path, 'r') as f:
-                raw_state = json.load(f)
-        except (json.JSONDecodeError, OSError):
+            raw_state = load_state(self.state_path)
+        except (ValueError, OSError):
+            raw_state = None
+        if raw_state is None:
             return {"decision": "approve", "reason": "State file unreadable, allowing exit"}
 
         # CHECK 2: Session age > threshold = stale session (auto-cleanup)
@@ -3289,13 +2551,11 @@ Full details available in {summary_path}
             # Mark phase complete in state
             try:
                 if self.state_path.exists():
-                    with open(self.state_path, 'r') as f:
-                        state_data = json.load(f)
-                    state_data["phase"] = "complete"
-                    state_data["completedAt"] = datetime.now(timezone.utc).isoformat()
-                    with open(self.state_path, 'w') as f:
-                        json.dump(state_data, f, indent=2)
-            except (json.JSONDecodeError, OSError):
+                    checkpoint_state(self.state_path, {
+                        "phase": "complete",
+                        "completedAt": datetime.now(timezone.utc).isoformat(),
+                    })
+            except OSError:
                 pass
 
             return {
@@ -3395,8 +2655,7 @@ This will properly close the Ralph session."""
         # ORPHAN DETECTION: Clean stale sessions at startup
         if self.state_exists():
             try:
-                with open(self.state_path, 'r') as f:
-                    raw_state = json.load(f)
+                raw_state = load_state(self.state_path) or {}
 
                 should_cleanup = False
                 cleanup_reason = None
@@ -3441,7 +2700,7 @@ This will properly close the Ralph session."""
                         "cleanup": cleanup_results
                     }
 
-            except (json.JSONDecodeError, OSError):
+            except (ValueError, OSError):
                 # State file corrupted, clean it up
                 self.log_activity("Session start: Cleaning corrupted state file", level="WARN")
                 self.cleanup_ralph_session(keep_activity_log=False)
@@ -3799,6 +3058,13 @@ This will properly close the Ralph session."""
         if not state:
             return {}
 
+        # Lapse this agent's task leases now; the next claim reclaims unfinished work
+        try:
+            from scripts.ralph_lease import agent_lease_id, end_lease
+            end_lease(agent_lease_id(data) or str(agent_id), self.base_dir)
+        except OSError:
+            pass
+
         if hard_failed:
             status_label = "FAILED(hard)"
         elif soft_failure_result.get("soft_failed"):
@@ -4007,8 +3273,9 @@ This will properly close the Ralph session."""
                 results["errors"].append(f"{path}: {e}")
             return False
 
-        # Always remove state file
+        # Always remove state file and its journal
         safe_remove(self.state_path)
+        safe_remove(state_journal_path(self.state_path))
 
         # Activity log based on config
         if keep_activity_log:
@@ -4247,9 +3514,13 @@ def agent_tracker() -> None:
     """Track Ralph agent completion and enforce phase transitions.
 
     Consolidated from guards.py ralph_agent_tracker().
-    Fires after each Task tool completes. Updates state.json with:
-    - Completed agent count
-    - Phase transitions (implementation → review → complete)
+    Fires after each Task tool completes. Parallel agents finish together, so
+    nothing here read-modify-writes state.json per completion (see
+    scripts/ralph_phase.py):
+    - Completed agent count: one line appended to the phase's completion journal
+    - Phase transitions (implementation → verify_fix → review → complete):
+      a single compare-and-set on phase/phaseEpoch, so each fires exactly once
+    - Activity events: appended to the bounded .claude/ralph/activity.jsonl
     - Debug logging via _debug_exit() (env-gated: RALPH_DEBUG)
     - Stale session auto-cleanup (>4h marks as complete with staleReason)
     """
@@ -4275,16 +3546,25 @@ def agent_tracker() -> None:
             _debug_exit("no state file found", 0)
 
     try:
-        with open(state_path) as f:
-            state = json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
+        state = load_state(state_path)
+    except (ValueError, OSError) as e:
         _debug_exit(f"state file unreadable: {e}", 0)
+    if state is None:
+        _debug_exit("no state file found", 0)
+
+    from scripts.ralph_phase import append_activity, clear_journals, compare_and_set, record_completion
+
+    ralph_dir = state_path.parent if state_path.name == "state.json" else state_path.parent / "ralph"
 
     # Skip if already complete
     phase = state.get("phase", "implementation")
     if phase == "complete":
         _debug_exit("phase already complete", 0)
 
+    # Transitions only apply to the phase instance this completion was counted in
+    expected_state = {"phase": state.get("phase"), "phaseEpoch": state.get("phaseEpoch")}
+    epoch = state.get("phaseEpoch") or 0
+
     # Check for stale session (>4h old) - auto-cleanup (Fix B)
     started_at = state.get("startedAt") or state.get("started_at")
     if started_at:
@@ -4295,33 +3575,54 @@ def agent_tracker() -> None:
             age_hours = (datetime.now(timezone.utc) - start_time).total_seconds() / 3600
             if age_hours > 4:
                 # Mark as complete with stale reason instead of silently ignoring
-                state["phase"] = "complete"
-                state["staleReason"] = f"Session age {age_hours:.1f}h exceeds 4h threshold"
-                state["completedAt"] = datetime.now(timezone.utc).isoformat()
-                try:
-                    with open(state_path, "w") as f:
-                        json.dump(state, f, indent=2)
-                except OSError:
-                    pass
+                def mark_stale(current: dict) -> dict:
+                    current["phase"] = "complete"
+                    current["phaseEpoch"] = epoch + 1
+                    current["staleReason"] = f"Session age {age_hours:.1f}h exceeds 4h threshold"
+                    current["completedAt"] = datetime.now(timezone.utc).isoformat()
+                    return current
+
+                compare_and_set(state_path, expected_state, mark_stale, base_dir=ralph_dir)
                 _debug_exit(f"stale session ({age_hours:.1f}h), marked complete", 0)
         except (ValueError, TypeError) as e:
             _debug_exit(f"timestamp parse error: {e}", 0)
 
-    # Track completion
-    completed = state.get("completedAgents", 0) + 1
-    state["completedAgents"] = completed
+    # Track completion (journal line count, safe under concurrent agents)
+    agent_name = os.environ.get("CLAUDE_CODE_AGENT_NAME", "")
+    try:
+        completed = record_completion(state, agent_name, base_dir=ralph_dir)
+    except OSError as e:
+        _debug_exit(f"completion journal write failed: {e}", 0)
 
     timestamp = datetime.now(timezone.utc).isoformat()
 
     # Log activity
-    activity_log = state.get("activityLog", [])
-    activity_log.append({
+    append_activity({
         "timestamp": timestamp,
         "event": "agent_completed",
         "phase": phase,
         "completed": completed
-    })
-    state["activityLog"] = activity_log[-50:]  # Keep last 50
+    }, base_dir=ralph_dir)
+
+    def advance(to_phase: str):
+        """Compare-and-set the transition; returns the new state or None if another agent won."""
+        def apply(current: dict) -> dict:
+            current["phase"] = to_phase
+            current["phaseEpoch"] = epoch + 1
+            current["completedAgents"] = 0  # Counting restarts in the new phase's journal
+            if to_phase == "complete":
+                current["completedAt"] = timestamp
+            return current
+
+        new_state = compare_and_set(state_path, expected_state, apply, base_dir=ralph_dir)
+        if new_state is not None:
+            append_activity({
+                "timestamp": timestamp,
+                "event": "phase_transition",
+                "from": phase,
+                "to": to_phase
+            }, base_dir=ralph_dir)
+        return new_state
 
     # Determine phase transition
     output_msg = None
@@ -4329,22 +3630,12 @@ def agent_tracker() -> None:
     if phase == "implementation":
         agents_field = state.get("agents", 3)
         expected = state.get("total_agents") or (len(agents_field) if isinstance(agents_field, list) else agents_field)
-        if completed >= expected:
+        if completed >= expected and advance("verify_fix") is not None:
             # All implementation agents done → transition to verify_fix
             vf_config = state.get("verify_fix", {"agents": 2, "iterations": 2})
             vf_agents = vf_config.get("agents", 2)
             task = state.get("task", "Verify and fix the implementation")
 
-            state["phase"] = "verify_fix"
-            state["completedAgents"] = 0  # Reset for verify_fix phase
-
-            activity_log.append({
-                "timestamp": timestamp,
-                "event": "phase_transition",
-                "from": "implementation",
-                "to": "verify_fix"
-            })
-
             output_msg = f"""🔄 RALPH PHASE TRANSITION: Implementation → Verify+Fix
 
 All {expected} implementation agents completed.
@@ -4370,23 +3661,13 @@ Verify-Fix agents should:
     elif phase == "verify_fix":
         vf_config = state.get("verify_fix", {"agents": 2, "iterations": 2})
         expected = vf_config.get("agents", 2)
-        if completed >= expected:
+        if completed >= expected and advance("review") is not None:
             # All verify-fix agents done → transition to review
             review_config = state.get("review", {"agents": 5, "iterations": 2})
             review_agents = review_config.get("agents", 5)
             review_iterations = review_config.get("iterations", 2)
             task = state.get("task", "Review the implementation")
 
-            state["phase"] = "review"
-            state["completedAgents"] = 0  # Reset for review phase
-
-            activity_log.append({
-                "timestamp": timestamp,
-                "event": "phase_transition",
-                "from": "verify_fix",
-                "to": "review"
-            })
-
             output_msg = f"""🔄 RALPH PHASE TRANSITION: Verify+Fix → Review
 
 All {expected} verify-fix agents completed.
@@ -4410,17 +3691,9 @@ Review agents should:
     elif phase == "review":
         review_config = state.get("review", {"agents": 5, "iterations": 2})
         expected = review_config.get("agents", 5)
-        if completed >= expected:
+        if completed >= expected and advance("complete") is not None:
             # All review agents done → signal completion
-            state["phase"] = "complete"
-            state["completedAt"] = timestamp
-
-            activity_log.append({
-                "timestamp": timestamp,
-                "event": "phase_transition",
-                "from": "review",
-                "to": "complete"
-            })
+            clear_journals(state, base_dir=ralph_dir)
 
             output_msg = f"""✅ RALPH LOOP COMPLETE
 
@@ -4443,13 +3716,6 @@ This will allow the session to exit properly.
 - Task: {state.get("task", "N/A")}
 - Duration: {state.get("startedAt", "?")} → {timestamp}"""
 
-    # Write updated state
-    try:
-        with open(state_path, "w") as f:
-            json.dump(state, f, indent=2)
-    except OSError as e:
-        _debug_exit(f"state write failed: {e}", 0)
-
     # Output phase transition instructions
     if output_msg:
         output = {
@@ -4473,14 +3739,16 @@ def preflight_check() -> None:
         return
 
     try:
-        with open(state_path) as f:
-            state = json.load(f)
-    except (json.JSONDecodeError, OSError):
+        state = load_state(state_path)
+    except (ValueError, OSError):
         # Corrupted state, remove it
-        try:
-            state_path.unlink()
-        except OSError:
-            pass
+        for path in (state_path, state_journal_path(state_path)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return
+    if state is None:
         return
 
     started_at = state.get("startedAt") or state.get("started_at")
@@ -4504,6 +3772,10 @@ def preflight_check() -> None:
             with open(archive_path, "w") as f:
                 json.dump(state, f, indent=2)
             state_path.unlink()
+            try:
+                state_journal_path(state_path).unlink()
+            except FileNotFoundError:
+                pass
 
             if os.environ.get("RALPH_DEBUG"):
                 sys.stderr.write(
@@ -4545,6 +3817,35 @@ NOTE: Subprocess orchestration (loop, setup, teardown, resume commands) has been
       See /start skill for team-based orchestration.
 """)
 
+def _hook_pre_compact(protocol: "RalphProtocol", stdin_content: Optional[str] = None) -> dict:
+    """PreCompact handler - create checkpoint before context compaction."""
+    result = None
+    if protocol.state_exists():
+        state = protocol.read_state()
+        if state is not None:
+            try:
+                result = protocol.create_checkpoint(state)
+            except Exception as e:
+                protocol.log_activity(f"PreCompact checkpoint failed: {e}", level="ERROR")
+    return {"checkpoint_created": result is not None}
+
+
+# hook-* command -> handler(protocol, stdin_content) -> JSON-serializable result.
+# Also used by hooks/ralph.py to dispatch in-process.
+HOOK_HANDLERS = {
+    "hook-stop": lambda protocol, stdin: protocol.handle_hook_stop(stdin),
+    "hook-pretool": lambda protocol, stdin: protocol.handle_hook_pretool(stdin),
+    "hook-user-prompt": lambda protocol, stdin: protocol.handle_hook_user_prompt(stdin),
+    "hook-session": lambda protocol, stdin: protocol.handle_hook_session_start(stdin),
+    # Alias for hook-session (wrapper sends session-start -> hook-session-start)
+    "hook-session-start": lambda protocol, stdin: protocol.handle_hook_session_start(stdin),
+    "hook-pre-compact": _hook_pre_compact,
+    "hook-subagent-start": lambda protocol, stdin: protocol.handle_hook_subagent_start(stdin),
+    "hook-subagent-stop": lambda protocol, stdin: protocol.handle_hook_subagent_stop(stdin),
+}
+
+
+@traced("ralph.py")
 def main():
     """Main CLI entry point."""
     if len(sys.argv) < 2:
@@ -4627,53 +3928,14 @@ def main():
         else:
             protocol.cmd_cleanup()
 
-    elif command == "hook-stop":
-        result = protocol.handle_hook_stop()
-        print(json.dumps(result))
-
-    elif command == "hook-pretool":
-        result = protocol.handle_hook_pretool()
-        print(json.dumps(result))
-
-    elif command == "hook-user-prompt":
-        result = protocol.handle_hook_user_prompt()
-        print(json.dumps(result))
-
-    elif command == "hook-session":
-        result = protocol.handle_hook_session_start()
-        print(json.dumps(result))
-
-    elif command == "hook-session-start":
-        # Alias for hook-session (wrapper sends session-start -> hook-session-start)
-        result = protocol.handle_hook_session_start()
+    elif command in HOOK_HANDLERS:
+        result = HOOK_HANDLERS[command](protocol, None)
         print(json.dumps(result))
 
     elif command == "agent-tracker":
         # PostToolUse:Task hook - consolidated from guards.py
         agent_tracker()
 
-    elif command == "hook-pre-compact":
-        # PreCompact handler - create checkpoint before context compaction
-        result = None
-        if protocol.state_exists():
-            state = protocol.read_state()
-            if state is not None:
-                try:
-                    result = protocol.create_checkpoint(state)
-                except Exception as e:
-                    protocol.log_activity(f"PreCompact checkpoint failed: {e}", level="ERROR")
-        print(json.dumps({"checkpoint_created": result is not None}))
-
-    elif command == "hook-subagent-start":
-        # SubagentStart hook handler
-        result = protocol.handle_hook_subagent_start()
-        print(json.dumps(result))
-
-    elif command == "hook-subagent-stop":
-        # SubagentStop hook handler
-        result = protocol.handle_hook_subagent_stop()
-        print(json.dumps(result))
-
     else:
         print(f"Unknown command: {command}")
         print_usage()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Ralph Hooks - Fast-start entry point for Ralph hook modes.
+
+scripts/ralph.py is a ~4k line module; importing it for every PreToolUse:Task,
+PostToolUse:Task, SubagentStart and SubagentStop event costs more than the
+hooks themselves in the common case where no Ralph session is active. This
+module imports only json/os/sys/pathlib at load time, answers the no-session
+and read-only cases directly from .claude/ralph/state.json (plus its state
+journal, via scripts.ralph_phase.load_state), and imports scripts.ralph only
+when a handler actually has work to do.
+
+Results are identical to `scripts/ralph.py <command>`.
+
+Usage:
+    python ralph_hooks.py hook-pretool          # PreToolUse:Task context
+    python ralph_hooks.py hook-user-prompt      # UserPromptSubmit prepend
+    python ralph_hooks.py hook-subagent-start   # SubagentStart tracking
+    python ralph_hooks.py hook-subagent-stop    # SubagentStop tracking
+    python ralph_hooks.py hook-pre-compact      # PreCompact checkpoint
+    python ralph_hooks.py agent-tracker         # PostToolUse:Task tracker
+    python ralph_hooks.py heartbeat             # PostToolUse (working tools): renew task leases
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+# Lazy scripts.* imports need the repo root (invoked as python scripts/ralph_hooks.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hooks.hook_trace import traced
+
+# Mirror RalphProtocol.STATE_FILE / LEGACY_STATE_FILE (relative to cwd)
+STATE_FILE = Path(".claude/ralph/state.json")
+LEGACY_STATE_FILE = Path(".claude/ralph-state.json")
+
+# Handler results when no Ralph session exists (same as scripts/ralph.py)
+NO_SESSION_RESULTS = {
+    "hook-pretool": {"inject_context": None},
+    "hook-user-prompt": {"prepend": None},
+    "hook-subagent-start": {},
+    "hook-pre-compact": {"checkpoint_created": False},
+}
+
+
+def session_exists(base_dir: Path | None = None) -> bool:
+    """True if a Ralph state file (current or legacy layout) exists under base_dir."""
+    base = base_dir or Path.cwd()
+    return (base / STATE_FILE).exists() or (base / LEGACY_STATE_FILE).exists()
+
+
+def pretool_context(state: dict) -> dict:
+    """Build the hook-pretool inject_context payload from raw state data (load_state).
+
+    Matches RalphProtocol.handle_hook_pretool, including RalphState.from_dict's
+    handling of the guards.py format where "agents" is an integer count.
+    """
+    agents = state.get("agents", [])
+    if isinstance(agents, int):
+        total_agents = agents
+        agents = []
+    else:
+        total_agents = state.get("total_agents", len(agents) or 3)
+
+    return {
+        "ralph_active": True,
+        "session_id": state.get("session_id", "unknown"),
+        "task": state.get("task"),
+        "agents_complete": sum(
+            1 for a in agents
+            if isinstance(a, dict) and a.get("status") == "completed"
+        ),
+        "total_agents": total_agents,
+    }
+
+
+def run_hook(command: str, stdin_content: str | None = None) -> dict:
+    """Run a hook-* command, importing scripts.ralph only when needed.
+
+    Args:
+        command: A scripts.ralph.HOOK_HANDLERS key (e.g. "hook-pretool").
+        stdin_content: Raw hook stdin, or None to let the handler read stdin.
+
+    Returns:
+        JSON-serializable handler result.
+    """
+    base = Path.cwd()
+
+    if command in NO_SESSION_RESULTS and not session_exists(base):
+        return dict(NO_SESSION_RESULTS[command])
+
+    if command == "hook-pretool" and (base / STATE_FILE).exists():
+        from scripts.ralph_phase import load_state
+
+        try:
+            state = load_state(base / STATE_FILE)
+            if state is not None:
+                return {"inject_context": pretool_context(state)}
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass  # Full handler logs the unreadable state to activity.log
+
+    from scripts.ralph import HOOK_HANDLERS, RalphProtocol
+
+    return HOOK_HANDLERS[command](RalphProtocol(), stdin_content)
+
+
+def agent_tracker() -> None:
+    """PostToolUse:Task tracker: exit early unless a Task finished in a Ralph session."""
+    from scripts.compat import setup_stdin_timeout
+
+    setup_stdin_timeout(10)
+    raw = sys.stdin.read()
+
+    # RALPH_DEBUG wants scripts.ralph's per-exit diagnostics; skip the shortcut
+    if not os.environ.get("RALPH_DEBUG"):
+        try:
+            tool_name = json.loads(raw).get("tool_name", "")
+        except (json.JSONDecodeError, AttributeError):
+            sys.exit(0)
+        if tool_name != "Task" or not session_exists():
+            sys.exit(0)
+
+    import io
+    from scripts.ralph import agent_tracker as ralph_agent_tracker
+
+    sys.stdin = io.StringIO(raw)
+    ralph_agent_tracker()
+
+
+def heartbeat_hook() -> None:
+    """PostToolUse: renew the calling agent's task leases, if it holds any (scripts/ralph_lease.py)."""
+    from scripts.compat import setup_stdin_timeout
+
+    setup_stdin_timeout(5)
+    try:
+        payload = json.loads(sys.stdin.read())
+    except json.JSONDecodeError:
+        return
+    if not isinstance(payload, dict) or not session_exists():
+        return
+
+    from scripts.ralph_lease import agent_lease_id, renew
+
+    agent_id = agent_lease_id(payload)
+    if not agent_id:
+        return
+    try:
+        renew(agent_id)
+    except OSError:
+        pass  # A missed heartbeat only shortens the lease
+
+
+@traced("ralph_hooks.py")
+def main() -> None:
+    """Dispatch sys.argv[1]; hook commands always exit 0."""
+    if len(sys.argv) < 2:
+        sys.exit(0)
+
+    command = sys.argv[1]
+    try:
+        if command == "agent-tracker":
+            agent_tracker()
+            sys.exit(0)
+        if command == "heartbeat":
+            heartbeat_hook()
+            sys.exit(0)
+        if not command.startswith("hook-"):
+            sys.exit(0)
+        result = run_hook(command)
+    except SystemExit:
+        raise
+    except Exception as e:
+        print(json.dumps({"error": str(e), "hook_safe_exit": True}), file=sys.stderr)
+        sys.exit(0)
+
+    print(json.dumps(result))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
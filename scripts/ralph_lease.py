@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Ralph Leases - time-bounded task ownership renewed by agent heartbeats.
+
+A claim gives the agent a lease (QueueTask.lease_expires_at, RALPH_LEASE_SECONDS
+from now). While the agent works, hooks renew it by touching one heartbeat file
+per agent; the queue itself is not rewritten:
+
+    .claude/ralph/leases/<agent_id>     mtime = last heartbeat
+                                        content "stopped" = agent exited (SubagentStop)
+
+Leases are held under the agent's lease id (agent_lease_id): the hook
+payload's agent_id for an in-process subagent, else RALPH_AGENT_ID or
+CLAUDE_CODE_AGENT_NAME for an agent running as its own process. Claimants
+must claim under that id, because the heartbeat hook can only renew by it. A
+claim made while the environment names a different agent raises ValueError
+(check_claimant). The hook renews only a lease file that a claim created,
+so agents that never claim leave nothing behind.
+
+Effective expiry is max(lease_expires_at, last heartbeat + lease length), or
+immediately once the agent has stopped. Expired leases are reclaimed lazily by
+the next claim_next_task, so a crashed agent's task returns to the pool at the
+next claim instead of after a fixed timeout, and a slow but live agent keeps
+its task as long as it heartbeats.
+
+This module imports only os/time/datetime/pathlib: ralph_hooks.py calls
+renew() on every working tool use.
+
+Usage:
+    from scripts.ralph_lease import heartbeat, effective_expiry
+
+    heartbeat("agent-1")                    # Claim time (creates the lease file)
+    renew(agent_lease_id(payload))          # PostToolUse (cheap: one utime)
+    end_lease("agent-1")                    # SubagentStop
+
+Env vars:
+    RALPH_LEASE_SECONDS     Lease length and heartbeat grace (default: 300)
+    RALPH_AGENT_ID          Lease id of an agent process (else CLAUDE_CODE_AGENT_NAME)
+"""
+
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+LEASE_SECONDS = 300
+LEASE_DIR = Path(".claude") / "ralph" / "leases"
+STOPPED = b"stopped"
+AGENT_ID_ENV = ("RALPH_AGENT_ID", "CLAUDE_CODE_AGENT_NAME")
+
+
+def lease_seconds() -> float:
+    try:
+        return max(1.0, float(os.environ.get("RALPH_LEASE_SECONDS", LEASE_SECONDS)))
+    except ValueError:
+        return float(LEASE_SECONDS)
+
+
+def heartbeat_path(agent_id: str, base_dir: Optional[Path] = None) -> Path:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in agent_id).lstrip(".") or "_"
+    return (Path(base_dir) if base_dir else Path.cwd()) / LEASE_DIR / safe
+
+
+def agent_lease_id(payload: Optional[dict] = None) -> Optional[str]:
+    """Lease id of the calling agent: the hook payload's agent_id, else RALPH_AGENT_ID / CLAUDE_CODE_AGENT_NAME."""
+    agent_id = (payload or {}).get("agent_id")
+    if agent_id and isinstance(agent_id, str):
+        return agent_id
+    for name in AGENT_ID_ENV:
+        if os.environ.get(name):
+            return os.environ[name]
+    return None
+
+
+def check_claimant(agent_id: str) -> None:
+    """Raise ValueError if this process belongs to an agent whose lease id is not agent_id."""
+    current = agent_lease_id()
+    if current is not None and current != agent_id:
+        raise ValueError(
+            f"claimant {agent_id!r} is not this agent's lease id {current!r}; "
+            "its heartbeats would never renew the lease"
+        )
+
+
+def heartbeat(agent_id: str, base_dir: Optional[Path] = None) -> None:
+    """Renew every lease held by agent_id (truncates a "stopped" marker)."""
+    path = heartbeat_path(agent_id, base_dir)
+    try:
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.close(fd)
+    os.utime(path)  # O_TRUNC on an already-empty file need not bump mtime
+
+
+def renew(agent_id: str, base_dir: Optional[Path] = None) -> bool:
+    """Renew agent_id's leases if it holds any (a claim created its file). False otherwise."""
+    try:
+        os.utime(heartbeat_path(agent_id, base_dir))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def end_lease(agent_id: str, base_dir: Optional[Path] = None) -> bool:
+    """Mark agent_id as stopped so its leases expire at the next claim. False if it never heartbeat."""
+    path = heartbeat_path(agent_id, base_dir)
+    if not path.exists():
+        return False
+    path.write_bytes(STOPPED)
+    return True
+
+
+def new_lease(seconds: Optional[float] = None) -> str:
+    """Expiry timestamp for a lease granted now (ISO, like started_at)."""
+    return datetime.fromtimestamp(time.time() + (seconds or lease_seconds())).isoformat()
+
+
+def _epoch(stamp: Optional[str]) -> Optional[float]:
+    if not stamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(stamp)
+    except (ValueError, TypeError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None)  # Queue timestamps are naive local time
+    return parsed.timestamp()
+
+
+def effective_expiry(
+    claimed_by: Optional[str],
+    lease_expires_at: Optional[str],
+    started_at: Optional[str],
+    base_dir: Optional[Path] = None,
+    seconds: Optional[float] = None,
+) -> Optional[float]:
+    """
+    Epoch time at which a claim lapses, or None if nothing is known about it.
+
+    Tasks claimed before leases existed fall back to started_at + lease length.
+    A stopped agent's claims lapse immediately (returns 0.0).
+    """
+    seconds = seconds or lease_seconds()
+    expiry = _epoch(lease_expires_at)
+    if expiry is None:
+        started = _epoch(started_at)
+        expiry = started + seconds if started is not None else None
+    if claimed_by:
+        path = heartbeat_path(claimed_by, base_dir)
+        try:
+            stat = path.stat()
+        except OSError:
+            return expiry
+        if stat.st_size and path.read_bytes() == STOPPED:
+            return 0.0
+        expiry = max(expiry or 0.0, stat.st_mtime + seconds)
+    return expiry
+
+
+def expiry_stamp(expiry: float) -> str:
+    return datetime.fromtimestamp(expiry).isoformat()
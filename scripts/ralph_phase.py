@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Ralph Phase Counters - race-free agent completion counting and phase transitions.
+
+Parallel Task agents finish together, so agent_tracker must not count by
+read-modify-write of state.json. Instead each completion appends one line to
+a per-phase journal, and the journal's line count is the counter:
+
+    .claude/ralph/phase/<session>-<epoch>-<phase>.log   one line per completed agent
+    .claude/ralph/activity.jsonl(.1)                    bounded activity log
+    .claude/ralph/state.lock                            held only for compare-and-set
+
+<session> is derived from the state's startedAt and <epoch> is the
+state's phaseEpoch (bumped by every transition), so a new session or phase
+starts from an empty journal without anything being reset. A completion that
+brings the count to the phase's target attempts one compare-and-set on
+state.json: under the lock, the state is re-read and only advanced if phase
+and phaseEpoch still match. Exactly one agent wins the transition; the rest
+see the new epoch and do nothing.
+
+Activity events are single O_APPEND lines. When the file passes
+ACTIVITY_MAX_BYTES it is renamed over activity.jsonl.1 and appends start a
+new file; readers see both segments. Appenders never take the lock, so the
+log is never rewritten: a line lands in one segment or the other.
+
+State journal: state.json is a snapshot, and small state changes
+(heartbeats, agent status, counters) are appended to state.journal as
+{"base": ..., "set": {...}} lines instead of rewriting it:
+
+    .claude/ralph/state.json       snapshot, tagged with journalBase
+    .claude/ralph/state.journal    deltas recorded against that snapshot
+
+load_state() is the snapshot with the deltas of its journalBase applied in
+order; deltas of another base (a snapshot written by someone else, or a
+journal left behind by a removed session) are ignored. checkpoint_state()
+folds the journal into a new fsync'd snapshot with a fresh journalBase; it
+runs at phase boundaries and whenever the journal passes
+STATE_JOURNAL_MAX_BYTES. Appends and folds take the state lock, so a fold
+never drops a delta written while it ran. compare_and_set() folds too.
+
+Usage:
+    from scripts.ralph_phase import record_completion, compare_and_set, append_activity
+
+    count = record_completion(state, "agent-3")
+    if count >= expected:
+        new_state = compare_and_set(state_path, {"phase": phase, "phaseEpoch": epoch}, advance)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+RALPH_DIR = Path(".claude") / "ralph"
+ACTIVITY_NAME = "activity.jsonl"
+ACTIVITY_MAX_BYTES = 32 * 1024
+ACTIVITY_KEEP = 50
+LOCK_NAME = "state.lock"
+STATE_JOURNAL_NAME = "state.journal"
+STATE_JOURNAL_MAX_BYTES = 16 * 1024
+
+
+def _append_line(path: Path, line: str) -> int:
+    """One O_APPEND write; returns the file size afterwards."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, line.encode("utf-8"))
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _locked(base_dir: Path):
+    """Hold the state lock of base_dir (counting and activity appends never take it)."""
+    # Imported here so lock-free readers (load_state in ralph_hooks) skip scripts.compat
+    from scripts.compat import file_lock, file_unlock
+
+    base_dir.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(base_dir / LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        file_lock(fd)
+        try:
+            yield
+        finally:
+            file_unlock(fd)
+    finally:
+        os.close(fd)
+
+
+# =============================================================================
+# Completion counters
+# =============================================================================
+
+def journal_path(state: dict, base_dir: Path = RALPH_DIR) -> Path:
+    """Completion journal of the state's current session, epoch and phase."""
+    started = str(state.get("startedAt") or state.get("started_at") or "")
+    session = hashlib.sha1(started.encode("utf-8")).hexdigest()[:8]
+    epoch = int(state.get("phaseEpoch") or 0)
+    phase = state.get("phase", "implementation")
+    return base_dir / "phase" / f"{session}-{epoch}-{phase}.log"
+
+
+def record_completion(state: dict, agent: str = "", base_dir: Path = RALPH_DIR) -> int:
+    """Count one completed agent in the current phase. Returns the phase's count so far."""
+    path = journal_path(state, base_dir)
+    _append_line(path, f"{agent or '-'}\n")
+    return completions(state, base_dir)
+
+
+def completions(state: dict, base_dir: Path = RALPH_DIR) -> int:
+    """Completed agents recorded for the state's current phase."""
+    try:
+        with open(journal_path(state, base_dir), "rb") as f:
+            return f.read().count(b"\n")
+    except OSError:
+        return 0
+
+
+def clear_journals(state: dict, base_dir: Path = RALPH_DIR) -> None:
+    """Remove the session's completion journals (after the loop completes)."""
+    prefix = journal_path(state, base_dir).name.split("-", 1)[0] + "-"
+    try:
+        for path in (base_dir / "phase").iterdir():
+            if path.name.startswith(prefix):
+                path.unlink()
+    except OSError:
+        pass
+
+
+# =============================================================================
+# State compare-and-set
+# =============================================================================
+
+def compare_and_set(
+    state_path: Path,
+    expected: dict,
+    update: Callable[[dict], dict],
+    base_dir: Optional[Path] = None,
+) -> Optional[dict]:
+    """
+    Apply update to state.json only if every expected key still has its value.
+
+    Runs under the state lock, so of several callers racing on the same
+    expected values exactly one succeeds. The state journal is folded into
+    the written snapshot. Returns the written state, or None if the state
+    moved on (or could not be read/written).
+    """
+    base_dir = base_dir if base_dir is not None else state_path.parent
+    with _locked(base_dir):
+        try:
+            current = load_state(state_path)
+        except (OSError, ValueError):
+            return None
+        if current is None:
+            return None
+        if any(current.get(key) != value for key, value in expected.items()):
+            return None
+        new_state = update(current)
+        try:
+            _write_snapshot(state_path, new_state, fsync=False)
+        except OSError:
+            return None
+        return new_state
+
+
+# =============================================================================
+# State journal
+# =============================================================================
+
+def state_journal_path(state_path: Path) -> Path:
+    return state_path.with_name(STATE_JOURNAL_NAME)
+
+
+def load_state(state_path: Path) -> Optional[dict]:
+    """
+    Snapshot plus the journal deltas recorded against it, or None if there is
+    no state. Raises ValueError for an unreadable snapshot.
+    """
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    if not isinstance(state, dict):
+        raise ValueError("state snapshot is not an object")
+    base = state.get("journalBase")
+    if not base:
+        return state
+    try:
+        with open(state_journal_path(state_path), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    delta = json.loads(line)
+                except ValueError:
+                    continue  # Torn line from a crashed writer
+                if isinstance(delta, dict) and delta.get("base") == base and isinstance(delta.get("set"), dict):
+                    state.update(delta["set"])
+    except OSError:
+        pass
+    return state
+
+
+def _write_snapshot(state_path: Path, state: dict, fsync: bool) -> None:
+    """Replace the snapshot with state under a new journalBase and drop the folded journal."""
+    state["journalBase"] = uuid.uuid4().hex[:12]
+    tmp = state_path.with_name(f"{state_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, state_path)
+    try:
+        state_journal_path(state_path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def checkpoint_state(
+    state_path: Path,
+    changes: Optional[dict] = None,
+    base_dir: Optional[Path] = None,
+    replace: bool = False,
+) -> dict:
+    """
+    Fold the journal and changes into a new fsync'd snapshot. With replace=True
+    changes becomes the whole state. Returns the written state. Raises OSError.
+    """
+    base_dir = base_dir if base_dir is not None else state_path.parent
+    with _locked(base_dir):
+        state = None
+        if not replace:
+            try:
+                state = load_state(state_path)
+            except ValueError:
+                state = None  # Corrupt snapshot: start over from changes
+        state = dict(state or {})
+        state.update(changes or {})
+        _write_snapshot(state_path, state, fsync=True)
+        return state
+
+
+def append_state_delta(state_path: Path, changes: dict, base_dir: Optional[Path] = None) -> bool:
+    """
+    Record changes against the current snapshot. Returns False if the snapshot
+    has no journalBase yet (the caller must checkpoint instead). Raises OSError.
+    """
+    base_dir = base_dir if base_dir is not None else state_path.parent
+    with _locked(base_dir):
+        try:
+            snapshot = json.loads(state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        base = snapshot.get("journalBase") if isinstance(snapshot, dict) else None
+        if not base:
+            return False
+        line = json.dumps({"base": base, "set": changes}, separators=(",", ":")) + "\n"
+        size = _append_line(state_journal_path(state_path), line)
+    if size >= STATE_JOURNAL_MAX_BYTES:
+        checkpoint_state(state_path, base_dir=base_dir)  # Periodic snapshot
+    return True
+
+
+# =============================================================================
+# Activity log
+# =============================================================================
+
+def _activity_segments(base_dir: Path) -> tuple[Path, Path]:
+    """(previous, current) activity segments, oldest first."""
+    path = base_dir / ACTIVITY_NAME
+    return path.with_name(f"{ACTIVITY_NAME}.1"), path
+
+
+def append_activity(event: dict, base_dir: Path = RALPH_DIR) -> None:
+    """Append one activity event; rotates the log into its previous segment when it grows."""
+    previous, path = _activity_segments(base_dir)
+    try:
+        size = _append_line(path, json.dumps(event, separators=(",", ":")) + "\n")
+    except OSError:
+        return
+    if size < ACTIVITY_MAX_BYTES:
+        return
+    with _locked(base_dir):  # One rotation per full segment
+        try:
+            if path.stat().st_size >= ACTIVITY_MAX_BYTES:
+                os.replace(path, previous)
+        except OSError:
+            pass
+
+
+def read_activity(base_dir: Path = RALPH_DIR, limit: int = ACTIVITY_KEEP) -> list[dict]:
+    """Newest `limit` activity events, oldest first."""
+    lines = []
+    for segment in _activity_segments(base_dir):
+        try:
+            lines.extend(segment.read_text(encoding="utf-8", errors="replace").splitlines())
+        except OSError:
+            continue
+    events = []
+    for line in lines[-limit:]:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events
@@ -0,0 +1,798 @@
+#!/usr/bin/env python3
+"""
+Ralph Work-Stealing Queue - file-based task queue shared by Ralph agents.
+
+Single home for QueueTask, TaskQueue, TaskQueueParser and WorkStealingQueue
+(previously defined twice in scripts/ralph.py, where the second copy silently
+shadowed the first). scripts/ralph.py re-exports every name for backward
+compatibility.
+
+Usage:
+    from scripts.ralph_queue import WorkStealingQueue
+
+    queue = WorkStealingQueue("feature-auth", "plans/auth.md", format="json")
+    queue.add_task("1", "Add login form")
+    task = queue.claim_next_task("agent-0")
+    queue.complete_task(task.id)
+
+    queue = open_queue("feature-auth", "plans/auth.md")   # Honours RALPH_QUEUE_BACKEND
+
+Env vars:
+    RALPH_QUEUE_BACKEND    markdown | json | sqlite (default: sqlite if a
+                           task-queue-{plan}.db exists, else markdown)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.compat import file_lock, file_unlock
+from scripts.ralph_lease import check_claimant, effective_expiry, expiry_stamp, heartbeat, new_lease
+
+
+# =============================================================================
+# Work-Stealing Queue Data Models
+# =============================================================================
+
+@dataclass
+class QueueTask:
+    """Task in the work-stealing queue."""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    description: str = ""  # Task description for markdown format
+    status: str = "pending"
+    blocked_by: list = field(default_factory=list)
+    claimed_by: Optional[str] = None
+    iterations: int = 0
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    lease_expires_at: Optional[str] = None  # Claim lapses after this unless the agent heartbeats
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "blockedBy": self.blocked_by,
+            "claimed_by": self.claimed_by,
+            "iterations": self.iterations,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "lease_expires_at": self.lease_expires_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QueueTask":
+        return cls(
+            id=data["id"],
+            description=data.get("description", ""),
+            status=data.get("status", "pending"),
+            blocked_by=data.get("blockedBy", []),
+            claimed_by=data.get("claimed_by"),
+            iterations=data.get("iterations", 0),
+            started_at=data.get("started_at"),
+            completed_at=data.get("completed_at"),
+            lease_expires_at=data.get("lease_expires_at"),
+        )
+
+
+_MARKDOWN_ATTRS = re.compile(r"\s*<!--(.*?)-->\s*$")
+
+
+def _markdown_attrs(task: QueueTask) -> str:
+    """Trailing comment carrying the claim fields the checkbox line has no room for."""
+    attrs = [f"iterations={task.iterations}"] if task.iterations else []
+    for key in ("started_at", "completed_at", "lease_expires_at"):
+        value = getattr(task, key)
+        if value:
+            attrs.append(f"{key}={value}")
+    return f" <!-- {' '.join(attrs)} -->" if attrs else ""
+
+
+@dataclass
+class TaskQueue:
+    """Work-stealing task queue tied to a plan file (supports JSON and Markdown)."""
+    plan_id: str
+    plan_file: str
+    created_at: str
+    tasks: list = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "plan_id": self.plan_id,
+            "plan_file": self.plan_file,
+            "created_at": self.created_at,
+            "tasks": [t.to_dict() if isinstance(t, QueueTask) else t for t in self.tasks]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TaskQueue":
+        return cls(
+            plan_id=data["plan_id"],
+            plan_file=data["plan_file"],
+            created_at=data["created_at"],
+            tasks=[QueueTask.from_dict(t) if isinstance(t, dict) else t for t in data.get("tasks", [])]
+        )
+
+    def to_markdown(self) -> str:
+        """
+        Generate markdown representation of task queue.
+
+        Format:
+        ---
+        plan_id: feature-auth
+        created: 2026-02-04T10:00:00Z
+        total_tasks: 5
+        completed: 2
+        ---
+
+        # Task Queue: feature-auth
+
+        ## ✅ Completed
+        - [x] Task 1: Description (agent-abc123)
+
+        ## 🔄 In Progress
+        - [/] Task 2: Description (agent-def456)
+
+        ## ⏳ Pending
+        - [ ] Task 3: Description (blocked by: 1, 2)
+
+        Claim bookkeeping (iterations, started_at, completed_at,
+        lease_expires_at) rides along in a trailing comment, e.g.
+        "<!-- iterations=2 lease_expires_at=2026-02-04T10:05:00 -->".
+        """
+        completed = [t for t in self.tasks if t.status == "completed"]
+        in_progress = [t for t in self.tasks if t.status == "in_progress"]
+        pending = [t for t in self.tasks if t.status == "pending"]
+
+        lines = [
+            "---",
+            f"plan_id: {self.plan_id}",
+            f"created: {self.created_at}",
+            f"total_tasks: {len(self.tasks)}",
+            f"completed: {len(completed)}",
+            "---",
+            "",
+            f"# Task Queue: {self.plan_id}",
+            ""
+        ]
+
+        if completed:
+            lines.append("## ✅ Completed")
+            for task in completed:
+                agent_info = f" ({task.claimed_by})" if task.claimed_by else ""
+                lines.append(f"- [x] Task {task.id}: {task.description}{agent_info}{_markdown_attrs(task)}")
+            lines.append("")
+
+        if in_progress:
+            lines.append("## 🔄 In Progress")
+            for task in in_progress:
+                agent_info = f" ({task.claimed_by})" if task.claimed_by else ""
+                lines.append(f"- [/] Task {task.id}: {task.description}{agent_info}{_markdown_attrs(task)}")
+            lines.append("")
+
+        if pending:
+            lines.append("## ⏳ Pending")
+            for task in pending:
+                blocked_info = f" (blocked by: {', '.join(task.blocked_by)})" if task.blocked_by else ""
+                lines.append(f"- [ ] Task {task.id}: {task.description}{blocked_info}{_markdown_attrs(task)}")
+            lines.append("")
+
+        return "\n".join(lines)
+
+    @classmethod
+    def from_markdown(cls, content: str, plan_id: str = None, plan_file: str = None) -> "TaskQueue":
+        """Parse markdown task queue (as written by to_markdown) into a TaskQueue."""
+        in_frontmatter = False
+        frontmatter = {}
+        tasks_section = []
+
+        for line in content.split("\n"):
+            if line.strip() == "---":
+                in_frontmatter = not in_frontmatter
+                continue
+            if in_frontmatter:
+                if ":" in line:
+                    key, value = line.split(":", 1)
+                    frontmatter[key.strip()] = value.strip()
+            else:
+                tasks_section.append(line)
+
+        extracted_plan_id = plan_id or frontmatter.get("plan_id", "unknown")
+        extracted_plan_file = plan_file or frontmatter.get("plan_file", "")
+        created_at = frontmatter.get("created", datetime.now().isoformat())
+
+        tasks = []
+        task_pattern = re.compile(
+            r"^-\s+\[([ x/])\]\s+Task\s+(\S+):\s?(.*?)"
+            r"(?:\s+\(blocked by:\s+([^)]+)\)|\s+\(([^)]+)\))?$"
+        )
+
+        for line in tasks_section:
+            attrs = {}
+            found = _MARKDOWN_ATTRS.search(line)
+            if found:
+                attrs = dict(re.findall(r"(\w+)=(\S+)", found.group(1)))
+                line = line[:found.start()]
+            match = task_pattern.match(line.strip())
+            if not match:
+                continue
+            checkbox, task_id, description, blocked_by, claimed_by = match.groups()
+            if checkbox == "x":
+                status = "completed"
+            elif checkbox == "/":
+                status = "in_progress"
+            else:
+                status = "pending"
+            blocked_list = [b.strip() for b in blocked_by.split(",")] if blocked_by else []
+            tasks.append(QueueTask(
+                id=task_id,
+                description=description.strip(),
+                status=status,
+                claimed_by=claimed_by,
+                blocked_by=blocked_list,
+                iterations=int(attrs.get("iterations", 0)),
+                started_at=attrs.get("started_at"),
+                completed_at=attrs.get("completed_at"),
+                lease_expires_at=attrs.get("lease_expires_at"),
+            ))
+
+        return cls(plan_id=extracted_plan_id, plan_file=extracted_plan_file, created_at=created_at, tasks=tasks)
+
+
+class TaskQueueParser:
+    """
+    Parser for markdown task lists with priority-based format.
+
+    Supports formats:
+    - [ ] P1: Description - blocked by: task-name
+    - [x] P2: Description - completed
+    - [ ] P3: Description - depends on: task-name
+
+    Features:
+    - Priority extraction (P1/P2/P3)
+    - Status parsing (pending/in_progress/completed)
+    - Dependency detection (blocked by/depends on)
+    - Plan file parsing
+    - Round-trip conversion (markdown <-> QueueTask)
+    """
+
+    @staticmethod
+    def parse_markdown(content: str) -> list[QueueTask]:
+        """
+        Parse markdown content into list of QueueTask objects.
+
+        Supports priority labels (P1/P2/P3) and dependency syntax.
+
+        Args:
+            content: Markdown task list content
+
+        Returns:
+            List of QueueTask objects
+        """
+        tasks = []
+        lines = content.strip().split("\n")
+
+        # Pattern: - [checkbox] P1: Description - blocked by: task-name
+        # Supports em-dash (—), en-dash (–), and hyphen as separators
+        task_pattern = re.compile(
+            r"^-\s+\[([ x/])\]\s+(?:P[123]:\s+)?(.+?)(?:\s+[—–-]\s+(?:blocked by|depends on):\s+(.+))?$",
+            re.IGNORECASE
+        )
+
+        for line in lines:
+            stripped = line.strip()
+            match = task_pattern.match(stripped)
+            if not match:
+                continue
+
+            checkbox, description, dependencies = match.groups()
+
+            # Determine status from checkbox
+            if checkbox == "x":
+                status = "completed"
+            elif checkbox == "/":
+                status = "in_progress"
+            else:
+                status = "pending"
+
+            # Parse blocked_by list
+            blocked_list = []
+            if dependencies:
+                blocked_list = [d.strip() for d in dependencies.split(",")]
+
+            tasks.append(QueueTask(
+                description=description.strip(),
+                status=status,
+                blocked_by=blocked_list
+            ))
+
+        return tasks
+
+
+# =============================================================================
+# Work-Stealing Queue
+# =============================================================================
+
+class WorkStealingQueue:
+    """
+    File-based work-stealing queue with atomic task claiming.
+
+    Location: {project}/.claude/task-queue-{plan-id}.md (or .json)
+
+    Uses file locking to prevent race conditions when multiple
+    agents attempt to claim tasks simultaneously.
+    """
+
+    QUEUE_DIR = ".claude"
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, plan_id: str, plan_file: str, base_dir: Optional[Path] = None, format: str = "markdown"):
+        self.plan_id = plan_id
+        self.plan_file = plan_file
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        self.format = format  # "json" or "markdown"
+
+        ext = ".md" if format == "markdown" else ".json"
+        self.queue_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}{ext}"
+        self.lock_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}{self.LOCK_SUFFIX}"
+
+    def _ensure_dir(self) -> None:
+        """Ensure queue directory exists."""
+        self.queue_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _acquire_lock(self) -> int:
+        """Acquire file lock for atomic operations."""
+        self._ensure_dir()
+        fd = os.open(str(self.lock_path), os.O_CREAT | os.O_RDWR)
+        file_lock(fd)
+        return fd
+
+    def _release_lock(self, fd: int) -> None:
+        """Release file lock."""
+        file_unlock(fd)
+        os.close(fd)
+
+    def load(self) -> TaskQueue:
+        """Load queue from file (JSON or Markdown), creating if needed."""
+        if self.queue_path.exists():
+            try:
+                if self.format == "markdown":
+                    content = self.queue_path.read_text(encoding="utf-8")
+                    return TaskQueue.from_markdown(content, self.plan_id, self.plan_file)
+                else:
+                    with open(self.queue_path) as f:
+                        return TaskQueue.from_dict(json.load(f))
+            except (json.JSONDecodeError, KeyError, ValueError):
+                pass
+
+        # Create new queue
+        return TaskQueue(
+            plan_id=self.plan_id,
+            plan_file=self.plan_file,
+            created_at=datetime.now().isoformat(),
+            tasks=[]
+        )
+
+    def save(self, queue: TaskQueue) -> None:
+        """Save queue to file (JSON or Markdown)."""
+        self._ensure_dir()
+
+        if self.format == "markdown":
+            self.queue_path.write_text(queue.to_markdown(), encoding="utf-8")
+        else:
+            # Deferred: hooks.transaction pulls in portalocker
+            from hooks.transaction import atomic_write_json
+            atomic_write_json(self.queue_path, queue.to_dict(), fsync=True)
+
+    def _update_task(self, task_id: str, **changes) -> bool:
+        """Apply attribute changes to one task under the queue lock."""
+        fd = self._acquire_lock()
+        try:
+            queue = self.load()
+
+            for task in queue.tasks:
+                if task.id == task_id:
+                    for name, value in changes.items():
+                        setattr(task, name, value)
+                    self.save(queue)
+                    return True
+
+            return False
+
+        finally:
+            self._release_lock(fd)
+
+    def _expire_leases(self, tasks: list, seconds: Optional[float] = None) -> list[str]:
+        """Return in_progress tasks whose lease has lapsed to pending; refresh heartbeat-extended leases."""
+        now = time.time()
+        reclaimed = []
+        for task in tasks:
+            if task.status != "in_progress":
+                continue
+            expiry = effective_expiry(task.claimed_by, task.lease_expires_at, task.started_at, self.base_dir, seconds)
+            if expiry is None:
+                continue  # No lease, start time or heartbeat recorded (e.g. markdown round-trip)
+            if expiry <= now:
+                task.status = "pending"
+                task.claimed_by = None
+                task.lease_expires_at = None
+                reclaimed.append(task.id)
+            else:
+                task.lease_expires_at = expiry_stamp(expiry)
+        return reclaimed
+
+    def heartbeat(self, agent_id: str) -> None:
+        """Renew agent_id's leases (touches its heartbeat file; the queue is not rewritten)."""
+        heartbeat(agent_id, self.base_dir)
+
+    def apply(self, ops: Iterable[tuple]) -> list:
+        """
+        Run several queue operations with one lock, one load and at most one save.
+
+        Each op is a tuple; results come back in the same order:
+            ("add", task_id, description="", blocked_by=None)  -> QueueTask (the stored one if the id exists)
+            ("claim", agent_id)                                -> QueueTask or None
+            ("complete", task_id)                              -> bool
+            ("release", task_id)                               -> bool
+            ("reclaim", timeout_seconds=None)                  -> list of reclaimed task IDs
+
+        Later ops see earlier ones (a claim after a complete can take the
+        task it unblocked). Expired leases are reclaimed before the first claim.
+        """
+        ops = list(ops)
+        if not ops:
+            return []
+        for op, *args in ops:
+            if op == "claim":
+                check_claimant(args[0])
+
+        # Deferred: ralph_scheduler imports this module
+        from scripts.ralph_scheduler import ReadyScheduler
+
+        fd = self._acquire_lock()
+        try:
+            queue = self.load()
+            scheduler = ReadyScheduler(queue.tasks)
+            results: list = []
+            claimants: list[str] = []
+            changed = False
+            leases_checked = False
+
+            def reclaim(seconds: Optional[float] = None) -> list[str]:
+                reclaimed = self._expire_leases(queue.tasks, seconds)
+                for task_id in reclaimed:
+                    scheduler.release(task_id)  # Back into the ready heap
+                return reclaimed
+
+            for op, *args in ops:
+                if op == "add":
+                    task_id, description, blocked_by = (list(args) + ["", None])[:3]
+                    task = QueueTask(id=task_id, description=description, blocked_by=list(blocked_by or []))
+                    stored = scheduler.add(task)
+                    if stored is task:
+                        queue.tasks.append(task)
+                        changed = True
+                    results.append(stored)
+                elif op == "claim":
+                    if not leases_checked:
+                        changed |= bool(reclaim())
+                        leases_checked = True
+                    task = scheduler.claim(args[0])
+                    if task is not None:
+                        task.lease_expires_at = new_lease()
+                        claimants.append(args[0])
+                        changed = True
+                    results.append(task)
+                elif op in ("complete", "release"):
+                    done = scheduler.complete(args[0]) if op == "complete" else scheduler.release(args[0])
+                    if done:
+                        scheduler.tasks[args[0]].lease_expires_at = None
+                        changed = True
+                    results.append(done)
+                elif op == "reclaim":
+                    reclaimed = reclaim(args[0] if args else None)
+                    leases_checked = True
+                    changed |= bool(reclaimed)
+                    results.append(reclaimed)
+                else:
+                    raise ValueError(f"Unknown queue op: {op!r}")
+
+            if changed:
+                self.save(queue)
+        finally:
+            self._release_lock(fd)
+
+        for agent_id in dict.fromkeys(claimants):
+            heartbeat(agent_id, self.base_dir)  # Clears a "stopped" marker from a previous run
+        return results
+
+    def claim_next_task(self, agent_id: str) -> Optional[QueueTask]:
+        """
+        Atomically claim the next available task.
+
+        A task is available if:
+        - status == "pending"
+        - claimed_by is None
+        - all blockedBy tasks are completed
+
+        Among available tasks the one heading the longest remaining
+        dependency chain (weighted by estimated cost) is claimed first.
+        Expired leases are reclaimed first, so their tasks are claimable
+        again. The claimed task carries a fresh lease_expires_at, and its
+        iterations field counts attempts.
+
+        Args:
+            agent_id: ID of the agent claiming the task.
+
+        Returns:
+            The claimed QueueTask, or None if no tasks available.
+        """
+        return self.apply([("claim", agent_id)])[0]
+
+    def claim_many(self, agent_id: str, k: int) -> list[QueueTask]:
+        """Claim up to k tasks for one agent in a single locked pass (fewer if fewer are ready)."""
+        return [task for task in self.apply([("claim", agent_id)] * max(0, k)) if task is not None]
+
+    def complete_task(self, task_id: str) -> bool:
+        """
+        Mark a task as completed.
+
+        Args:
+            task_id: ID of the task to complete.
+
+        Returns:
+            True if task was found and completed, False otherwise.
+        """
+        return self.apply([("complete", task_id)])[0]
+
+    def complete_many(self, task_ids: Iterable[str]) -> list[bool]:
+        """Complete several tasks in one locked pass (per-id found flags)."""
+        return self.apply([("complete", task_id) for task_id in task_ids])
+
+    def mark_task_complete(self, task_id: str, agent_id: str) -> bool:
+        """Mark a task as completed on behalf of agent_id (alias of complete_task)."""
+        return self.complete_task(task_id)
+
+    def release_task(self, task_id: str) -> bool:
+        """
+        Release a task back to pending (e.g., on agent failure).
+
+        Args:
+            task_id: ID of the task to release.
+
+        Returns:
+            True if task was found and released, False otherwise.
+        """
+        return self.apply([("release", task_id)])[0]
+
+    def add_task(self, task_id: str, description: str = "", blocked_by: list | None = None) -> QueueTask:
+        """
+        Add a new task to the queue.
+
+        Args:
+            task_id: Unique task identifier.
+            description: Human-readable task description.
+            blocked_by: List of task IDs that must complete first.
+
+        Returns:
+            The created QueueTask (or the stored one if task_id already exists).
+        """
+        return self.apply([("add", task_id, description, blocked_by)])[0]
+
+    def add_tasks(self, tasks: Iterable) -> list[QueueTask]:
+        """Add many tasks in one locked pass. Items are QueueTask objects or (id, description, blocked_by) tuples."""
+        return self.apply([add_op(task) for task in tasks])
+
+    def get_status(self) -> dict:
+        """Get queue status summary."""
+        queue = self.load()
+
+        status_counts = {"pending": 0, "in_progress": 0, "completed": 0}
+        for task in queue.tasks:
+            status_counts[task.status] = status_counts.get(task.status, 0) + 1
+
+        return {
+            "plan_id": queue.plan_id,
+            "total_tasks": len(queue.tasks),
+            **status_counts
+        }
+
+    def reclaim_stale_tasks(self, timeout_seconds: Optional[float] = None) -> list[str]:
+        """
+        Eagerly unclaim in_progress tasks whose lease has expired.
+
+        claim_next_task already does this lazily; this is for sweeps/status.
+        A lease lapses at max(lease_expires_at, last heartbeat + lease length),
+        or at once when the owning agent has stopped.
+
+        Args:
+            timeout_seconds: Lease length override (default RALPH_LEASE_SECONDS);
+                also the fallback age for tasks claimed without a lease.
+
+        Returns:
+            List of reclaimed task IDs.
+        """
+        return self.apply([("reclaim", timeout_seconds)])[0]
+
+
+def add_op(task) -> tuple:
+    """("add", ...) op for a QueueTask or an (id, description, blocked_by) tuple."""
+    if isinstance(task, QueueTask):
+        return ("add", task.id, task.description, task.blocked_by)
+    return ("add", *task)
+
+
+# =============================================================================
+# Backend selection
+# =============================================================================
+
+QUEUE_BACKENDS = ("markdown", "json", "sqlite")
+
+
+def open_queue(plan_id: str, plan_file: str, base_dir: Optional[Path] = None, backend: Optional[str] = None):
+    """
+    Open the queue for a plan on the configured backend.
+
+    Backend resolution: explicit argument, then RALPH_QUEUE_BACKEND, then
+    "sqlite" if task-queue-{plan_id}.db already exists, else "markdown".
+    The sqlite backend (scripts/ralph_queue_sqlite.py) is imported lazily.
+    """
+    backend = backend or os.environ.get("RALPH_QUEUE_BACKEND", "").strip().lower()
+    if not backend:
+        db_path = (Path(base_dir) if base_dir else Path.cwd()) / WorkStealingQueue.QUEUE_DIR / f"task-queue-{plan_id}.db"
+        backend = "sqlite" if db_path.exists() else "markdown"
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(f"Unknown queue backend: {backend!r} (expected one of {', '.join(QUEUE_BACKENDS)})")
+    if backend == "sqlite":
+        from scripts.ralph_queue_sqlite import SqliteWorkStealingQueue
+        return SqliteWorkStealingQueue(plan_id, plan_file, base_dir)
+    return WorkStealingQueue(plan_id, plan_file, base_dir, format=backend)
+
+
+# Convenience functions for work-stealing queue
+def claim_next_task(agent_id: str, plan_id: str, plan_file: str, base_dir: Optional[Path] = None) -> Optional[QueueTask]:
+    """Atomic task claiming (file lock or SQLite write transaction)."""
+    return open_queue(plan_id, plan_file, base_dir).claim_next_task(agent_id)
+
+
+def release_task(task_id: str, plan_id: str, plan_file: str, base_dir: Optional[Path] = None) -> bool:
+    """Release uncompleted task back to queue."""
+    return open_queue(plan_id, plan_file, base_dir).release_task(task_id)
+
+
+def mark_task_complete(task_id: str, agent_id: str, plan_id: str, plan_file: str, base_dir: Optional[Path] = None) -> bool:
+    """Mark task as done."""
+    return open_queue(plan_id, plan_file, base_dir).mark_task_complete(task_id, agent_id)
+
+
+# =============================================================================
+# Plan import / benchmark CLI
+# =============================================================================
+
+def import_markdown_tasks(queue, content: str) -> tuple[list[QueueTask], list[str]]:
+    """
+    Add every checklist item of a markdown plan in one batch.
+
+    "blocked by:" / "depends on:" names are resolved to task ids by matching
+    an imported task's description (case-insensitive). Task ids are derived
+    from the normalized description, so importing the same plan again adds
+    only the items that are new.
+
+    Returns:
+        (tasks as stored, dependency names that matched no task)
+    """
+    tasks = TaskQueueParser.parse_markdown(content)
+    occurrences: dict[str, int] = {}
+    for task in tasks:
+        key = " ".join(task.description.lower().split())
+        occurrences[key] = occurrences.get(key, 0) + 1
+        if occurrences[key] > 1:
+            key += f"#{occurrences[key]}"  # Repeated items stay distinct
+        task.id = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    by_description: dict[str, str] = {}
+    for task in tasks:
+        by_description.setdefault(task.description.lower(), task.id)  # First item of a name wins
+    unresolved = []
+    for task in tasks:
+        resolved = []
+        for name in task.blocked_by:
+            task_id = by_description.get(name.lower())
+            if task_id is None:
+                unresolved.append(name)
+            resolved.append(task_id or name)
+        task.blocked_by = resolved
+    return queue.add_tasks(tasks), unresolved
+
+
+def bench(tasks: int = 500, agents: int = 10, backends: tuple = ("json", "sqlite")) -> None:
+    """Print plan-import and claim-storm timings, per-call vs batch APIs, in throwaway dirs."""
+    import tempfile
+    import threading
+
+    def storm(queue_factory, batch: int) -> None:
+        def agent(n: int) -> None:
+            queue = queue_factory()
+            while True:
+                if batch > 1:
+                    claimed = queue.claim_many(f"agent-{n}", batch)
+                    if not claimed:
+                        return
+                    queue.complete_many([task.id for task in claimed])
+                else:
+                    task = queue.claim_next_task(f"agent-{n}")
+                    if task is None:
+                        return
+                    queue.complete_task(task.id)
+
+        threads = [threading.Thread(target=agent, args=(n,)) for n in range(agents)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    items = [(f"t{i}", f"Task {i}", [f"t{i - 1}"] if i % 10 else []) for i in range(tasks)]
+    print(f"{'backend':<8} {'scenario':<26} {'per-call s':>11} {'batch s':>9} {'speedup':>8}")
+    for backend in backends:
+        for scenario in (f"import {tasks} tasks", f"{agents}-agent claim storm"):
+            timings = []
+            for batched in (False, True):
+                with tempfile.TemporaryDirectory() as tmp:
+                    factory = lambda: open_queue("bench", "", Path(tmp), backend=backend)  # noqa: E731
+                    queue = factory()
+                    start = time.perf_counter()
+                    if scenario.startswith("import"):
+                        if batched:
+                            queue.add_tasks(items)
+                        else:
+                            for item in items:
+                                queue.add_task(*item)
+                    else:
+                        queue.add_tasks(items)
+                        start = time.perf_counter()
+                        storm(factory, batch=5 if batched else 1)
+                        assert queue.get_status()["completed"] == tasks
+                    timings.append(time.perf_counter() - start)
+                    if hasattr(queue, "close"):
+                        queue.close()
+            print(f"{backend:<8} {scenario:<26} {timings[0]:>11.3f} {timings[1]:>9.3f} {timings[0] / timings[1]:>7.1f}x")
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ralph work-stealing queue utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_parser = sub.add_parser("import", help="Seed a plan's queue from a markdown checklist")
+    import_parser.add_argument("plan_id")
+    import_parser.add_argument("source")
+    import_parser.add_argument("--project", default=None)
+    import_parser.add_argument("--backend", choices=QUEUE_BACKENDS, default=None)
+    bench_parser = sub.add_parser("bench", help="Per-call vs batch API timings")
+    bench_parser.add_argument("--tasks", type=int, default=500)
+    bench_parser.add_argument("--agents", type=int, default=10)
+    bench_parser.add_argument("--backend", action="append", choices=QUEUE_BACKENDS)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.tasks, args.agents, tuple(args.backend or ("json", "sqlite")))
+        return
+
+    source = Path(args.source)
+    queue = open_queue(args.plan_id, str(source), args.project, backend=args.backend)
+    tasks, unresolved = import_markdown_tasks(queue, source.read_text(encoding="utf-8"))
+    print(f"Imported {len(tasks)} tasks into {queue.queue_path}")
+    for name in dict.fromkeys(unresolved):
+        print(f"  warning: dependency '{name}' matches no task (stays blocked)")
+
+
+if __name__ == "__main__":
+    main()
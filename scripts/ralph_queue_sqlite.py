@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Ralph Work-Stealing Queue - SQLite (WAL) backend.
+
+Drop-in alternative to the markdown/JSON WorkStealingQueue in
+scripts/ralph_queue.py. The file backends re-parse and re-render the whole
+queue under one lock for every operation; here each operation is a short
+transaction against indexed rows:
+
+    tasks  (seq, id UNIQUE, description, status, claimed_by, iterations,
+            started_at, completed_at, lease_expires_at, unmet, cost, rank)
+    deps   (task_id, blocker_id)          blocked_by edges
+    meta   (key, value)                   plan_id, plan_file, created_at
+
+`unmet` counts blockers that are not completed (a missing blocker counts as
+unmet, as in the file backends). It is maintained on status changes. `rank`
+is the critical-path length from scripts/ralph_scheduler.py (task cost plus
+the longest chain it unblocks), raised on its blockers when a task is added.
+A claim is one index lookup on (status, unmet, rank DESC, seq) inside
+BEGIN IMMEDIATE, after reclaiming in_progress rows whose lease has lapsed
+(scripts/ralph_lease.py). Readers never block writers (WAL).
+
+Location: {project}/.claude/task-queue-{plan-id}.db
+Human view: export_markdown() writes task-queue-{plan-id}.export.md (read-only).
+
+Usage:
+    from scripts.ralph_queue import open_queue
+
+    queue = open_queue("feature-auth", "plans/auth.md", backend="sqlite")
+    queue.add_task("1", "Add login form")
+    task = queue.claim_next_task("agent-0")
+
+CLI:
+    python ralph_queue_sqlite.py migrate [project_dir]    # task-queue-*.md/.json -> .db
+    python ralph_queue_sqlite.py export <plan_id> [project_dir]
+    python ralph_queue_sqlite.py status <plan_id> [project_dir]
+"""
+
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.ralph_lease import check_claimant, effective_expiry, expiry_stamp, heartbeat, new_lease
+from scripts.ralph_queue import QueueTask, TaskQueue, add_op
+from scripts.ralph_scheduler import estimate_cost
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'pending',
+    claimed_by TEXT,
+    iterations INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT,
+    completed_at TEXT,
+    unmet INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 1.0,
+    rank REAL NOT NULL DEFAULT 0,
+    lease_expires_at TEXT
+);
+CREATE TABLE IF NOT EXISTS deps (
+    task_id TEXT NOT NULL,
+    blocker_id TEXT NOT NULL,
+    PRIMARY KEY (task_id, blocker_id)
+);
+"""
+
+# Created after _upgrade() so databases from before the cost/rank/lease columns still open
+INDEXES = """
+DROP INDEX IF EXISTS tasks_ready;
+CREATE INDEX IF NOT EXISTS tasks_ready_rank ON tasks (status, unmet, rank DESC, seq);
+CREATE INDEX IF NOT EXISTS tasks_claimed_by ON tasks (claimed_by);
+CREATE INDEX IF NOT EXISTS deps_blocker ON deps (blocker_id);
+"""
+
+TASK_COLUMNS = "id, description, status, claimed_by, iterations, started_at, completed_at, lease_expires_at"
+
+
+class SqliteWorkStealingQueue:
+    """WorkStealingQueue API on a WAL-mode SQLite database (one row per task)."""
+
+    QUEUE_DIR = ".claude"
+    format = "sqlite"
+
+    def __init__(self, plan_id: str, plan_file: str, base_dir: Optional[Path] = None):
+        self.plan_id = plan_id
+        self.plan_file = plan_file
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        self.queue_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}.db"
+        self.export_path = self.base_dir / self.QUEUE_DIR / f"task-queue-{plan_id}.export.md"
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # -------------------------------------------------------------------------
+    # Connection
+    # -------------------------------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.queue_path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly below
+            conn = sqlite3.connect(str(self.queue_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._upgrade(conn)
+            conn.executescript(INDEXES)
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('plan_id', ?), ('plan_file', ?), ('created_at', ?)",
+                (self.plan_id, self.plan_file, datetime.now().isoformat()),
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _upgrade(conn: sqlite3.Connection) -> None:
+        """Add columns introduced after a database was created (scheduling, leases)."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+        for name, ddl in (
+            ("cost", "REAL NOT NULL DEFAULT 1.0"), ("rank", "REAL NOT NULL DEFAULT 0"), ("lease_expires_at", "TEXT"),
+        ):
+            if name not in columns:
+                conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {ddl}")
+        if "rank" not in columns:
+            conn.execute("UPDATE tasks SET rank = cost")  # Unranked rows tie on the default cost
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @contextmanager
+    def _write(self):
+        """BEGIN IMMEDIATE: take the write lock up front so claims never deadlock-upgrade."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    # -------------------------------------------------------------------------
+    # Row helpers
+    # -------------------------------------------------------------------------
+
+    def _blockers(self, conn: sqlite3.Connection, task_id: str) -> list[str]:
+        rows = conn.execute("SELECT blocker_id FROM deps WHERE task_id = ? ORDER BY rowid", (task_id,))
+        return [row[0] for row in rows]
+
+    def _task(self, conn: sqlite3.Connection, row: sqlite3.Row) -> QueueTask:
+        return QueueTask(
+            id=row["id"],
+            description=row["description"],
+            status=row["status"],
+            blocked_by=self._blockers(conn, row["id"]),
+            claimed_by=row["claimed_by"],
+            iterations=row["iterations"],
+            started_at=row["started_at"],
+            completed_at=row["completed_at"],
+            lease_expires_at=row["lease_expires_at"],
+        )
+
+    @staticmethod
+    def _set_status(conn: sqlite3.Connection, task_id: str, old: str, new: str) -> None:
+        """Keep dependents' unmet counts in step with a status change."""
+        if old != "completed" and new == "completed":
+            delta = -1
+        elif old == "completed" and new != "completed":
+            delta = 1
+        else:
+            return
+        conn.execute(
+            "UPDATE tasks SET unmet = unmet + ? WHERE id IN (SELECT task_id FROM deps WHERE blocker_id = ?)",
+            (delta, task_id),
+        )
+
+    def _insert(self, conn: sqlite3.Connection, task: QueueTask) -> bool:
+        """Insert one task (False if the id already exists)."""
+        blockers = list(dict.fromkeys(task.blocked_by or []))
+        unmet = 0
+        for blocker in blockers:
+            row = conn.execute("SELECT status FROM tasks WHERE id = ?", (blocker,)).fetchone()
+            if row is None or row[0] != "completed":
+                unmet += 1
+        cost = estimate_cost(task)
+        # Tasks added earlier may already name this id as a (missing) blocker
+        downstream = conn.execute(
+            "SELECT MAX(rank) FROM tasks WHERE id IN (SELECT task_id FROM deps WHERE blocker_id = ?)",
+            (task.id,),
+        ).fetchone()[0]
+        rank = cost + (downstream or 0.0)
+        cursor = conn.execute(
+            f"INSERT OR IGNORE INTO tasks ({TASK_COLUMNS}, unmet, cost, rank) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task.id, task.description, task.status, task.claimed_by, task.iterations,
+             task.started_at, task.completed_at, task.lease_expires_at, unmet, cost, rank),
+        )
+        if cursor.rowcount == 0:
+            return False
+        conn.executemany(
+            "INSERT OR IGNORE INTO deps (task_id, blocker_id) VALUES (?, ?)",
+            [(task.id, blocker) for blocker in blockers],
+        )
+        if task.status == "completed":
+            self._set_status(conn, task.id, "pending", "completed")
+        self._raise_rank(conn, task.id, rank)
+        return True
+
+    @staticmethod
+    def _raise_rank(conn: sqlite3.Connection, task_id: str, rank: float) -> None:
+        """Propagate a new dependent's critical-path length up through its blockers."""
+        stack = [(task_id, rank, (task_id,))]
+        while stack:
+            tid, tid_rank, path = stack.pop()
+            rows = conn.execute(
+                "SELECT id, cost, rank FROM tasks WHERE id IN (SELECT blocker_id FROM deps WHERE task_id = ?)",
+                (tid,),
+            ).fetchall()
+            for row in rows:
+                candidate = row["cost"] + tid_rank
+                if candidate > row["rank"] and row["id"] not in path:  # Path check: cycles never converge
+                    conn.execute("UPDATE tasks SET rank = ? WHERE id = ?", (candidate, row["id"]))
+                    stack.append((row["id"], candidate, path + (row["id"],)))
+
+    # -------------------------------------------------------------------------
+    # WorkStealingQueue API
+    # -------------------------------------------------------------------------
+
+    def _expire_leases(self, conn: sqlite3.Connection, seconds: Optional[float] = None) -> list[str]:
+        """
+        Reclaim lapsed leases.
+
+        Every in_progress row is checked (one heartbeat stat each, so about one
+        per live agent): a stopped agent's lease lapses before its stored expiry.
+        """
+        now = time.time()
+        now_stamp = expiry_stamp(now)
+        rows = conn.execute(
+            "SELECT id, claimed_by, lease_expires_at, started_at FROM tasks WHERE status = 'in_progress'"
+        ).fetchall()
+        reclaimed = []
+        for row in rows:
+            expiry = effective_expiry(
+                row["claimed_by"], row["lease_expires_at"], row["started_at"], self.base_dir, seconds)
+            if expiry is None:
+                continue
+            if expiry <= now:
+                conn.execute(
+                    "UPDATE tasks SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL WHERE id = ?",
+                    (row["id"],),
+                )
+                reclaimed.append(row["id"])
+            elif (row["lease_expires_at"] or "") <= now_stamp:
+                # Stored lease passed but the agent heartbeat: persist the extension
+                conn.execute(
+                    "UPDATE tasks SET lease_expires_at = ? WHERE id = ?", (expiry_stamp(expiry), row["id"]))
+        return reclaimed
+
+    def heartbeat(self, agent_id: str) -> None:
+        """Renew agent_id's leases (touches its heartbeat file; no database write)."""
+        heartbeat(agent_id, self.base_dir)
+
+    def _claim(self, conn: sqlite3.Connection, agent_id: str) -> Optional[QueueTask]:
+        row = conn.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE status = 'pending' AND unmet = 0 "
+            "AND claimed_by IS NULL ORDER BY rank DESC, seq LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        started_at = datetime.now().isoformat()
+        lease = new_lease()
+        conn.execute(
+            "UPDATE tasks SET status = 'in_progress', claimed_by = ?, started_at = ?, lease_expires_at = ?, "
+            "iterations = iterations + 1 WHERE id = ?",
+            (agent_id, started_at, lease, row["id"]),
+        )
+        task = self._task(conn, row)
+        task.status = "in_progress"
+        task.claimed_by = agent_id
+        task.started_at = started_at
+        task.lease_expires_at = lease
+        task.iterations += 1
+        return task
+
+    def _update(self, conn: sqlite3.Connection, task_id: str, **changes) -> bool:
+        row = conn.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return False
+        if "status" in changes:
+            self._set_status(conn, task_id, row["status"], changes["status"])
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*changes.values(), task_id))
+        return True
+
+    def _add(self, conn: sqlite3.Connection, task_id: str, description: str = "", blocked_by=None) -> QueueTask:
+        task = QueueTask(id=task_id, description=description, status="pending", blocked_by=list(blocked_by or []))
+        if self._insert(conn, task):
+            return task
+        row = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._task(conn, row)
+
+    def apply(self, ops: Iterable[tuple]) -> list:
+        """Run several ops in one BEGIN IMMEDIATE transaction (same op tuples as WorkStealingQueue.apply)."""
+        ops = list(ops)
+        if not ops:
+            return []
+        for op, *args in ops:
+            if op == "claim":
+                check_claimant(args[0])
+        results: list = []
+        claimants: list[str] = []
+        with self._write() as conn:
+            leases_checked = False
+            for op, *args in ops:
+                if op == "add":
+                    results.append(self._add(conn, *args))
+                elif op == "claim":
+                    if not leases_checked:
+                        self._expire_leases(conn)
+                        leases_checked = True
+                    task = self._claim(conn, args[0])
+                    if task is not None:
+                        claimants.append(args[0])
+                    results.append(task)
+                elif op == "complete":
+                    results.append(self._update(
+                        conn, args[0], status="completed", completed_at=datetime.now().isoformat(),
+                        lease_expires_at=None))
+                elif op == "release":
+                    results.append(self._update(
+                        conn, args[0], status="pending", claimed_by=None, lease_expires_at=None))
+                elif op == "reclaim":
+                    results.append(self._expire_leases(conn, args[0] if args else None))
+                    leases_checked = True
+                else:
+                    raise ValueError(f"Unknown queue op: {op!r}")
+        for agent_id in dict.fromkeys(claimants):
+            heartbeat(agent_id, self.base_dir)  # Clears a "stopped" marker from a previous run
+        return results
+
+    def claim_next_task(self, agent_id: str) -> Optional[QueueTask]:
+        """Atomically claim the ready task with the longest critical path (ties: insertion order)."""
+        return self.apply([("claim", agent_id)])[0]
+
+    def claim_many(self, agent_id: str, k: int) -> list[QueueTask]:
+        """Claim up to k tasks for one agent in a single transaction."""
+        return [task for task in self.apply([("claim", agent_id)] * max(0, k)) if task is not None]
+
+    def _update_task(self, task_id: str, **changes) -> bool:
+        with self._write() as conn:
+            return self._update(conn, task_id, **changes)
+
+    def complete_task(self, task_id: str) -> bool:
+        """Mark a task as completed (unblocks its dependents)."""
+        return self.apply([("complete", task_id)])[0]
+
+    def complete_many(self, task_ids: Iterable[str]) -> list[bool]:
+        """Complete several tasks in one transaction (per-id found flags)."""
+        return self.apply([("complete", task_id) for task_id in task_ids])
+
+    def mark_task_complete(self, task_id: str, agent_id: str) -> bool:
+        """Mark a task as completed on behalf of agent_id (alias of complete_task)."""
+        return self.complete_task(task_id)
+
+    def release_task(self, task_id: str) -> bool:
+        """Release a task back to pending (e.g., on agent failure)."""
+        return self.apply([("release", task_id)])[0]
+
+    def add_task(self, task_id: str, description: str = "", blocked_by: list | None = None) -> QueueTask:
+        """Add a new pending task. An existing id is left unchanged and returned as stored."""
+        return self.apply([("add", task_id, description, blocked_by)])[0]
+
+    def add_tasks(self, tasks: Iterable) -> list[QueueTask]:
+        """Add many tasks in one transaction (QueueTask objects or (id, description, blocked_by) tuples)."""
+        return self.apply([add_op(task) for task in tasks])
+
+    def get_status(self) -> dict:
+        """Get queue status summary."""
+        status_counts = {"pending": 0, "in_progress": 0, "completed": 0}
+        total = 0
+        for status, count in self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+            status_counts[status] = count
+            total += count
+        return {"plan_id": self.plan_id, "total_tasks": total, **status_counts}
+
+    def reclaim_stale_tasks(self, timeout_seconds: Optional[float] = None) -> list[str]:
+        """Eagerly unclaim tasks whose lease has expired (claim_next_task also does this lazily)."""
+        return self.apply([("reclaim", timeout_seconds)])[0]
+
+    # -------------------------------------------------------------------------
+    # Whole-queue views (export / migration)
+    # -------------------------------------------------------------------------
+
+    def load(self) -> TaskQueue:
+        """Snapshot of the whole queue as a TaskQueue (consistent read)."""
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            deps: dict[str, list] = {}
+            for task_id, blocker in conn.execute("SELECT task_id, blocker_id FROM deps ORDER BY rowid"):
+                deps.setdefault(task_id, []).append(blocker)
+            tasks = [
+                QueueTask(
+                    id=row["id"], description=row["description"], status=row["status"],
+                    blocked_by=deps.get(row["id"], []), claimed_by=row["claimed_by"],
+                    iterations=row["iterations"], started_at=row["started_at"],
+                    completed_at=row["completed_at"], lease_expires_at=row["lease_expires_at"],
+                )
+                for row in conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY seq")
+            ]
+        finally:
+            conn.execute("COMMIT")
+        return TaskQueue(
+            plan_id=meta.get("plan_id", self.plan_id),
+            plan_file=meta.get("plan_file", self.plan_file),
+            created_at=meta.get("created_at", ""),
+            tasks=tasks,
+        )
+
+    def import_queue(self, queue: TaskQueue) -> int:
+        """Insert every task of a file-backend TaskQueue (existing ids are kept). Returns rows added."""
+        added = 0
+        with self._write() as conn:
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'created_at'", (queue.created_at,))
+            for task in queue.tasks:
+                added += self._insert(conn, task)
+        return added
+
+    def export_markdown(self, path: Optional[Path] = None) -> Path:
+        """Write the human-readable (read-only) markdown view; returns its path."""
+        path = Path(path) if path else self.export_path
+        header = "<!-- Generated from task-queue-{}.db - edits here are not read back -->\n".format(self.plan_id)
+        path.write_text(header + self.load().to_markdown(), encoding="utf-8")
+        return path
+
+
+# =============================================================================
+# Migration
+# =============================================================================
+
+def migrate_file_queues(base_dir: Optional[Path] = None) -> dict[str, int]:
+    """
+    One-shot import of .claude/task-queue-*.md / .json into task-queue-*.db.
+
+    Plans that already have a database are skipped, so running it again is a
+    no-op. Source files are left in place (other tools still read the JSON).
+
+    Returns:
+        {plan_id: tasks imported}
+    """
+    from scripts.ralph_queue import WorkStealingQueue
+
+    base_dir = Path(base_dir) if base_dir else Path.cwd()
+    claude_dir = base_dir / SqliteWorkStealingQueue.QUEUE_DIR
+    migrated: dict[str, int] = {}
+    sources = sorted(claude_dir.glob("task-queue-*.json")) + sorted(claude_dir.glob("task-queue-*.md"))
+    for source in sources:
+        if source.name.endswith(".export.md"):
+            continue
+        plan_id = source.stem[len("task-queue-"):]
+        if plan_id in migrated or (claude_dir / f"task-queue-{plan_id}.db").exists():
+            continue
+        file_format = "json" if source.suffix == ".json" else "markdown"
+        file_queue = WorkStealingQueue(plan_id, "", base_dir=base_dir, format=file_format)
+        queue = file_queue.load()
+        target = SqliteWorkStealingQueue(plan_id, queue.plan_file, base_dir=base_dir)
+        try:
+            migrated[plan_id] = target.import_queue(queue)
+        finally:
+            target.close()
+    return migrated
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("migrate", "export", "status"):
+        print(__doc__.split("CLI:")[1].rstrip())
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "migrate":
+        base_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+        for plan_id, count in migrate_file_queues(base_dir).items():
+            print(f"{plan_id}: {count} tasks -> task-queue-{plan_id}.db")
+        return
+
+    if len(sys.argv) < 3:
+        print(f"Usage: ralph_queue_sqlite.py {command} <plan_id> [project_dir]")
+        sys.exit(1)
+    base_dir = Path(sys.argv[3]) if len(sys.argv) > 3 else None
+    queue = SqliteWorkStealingQueue(sys.argv[2], "", base_dir=base_dir)
+    if not queue.queue_path.exists():
+        print(f"No queue database: {queue.queue_path}")
+        sys.exit(1)
+    if command == "export":
+        print(queue.export_markdown())
+    else:
+        print(queue.get_status())
+
+
+if __name__ == "__main__":
+    main()
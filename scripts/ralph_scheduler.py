@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Ralph Scheduler - dependency-aware ready set with critical-path priority.
+
+The file queue used to hand out the first unblocked task in file order, so a
+long dependency chain could start last and leave agents idle at the end of a
+plan. ReadyScheduler instead keeps, per task:
+
+    unmet   blockers not yet completed (in-degree; a missing blocker counts)
+    cost    estimated effort - calculate_complexity(description), 0 once completed
+    rank    critical-path length: cost + max(rank of dependents)
+
+Ready tasks (pending, unclaimed, unmet == 0) sit in a heap ordered by
+(-rank, file order), so the task heading the longest remaining chain is
+claimed first and ties keep file order. complete() decrements dependents'
+unmet counts and pushes newly ready tasks; nothing is rescanned.
+
+A long-lived orchestrator can keep one scheduler and call claim/complete
+directly. WorkStealingQueue builds one per claim from the freshly loaded
+queue (O(tasks + edges), no worse than the old per-task blocker checks).
+
+Usage:
+    from scripts.ralph_scheduler import ReadyScheduler
+
+    scheduler = ReadyScheduler(queue.tasks)
+    task = scheduler.claim("agent-0")
+    scheduler.complete(task.id)
+    print(scheduler.explain("3"))
+
+CLI:
+    python ralph_scheduler.py ready <plan_id> [project_dir]
+    python ralph_scheduler.py explain <plan_id> <task_id> [project_dir]
+"""
+
+import heapq
+import json
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.ralph_queue import QueueTask
+
+
+@lru_cache(maxsize=4096)  # Queue claims re-score every task description
+def calculate_complexity(task_description: str) -> float:
+    """
+    Calculate complexity score for a task description.
+
+    Scoring factors:
+    - Base keywords: "refactor", "architecture", "system", "migrate" (+0.5 each)
+    - Scope indicators: "all", "entire", "full", "complete" (+0.3 each)
+    - File count mentions: "multiple files", "across" (+0.4 each)
+    - Simple indicators: "typo", "fix", "add button", "update text" (-0.5 each)
+    - Word count: long descriptions tend to be more complex (+0.1 per 20 words)
+
+    Returns:
+        float: Complexity score (0-5 range typical)
+    """
+    if not task_description:
+        return 1.0
+
+    score = 1.0  # Base score
+    lower_task = task_description.lower()
+
+    # High complexity keywords
+    high_keywords = ["refactor", "architecture", "system", "migrate", "redesign",
+                     "rewrite", "overhaul", "integrate", "framework"]
+    score += sum(0.5 for kw in high_keywords if kw in lower_task)
+
+    # Scope indicators
+    scope_keywords = ["all", "entire", "full", "complete", "comprehensive", "throughout"]
+    score += sum(0.3 for kw in scope_keywords if kw in lower_task)
+
+    # Multi-file indicators
+    multi_file = ["multiple files", "across", "codebase", "project-wide", "global"]
+    score += sum(0.4 for kw in multi_file if kw in lower_task)
+
+    # Simple task indicators (reduce score)
+    simple_keywords = ["typo", "fix typo", "add button", "update text", "change color",
+                      "rename", "small fix", "quick"]
+    score -= sum(0.5 for kw in simple_keywords if kw in lower_task)
+
+    # Word count factor (longer = more complex)
+    word_count = len(task_description.split())
+    score += (word_count // 20) * 0.1
+
+    return max(0.5, min(5.0, score))  # Clamp between 0.5 and 5.0
+
+
+def estimate_cost(task: QueueTask) -> float:
+    """Remaining effort of a task (completed work costs nothing)."""
+    if task.status == "completed":
+        return 0.0
+    return calculate_complexity(task.description)
+
+
+class ReadyScheduler:
+    """Incremental in-degree / ready-set scheduler over QueueTask objects (mutated in place)."""
+
+    def __init__(self, tasks: Iterable[QueueTask], cost: Callable[[QueueTask], float] = estimate_cost):
+        self._cost_fn = cost
+        self.tasks: dict[str, QueueTask] = {}
+        self.order: dict[str, int] = {}
+        self.cost: dict[str, float] = {}
+        self.rank: dict[str, float] = {}
+        self.unmet: dict[str, int] = {}
+        self.dependents: dict[str, list[str]] = {}
+        self.cyclic: set[str] = set()
+        self._heap: list[tuple[float, int, str]] = []
+
+        for task in tasks:
+            if task.id in self.tasks:
+                continue  # First definition wins, as in the file scan
+            self.order[task.id] = len(self.order)
+            self.tasks[task.id] = task
+            self.cost[task.id] = cost(task)
+        for task in self.tasks.values():
+            for blocker in dict.fromkeys(task.blocked_by):
+                self.dependents.setdefault(blocker, []).append(task.id)
+        for task_id, task in self.tasks.items():
+            self.unmet[task_id] = sum(1 for b in dict.fromkeys(task.blocked_by) if not self._done(b))
+        self._compute_ranks()
+        for task_id in self.tasks:
+            self._push_if_ready(task_id)
+
+    # -------------------------------------------------------------------------
+    # Bookkeeping
+    # -------------------------------------------------------------------------
+
+    def _done(self, task_id: str) -> bool:
+        task = self.tasks.get(task_id)
+        return task is not None and task.status == "completed"
+
+    def _compute_ranks(self) -> None:
+        """Longest cost path to a sink, in reverse topological order (Kahn)."""
+        pending_deps = {tid: len(self.dependents.get(tid, ())) for tid in self.tasks}
+        stack = [tid for tid, n in pending_deps.items() if n == 0]
+        while stack:
+            tid = stack.pop()
+            downstream = [self.rank[d] for d in self.dependents.get(tid, ())]
+            self.rank[tid] = self.cost[tid] + max(downstream, default=0.0)
+            for blocker in dict.fromkeys(self.tasks[tid].blocked_by):
+                if blocker in pending_deps:
+                    pending_deps[blocker] -= 1
+                    if pending_deps[blocker] == 0:
+                        stack.append(blocker)
+        for tid in self.tasks:
+            if tid not in self.rank:
+                self.cyclic.add(tid)  # On or upstream of a dependency cycle
+                self.rank[tid] = self.cost[tid]
+
+    def _is_ready(self, task_id: str) -> bool:
+        task = self.tasks[task_id]
+        return task.status == "pending" and not task.claimed_by and self.unmet[task_id] == 0
+
+    def _push_if_ready(self, task_id: str) -> None:
+        if self._is_ready(task_id):
+            heapq.heappush(self._heap, (-self.rank[task_id], self.order[task_id], task_id))
+
+    def _raise_rank(self, task_id: str) -> None:
+        """Propagate a dependent's rank increase to its blockers (after add())."""
+        stack = [(task_id, (task_id,))]
+        while stack:
+            tid, path = stack.pop()
+            for blocker in dict.fromkeys(self.tasks[tid].blocked_by):
+                if blocker not in self.tasks or blocker in self.cyclic or blocker in path:
+                    continue  # Path check: ranks around a cycle never converge
+                candidate = self.cost[blocker] + self.rank[tid]
+                if candidate > self.rank[blocker]:
+                    self.rank[blocker] = candidate
+                    self._push_if_ready(blocker)  # Old heap entry goes stale
+                    stack.append((blocker, path + (blocker,)))
+
+    def _set_status(self, task_id: str, status: str) -> None:
+        task = self.tasks[task_id]
+        was_done = task.status == "completed"
+        task.status = status
+        if was_done == (status == "completed"):
+            return
+        delta = -1 if status == "completed" else 1
+        for dependent in self.dependents.get(task_id, ()):
+            self.unmet[dependent] += delta
+            if delta < 0:
+                self._push_if_ready(dependent)
+
+    # -------------------------------------------------------------------------
+    # Scheduling
+    # -------------------------------------------------------------------------
+
+    def peek(self) -> Optional[QueueTask]:
+        """Highest-priority ready task without claiming it."""
+        heap = self._heap
+        while heap:
+            neg_rank, _, task_id = heap[0]
+            if self._is_ready(task_id) and -neg_rank == self.rank[task_id]:
+                return self.tasks[task_id]
+            heapq.heappop(heap)  # Claimed, blocked again or re-ranked since it was pushed
+        return None
+
+    def claim(self, agent_id: str) -> Optional[QueueTask]:
+        """Claim the ready task heading the longest remaining chain."""
+        task = self.peek()
+        if task is None:
+            return None
+        heapq.heappop(self._heap)
+        task.claimed_by = agent_id
+        task.status = "in_progress"
+        task.started_at = datetime.now().isoformat()
+        task.iterations += 1
+        return task
+
+    def complete(self, task_id: str) -> bool:
+        if task_id not in self.tasks:
+            return False
+        self.tasks[task_id].completed_at = datetime.now().isoformat()
+        self._set_status(task_id, "completed")
+        return True
+
+    def release(self, task_id: str) -> bool:
+        if task_id not in self.tasks:
+            return False
+        self.tasks[task_id].claimed_by = None
+        self._set_status(task_id, "pending")
+        self._push_if_ready(task_id)
+        return True
+
+    def add(self, task: QueueTask) -> QueueTask:
+        """Register a new task (an existing id is returned unchanged)."""
+        if task.id in self.tasks:
+            return self.tasks[task.id]
+        self.order[task.id] = len(self.order)
+        self.tasks[task.id] = task
+        self.cost[task.id] = self._cost_fn(task)
+        for blocker in dict.fromkeys(task.blocked_by):
+            self.dependents.setdefault(blocker, []).append(task.id)
+        self.unmet[task.id] = sum(1 for b in dict.fromkeys(task.blocked_by) if not self._done(b))
+        # Tasks may already name this id as a (so far missing) blocker
+        downstream = [self.rank[d] for d in self.dependents.get(task.id, ())]
+        self.rank[task.id] = self.cost[task.id] + max(downstream, default=0.0)
+        if task.status == "completed":
+            for dependent in self.dependents.get(task.id, ()):
+                self.unmet[dependent] -= 1
+                self._push_if_ready(dependent)
+        self._push_if_ready(task.id)
+        self._raise_rank(task.id)
+        return task
+
+    def ready(self) -> list[QueueTask]:
+        """Ready tasks in claim order."""
+        return [self.tasks[tid] for tid in sorted(
+            (tid for tid in self.tasks if self._is_ready(tid)),
+            key=lambda tid: (-self.rank[tid], self.order[tid]),
+        )]
+
+    def critical_path(self) -> list[str]:
+        """Task ids along the longest remaining chain (follows the highest-ranked dependent)."""
+        roots = [tid for tid, task in self.tasks.items() if task.status != "completed" and self.unmet[tid] == 0]
+        if not roots:
+            return []
+        path = [max(roots, key=lambda tid: (self.rank[tid], -self.order[tid]))]
+        seen = set(path)
+        while True:
+            nxt = [d for d in self.dependents.get(path[-1], ()) if d in self.tasks and d not in seen]
+            if not nxt:
+                return path
+            path.append(max(nxt, key=lambda tid: (self.rank[tid], -self.order[tid])))
+            seen.add(path[-1])
+
+    def explain(self, task_id: str) -> dict:
+        """Why a task is (or is not) claimable, with its priority inputs."""
+        task = self.tasks.get(task_id)
+        if task is None:
+            waiting = self.dependents.get(task_id, [])
+            return {"id": task_id, "known": False, "ready": False,
+                    "reason": "not in queue" + (f" (blocks {', '.join(waiting)})" if waiting else "")}
+
+        blockers = [
+            {"id": b, "status": self.tasks[b].status if b in self.tasks else "missing"}
+            for b in dict.fromkeys(task.blocked_by)
+        ]
+        waiting_on = [b["id"] for b in blockers if b["status"] != "completed"]
+        ready = self._is_ready(task_id)
+        if ready:
+            position = [t.id for t in self.ready()].index(task_id) + 1
+            reason = f"ready (position {position} of {len(self.ready())})"
+        elif task.status == "completed":
+            reason = "completed"
+        elif task.status == "in_progress" or task.claimed_by:
+            reason = f"claimed by {task.claimed_by}" if task.claimed_by else "in progress"
+        elif task_id in self.cyclic and waiting_on:
+            reason = f"dependency cycle; waiting on {', '.join(waiting_on)}"
+        else:
+            reason = f"waiting on {', '.join(waiting_on)}"
+        return {
+            "id": task_id,
+            "known": True,
+            "status": task.status,
+            "ready": ready,
+            "reason": reason,
+            "blocked_by": blockers,
+            "unblocks": list(self.dependents.get(task_id, [])),
+            "cost": round(self.cost[task_id], 2),
+            "critical_path": round(self.rank[task_id], 2),
+        }
+
+
+def main() -> None:
+    if len(sys.argv) < 3 or sys.argv[1] not in ("ready", "explain") or (sys.argv[1] == "explain" and len(sys.argv) < 4):
+        print(__doc__.split("CLI:")[1].rstrip())
+        sys.exit(1)
+
+    from scripts.ralph_queue import open_queue
+
+    command, plan_id = sys.argv[1], sys.argv[2]
+    extra = sys.argv[4:] if command == "explain" else sys.argv[3:]
+    base_dir = Path(extra[0]) if extra else None
+    scheduler = ReadyScheduler(open_queue(plan_id, "", base_dir).load().tasks)
+    if command == "ready":
+        for task in scheduler.ready():
+            print(f"{scheduler.rank[task.id]:6.2f}  {task.id}: {task.description}")
+        print(f"Critical path: {' -> '.join(scheduler.critical_path()) or '(none)'}")
+    else:
+        print(json.dumps(scheduler.explain(sys.argv[3]), indent=2))
+
+
+if __name__ == "__main__":
+    main()
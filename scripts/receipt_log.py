@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Receipt Log - Append-only, size-rotated JSONL store for Ralph audit receipts.
+
+Replaces one pretty-printed JSON file per agent action. Layout of
+~/.claude/ralph/receipts/log/:
+
+    HEAD                Sequence number of the segment being appended to
+    seg-000001.jsonl    Receipts, one JSON object per line
+    seg-000001.idx      Sidecar index, one line per receipt:
+                        ts<TAB>id<TAB>agent_id<TAB>action<TAB>session_id<TAB>offset<TAB>length
+    seg-000001.sum.json Time range and inverted indexes of a sealed segment
+                        (written lazily by receipt_query.py)
+    .lock               Held only while rotating
+
+Writers buffer receipts in memory and flush them with a single O_APPEND
+write per file (at buffer_size records, on flush(), or at interpreter exit).
+Hook processes must not rely on the exit flush: compat's Windows stdin
+timeout leaves via os._exit, and inside hookd the process never exits
+between hooks. ralph.write_receipt therefore flushes every receipt; buffering
+is for bulk writers such as import_legacy.
+The index line records where each receipt landed, so readers filter on the
+small index files and seek straight to the receipts they need; nothing else
+is parsed. A segment is sealed when it passes segment_bytes.
+
+Usage:
+    from scripts.receipt_log import get_receipt_log
+
+    log = get_receipt_log()
+    log.append({"id": ..., "timestamp": ..., "agent_id": "agent-1", ...})
+    for entry in log.entries(agent="agent-1", limit=20):
+        receipt = log.read(entry)
+
+CLI:
+    python receipt_log.py import [--remove]     # Per-file *.json receipts -> log
+    python receipt_log.py info
+"""
+
+import atexit
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.compat import file_lock, file_unlock
+
+RECEIPTS_DIR = Path.home() / ".claude" / "ralph" / "receipts"
+LOG_DIR = RECEIPTS_DIR / "log"
+SEGMENT_BYTES = 4 * 1024 * 1024
+BUFFER_RECORDS = 64
+
+HEAD_NAME = "HEAD"
+LOCK_NAME = ".lock"
+
+
+class IndexEntry(NamedTuple):
+    """One sidecar index line: where a receipt lives and what it is about."""
+    ts: float
+    id: str
+    agent_id: str
+    action: str
+    session_id: str
+    segment: int
+    offset: int
+    length: int
+
+
+def receipt_time(receipt: dict) -> float:
+    """Epoch seconds of a receipt's ISO timestamp (0.0 if missing or malformed)."""
+    try:
+        return datetime.fromisoformat(str(receipt.get("timestamp", "")).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def _field(value) -> str:
+    text = "unknown" if value is None else str(value)
+    return text.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+class ReceiptLog:
+    """Buffered appends to rotated JSONL segments with a per-segment sidecar index."""
+
+    def __init__(self, directory: Path = LOG_DIR, segment_bytes: int = SEGMENT_BYTES,
+                 buffer_size: int = BUFFER_RECORDS):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.buffer_size = buffer_size
+        self._buffer: list[dict] = []
+
+    # -------------------------------------------------------------------------
+    # Segments
+    # -------------------------------------------------------------------------
+
+    def segment_path(self, seq: int) -> Path:
+        return self.directory / f"seg-{seq:06d}.jsonl"
+
+    def index_path(self, seq: int) -> Path:
+        return self.directory / f"seg-{seq:06d}.idx"
+
+    def summary_path(self, seq: int) -> Path:
+        """Postings/time-range summary of a sealed segment (built by receipt_query.py)."""
+        return self.directory / f"seg-{seq:06d}.sum.json"
+
+    def head(self) -> int:
+        try:
+            return max(1, int((self.directory / HEAD_NAME).read_text(encoding="ascii").strip()))
+        except (OSError, ValueError):
+            return 1
+
+    def segments(self) -> list[int]:
+        """Sequence numbers of segments that have an index, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        seqs = []
+        for name in names:
+            if name.startswith("seg-") and name.endswith(".idx"):
+                try:
+                    seqs.append(int(name[4:-4]))
+                except ValueError:
+                    continue
+        return sorted(seqs)
+
+    @contextmanager
+    def _locked(self):
+        fd = os.open(str(self.directory / LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            file_lock(fd)
+            try:
+                yield
+            finally:
+                file_unlock(fd)
+        finally:
+            os.close(fd)
+
+    def _rotate(self, full_seq: int) -> None:
+        """Seal segment full_seq by advancing HEAD (no-op if another writer already did)."""
+        with self._locked():
+            if self.head() != full_seq:
+                return
+            tmp = self.directory / f"{HEAD_NAME}.{os.getpid()}.tmp"
+            tmp.write_text(str(full_seq + 1), encoding="ascii")
+            os.replace(tmp, self.directory / HEAD_NAME)
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def append(self, receipt: dict) -> None:
+        """Buffer one receipt; flushes when the buffer is full."""
+        self._buffer.append(receipt)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered receipts (one append per file). Returns the number written."""
+        if not self._buffer:
+            return 0
+        records, self._buffer = self._buffer, []
+        lines = [(json.dumps(r, separators=(",", ":"), default=str) + "\n").encode("utf-8") for r in records]
+        payload = b"".join(lines)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        seq = self.head()
+        fd = os.open(str(self.segment_path(seq)), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, payload)
+            # With O_APPEND the file position ends right after this write, even
+            # when other processes append concurrently
+            end = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+
+        offset = end - len(payload)
+        index_lines = []
+        for record, line in zip(records, lines):
+            index_lines.append("\t".join((
+                f"{receipt_time(record):.3f}", _field(record.get("id")), _field(record.get("agent_id")),
+                _field(record.get("action")), _field(record.get("session_id")), str(offset), str(len(line)),
+            )) + "\n")
+            offset += len(line)
+        fd = os.open(str(self.index_path(seq)), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, "".join(index_lines).encode("utf-8"))
+        finally:
+            os.close(fd)
+
+        if end >= self.segment_bytes:
+            self._rotate(seq)
+        return len(records)
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def _index(self, seq: int) -> list[IndexEntry]:
+        try:
+            with open(self.index_path(seq), encoding="utf-8", errors="replace") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 7:
+                continue  # Torn line from a crashed writer
+            try:
+                entries.append(IndexEntry(float(parts[0]), parts[1], parts[2], parts[3], parts[4],
+                                          seq, int(parts[5]), int(parts[6])))
+            except ValueError:
+                continue
+        return entries
+
+    def entries(
+        self,
+        agent: Optional[str] = None,
+        action: Optional[str] = None,
+        session: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        newest_first: bool = True,
+        limit: Optional[int] = None,
+    ) -> Iterator[IndexEntry]:
+        """Index entries matching every given filter (reads index files only)."""
+        seqs = self.segments()
+        if newest_first:
+            seqs.reverse()
+        produced = 0
+        for seq in seqs:
+            entries = self._index(seq)
+            if newest_first:
+                entries.reverse()
+            for entry in entries:
+                if agent is not None and entry.agent_id != agent:
+                    continue
+                if action is not None and entry.action != action:
+                    continue
+                if session is not None and entry.session_id != session:
+                    continue
+                if since is not None and entry.ts < since:
+                    continue
+                if until is not None and entry.ts >= until:
+                    continue
+                yield entry
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
+
+    def read(self, entry: IndexEntry) -> Optional[dict]:
+        """The receipt an index entry points at (one seek + read)."""
+        try:
+            with open(self.segment_path(entry.segment), "rb") as f:
+                f.seek(entry.offset)
+                return json.loads(f.read(entry.length))
+        except (OSError, ValueError):
+            return None
+
+    def find(self, id_prefix: str) -> list[IndexEntry]:
+        return [entry for entry in self.entries() if entry.id.startswith(id_prefix)]
+
+    def drop_before(self, cutoff: float, dry_run: bool = False) -> list[tuple[int, int]]:
+        """
+        Delete sealed segments whose newest receipt is older than cutoff.
+
+        Retention is per segment: receipts sharing a segment with newer ones
+        are kept. Returns [(segment seq, receipt count)].
+        """
+        head = self.head()
+        dropped = []
+        for seq in self.segments():
+            if seq >= head:
+                continue
+            entries = self._index(seq)
+            if entries and max(e.ts for e in entries) >= cutoff:
+                continue
+            dropped.append((seq, len(entries)))
+            if not dry_run:
+                for path in (self.segment_path(seq), self.index_path(seq), self.summary_path(seq)):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+        return dropped
+
+    # -------------------------------------------------------------------------
+    # Migration
+    # -------------------------------------------------------------------------
+
+    def import_legacy(self, legacy_dir: Path = RECEIPTS_DIR, remove: bool = False) -> int:
+        """
+        Append per-file *.json receipts in timestamp order; receipts whose id is
+        already indexed are skipped, so re-running is safe. Returns the number imported.
+        """
+        known = {entry.id for entry in self.entries()}
+        receipts = []
+        paths = []
+        for path in Path(legacy_dir).glob("*.json"):
+            try:
+                receipt = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            paths.append(path)
+            if isinstance(receipt, dict) and receipt.get("id") not in known:
+                receipts.append(receipt)
+        receipts.sort(key=receipt_time)
+
+        pending, self._buffer = self._buffer, []
+        for receipt in receipts:
+            self.append(receipt)
+        self.flush()
+        self._buffer = pending
+
+        if remove:
+            for path in paths:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        return len(receipts)
+
+
+def legacy_receipts_exist(legacy_dir: Path = RECEIPTS_DIR) -> bool:
+    """True if un-imported per-file receipts remain (stops at the first one)."""
+    try:
+        with os.scandir(legacy_dir) as it:
+            return any(entry.name.endswith(".json") for entry in it)
+    except OSError:
+        return False
+
+
+_log: Optional[ReceiptLog] = None
+
+
+def get_receipt_log() -> ReceiptLog:
+    """Process-wide log; receipts still buffered are flushed at (normal) interpreter exit."""
+    global _log
+    if _log is None:
+        _log = ReceiptLog()
+        atexit.register(_log.flush)
+    return _log
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ralph receipt log utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_parser = sub.add_parser("import", help="Import per-file receipts into the log")
+    import_parser.add_argument("--remove", action="store_true", help="Delete the per-file receipts afterwards")
+    sub.add_parser("info", help="Show segments and receipt counts")
+    args = parser.parse_args()
+
+    log = ReceiptLog()
+    if args.command == "import":
+        print(f"Imported {log.import_legacy(remove=args.remove)} receipt(s) into {log.directory}")
+    else:
+        head = log.head()
+        for seq in log.segments():
+            try:
+                size = log.segment_path(seq).stat().st_size
+            except OSError:
+                size = 0
+            state = "active" if seq == head else "sealed"
+            print(f"seg-{seq:06d}  {state:<6}  {len(log._index(seq)):>7} receipts  {size:>10} bytes")
+        if legacy_receipts_exist():
+            print("Per-file receipts remain; run: python receipt_log.py import")
+
+
+if __name__ == "__main__":
+    main()
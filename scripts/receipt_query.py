@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Receipt Query - Indexed filtering and streaming aggregation over the receipt log.
+
+Sealed segments of the receipt log (scripts/receipt_log.py) never change, so
+each gets a summary sidecar the first time it is queried:
+
+    seg-000001.sum.json  {"idx_bytes": ..., "count": ..., "min_ts": ..., "max_ts": ...,
+                          "agent_id": {"agent-1": [row, ...]},
+                          "action": {...}, "session_id": {...},
+                          "rollup": [[agent, action, session, hour, count], ...],
+                          "runs": [[ts, agent, action, session], ...]}
+
+min_ts/max_ts form the time-range index: a query skips every segment that
+lies outside since/until without opening it. The per-field maps are
+inverted indexes (value -> rows of the segment's .idx file): a filter on a
+value the segment never saw skips it, and otherwise only the intersection of
+the posting lists is visited. The active segment is still being appended to
+and is scanned directly. A summary is rebuilt if its .idx grew after it was
+written (a writer that raced the rotation).
+
+Aggregation walks segments oldest-first and keeps one accumulator per group,
+so memory is bounded by the number of groups, not receipts. A sealed segment
+that lies wholly inside the time range is folded in from its rollup (counts
+per agent/action/session/hour) and its run events without touching its .idx;
+only the active segment and segments cut by since/until are scanned.
+Durations pair each agent_start with the next agent_complete/agent_error of
+the same agent and session.
+
+Usage:
+    from scripts.receipt_query import ReceiptQuery
+
+    query = ReceiptQuery()
+    for entry in query.entries(agent="agent-1", since=time.time() - 86400):
+        ...
+    rows = query.aggregate(group_by=["agent", "hour"])
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.receipt_log import LOG_DIR, IndexEntry, ReceiptLog
+
+INDEXED_FIELDS = ("agent_id", "action", "session_id")
+
+START_ACTIONS = frozenset({"agent_start"})
+END_ACTIONS = frozenset({"agent_complete", "agent_error"})
+
+
+@lru_cache(maxsize=4096)
+def _hour_label(hour: int) -> str:
+    if hour < 0:
+        return "unknown"
+    return datetime.fromtimestamp(hour * 3600, timezone.utc).strftime("%Y-%m-%d %H:00")
+
+
+def _hour(ts: float) -> int:
+    """Hours since the epoch (-1 for a receipt without a usable timestamp)."""
+    return int(ts // 3600) if ts > 0 else -1
+
+
+# --group-by keys -> bucket from (agent_id, action, session_id, hour)
+GROUP_KEYS = {
+    "agent": lambda agent, action, session, hour: agent,
+    "action": lambda agent, action, session, hour: action,
+    "session": lambda agent, action, session, hour: session,
+    "hour": lambda agent, action, session, hour: _hour_label(hour),
+    "day": lambda agent, action, session, hour: _hour_label(hour)[:10],
+}
+
+
+def is_error(action: str) -> bool:
+    """Actions counted toward the error rate."""
+    return "error" in action or "fail" in action
+
+
+class ReceiptQuery:
+    """Time-range and inverted-index lookups over a ReceiptLog."""
+
+    def __init__(self, log: Optional[ReceiptLog] = None):
+        self.log = log if log is not None else ReceiptLog(LOG_DIR)
+
+    # -------------------------------------------------------------------------
+    # Segment summaries
+    # -------------------------------------------------------------------------
+
+    def _build_summary(self, seq: int, idx_bytes: int) -> dict:
+        entries = self.log._index(seq)
+        summary: dict = {
+            "idx_bytes": idx_bytes,
+            "count": len(entries),
+            "min_ts": min((e.ts for e in entries), default=0.0),
+            "max_ts": max((e.ts for e in entries), default=0.0),
+        }
+        for name in INDEXED_FIELDS:
+            postings: dict[str, list[int]] = {}
+            for row, entry in enumerate(entries):
+                postings.setdefault(getattr(entry, name), []).append(row)
+            summary[name] = postings
+
+        rollup: dict[tuple, int] = {}
+        runs = []
+        for entry in entries:
+            key = (entry.agent_id, entry.action, entry.session_id, _hour(entry.ts))
+            rollup[key] = rollup.get(key, 0) + 1
+            if entry.action in START_ACTIONS or entry.action in END_ACTIONS:
+                runs.append([entry.ts, entry.agent_id, entry.action, entry.session_id])
+        summary["rollup"] = [[*key, count] for key, count in rollup.items()]
+        summary["runs"] = runs
+
+        path = self.log.summary_path(seq)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(summary, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass  # Read-only log: the summary is still used for this query
+        return summary
+
+    def summary(self, seq: int) -> Optional[dict]:
+        """Summary of a sealed segment, built or rebuilt as needed (None if it has no index)."""
+        try:
+            idx_bytes = self.log.index_path(seq).stat().st_size
+        except OSError:
+            return None
+        try:
+            summary = json.loads(self.log.summary_path(seq).read_text(encoding="utf-8"))
+            if summary.get("idx_bytes") == idx_bytes and "rollup" in summary:
+                return summary
+        except (OSError, ValueError, AttributeError):
+            pass
+        return self._build_summary(seq, idx_bytes)
+
+    # -------------------------------------------------------------------------
+    # Filtering
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _filters(agent: Optional[str], action: Optional[str], session: Optional[str]) -> dict[str, str]:
+        return {name: value for name, value in
+                zip(INDEXED_FIELDS, (agent, action, session)) if value is not None}
+
+    def _candidate_rows(self, summary: dict, filters: dict[str, str]) -> Optional[list[int]]:
+        """Rows matching every field filter ([] = none, None = no field filter given)."""
+        rows: Optional[set[int]] = None
+        for name, value in filters.items():
+            postings = summary.get(name, {}).get(value)
+            if not postings:
+                return []
+            rows = set(postings) if rows is None else rows & set(postings)
+            if not rows:
+                return []
+        return None if rows is None else sorted(rows)
+
+    def _scan(self, seq: int, summary: Optional[dict], filters: dict[str, str],
+              since: Optional[float], until: Optional[float]) -> list[IndexEntry]:
+        """Matching entries of one segment, oldest first (summary narrows the rows read)."""
+        rows = self._candidate_rows(summary, filters) if summary is not None else None
+        if rows == []:
+            return []
+        entries = self.log._index(seq)
+        if rows is not None:
+            entries = [entries[row] for row in rows if row < len(entries)]
+        return [
+            entry for entry in entries
+            if all(getattr(entry, name) == value for name, value in filters.items())
+            and (since is None or entry.ts >= since)
+            and (until is None or entry.ts < until)
+        ]
+
+    def _segments(self, since: Optional[float], until: Optional[float],
+                  newest_first: bool = False) -> Iterator[tuple[int, Optional[dict], bool]]:
+        """(seq, summary or None if active, fully inside the time range) for segments that overlap it."""
+        head = self.log.head()
+        seqs = self.log.segments()
+        if newest_first:
+            seqs.reverse()
+        for seq in seqs:
+            if seq >= head:
+                yield seq, None, False
+                continue
+            summary = self.summary(seq)
+            if summary is None or not summary["count"]:
+                continue
+            if since is not None and summary["max_ts"] < since:
+                continue
+            if until is not None and summary["min_ts"] >= until:
+                continue
+            inside = ((since is None or summary["min_ts"] >= since)
+                      and (until is None or summary["max_ts"] < until))
+            yield seq, summary, inside
+
+    def entries(
+        self,
+        agent: Optional[str] = None,
+        action: Optional[str] = None,
+        session: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        newest_first: bool = False,
+    ) -> Iterator[IndexEntry]:
+        """Index entries matching every given filter, skipping segments via their summaries."""
+        filters = self._filters(agent, action, session)
+        for seq, summary, _ in self._segments(since, until, newest_first):
+            entries = self._scan(seq, summary, filters, since, until)
+            if newest_first:
+                entries.reverse()
+            yield from entries
+
+    # -------------------------------------------------------------------------
+    # Aggregation
+    # -------------------------------------------------------------------------
+
+    def aggregate(
+        self,
+        group_by: Iterable[str] = ("agent",),
+        agent: Optional[str] = None,
+        action: Optional[str] = None,
+        session: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> list[dict]:
+        """
+        Counts, error rates and durations per group, streamed in one pass.
+
+        Returns one dict per group, sorted by group key:
+            {"agent": ..., "hour": ..., "count": n, "errors": n, "error_rate": f,
+             "runs": n, "avg_duration_s": f | None, "max_duration_s": f | None}
+        """
+        keys = list(group_by)
+        unknown = [key for key in keys if key not in GROUP_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown group-by key(s): {', '.join(unknown)} "
+                             f"(choose from {', '.join(GROUP_KEYS)})")
+        key_funcs = [GROUP_KEYS[key] for key in keys]
+        filters = self._filters(agent, action, session)
+        wanted = [(INDEXED_FIELDS.index(name), value) for name, value in filters.items()]
+
+        groups: dict[tuple, list] = {}  # key -> [count, errors, runs, total duration, max duration]
+        started: dict[tuple[str, str], float] = {}
+
+        def tally(fields: tuple, count: int) -> list:
+            group = tuple(func(*fields) for func in key_funcs)
+            acc = groups.get(group)
+            if acc is None:
+                acc = groups[group] = [0, 0, 0, 0.0, 0.0]
+            acc[0] += count
+            if is_error(fields[1]):
+                acc[1] += count
+            return acc
+
+        def pair(ts: float, run_agent: str, run_action: str, run_session: str) -> None:
+            run = (run_agent, run_session)
+            if run_action in START_ACTIONS:
+                started[run] = ts
+            elif run_action in END_ACTIONS and run in started:
+                duration = max(0.0, ts - started.pop(run))
+                acc = tally((run_agent, run_action, run_session, _hour(ts)), 0)
+                acc[2] += 1
+                acc[3] += duration
+                acc[4] = max(acc[4], duration)
+
+        for seq, summary, inside in self._segments(since, until):
+            if inside:
+                for row in summary["rollup"]:
+                    if not wanted or all(row[i] == value for i, value in wanted):
+                        tally(tuple(row[:4]), row[4])
+                for ts, run_agent, run_action, run_session in summary["runs"]:
+                    if not wanted or all((run_agent, run_action, run_session)[i] == value
+                                         for i, value in wanted):
+                        pair(ts, run_agent, run_action, run_session)
+                continue
+            for entry in self._scan(seq, summary, filters, since, until):
+                tally((entry.agent_id, entry.action, entry.session_id, _hour(entry.ts)), 1)
+                if entry.action in START_ACTIONS or entry.action in END_ACTIONS:
+                    pair(entry.ts, entry.agent_id, entry.action, entry.session_id)
+
+        rows = []
+        for group in sorted(groups):
+            count, errors, runs, total, longest = groups[group]
+            row = dict(zip(keys, group))
+            row.update({
+                "count": count,
+                "errors": errors,
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "runs": runs,
+                "avg_duration_s": round(total / runs, 3) if runs else None,
+                "max_duration_s": round(longest, 3) if runs else None,
+            })
+            rows.append(row)
+        return rows
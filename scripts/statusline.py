@@ -7,26 +7,40 @@ Reads JSON input from stdin (Claude Code statusLine protocol).
 Optimized for speed:
 - Parallel git commands via ThreadPoolExecutor
 - Single git status --porcelain for staged/modified/untracked
+- Git snapshot cache: unchanged repos cost a few stats (scripts/git_snapshot.py)
 - Stale-while-revalidate for usage API
 - Last-output cache fallback for post-/clear persistence
+- Optional resident daemon (scripts/statusline_daemon.py): when it is running
+  this script is a thin client and skips the imports below
 """
 
-import argparse
 import json
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Thin client: a running statusline daemon answers from memory. This runs
+# before the heavy imports (portalocker alone costs ~70 ms); stdin it already
+# consumed is handed to main() if the daemon does not answer.
+_client_stdin: str | None = None
+if __name__ == "__main__" and len(sys.argv) == 1:
+    from scripts.statusline_daemon import client_render
+    _client_stdin = client_render()
+
+import argparse
 import re
 import subprocess
-import sys
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from pathlib import Path
 
 # Import transaction primitives for locked reads
-sys.path.insert(0, str(Path(__file__).parent.parent))
 from hooks.transaction import locked_read_json, LockTimeoutError
 from hooks.utils import parse_model_id
+from scripts.git_snapshot import snapshot as git_snapshot
 
 # ---------------------------------------------------------------------------
 # Timeout guard — kill process if stdin hangs (Windows-safe)
@@ -82,6 +96,15 @@ BUILD_CRITICAL= "\033[38;2;251;146;60m"   # #fb923c Orange - multiple struggles
 
 CACHE_DIR = Path.home() / ".claude"
 
+# Session -> team index for _read_team_config
+TEAM_INDEX_NAME = ".team-index.json"
+TEAM_INDEX_RACY_SECONDS = 2.0
+
+# Per-team task status memo for _read_task_list_progress
+TASK_MEMO_NAME = ".task-progress-cache.json"
+TASK_MEMO_MAX_TEAMS = 32
+TASK_MEMO_RACY_SECONDS = 2.0
+
 
 def _format_model_mix(mix: dict) -> str:
     """Format model mix counts as compact string like ':9o1h' or ':4o5s1h'.
@@ -153,6 +176,53 @@ def _read_ralph_progress(cwd: str) -> dict | None:
     except (OSError, json.JSONDecodeError, KeyError):
         return None
 
+def _team_summary(config: dict) -> dict:
+    """Statusline view of a team config: name, members and model mix."""
+    members = config.get("members", [])
+    if not isinstance(members, list):
+        members = []
+
+    # Compute model mix from member models (exclude team-lead)
+    model_counts = {"opus": 0, "sonnet": 0, "haiku": 0}
+    for member in members:
+        if not isinstance(member, dict) or member.get("agentType") == "team-lead":
+            continue  # Don't count team-lead in model mix
+        model = (member.get("model") or "opus").lower()
+        if "sonnet" in model:
+            model_counts["sonnet"] += 1
+        elif "haiku" in model:
+            model_counts["haiku"] += 1
+        else:
+            model_counts["opus"] += 1
+
+    return {
+        "team_name": config.get("name", ""),
+        "member_count": len(members),
+        "members": members,
+        "model_mix": model_counts,
+    }
+
+
+def _index_team(config_path: Path, identity: list) -> dict | None:
+    """Team index entry for one config.json, or None if it cannot be read."""
+    try:
+        # Use locked read with SHORT timeout (0.5s per file)
+        config = locked_read_json(config_path, timeout=0.5, default=None)
+    except LockTimeoutError:
+        return None
+    if not isinstance(config, dict):
+        return None
+    return {"config": identity, "lead": config.get("leadSessionId"), "team": _team_summary(config)}
+
+
+def _stat_identity(path: Path) -> list | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
 def _read_team_config(session_id: str) -> dict | None:
     """Read active team config from ~/.claude/teams/*/config.json.
 
@@ -161,7 +231,14 @@ def _read_team_config(session_id: str) -> dict | None:
     - A team config exists where leadSessionId matches current session_id
 
     Returns None if no active team or Agent Teams not enabled.
-    Uses locked reads with SHORT timeout (0.5s per config) - statusline must not hang.
+
+    Looked up in ~/.claude/.team-index.json, which maps each team to its
+    config identity (mtime_ns, size, inode), lead session and summary
+    (members, model mix). While the teams directory's mtime matches the
+    index, a lookup is one stat, one small read and a stat of the matched
+    config. When teams are added or removed the index is rebuilt, re-reading
+    (locked, 0.5s timeout) only configs whose identity changed; configs of
+    other sessions' teams are never re-read otherwise.
     """
     # Check if Agent Teams feature is enabled
     if os.environ.get("CLAUDE_CODE_EXPERIMENTAL_AGENT_TEAMS") != "1":
@@ -169,84 +246,163 @@ def _read_team_config(session_id: str) -> dict | None:
 
     try:
         teams_dir = CACHE_DIR / "teams"
-        if not teams_dir.exists():
+        dir_identity = _stat_identity(teams_dir)
+        if dir_identity is None:
             return None
 
-        # Search all team configs for matching leadSessionId
-        for team_config_path in teams_dir.glob("*/config.json"):
-            try:
-                # Use locked read with SHORT timeout (0.5s per file)
-                config = locked_read_json(team_config_path, timeout=0.5, default=None)
-                if config is None:
+        index_path = CACHE_DIR / TEAM_INDEX_NAME
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+            if not isinstance(index, dict):
+                index = {}
+        except (OSError, json.JSONDecodeError):
+            index = {}
+        teams = index.get("teams") if isinstance(index.get("teams"), dict) else {}
+        sessions = index.get("sessions") if isinstance(index.get("sessions"), dict) else {}
+        dirty = False
+
+        if index.get("dir") != dir_identity[0]:
+            # Teams added or removed: re-read only configs that changed
+            rebuilt = {}
+            for team_config_path in teams_dir.glob("*/config.json"):
+                identity = _stat_identity(team_config_path)
+                name = team_config_path.parent.name
+                cached = teams.get(name)
+                if isinstance(cached, dict) and cached.get("config") == identity:
+                    rebuilt[name] = cached
                     continue
-                if config.get("leadSessionId") == session_id:
-                    # Found matching team
-                    members = config.get("members", [])
-                    if not isinstance(members, list):
-                        members = []
-
-                    # Compute model mix from member models (exclude team-lead)
-                    model_counts = {"opus": 0, "sonnet": 0, "haiku": 0}
-                    for member in members:
-                        if member.get("agentType") == "team-lead":
-                            continue  # Don't count team-lead in model mix
-                        model = (member.get("model") or "opus").lower()
-                        if "sonnet" in model:
-                            model_counts["sonnet"] += 1
-                        elif "haiku" in model:
-                            model_counts["haiku"] += 1
-                        else:
-                            model_counts["opus"] += 1
-
-                    return {
-                        "team_name": config.get("name", ""),
-                        "member_count": len(members),
-                        "members": members,
-                        "model_mix": model_counts,
-                    }
-            except LockTimeoutError:
-                # Lock timeout - skip this config file
-                continue
-            except (OSError, json.JSONDecodeError, KeyError):
-                continue
+                entry = _index_team(team_config_path, identity)
+                if entry is not None:
+                    rebuilt[name] = entry
+            teams = rebuilt
+            sessions = {entry["lead"]: name for name, entry in teams.items() if entry.get("lead")}
+            dirty = True
+
+        name = sessions.get(session_id)
+        entry = teams.get(name) if name else None
+        if entry is not None:
+            # Members join and leave by rewriting the team's own config.json
+            config_path = teams_dir / name / "config.json"
+            identity = _stat_identity(config_path)
+            if identity != entry.get("config"):
+                entry = _index_team(config_path, identity) if identity else None
+                if entry is None:
+                    teams.pop(name, None)
+                else:
+                    teams[name] = entry
+                sessions = {e["lead"]: n for n, e in teams.items() if e.get("lead")}
+                dirty = True
+                if entry is not None and entry.get("lead") != session_id:
+                    entry = None
+
+        if dirty:
+            racy = time.time() - dir_identity[0] / 1e9 < TEAM_INDEX_RACY_SECONDS
+            index = {"dir": None if racy else dir_identity[0], "teams": teams, "sessions": sessions}
+            try:
+                tmp = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+                os.replace(tmp, index_path)
+            except OSError:
+                pass  # Index only: the lookup result is still current
 
+        return dict(entry["team"]) if entry is not None else None
+    except (OSError, PermissionError, KeyError, TypeError):
         return None
-    except (OSError, PermissionError):
+
+def _task_status(task_file: Path) -> str | None:
+    """Status of one task file, or None if it is unreadable.
+
+    Read without a lock: task writers replace files atomically, so a reader
+    sees either the old or the new file, never a partial one.
+    """
+    try:
+        task = json.loads(task_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(task, dict):
         return None
+    return str(task.get("status", ""))
+
 
 def _read_task_list_progress(team_name: str) -> dict | None:
     """Compute progress from native task list files.
 
     Reads ~/.claude/tasks/{team-name}/*.json and counts task statuses.
     Returns dict with total/completed/in_progress or None if no tasks.
-    Uses locked reads with VERY SHORT timeout (0.5s per file) - statusline must not hang.
+
+    Incremental: ~/.claude/.task-progress-cache.json memoizes each file's
+    (mtime_ns, size, inode) -> status and the directory's mtime. An unchanged
+    directory costs one stat; otherwise only task files whose identity changed
+    are re-read. A directory modified within TASK_MEMO_RACY_SECONDS of the
+    scan (its mtime could tick again unnoticed) or holding an unreadable task
+    file is re-listed on the next call.
     """
     try:
         tasks_dir = CACHE_DIR / "tasks" / team_name
-        if not tasks_dir.exists():
+        try:
+            dir_mtime = tasks_dir.stat().st_mtime_ns
+        except FileNotFoundError:
             return None
 
-        total = completed = in_progress = 0
-        for task_file in sorted(tasks_dir.iterdir()):
-            if not task_file.suffix == ".json":
-                continue
+        memo_path = CACHE_DIR / TASK_MEMO_NAME
+        try:
+            memos = json.loads(memo_path.read_text(encoding="utf-8"))
+            if not isinstance(memos, dict):
+                memos = {}
+        except (OSError, json.JSONDecodeError):
+            memos = {}
+        memo = memos.get(team_name)
+        if not isinstance(memo, dict):
+            memo = {}
+
+        if memo.get("dir") == dir_mtime and isinstance(memo.get("counts"), list):
+            total, completed, in_progress = memo["counts"]
+        else:
+            old_files = memo.get("files") if isinstance(memo.get("files"), dict) else {}
+            files = {}
+            unreadable = False
+            total = completed = in_progress = 0
+            with os.scandir(tasks_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    identity = [st.st_mtime_ns, st.st_size, st.st_ino]
+                    cached = old_files.get(entry.name)
+                    if isinstance(cached, list) and cached[:3] == identity:
+                        status = cached[3]
+                    else:
+                        status = _task_status(Path(entry.path))
+                        if status is None:
+                            unreadable = True  # Not memoized: retried next render
+                            continue
+                    files[entry.name] = [*identity, status]
+                    if status == "deleted":
+                        continue
+                    total += 1
+                    if status == "completed":
+                        completed += 1
+                    elif status == "in_progress":
+                        in_progress += 1
+
+            racy = time.time() - dir_mtime / 1e9 < TASK_MEMO_RACY_SECONDS
+            memos.pop(team_name, None)
+            memos[team_name] = {  # Most recently used last
+                "dir": None if racy or unreadable else dir_mtime,
+                "files": files,
+                "counts": [total, completed, in_progress],
+            }
+            while len(memos) > TASK_MEMO_MAX_TEAMS:
+                memos.pop(next(iter(memos)))
             try:
-                # Use locked read with VERY SHORT timeout (0.5s per file)
-                # Skip this file on timeout - move to next file
-                task = locked_read_json(task_file, timeout=0.5, default={})
-                status = task.get("status", "")
-                if status == "deleted":
-                    continue
-                total += 1
-                if status == "completed":
-                    completed += 1
-                elif status == "in_progress":
-                    in_progress += 1
-            except LockTimeoutError:
-                # Lock timeout - skip this file, continue to next
-                continue
-            except (OSError, json.JSONDecodeError):
-                continue
+                tmp = memo_path.with_name(f"{memo_path.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(memos, separators=(",", ":")), encoding="utf-8")
+                os.replace(tmp, memo_path)
+            except OSError:
+                pass  # Memo only: the counts are still current
 
         if total == 0:
             return None
@@ -343,7 +499,11 @@ def git_run(cwd: str, *args: str) -> str:
 
 
 def git_batch(cwd: str) -> dict:
-    """Run all git commands in parallel, return results dict."""
+    """Git results for cwd: from the snapshot cache, else all git commands in parallel."""
+    cached = git_snapshot(cwd)
+    if cached is not None:
+        return cached
+
     commands = {
         "git_dir":     ("rev-parse", "--git-dir"),
         "branch":      ("branch", "--show-current"),
@@ -757,21 +917,42 @@ def run_test_mode() -> None:
 # Main
 # ---------------------------------------------------------------------------
 
-def main() -> None:
-    # ------------------------------------------------------------------
-    # Read JSON input from stdin (kill timer protects against hang)
-    # ------------------------------------------------------------------
-    _start_kill_timer(8.0)
-    try:
-        raw_input = sys.stdin.read()
-    except (OSError, ValueError) as e:
-        print(f"Error reading stdin: {e}", file=sys.stderr)
-        raw_input = "{}"
-    finally:
-        # Cancel kill timer — stdin phase done, rest of main() is safe
-        if _kill_timer:
-            _kill_timer.cancel()
+class DirectSources:
+    """Segment inputs read from disk and git on every render (the cold path).
+
+    The statusline daemon substitutes an object with the same methods that
+    serves them from memory.
+    """
+
+    def model_display(self) -> str:
+        """Display name from .model-info (written by the SessionStart hook), or ''."""
+        try:
+            mi = json.loads((CACHE_DIR / ".model-info").read_text(encoding="utf-8"))
+            return mi.get("display", "") or ""
+        except (json.JSONDecodeError, OSError, AttributeError):
+            return ""
+
+    def usage(self) -> dict:
+        return fetch_usage_data(CACHE_DIR / ".usage-cache")
+
+    def git(self, cwd: str) -> dict:
+        return git_batch(cwd)
+
+    def ralph_progress(self, cwd: str) -> dict | None:
+        return _read_ralph_progress(cwd)
 
+    def team(self, session_id: str) -> dict | None:
+        return _read_team_config(session_id)
+
+    def task_progress(self, team_name: str) -> dict | None:
+        return _read_task_list_progress(team_name)
+
+    def build_intelligence(self, cwd: str) -> str:
+        return read_build_intelligence(cwd)
+
+
+def parse_input(raw_input: str) -> dict:
+    """Decode the statusLine protocol JSON ({} when missing or malformed)."""
     try:
         inp = json.loads(raw_input)
     except json.JSONDecodeError:
@@ -780,6 +961,47 @@ def main() -> None:
     # Validate JSON structure
     if not isinstance(inp, dict):
         inp = {}
+    return inp
+
+
+def main() -> None:
+    # ------------------------------------------------------------------
+    # Read JSON input from stdin (kill timer protects against hang)
+    # ------------------------------------------------------------------
+    if _client_stdin is not None:
+        raw_input = _client_stdin  # Already read by the thin client
+    else:
+        _start_kill_timer(8.0)
+        try:
+            raw_input = sys.stdin.read()
+        except (OSError, ValueError) as e:
+            print(f"Error reading stdin: {e}", file=sys.stderr)
+            raw_input = "{}"
+        finally:
+            # Cancel kill timer — stdin phase done, rest of main() is safe
+            if _kill_timer:
+                _kill_timer.cancel()
+
+    line = render(parse_input(raw_input))
+
+    # Cache output for fallback after /clear
+    save_last_output(line)
+
+    # Output encoding: 'replace' mode handles terminal encoding mismatches gracefully.
+    # This prevents crashes when terminal locale differs from UTF-8 (e.g., Windows CP1252).
+    # Invalid chars are replaced with '?' rather than raising UnicodeEncodeError.
+    sys.stdout.buffer.write(line.encode("utf-8", errors="replace"))
+    sys.stdout.buffer.flush()
+
+
+def render(inp: dict, sources: DirectSources | None = None, env=None) -> str:
+    """Build the statusline for one statusLine protocol input.
+
+    sources supplies the file- and git-backed segments; env the environment
+    of the Claude Code session (the daemon passes the client's).
+    """
+    sources = sources if sources is not None else DirectSources()
+    env = env if env is not None else os.environ
 
     cwd     = inp.get("cwd", ".")
 
@@ -801,15 +1023,9 @@ def main() -> None:
 
     model = "?"
     # Try .model-info first (written by SessionStart hook)
-    model_info_path = CACHE_DIR / ".model-info"
-    try:
-        if model_info_path.exists():
-            mi = json.loads(model_info_path.read_text(encoding="utf-8"))
-            display = mi.get("display", "") or ""
-            if display and display != "Claude":
-                model = _short_model(display)
-    except (json.JSONDecodeError, OSError):
-        pass
+    display = sources.model_display()
+    if display and display != "Claude":
+        model = _short_model(display)
 
     # Fallback: parse from statusline input
     if model == "?":
@@ -848,7 +1064,7 @@ def main() -> None:
     elif isinstance(inp.get("reasoning_effort"), str):
         effort_raw = inp["reasoning_effort"]
     if not effort_raw:
-        effort_raw = os.environ.get("CLAUDE_CODE_EFFORT_LEVEL", "")
+        effort_raw = env.get("CLAUDE_CODE_EFFORT_LEVEL", "")
     if not effort_raw:
         effort_raw = _MODEL_EFFORT_DEFAULT.get(model[0] if model else "", "")
 
@@ -878,8 +1094,7 @@ def main() -> None:
     # ------------------------------------------------------------------
     # Usage data (stale-while-revalidate, never blocks)
     # ------------------------------------------------------------------
-    cache_path = CACHE_DIR / ".usage-cache"
-    usage = fetch_usage_data(cache_path)
+    usage = sources.usage()
 
     all_weekly = usage["all_weekly"]
     sonnet_weekly = usage["sonnet_weekly"]
@@ -905,7 +1120,7 @@ def main() -> None:
     # ------------------------------------------------------------------
     git_section = ""
 
-    git_data = git_batch(cwd)
+    git_data = sources.git(cwd)
 
     if git_data.get("git_dir"):
         branch      = git_data.get("branch", "")
@@ -943,8 +1158,11 @@ def main() -> None:
             else:
                 ahead_behind += f"{AURORA_GREEN}\u00ab{ahead}{RESET}"
 
-        # Git status counts from single porcelain call
-        staged, modified, untracked = parse_porcelain_status(git_data.get("status", ""))
+        # Git status counts (snapshot cache, or a single porcelain call)
+        staged, modified, untracked = (
+            git_data.get("status_counts")
+            or parse_porcelain_status(git_data.get("status", ""))
+        )
 
         # Staged color
         if staged == 0:
@@ -994,11 +1212,12 @@ def main() -> None:
     # Ralph progress section (Elements 1-4)
     # ------------------------------------------------------------------
     ralph_section = ""
-    ralph_progress = _read_ralph_progress(cwd)
+    ralph_progress = sources.ralph_progress(cwd)
 
     # Team agents display (native Agent Teams)
     session_id = inp.get("session_id", "")
-    team_data = _read_team_config(session_id) if session_id else None
+    teams_enabled = env.get("CLAUDE_CODE_EXPERIMENTAL_AGENT_TEAMS") == "1"
+    team_data = sources.team(session_id) if session_id and teams_enabled else None
     team_indicator = ""
 
     if team_data and team_data.get("member_count", 0) > 0:
@@ -1040,7 +1259,7 @@ def main() -> None:
         struggle_indicator = f"{YELLOW}⚠️{RESET}" if struggle > 0 else ""
 
         # Build intelligence indicator (read from build-intelligence.json)
-        build_intel = read_build_intelligence(cwd)
+        build_intel = sources.build_intelligence(cwd)
 
         # Combine Ralph section (with leading separator only; trailing separator added conditionally)
         ralph_section = f" {DARK_GREY}|{RESET} {team_indicator} {agent_block}{model_mix}{struggle_indicator}{build_intel}"
@@ -1048,7 +1267,7 @@ def main() -> None:
         # Fallback: Native Agent Teams active but no progress.json
         # Try to compute progress from task list
         team_name = team_data.get("team_name", "")
-        task_progress = _read_task_list_progress(team_name) if team_name else None
+        task_progress = sources.task_progress(team_name) if team_name else None
         
         if task_progress and task_progress.get("total", 0) > 0:
             # Format: "3/10:8O2S 👥10"
@@ -1065,7 +1284,7 @@ def main() -> None:
             model_mix = _format_model_mix(team_data.get("model_mix", {}))
             
             # Build intelligence indicator
-            build_intel = read_build_intelligence(cwd)
+            build_intel = sources.build_intelligence(cwd)
 
             # Struggle from build intelligence (fallback doesn't have ralph_progress)
             struggle_indicator = ""
@@ -1110,15 +1329,7 @@ def main() -> None:
         f"{ralph_section}"  # Element 4: Ralph section with leading | (trailing | in git_display)
         f"{git_display}"
     )
-
-    # Cache output for fallback after /clear
-    save_last_output(line)
-
-    # Output encoding: 'replace' mode handles terminal encoding mismatches gracefully.
-    # This prevents crashes when terminal locale differs from UTF-8 (e.g., Windows CP1252).
-    # Invalid chars are replaced with '?' rather than raising UnicodeEncodeError.
-    sys.stdout.buffer.write(line.encode("utf-8", errors="replace"))
-    sys.stdout.buffer.flush()
+    return line
 
 
 if __name__ == "__main__":
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Statusline Daemon - Resident statusline renderer with warm, watched segments.
+
+statusline.py cold-starts Python on every render, imports portalocker, and
+re-reads .model-info, the usage cache, progress.json, team configs, task
+files and build-intelligence.json, then re-runs git. This daemon keeps each of
+those segment inputs in memory and watches the files behind them, so a render
+is string formatting over values it already holds:
+
+    segment             key                 watched
+    model               -                   ~/.claude/.model-info
+    usage               -                   ~/.claude/.usage-cache
+    git                 cwd                 (git_snapshot keys on git's own files)
+    ralph_progress      cwd                 <cwd>/.claude/ralph/progress.json
+    team                session_id          ~/.claude/teams/*/config.json
+    task_progress       team name           ~/.claude/tasks/<team>/
+    build_intelligence  cwd                 <cwd>/.claude/ralph/build-intelligence.json
+
+A segment is computed the first time a render asks for it. After that a
+watcher thread polls the (mtime_ns, size, inode) of its files and recomputes
+it off the request path when they change, or once the segment's max age
+passes for time-dependent values (usage refresh, progress staleness, git
+worktree edits). The poll interval starts at POLL_MIN and doubles up to POLL_MAX while
+nothing changes; a render or a change resets it. Segments nobody asked for in
+SEGMENT_IDLE seconds are dropped.
+
+statusline.py is the client: if the socket exists it forwards stdin and
+prints the daemon's line, otherwise (or if the daemon does not answer) it
+renders in-process exactly as before. The socket plumbing is shared with
+hooks/hookd.py.
+
+Usage:
+  python statusline_daemon.py start     # SessionStart: spawn daemon if absent
+  python statusline_daemon.py serve     # Run daemon in the foreground
+  python statusline_daemon.py stop      # Ask the daemon to exit
+  python statusline_daemon.py stats     # Render latency (count/p50/p95/p99)
+  python statusline_daemon.py ping      # Exit 0 if the daemon is alive
+
+Env vars:
+  CLAUDE_STATUSLINED_IDLE_SECONDS  Idle shutdown after N seconds (default: 1800)
+  CLAUDE_STATUSLINED_DISABLE=1     Client always renders in-process
+
+Platforms without AF_UNIX (Windows) always use the in-process path.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hooks.hookd import CLAUDE_ROOT, HAS_UNIX_SOCKETS, RUN_DIR, _request
+
+SOCKET_PATH = RUN_DIR / "statuslined.sock"
+STATS_FILE = CLAUDE_ROOT / "debug" / "statuslined-stats.json"
+
+RENDER_TIMEOUT = 1.0  # Seconds - past this the client renders itself
+DEFAULT_IDLE_SECONDS = 1800
+POLL_MIN = 0.25
+POLL_MAX = 4.0
+SEGMENT_IDLE = 600.0
+
+# Environment of the Claude Code session that render() reads
+FORWARDED_ENV = ("CLAUDE_CODE_EFFORT_LEVEL", "CLAUDE_CODE_EXPERIMENTAL_AGENT_TEAMS")
+
+
+# =============================================================================
+# Client (imported by statusline.py before its heavy imports)
+# =============================================================================
+
+def _disabled() -> bool:
+    return os.environ.get("CLAUDE_STATUSLINED_DISABLE", "") in ("1", "true", "yes")
+
+
+def client_render() -> str | None:
+    """
+    Print the daemon's statusline for stdin and exit.
+
+    Returns None without touching stdin when no daemon is listening, or the
+    stdin it consumed when the daemon did not answer, for an in-process render.
+    """
+    if not HAS_UNIX_SOCKETS or _disabled() or not SOCKET_PATH.exists():
+        return None
+    try:
+        raw = sys.stdin.read()
+    except (OSError, ValueError):
+        raw = "{}"
+    response = _request({
+        "op": "render",
+        "input": raw,
+        "cwd": os.getcwd(),
+        "env": {key: os.environ[key] for key in FORWARDED_ENV if key in os.environ},
+    }, timeout=RENDER_TIMEOUT, socket_path=SOCKET_PATH)
+    line = response.get("line") if isinstance(response, dict) else None
+    if not isinstance(line, str):
+        return raw
+    sys.stdout.buffer.write(line.encode("utf-8", errors="replace"))
+    sys.stdout.buffer.flush()
+    sys.exit(0)
+
+
+def client_start() -> None:
+    """Spawn a detached daemon unless one is already answering."""
+    if not HAS_UNIX_SOCKETS or _disabled():
+        sys.exit(0)
+    if _request({"op": "ping"}, timeout=1.0, socket_path=SOCKET_PATH):
+        sys.exit(0)
+
+    import subprocess
+
+    RUN_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=str(CLAUDE_ROOT),
+            start_new_session=True,
+            close_fds=True,
+        )
+    except OSError:
+        pass  # The statusline keeps rendering in-process
+    sys.exit(0)
+
+
+# =============================================================================
+# Watched segments
+# =============================================================================
+
+def _file_key(path: Path) -> list | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+class Segment:
+    """One memoized segment input: its value and the signature of the files it came from."""
+
+    __slots__ = ("compute", "inputs", "max_age", "value", "signature", "computed_at", "used_at")
+
+    def __init__(self, compute, inputs, max_age: float, now: float):
+        self.compute = compute
+        self.inputs = inputs
+        self.max_age = max_age
+        self.signature = inputs()
+        self.value = compute()
+        self.computed_at = now
+        self.used_at = now
+
+    def refresh(self, now: float) -> bool:
+        """Recompute if the watched files changed or the value aged out. Returns True if it changed."""
+        signature = self.inputs()
+        if signature == self.signature and now - self.computed_at < self.max_age:
+            return False
+        value = self.compute()
+        changed = value != self.value or signature != self.signature
+        self.value, self.signature, self.computed_at = value, signature, now
+        return changed
+
+
+class WatchedSources:
+    """statusline.DirectSources served from memory, refreshed by poll()."""
+
+    def __init__(self, statusline):
+        import threading
+
+        self.sl = statusline
+        self.generation = 0  # Bumped whenever any segment value changes
+        self._segments: dict[tuple, Segment] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: tuple, compute, inputs, max_age: float):
+        now = time.monotonic()
+        with self._lock:
+            segment = self._segments.get(key)
+        if segment is None:
+            segment = Segment(compute, inputs, max_age, now)
+            with self._lock:
+                self._segments[key] = segment
+                self.generation += 1
+        segment.used_at = now
+        return segment.value
+
+    def poll(self) -> bool:
+        """Refresh every segment whose inputs changed; drop idle ones. Returns True if any changed."""
+        now = time.monotonic()
+        with self._lock:
+            segments = list(self._segments.items())
+        changed = False
+        for key, segment in segments:
+            if now - segment.used_at > SEGMENT_IDLE:
+                with self._lock:
+                    self._segments.pop(key, None)
+                continue
+            try:
+                changed = segment.refresh(now) or changed
+            except Exception:
+                continue  # Keep serving the last good value
+        if changed:
+            with self._lock:
+                self.generation += 1
+        return changed
+
+    # -------------------------------------------------------------------------
+    # DirectSources interface
+    # -------------------------------------------------------------------------
+
+    def model_display(self) -> str:
+        path = self.sl.CACHE_DIR / ".model-info"
+        return self._get(("model",), self.sl.DirectSources().model_display,
+                         lambda: _file_key(path), 60.0)
+
+    def usage(self) -> dict:
+        path = self.sl.CACHE_DIR / ".usage-cache"
+        return self._get(("usage",), lambda: self.sl.fetch_usage_data(path),
+                         lambda: _file_key(path), 30.0)
+
+    def git(self, cwd: str) -> dict:
+        return self._get(("git", cwd), lambda: self.sl.git_batch(cwd), lambda: None, 2.0)
+
+    def ralph_progress(self, cwd: str) -> dict | None:
+        path = Path(cwd) / ".claude" / "ralph" / "progress.json"
+        return self._get(("ralph_progress", cwd), lambda: self.sl._read_ralph_progress(cwd),
+                         lambda: _file_key(path), 30.0)
+
+    def team(self, session_id: str) -> dict | None:
+        teams_dir = self.sl.CACHE_DIR / "teams"
+
+        def inputs():
+            try:
+                configs = sorted(teams_dir.glob("*/config.json"))
+            except OSError:
+                return None
+            return [_file_key(teams_dir)] + [[str(p), _file_key(p)] for p in configs]
+
+        return self._get(("team", session_id), lambda: self.sl._read_team_config(session_id),
+                         inputs, 60.0)
+
+    def task_progress(self, team_name: str) -> dict | None:
+        tasks_dir = self.sl.CACHE_DIR / "tasks" / team_name
+        return self._get(("task_progress", team_name),
+                         lambda: self.sl._read_task_list_progress(team_name),
+                         lambda: _file_key(tasks_dir), 60.0)
+
+    def build_intelligence(self, cwd: str) -> str:
+        path = Path(cwd) / ".claude" / "ralph" / "build-intelligence.json"
+        return self._get(("build_intelligence", cwd),
+                         lambda: self.sl.read_build_intelligence(cwd),
+                         lambda: _file_key(path), 60.0)
+
+
+# =============================================================================
+# Daemon
+# =============================================================================
+
+def _server_class():
+    """StatuslineServer, defined lazily so the client never imports the daemon side."""
+    import threading
+
+    from hooks.hookd import HookServer
+    from scripts import statusline
+
+    class StatuslineServer(HookServer):
+        """hookd's socket loop and latency counters, answering render requests."""
+
+        def __init__(self, socket_path: Path = SOCKET_PATH, idle_seconds: float | None = None,
+                     stats_file: Path | None = STATS_FILE):
+            if idle_seconds is None:
+                try:
+                    idle_seconds = float(os.environ.get("CLAUDE_STATUSLINED_IDLE_SECONDS",
+                                                        DEFAULT_IDLE_SECONDS))
+                except ValueError:
+                    idle_seconds = DEFAULT_IDLE_SECONDS
+            super().__init__(socket_path, idle_seconds, stats_file)
+            self.sources = WatchedSources(statusline)
+            self._wake = threading.Event()
+            self._last: tuple | None = None  # (input, env, generation, line)
+            self._saved_line = ""
+
+        def render(self, request: dict) -> dict:
+            started = time.perf_counter()
+            raw = request.get("input") or "{}"
+            env = request.get("env") if isinstance(request.get("env"), dict) else {}
+            env_key = (tuple(sorted(env.items())), request.get("cwd"))
+            last = self._last
+            if last and last[0] == raw and last[1] == env_key and last[2] == self.sources.generation:
+                line = last[3]
+            else:
+                inp = statusline.parse_input(raw)
+                inp.setdefault("cwd", request.get("cwd") or ".")  # "." would be the daemon's cwd
+                line = statusline.render(inp, self.sources, {k: str(v) for k, v in env.items()})
+                self._last = (raw, env_key, self.sources.generation, line)
+            if line != self._saved_line:
+                statusline.save_last_output(line)
+                self._saved_line = line
+            self._wake.set()
+            self.record_latency("render", (time.perf_counter() - started) * 1000)
+            return {"line": line}
+
+        def handle(self, request: dict, conn=None) -> dict:
+            op = request.get("op")
+            if op == "render":
+                return self.render(request)
+            if op == "run":
+                return {"error": "unknown op: run"}  # Hooks belong to hookd
+            return super().handle(request, conn)
+
+        def watch(self) -> None:
+            """Poll segment inputs, backing off from POLL_MIN to POLL_MAX while idle."""
+            interval = POLL_MIN
+            while self._running:
+                self._wake.wait(interval)
+                woken = self._wake.is_set()
+                self._wake.clear()
+                changed = self.sources.poll()
+                interval = POLL_MIN if changed or woken else min(POLL_MAX, interval * 2)
+
+        def serve_forever(self) -> None:
+            self._running = True
+            threading.Thread(target=self.watch, daemon=True).start()
+            super().serve_forever()
+            self._running = False
+
+    return StatuslineServer
+
+
+def serve() -> None:
+    """Run the daemon in the foreground (used by `start`)."""
+    if not HAS_UNIX_SOCKETS:
+        print("statuslined: Unix domain sockets are not available on this platform", file=sys.stderr)
+        sys.exit(0)
+    os.chdir(CLAUDE_ROOT)
+    # Agent Teams gating is per request in render(), from the client's environment
+    os.environ["CLAUDE_CODE_EXPERIMENTAL_AGENT_TEAMS"] = "1"
+    _server_class()().serve_forever()
+
+
+# =============================================================================
+# CLI Commands
+# =============================================================================
+
+def cmd_stats() -> None:
+    """Print render latency from the live daemon (or the last dump)."""
+    stats = _request({"op": "stats"}, timeout=2.0, socket_path=SOCKET_PATH)
+    source = "live"
+    if stats is None:
+        try:
+            stats = json.loads(STATS_FILE.read_text(encoding="utf-8"))
+            source = f"snapshot {STATS_FILE}"
+        except (OSError, ValueError):
+            print("statuslined: daemon not running and no stats snapshot found.")
+            return
+    render = stats.get("hooks", {}).get("render", {})
+    print(f"Statusline daemon ({source}, pid {stats.get('pid')}, uptime {stats.get('uptime_s')}s)")
+    print(f"renders {render.get('calls', 0)}  p50 {render.get('p50_ms', 0):.2f}ms  "
+          f"p95 {render.get('p95_ms', 0):.2f}ms  p99 {render.get('p99_ms', 0):.2f}ms")
+
+
+def main() -> None:
+    """Main entry point with mode dispatch."""
+    if len(sys.argv) < 2:
+        sys.exit(0)
+
+    mode = sys.argv[1]
+    if mode == "start":
+        client_start()
+    elif mode == "serve":
+        serve()
+    elif mode == "stop":
+        _request({"op": "shutdown"}, timeout=2.0, socket_path=SOCKET_PATH)
+    elif mode == "stats":
+        cmd_stats()
+    elif mode == "ping":
+        sys.exit(0 if _request({"op": "ping"}, timeout=1.0, socket_path=SOCKET_PATH) else 1)
+    else:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,12 +20,14 @@ Repos:
   D:/source/pulsona/pulsona-dev/
 """
 
-import filecmp
 import shutil
 import subprocess
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from hooks.file_digest import fast_digest
+
 # Source of truth
 CLAUDE_HOME = Path.home() / ".claude"
 
@@ -48,6 +50,16 @@ def get_repo_name(repo_path: Path) -> str:
     return repo_path.name
 
 
+def same_content(source: Path, dest: Path) -> bool:
+    """Size first, then cached fast digests (unchanged files are not re-read)."""
+    try:
+        if source.stat().st_size != dest.stat().st_size:
+            return False
+        return fast_digest(source) == fast_digest(dest)
+    except OSError:
+        return False
+
+
 def check_drift(verbose: bool = False) -> list[tuple[Path, str, str]]:
     """
     Check for drift between source-of-truth and repo copies.
@@ -71,7 +83,7 @@ def check_drift(verbose: bool = False) -> list[tuple[Path, str, str]]:
                 print(f"  {repo_name}/{dest_rel}: MISSING")
                 continue
 
-            if filecmp.cmp(str(source), str(dest), shallow=False):
+            if same_content(source, dest):
                 if verbose:
                     print(f"  {repo_name}/{dest_rel}: OK (identical)")
                 continue
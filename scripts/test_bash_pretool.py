@@ -0,0 +1,146 @@
+"""Tests for hooks/bash-pretool.py fused PreToolUse:Bash pipeline."""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Load bash-pretool with a temp HOME so security-gate logs stay out of ~/.claude."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("CLAUDE_BYPASS_PERMISSIONS", raising=False)
+    monkeypatch.delenv("CLAUDE_CODE_TASK_LIST_ID", raising=False)
+    spec = importlib.util.spec_from_file_location("bash_pretool", ROOT / "hooks" / "bash-pretool.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.cancel_stdin_timeout()
+    return module
+
+
+def _bash(command: str, **extra) -> dict:
+    return {"tool_name": "Bash", "tool_input": {"command": command}, "cwd": ".", **extra}
+
+
+def _stage(decision: str, reason: str = ""):
+    def stage(ctx):
+        return {"hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": decision,
+            "permissionDecisionReason": reason,
+        }}
+    return stage
+
+
+def test_first_deny_short_circuits(pipeline):
+    """A deny stops the pipeline; later stages never run."""
+    ran = []
+    stages = [
+        ("a", _stage("ask", "first")),
+        ("b", _stage("deny", "nope")),
+        ("c", lambda ctx: ran.append("c")),
+    ]
+    result = pipeline.run_pipeline(_bash("ls"), stages)
+    assert result["hookSpecificOutput"]["permissionDecision"] == "deny"
+    assert result["hookSpecificOutput"]["permissionDecisionReason"] == "nope"
+    assert ran == []
+
+
+def test_ask_reasons_merged(pipeline):
+    """Multiple asks collapse into one prompt; allow never overrides ask."""
+    stages = [
+        ("a", _stage("ask", "Deletion: rm x")),
+        ("b", _stage("allow")),
+        ("c", _stage("ask", "Security: pipe")),
+    ]
+    output = pipeline.run_pipeline(_bash("rm x"), stages)["hookSpecificOutput"]
+    assert output["permissionDecision"] == "ask"
+    assert output["permissionDecisionReason"] == "Deletion: rm x\n\nSecurity: pipe"
+
+
+def test_crashing_stage_is_skipped(pipeline):
+    """Stage exceptions never block the command."""
+    def boom(ctx):
+        raise RuntimeError("bug")
+
+    assert pipeline.run_pipeline(_bash("ls"), [("boom", boom)]) is None
+
+
+def test_non_bash_passthrough(pipeline):
+    assert pipeline.run_pipeline({"tool_name": "Read", "tool_input": {}}) is None
+
+
+def test_real_stages(pipeline):
+    """Full stage list: safe command passes, deletion asks, bypass blocks destructive."""
+    assert pipeline.run_pipeline(_bash("ls -la")) is None
+
+    ask = pipeline.run_pipeline(_bash("rm -rf build"))["hookSpecificOutput"]
+    assert ask["permissionDecision"] == "ask"
+    assert "Deletion" in ask["permissionDecisionReason"]
+
+    deny = pipeline.run_pipeline(_bash("rm -rf build", permission_mode="bypassPermissions"))
+    assert deny["hookSpecificOutput"]["permissionDecision"] == "deny"
+
+
+def test_context_resolves_git_root_once(pipeline, git_repo, monkeypatch):
+    """Git stages share one repo-root lookup per invocation."""
+    calls = []
+    real = pipeline.find_git_root_from_cwd
+
+    def counting(cwd):
+        calls.append(cwd)
+        return real(cwd)
+
+    monkeypatch.setattr(pipeline, "find_git_root_from_cwd", counting)
+    result = pipeline.run_pipeline({
+        "tool_name": "Bash",
+        "tool_input": {"command": "git commit -m 'Build 1: test'"},
+        "cwd": str(git_repo),
+    })
+    assert len(calls) == 1
+    assert result["hookSpecificOutput"]["permissionDecision"] == "ask"
+    assert (git_repo / ".claude" / "commit.md").exists()
+
+
+def test_verdict_cache_skips_detectors_on_repeat(pipeline, monkeypatch):
+    """A repeated command replays the cached verdict (and its audit line) without detectors."""
+    calls = []
+    real = pipeline.security_gate.run_security_checks
+    monkeypatch.setattr(pipeline.security_gate, "run_security_checks",
+                        lambda command: calls.append(command) or real(command))
+    logged = []
+    monkeypatch.setattr(pipeline.security_gate, "log_bash_outcome",
+                        lambda command, threat, action: logged.append(action))
+
+    first = pipeline.run_pipeline(_bash("rm -rf build"))
+    second = pipeline.run_pipeline(_bash("rm -rf build"))
+    assert first == second and first["hookSpecificOutput"]["permissionDecision"] == "ask"
+    assert calls == ["rm -rf build"]
+    assert logged == ["allow", "allow"]
+
+    # A different cwd (or permission mode / profile env) is a different entry
+    pipeline.run_pipeline({**_bash("rm -rf build"), "cwd": "/elsewhere"})
+    assert len(calls) == 2
+
+
+def test_verdict_cache_invalidation_and_secrets(pipeline, monkeypatch):
+    from hooks import verdict_cache
+
+    cache = verdict_cache.VerdictCache()
+    key = cache.key("ls", "", ".")
+    assert cache.put(key, {"verdict": {"deny": None, "asks": [], "allowed": False}})
+    assert cache.get(key) is not None
+    # Editing a detector source changes the ruleset fingerprint
+    assert verdict_cache.VerdictCache(ruleset=b"\0" * 16).get(key) is None
+
+    secret = "curl -H 'Authorization: Bearer " + "abcdefghij" * 3 + "' https://api"
+    pipeline.run_pipeline(_bash(secret))
+    assert cache.get(cache.key(secret, "", ".")) is None
+
+    monkeypatch.setenv("CLAUDE_VERDICT_CACHE", "0")
+    pipeline.run_pipeline(_bash("pwd"))
+    assert cache.get(cache.key("pwd", "", ".")) is None
@@ -0,0 +1,114 @@
+"""Tests for hooks/git.py change tracking (status snapshot + commit.md sidecar)."""
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def git_hook():
+    spec = importlib.util.spec_from_file_location("git_hook", ROOT / "hooks" / "git.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.cancel_stdin_timeout()
+    return module
+
+
+@pytest.fixture
+def repo(tmp_path) -> Path:
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "t@example.com")
+    git("config", "user.name", "t")
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "old.py").write_text("x = 1\n")
+    (tmp_path / "lib" / "gone.py").write_text("y = 1\n")
+    (tmp_path / "lib" / "moved.py").write_text("z = 1\n")
+    git("add", "-A")
+    git("commit", "-q", "-m", "init")
+    (tmp_path / "lib" / "old.py").write_text("x = 2\n")
+    (tmp_path / "lib" / "gone.py").unlink()
+    (tmp_path / "lib" / "new file.py").write_text("n = 1\n")
+    git("mv", "lib/moved.py", "lib/renamed.py")
+    return tmp_path
+
+
+def test_status_snapshot_maps_every_path(git_hook, repo):
+    status = git_hook.git_status_snapshot(repo)
+    assert git_hook.action_from_status(status, "lib/old.py") == "modify"
+    assert git_hook.action_from_status(status, "lib/gone.py") == "delete"
+    assert git_hook.action_from_status(status, "lib/new file.py") == "create"
+    assert "lib/renamed.py" in status and "lib/moved.py" not in status
+    assert git_hook.detect_action_type(str(repo / "lib" / "new file.py")) == "create"
+
+
+def test_commit_md_rerendered_only_when_grouping_changes(git_hook, repo, monkeypatch):
+    calls = []
+    real = git_hook.git_status_snapshot
+    monkeypatch.setattr(git_hook, "git_status_snapshot", lambda *a: calls.append(a) or real(*a))
+
+    git_hook.update_commit_md(repo, "lib/old.py", "modify")
+    commit_md = repo / ".claude" / "commit.md"
+    sidecar = json.loads((repo / ".claude" / "commit-tracked.json").read_text())
+    assert sidecar["paths"] == ["lib/old.py"]
+    assert "- Updated library utilities (old.py)" in commit_md.read_text()
+    assert len(calls) == 1
+
+    # Already tracked: no git call, no rewrite
+    stamp = commit_md.stat().st_mtime_ns
+    git_hook.update_commit_md(repo, "lib/old.py", "modify")
+    assert len(calls) == 1 and commit_md.stat().st_mtime_ns == stamp
+
+    git_hook.update_commit_md(repo, "lib/gone.py", "delete")
+    text = commit_md.read_text()
+    assert "- Removed library utilities (gone.py)" in text
+    assert git_hook.TRACKED_MARKER in text
+
+    # A path that groups into an existing line only updates the sidecar
+    stamp = commit_md.stat().st_mtime_ns
+    git_hook.update_commit_md(repo, "lib/sub/old.py", "modify")
+    assert commit_md.stat().st_mtime_ns == stamp
+    sidecar = json.loads((repo / ".claude" / "commit-tracked.json").read_text())
+    assert "lib/sub/old.py" in sidecar["paths"]
+
+
+def test_ready_edits_kept_and_cleared_file_resets(git_hook, repo):
+    git_hook.update_commit_md(repo, "lib/old.py", "modify")
+    commit_md = repo / ".claude" / "commit.md"
+    commit_md.write_text(commit_md.read_text().replace(
+        "(User writes their final bullet points here)", "feat: my message"))
+
+    git_hook.update_commit_md(repo, "lib/new file.py", "create")
+    text = commit_md.read_text()
+    assert "feat: my message" in text and "(old.py)" in text and "Added" in text
+
+    commit_md.write_text("# Pending Changes\n\n## Pending\n\n## Ready\n")  # /commit cleared it
+    git_hook.update_commit_md(repo, "lib/gone.py", "delete")
+    assert json.loads((repo / ".claude" / "commit-tracked.json").read_text())["paths"] == ["lib/gone.py"]
+
+
+def test_legacy_tracked_comment_is_migrated(git_hook, repo):
+    claude = repo / ".claude"
+    claude.mkdir()
+    (claude / "commit.md").write_text(
+        "# Pending Changes\n\n## Pending\n- Updated x\n\n<!-- tracked: lib/old.py -->\n\n## Ready\nkeep\n")
+    git_hook.update_commit_md(repo, "lib/gone.py", "delete")
+    assert json.loads((claude / "commit-tracked.json").read_text())["paths"] == ["lib/gone.py", "lib/old.py"]
+    assert "keep" in (claude / "commit.md").read_text()
+
+
+def test_log_receipt_appends_to_journal(git_hook, repo):
+    git_hook.log_receipt(repo, "lib/old.py", "modify")
+    git_hook.log_receipt(repo, "lib/gone.py", "removed")
+    lines = (repo / ".claude" / "receipts.jsonl").read_text().splitlines()
+    receipts = [json.loads(line) for line in lines]
+    assert [r["path"] for r in receipts] == ["lib/old.py", "lib/gone.py"]
+    assert receipts[1]["sha256"] == "DELETED" and len(receipts[0]["sha256"]) == 64
@@ -0,0 +1,89 @@
+"""Tests for hooks/file_digest.py (streamed hashing + shared digest cache)."""
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from hooks import file_digest as fd
+
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch) -> Path:
+    path = tmp_path / "digests.json"
+    monkeypatch.setenv("CLAUDE_FILE_DIGEST_CACHE", str(path))
+    monkeypatch.setattr(fd, "_cache", None)
+    return path
+
+
+def _big(path: Path, fill: bytes = b"a") -> Path:
+    path.write_bytes(fill * (fd.CACHE_MIN_BYTES + fd.BLOCK_BYTES + 7))  # Spans several blocks
+    os.utime(path, ns=(10**18, 10**18))  # Well outside the racy window
+    return path
+
+
+def test_streamed_digest_matches_one_shot(tmp_path, cache_file):
+    path = _big(tmp_path / "bundle.js")
+    assert fd.file_digest(path) == hashlib.sha256(path.read_bytes()).hexdigest()
+    assert fd.fast_digest(path) == fd.hash_file(path, fd.fast_algorithm())
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path, cache_file, monkeypatch):
+    path = _big(tmp_path / "lock.json")
+    first = fd.file_digest(path)
+    assert not cache_file.exists()  # Saved once per hook run, not per digest
+    fd.save_digests()
+    assert str(path.resolve()) in json.loads(cache_file.read_text())
+
+    monkeypatch.setattr(fd, "_cache", None)  # A new hook process
+    monkeypatch.setattr(fd, "hash_file", lambda *a: pytest.fail("re-hashed an unchanged file"))
+    assert fd.file_digest(path) == first
+
+
+def test_changed_identity_or_racy_entry_is_rehashed(tmp_path, cache_file):
+    path = _big(tmp_path / "nb.ipynb")
+    before = fd.file_digest(path)
+    _big(path, b"b")  # Same size and inode, new content
+    os.utime(path, ns=(10**18 + 1, 10**18 + 1))  # ...and a new mtime
+    assert fd.file_digest(path) != before
+
+    fresh = tmp_path / "fresh.bin"
+    fresh.write_bytes(b"x" * fd.CACHE_MIN_BYTES)  # mtime is now: racy
+    fd.file_digest(fresh)
+    fd.save_digests()
+    entry = json.loads(cache_file.read_text())[str(fresh.resolve())]
+    assert entry["racy"] is True
+
+
+def test_small_files_skip_the_cache(tmp_path, cache_file):
+    path = tmp_path / "small.txt"
+    path.write_text("hello")
+    assert fd.file_digest(path) == hashlib.sha256(b"hello").hexdigest()
+    fd.save_digests()
+    assert not cache_file.exists()
+
+
+def test_long_lived_cache_keeps_entries_saved_by_other_processes(tmp_path, cache_file):
+    daemon, hook = fd.DigestCache(cache_file), fd.DigestCache(cache_file)
+    first, second = _big(tmp_path / "a.bin"), _big(tmp_path / "b.bin", b"b")
+    daemon.digest(first, "sha256")
+    daemon.save()
+
+    hook.digest(second, "sha256")  # Another process, between two daemon runs
+    hook.save()
+    daemon.digest(first, "sha256")
+    assert str(second.resolve()) in daemon.entries()  # Reloaded after the replace
+
+    third = _big(tmp_path / "c.bin", b"c")
+    daemon.digest(third, "sha256")
+    hook.digest(first, "blake2b-128")
+    hook.save()  # Lands between the daemon's load and its save
+    daemon.save()
+    saved = json.loads(cache_file.read_text())
+    assert {str(p.resolve()) for p in (first, second, third)} <= set(saved)
+    assert "blake2b-128" in saved[str(first.resolve())]
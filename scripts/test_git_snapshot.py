@@ -0,0 +1,103 @@
+"""Tests for scripts/git_snapshot.py (per-part cached git state for the statusline)."""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts import git_snapshot as gs
+
+
+def _run(repo: Path, *args: str) -> None:
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch) -> Path:
+    monkeypatch.setattr(gs, "CACHE_PATH", tmp_path / "snapshots.json")
+    path = tmp_path / "repo"
+    path.mkdir()
+    _run(path, "init", "-q", "-b", "main")
+    _run(path, "config", "user.email", "t@example.com")
+    _run(path, "config", "user.name", "t")
+    _run(path, "config", "remote.origin.url", "git@github.com:me/repo.git")
+    (path / "a.py").write_text("a\n")
+    _run(path, "add", "a.py")
+    _run(path, "commit", "-q", "-m", "init")
+    return path
+
+
+@pytest.fixture
+def git_calls(monkeypatch) -> list:
+    calls = []
+    real = gs._git
+
+    def counting(cwd, *args, **kwargs):
+        calls.append(args[0])
+        return real(cwd, *args, **kwargs)
+
+    monkeypatch.setattr(gs, "_git", counting)
+    return calls
+
+
+@pytest.mark.integration
+def test_snapshot_matches_git(repo):
+    (repo / "a.py").write_text("changed\n")
+    (repo / "b.py").write_text("new\n")
+    data = gs.snapshot(str(repo))
+    head = subprocess.run(["git", "-C", str(repo), "rev-parse", "--short", "HEAD"],
+                          capture_output=True, text=True).stdout.strip()
+    assert data["branch"] == "main"
+    assert data["commit_hash"] == head
+    assert data["remote_url"] == "git@github.com:me/repo.git"
+    assert data["ahead_behind"] == ""
+    assert data["status_counts"] == (0, 1, 1)
+
+
+@pytest.mark.integration
+def test_unchanged_repo_runs_no_git(repo, git_calls):
+    first = gs.snapshot(str(repo), now=1000.0)
+    git_calls.clear()
+    assert gs.snapshot(str(repo), now=1001.0) == first
+    assert git_calls == []
+
+
+@pytest.mark.integration
+def test_only_changed_parts_refresh(repo, git_calls):
+    gs.snapshot(str(repo), now=1000.0)
+    git_calls.clear()
+    (repo / "b.py").write_text("b\n")
+    _run(repo, "add", "b.py")  # Touches the index only
+    data = gs.snapshot(str(repo), now=1001.0)
+    assert data["status_counts"] == (1, 0, 0)
+    assert sorted(git_calls) == ["ls-files", "status"]
+
+    git_calls.clear()
+    data = gs.snapshot(str(repo), now=1000.0 + gs.STATUS_TTL + 2)  # Worktree edits expire by age
+    assert sorted(git_calls) == ["ls-files", "status"]
+
+    git_calls.clear()
+    _run(repo, "commit", "-q", "-m", "b")
+    data = gs.snapshot(str(repo), now=1000.0 + gs.STATUS_TTL + 3)
+    assert data["status_counts"] == (0, 0, 0)
+    assert "rev-parse" in git_calls and "config" not in git_calls
+
+
+@pytest.mark.integration
+def test_untracked_scan_over_budget_keeps_last_count(repo, monkeypatch):
+    (repo / "new.txt").write_text("x\n")
+    assert gs.snapshot(str(repo), now=1000.0)["status_counts"] == (0, 0, 1)
+
+    real = gs._git
+    monkeypatch.setattr(gs, "_git", lambda cwd, *args, **kw: None if args[0] == "ls-files" else real(cwd, *args, **kw))
+    (repo / "a.py").write_text("edited\n")
+    data = gs.snapshot(str(repo), now=1000.0 + gs.STATUS_TTL)
+    assert data["status_counts"] == (0, 1, 1)
+
+
+def test_outside_a_repo_returns_none(tmp_path, monkeypatch):
+    monkeypatch.setattr(gs, "CACHE_PATH", tmp_path / "snapshots.json")
+    assert gs.snapshot(str(tmp_path)) is None
@@ -0,0 +1,101 @@
+"""Tests for scripts/hook-bench.py hook selection, replay and budget gating."""
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="module")
+def bench():
+    spec = importlib.util.spec_from_file_location("hook_bench", ROOT / "scripts" / "hook-bench.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def settings():
+    return json.loads((ROOT / "settings.json").read_text(encoding="utf-8"))
+
+
+def _names(bench, hooks):
+    return [bench.hook_id(h["command"]) for h in hooks]
+
+
+def test_select_hooks_uses_matchers(bench, settings):
+    """Tool matchers match whole names; async hooks are excluded unless asked for."""
+    bash = _names(bench, bench.select_hooks(settings, "PreToolUse", {"tool_name": "Bash"}))
+    assert bash == ["hooks/hookd.py run hooks/bash-pretool.py"]
+
+    edit = _names(bench, bench.select_hooks(settings, "PreToolUse", {"tool_name": "Edit"}))
+    assert "hooks/hookd.py run scripts/guards.py fs-guard" in edit
+    assert "hooks/auto-allow.py" not in edit
+    assert "hooks/auto-allow.py" in _names(
+        bench, bench.select_hooks(settings, "PreToolUse", {"tool_name": "Edit"}, include_async=True)
+    )
+
+
+def test_select_hooks_prompt_prefix(bench, settings):
+    names = _names(bench, bench.select_hooks(settings, "UserPromptSubmit", {"prompt": "/start 3"}))
+    assert "hooks/hookd.py run scripts/guards.py skill-parser" in names
+    assert "hooks/hookd.py run scripts/guards.py skill-interceptor" not in names
+
+
+def test_default_corpus_loads(bench):
+    records = bench.load_corpus(bench.DEFAULT_CORPUS)
+    events = {r["event"] for r in records}
+    assert {"PreToolUse", "PostToolUse", "UserPromptSubmit", "SubagentStart",
+            "SubagentStop", "Stop", "SessionStart"} <= events
+
+    commands = [(r.get("git", {}), r["payload"].get("tool_input", {}).get("command", "")) for r in records]
+    commits = [state for state, command in commands if command.startswith("git commit")]
+    assert {state.get("branch", "main") for state in commits} >= {"main", "feature/bench-login"}
+    assert any(".env" in state.get("staged", {}) for state in commits)
+
+
+def test_git_state_switches_branch_and_staged_files(bench, tmp_path):
+    import subprocess
+
+    with bench.BenchHome(ROOT / "settings.json") as sandbox:
+        def git(*args):
+            return subprocess.run(["git", *args], cwd=sandbox.project, capture_output=True, text=True).stdout.strip()
+
+        assert git("branch", "--show-current") == "main"
+        sandbox.set_git_state({"branch": "feature/x", "staged": {".env": "A=1\n"}})
+        assert git("branch", "--show-current") == "feature/x"
+        assert git("diff", "--cached", "--name-only") == ".env"
+
+        sandbox.set_git_state(None)
+        assert git("branch", "--show-current") == "main"
+        assert git("diff", "--cached", "--name-only") == "" and not (sandbox.project / ".env").exists()
+
+
+def test_run_bench_and_budgets(bench, tmp_path):
+    """Replay through a minimal settings file; budgets gate on the reported percentiles."""
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({"hooks": {"PreToolUse": [{
+        "matcher": "Bash",
+        "hooks": [
+            {"type": "command", "command": "python -c \"import sys; sys.stdin.read()\""},
+            {"type": "command", "command": "node missing.js"},
+        ],
+    }]}}))
+    corpus = [
+        {"event": "PreToolUse", "payload": {"tool_name": "Bash", "tool_input": {"command": "ls"}}},
+        {"event": "PreToolUse", "payload": {"tool_name": "Read", "tool_input": {}}},
+    ]
+
+    report = bench.run_bench(corpus, settings_path, runs=2, warmup=0)
+
+    name = "python -c \"import sys; sys.stdin.read()\""
+    assert report["hooks"][name]["n"] == 2
+    assert report["hooks"][name]["errors"] == 0
+    assert report["events"]["PreToolUse:Bash"]["n"] == 2
+    assert report["skipped"] == ["node missing.js"]
+
+    assert bench.check_budgets(report, {"default": {"p95_ms": 60_000}}) == []
+    failures = bench.check_budgets(report, {"events": {"PreToolUse:Bash": {"p50_ms": 0.001}}})
+    assert len(failures) == 1 and "PreToolUse:Bash" in failures[0]
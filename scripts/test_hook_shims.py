@@ -0,0 +1,70 @@
+"""Regression tests: hooks/guards.py and hooks/ralph.py dispatch in-process."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Every interpreter that starts with this dir on PYTHONPATH appends its pid
+SITECUSTOMIZE = """
+import os
+with open(os.environ["HOOK_PID_LOG"], "a") as f:
+    f.write(f"{os.getpid()}\\n")
+"""
+
+
+def _run_shim(tmp_path: Path, script: str, mode: str, payload: dict) -> tuple[subprocess.CompletedProcess, int]:
+    site_dir = tmp_path / "site"
+    site_dir.mkdir(exist_ok=True)
+    (site_dir / "sitecustomize.py").write_text(SITECUSTOMIZE)
+    pid_log = tmp_path / "pids.log"
+    pid_log.write_text("")
+
+    home = tmp_path / "home"
+    home.mkdir(exist_ok=True)
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(site_dir),
+        "HOOK_PID_LOG": str(pid_log),
+        "HOME": str(home),
+        "CLAUDE_HOME": str(home / ".claude"),
+    }
+    result = subprocess.run(
+        [sys.executable, str(ROOT / "hooks" / script), mode],
+        input=json.dumps(payload),
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env=env,
+        timeout=30,
+    )
+    processes = len([line for line in pid_log.read_text().splitlines() if line.strip()])
+    return result, processes
+
+
+def test_guards_shim_single_process(tmp_path):
+    """hooks/guards.py fs-guard runs scripts/guards.py without a child interpreter."""
+    payload = {"tool_name": "Bash", "tool_input": {"command": "rm -rf build"}}
+    result, processes = _run_shim(tmp_path, "guards.py", "fs-guard", payload)
+
+    assert result.returncode == 0
+    assert json.loads(result.stdout)["hookSpecificOutput"]["permissionDecision"] == "ask"
+    assert processes == 1
+
+
+def test_guards_shim_unknown_mode_exits_zero(tmp_path):
+    result, processes = _run_shim(tmp_path, "guards.py", "no-such-mode", {})
+    assert result.returncode == 0
+    assert result.stdout == ""
+    assert processes == 1
+
+
+def test_ralph_shim_single_process(tmp_path):
+    """hooks/ralph.py pre-compact runs the scripts/ralph.py handler in-process."""
+    result, processes = _run_shim(tmp_path, "ralph.py", "pre-compact", {"session_id": "t"})
+
+    assert result.returncode == 0
+    assert json.loads(result.stdout) == {"checkpoint_created": False}
+    assert processes == 1
@@ -0,0 +1,86 @@
+"""Tests for hooks/hook_trace.py span collection and the mmap ring file."""
+import io
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from hooks import hook_trace
+
+
+@pytest.fixture
+def ring(tmp_path, monkeypatch):
+    path = tmp_path / "hook-trace.ring"
+    monkeypatch.setenv("CLAUDE_HOOK_TRACE_FILE", str(path))
+    monkeypatch.delenv("CLAUDE_HOOK_TRACE", raising=False)
+    return path
+
+
+def test_ring_wraps_and_keeps_newest(ring, monkeypatch):
+    monkeypatch.setattr(hook_trace, "SLOT_COUNT", 4)
+    monkeypatch.setattr(hook_trace, "RING_SIZE", hook_trace.HEADER_SIZE + hook_trace.SLOT_SIZE * 4)
+
+    for i in range(10):
+        hook_trace.write_span({"ts": time.time(), "handler": f"h{i}", "total_ms": i})
+
+    assert ring.stat().st_size == hook_trace.RING_SIZE
+    assert [s["handler"] for s in hook_trace.read_spans()] == ["h6", "h7", "h8", "h9"]
+
+
+def test_oversized_span_fits_slot(ring):
+    hook_trace.write_span({"handler": "x" * 2000, "paths": ["/p" * 300]})
+    (span,) = hook_trace.read_spans()
+    assert span["paths"] == [] and span["handler"].startswith("x")
+
+
+def test_traced_records_span(ring, tmp_path, monkeypatch):
+    """Decorated main(): phases, subprocesses, written files and the decision are captured."""
+    out_file = tmp_path / "state.json"
+
+    @hook_trace.traced("demo.py")
+    def main():
+        json.loads(sys.stdin.read())
+        out_file.write_text("{}")
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        print(json.dumps({"hookSpecificOutput": {"permissionDecision": "deny"}}))
+        sys.exit(0)
+
+    stdin = io.StringIO(json.dumps({"hook_event_name": "PreToolUse", "tool_name": "Bash"}))
+    monkeypatch.setattr(sys, "stdin", stdin)
+    monkeypatch.setattr(sys, "argv", ["demo.py", "check"])
+
+    with pytest.raises(SystemExit):
+        main()
+    assert sys.stdin is stdin  # Probes are removed again
+
+    (span,) = hook_trace.read_spans()
+    assert span["handler"] == "demo.py check"
+    assert (span["event"], span["tool"]) == ("PreToolUse", "Bash")
+    assert span["decision"] == "deny"
+    assert span["procs"] == 1
+    assert str(out_file) in span["paths"]
+    assert span["total_ms"] >= span["handler_ms"] > 0
+
+
+def test_tracing_disabled(ring, monkeypatch):
+    monkeypatch.setenv("CLAUDE_HOOK_TRACE", "0")
+    hook_trace.traced("demo.py")(lambda: None)()
+    assert not ring.exists()
+
+
+def test_aggregate_ranks_slowest_first():
+    spans = [
+        {"handler": "fast", "total_ms": 5, "decision": "none"},
+        {"handler": "slow", "total_ms": 80, "decision": "ask"},
+        {"handler": "slow", "total_ms": 120, "decision": "deny"},
+    ]
+    rows = hook_trace.aggregate(spans)
+    assert [r["key"] for r in rows] == ["slow", "fast"]
+    assert rows[0]["calls"] == 2 and rows[0]["max_ms"] == 120
+    assert rows[0]["decisions"] == {"ask": 1, "deny": 1}
@@ -0,0 +1,226 @@
+"""Unit tests for hooks/hookd.py warm hook daemon."""
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Ensure hooks directory is importable
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from hooks import hookd
+from hooks.hookd import HookServer, percentile, resolve_script
+
+ROOT = Path(__file__).parent.parent
+FS_GUARD_PAYLOAD = json.dumps({"tool_name": "Bash", "tool_input": {"command": "rm -rf build"}})
+
+
+def _run_direct(args: list[str], stdin: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "guards.py"), *args],
+        input=stdin, capture_output=True, text=True, timeout=30,
+        env={**os.environ, "CLAUDE_HOOK_TRACE": "0"},
+    )
+
+
+# ==============================================================================
+# Script resolution / percentiles
+# ==============================================================================
+
+def test_resolve_script_confined_to_root(tmp_path):
+    """Scripts outside the config root or non-.py files are rejected."""
+    outside = tmp_path / "evil.py"
+    outside.write_text("print('x')\n")
+
+    assert resolve_script("scripts/guards.py") == (ROOT / "scripts" / "guards.py").resolve()
+    assert resolve_script(str(outside)) is None
+    assert resolve_script("scripts/../../etc/passwd") is None
+    assert resolve_script("settings.json") is None
+
+
+def test_percentile_nearest_rank():
+    """Nearest-rank percentile over a sorted sample."""
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+# ==============================================================================
+# Execution parity
+# ==============================================================================
+
+def test_execute_matches_subprocess_output(tmp_path):
+    """Warm dispatch returns the same stdout/exit code as a cold subprocess."""
+    direct = _run_direct(["fs-guard"], FS_GUARD_PAYLOAD)
+    server = HookServer(socket_path=tmp_path / "hookd.sock", stats_file=None)
+
+    for _ in range(2):  # Second call hits the warm module cache
+        result = server.execute({
+            "op": "run",
+            "script": "scripts/guards.py",
+            "args": ["fs-guard"],
+            "cwd": str(tmp_path),
+            "env": {"HOME": str(tmp_path), "PATH": "/usr/bin:/bin"},
+            "stdin": FS_GUARD_PAYLOAD,
+        })
+        assert result["code"] == direct.returncode
+        assert json.loads(result["stdout"]) == json.loads(direct.stdout)
+
+    stats = server.stats()
+    assert stats["modules"] == 1
+    assert stats["hooks"]["guards.py fs-guard"]["calls"] == 2
+
+
+def test_execute_restores_process_state(tmp_path):
+    """cwd, env and argv are restored after a request."""
+    server = HookServer(socket_path=tmp_path / "hookd.sock", stats_file=None)
+    cwd_before, argv_before = Path.cwd(), list(sys.argv)
+
+    server.execute({
+        "script": "scripts/guards.py",
+        "args": ["fs-guard"],
+        "cwd": str(tmp_path),
+        "env": {"HOOKD_TEST_MARKER": "1", "HOME": str(tmp_path)},
+        "stdin": FS_GUARD_PAYLOAD,
+    })
+
+    assert Path.cwd() == cwd_before
+    assert sys.argv == argv_before
+    assert "HOOKD_TEST_MARKER" not in __import__("os").environ
+
+
+def test_execute_skips_request_past_client_deadline(tmp_path):
+    """A request queued past its client's --timeout is not run (the client ran it in-process)."""
+    import time
+
+    server = HookServer(socket_path=tmp_path / "hookd.sock", stats_file=None)
+    result = server.execute({
+        "script": "scripts/guards.py",
+        "args": ["fs-guard"],
+        "cwd": str(tmp_path),
+        "env": {"HOME": str(tmp_path)},
+        "stdin": FS_GUARD_PAYLOAD,
+        "deadline": time.time() - 1,
+    })
+    assert result == {"expired": True}
+    assert server.stats()["modules"] == 0
+
+
+def test_accept_declines_when_client_gave_up(tmp_path):
+    """The hook starts only once the client echoes ACCEPT; a closed client never gets a second run."""
+    import socket
+    import time
+
+    server = HookServer(socket_path=tmp_path / "hookd.sock", stats_file=None)
+    daemon_end, client_end = socket.socketpair()
+    client_end.close()  # Timed out and ran the hook in-process
+    with daemon_end:
+        assert server.accept({"deadline": time.time() + 5}, daemon_end) is False
+
+    daemon_end, client_end = socket.socketpair()
+    with daemon_end, client_end:
+        client_end.sendall(hookd.ACCEPT)
+        assert server.accept({"deadline": time.time() + 5}, daemon_end) is True
+        assert client_end.recv(1) == hookd.ACCEPT
+
+
+def test_client_runs_hook_when_daemon_declines(tmp_path, monkeypatch):
+    """An expired reply means the daemon did not run the hook, so the client must."""
+    import io
+
+    ran = []
+    (tmp_path / "hookd.sock").touch()
+    monkeypatch.setattr(hookd, "SOCKET_PATH", tmp_path / "hookd.sock")
+    monkeypatch.setattr(hookd, "_request_run", lambda payload, deadline: {"expired": True})
+    monkeypatch.setattr(hookd, "_run_in_process", lambda script, args, stdin=None: ran.append((args, stdin)))
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(FS_GUARD_PAYLOAD.encode())))
+    monkeypatch.delenv("CLAUDE_HOOKD_DISABLE", raising=False)
+
+    hookd.client_run(["--timeout", "1", "scripts/guards.py", "fs-guard"])
+    assert ran == [(["fs-guard"], FS_GUARD_PAYLOAD.encode())]
+
+
+@pytest.mark.skipif(not hookd.HAS_UNIX_SOCKETS, reason="AF_UNIX not available")
+def test_socket_ping_and_shutdown(tmp_path):
+    """Daemon answers ping over its socket and removes it on shutdown."""
+    sock_path = tmp_path / "hookd.sock"
+    server = HookServer(socket_path=sock_path, idle_seconds=30, stats_file=None)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    for _ in range(50):
+        if sock_path.exists():
+            break
+        thread.join(0.05)
+
+    assert hookd._request({"op": "ping"}, timeout=2.0, socket_path=sock_path)["ok"] is True
+    assert hookd._request({"op": "shutdown"}, timeout=2.0, socket_path=sock_path)["ok"] is True
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not sock_path.exists()
+
+
+@pytest.mark.skipif(not hookd.HAS_UNIX_SOCKETS, reason="AF_UNIX not available")
+def test_run_over_socket_with_accept_handshake(tmp_path):
+    """A run request is accepted, executed once and answered over the socket."""
+    import time
+
+    sock_path = tmp_path / "hookd.sock"
+    server = HookServer(socket_path=sock_path, idle_seconds=30, stats_file=None)
+    results = []
+
+    def client():
+        for _ in range(50):
+            if hookd._request({"op": "ping"}, timeout=1.0, socket_path=sock_path):
+                break  # Listening (the socket file appears at bind, before listen)
+            time.sleep(0.05)
+        results.append(hookd._request_run({
+            "script": "scripts/guards.py",
+            "args": ["fs-guard"],
+            "cwd": str(tmp_path),
+            "env": {"HOME": str(tmp_path), "PATH": "/usr/bin:/bin"},
+            "stdin": FS_GUARD_PAYLOAD,
+        }, time.time() + 5, socket_path=sock_path))
+        hookd._request({"op": "shutdown"}, timeout=2.0, socket_path=sock_path)
+
+    thread = threading.Thread(target=client, daemon=True)
+    thread.start()
+    server.serve_forever()  # Hooks arm SIGALRM, so the daemon needs the main thread
+    thread.join(5)
+
+    assert json.loads(results[0]["stdout"]) == json.loads(_run_direct(["fs-guard"], FS_GUARD_PAYLOAD).stdout)
+    assert server.stats()["hooks"]["guards.py fs-guard"]["calls"] == 1
+
+
+def test_helper_change_reloads_warm_modules(tmp_path, monkeypatch):
+    """Editing a module a hook imported (not just the hook script) reloads it; so does a new env."""
+    import time
+
+    monkeypatch.setattr(hookd, "CLAUDE_ROOT", tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    helper = tmp_path / "hookd_test_helper.py"
+    helper.write_text("import os\nVALUE = 'old ' + os.environ.get('CLAUDE_TEST_FLAVOR', '')\n")
+    (tmp_path / "hook.py").write_text(
+        "import hookd_test_helper\n\ndef main():\n    print(hookd_test_helper.VALUE)\n"
+    )
+    server = HookServer(socket_path=tmp_path / "hookd.sock", stats_file=None)
+    request = {"script": "hook.py", "cwd": str(tmp_path), "env": {"HOME": str(tmp_path)}}
+
+    try:
+        assert server.execute(request)["stdout"] == "old \n"
+        helper.write_text("VALUE = 'new'\n")
+        stamp = time.time_ns() + 10**9
+        os.utime(helper, ns=(stamp, stamp))
+        assert server.execute(request)["stdout"] == "new\n"
+
+        helper.write_text("import os\nVALUE = os.environ.get('CLAUDE_TEST_FLAVOR', '')\n")
+        os.utime(helper, ns=(stamp + 10**9, stamp + 10**9))
+        assert server.execute(request)["stdout"] == "\n"
+        request["env"] = {"HOME": str(tmp_path), "CLAUDE_TEST_FLAVOR": "mint"}
+        assert server.execute(request)["stdout"] == "mint\n"
+    finally:
+        sys.modules.pop("hookd_test_helper", None)
+        sys.modules.pop("_hookd_hook", None)
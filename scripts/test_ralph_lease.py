@@ -0,0 +1,108 @@
+"""Tests for scripts/ralph_lease.py (lease/heartbeat task ownership) across queue backends."""
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts import ralph_hooks
+from scripts.ralph_lease import AGENT_ID_ENV, agent_lease_id, end_lease, heartbeat_path
+from scripts.ralph_queue import WorkStealingQueue
+from scripts.ralph_queue_sqlite import SqliteWorkStealingQueue
+
+BACKENDS = {
+    "json": lambda base: WorkStealingQueue("plan", "", base_dir=base, format="json"),
+    "markdown": lambda base: WorkStealingQueue("plan", "", base_dir=base),
+    "sqlite": lambda base: SqliteWorkStealingQueue("plan", "", base_dir=base),
+}
+
+
+def _age(path: Path, seconds: float) -> None:
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_heartbeat_keeps_lease_and_silence_expires_it(backend, tmp_path, monkeypatch):
+    monkeypatch.setenv("RALPH_LEASE_SECONDS", "60")
+    queue = BACKENDS[backend](tmp_path)
+    queue.add_task("long")
+    queue.add_task("other")
+
+    task = queue.claim_next_task("agent-0")
+    assert task.id == "long" and task.lease_expires_at and task.iterations == 1
+    assert heartbeat_path("agent-0", tmp_path).exists()
+
+    # Lease passed but the agent heartbeat recently: still owned, lease pushed out
+    queue._update_task("long", lease_expires_at="2000-01-01T00:00:00")
+    queue.heartbeat("agent-0")
+    assert queue.reclaim_stale_tasks() == []
+    assert queue.claim_next_task("agent-1").id == "other"
+
+    # Silent for longer than the lease: reclaimed lazily by the next claim
+    queue._update_task("long", lease_expires_at="2000-01-01T00:00:00")
+    _age(heartbeat_path("agent-0", tmp_path), 120)
+    retry = queue.claim_next_task("agent-2")
+    assert (retry.id, retry.claimed_by, retry.iterations) == ("long", "agent-2", 2)
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_stopped_agent_releases_immediately(backend, tmp_path):
+    queue = BACKENDS[backend](tmp_path)
+    queue.add_task("t1")
+    queue.claim_next_task("agent-0")
+    assert queue.claim_next_task("agent-1") is None
+
+    assert end_lease("agent-0", tmp_path)
+    assert not end_lease("never-claimed", tmp_path)
+    assert queue.claim_next_task("agent-1").id == "t1"
+
+    # Claiming again clears the agent's own "stopped" marker
+    queue.release_task("t1")
+    again = queue.claim_next_task("agent-0")
+    assert (again.id, again.iterations) == ("t1", 3) and again.lease_expires_at
+    assert queue.claim_next_task("agent-1") is None
+
+
+def test_heartbeat_hook_renews_only_claimed_leases_in_ralph_sessions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in AGENT_ID_ENV:
+        monkeypatch.delenv(name, raising=False)
+    payload = json.dumps({"tool_name": "Edit", "agent_id": "agent-7"})
+
+    def run_hook():
+        monkeypatch.setattr(sys, "stdin", io.StringIO(payload))
+        ralph_hooks.heartbeat_hook()
+
+    run_hook()  # No Ralph session
+    (tmp_path / ".claude" / "ralph").mkdir(parents=True)
+    (tmp_path / ".claude" / "ralph" / "state.json").write_text("{}")
+    run_hook()  # Session, but agent-7 never claimed
+    assert not heartbeat_path("agent-7", tmp_path).exists()
+
+    queue = BACKENDS["json"](tmp_path)
+    queue.add_task("t1")
+    queue.claim_next_task("agent-7")
+    _age(heartbeat_path("agent-7", tmp_path), 120)
+    run_hook()
+    assert time.time() - heartbeat_path("agent-7", tmp_path).stat().st_mtime < 60
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_claim_under_another_agents_id_is_refused(backend, tmp_path, monkeypatch):
+    queue = BACKENDS[backend](tmp_path)
+    queue.add_task("t1")
+    monkeypatch.delenv("CLAUDE_CODE_AGENT_NAME", raising=False)
+    monkeypatch.setenv("RALPH_AGENT_ID", "agent-3")
+    assert agent_lease_id() == "agent-3"
+    assert agent_lease_id({"agent_id": "sub-1"}) == "sub-1"
+
+    with pytest.raises(ValueError):
+        queue.claim_next_task("agent-4")
+    assert queue.claim_next_task("agent-3").id == "t1"
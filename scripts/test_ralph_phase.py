@@ -0,0 +1,152 @@
+"""Tests for scripts/ralph_phase.py and the agent_tracker phase transitions built on it."""
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts.ralph_phase import (
+    append_activity, append_state_delta, checkpoint_state, completions,
+    compare_and_set, journal_path, load_state, read_activity, record_completion, state_journal_path,
+)
+
+STATE = {"phase": "implementation", "startedAt": "2026-01-01T00:00:00+00:00"}
+
+
+def test_parallel_completions_are_all_counted(tmp_path):
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        counts = list(pool.map(lambda i: record_completion(STATE, f"agent-{i}", tmp_path), range(10)))
+    assert completions(STATE, tmp_path) == 10
+    assert max(counts) == 10
+
+    # A new epoch (or session) counts from zero without any reset
+    assert completions({**STATE, "phaseEpoch": 1}, tmp_path) == 0
+    assert journal_path({**STATE, "startedAt": "other"}, tmp_path) != journal_path(STATE, tmp_path)
+
+
+def test_compare_and_set_succeeds_once(tmp_path):
+    state_path = tmp_path / "state.json"
+    state_path.write_text(json.dumps(STATE))
+
+    def advance(state):
+        state["phase"] = "verify_fix"
+        state["phaseEpoch"] = 1
+        return state
+
+    expected = {"phase": "implementation", "phaseEpoch": None}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: compare_and_set(state_path, expected, advance), range(8)))
+    assert sum(r is not None for r in results) == 1
+    assert json.loads(state_path.read_text())["phaseEpoch"] == 1
+
+
+def test_state_journal_replays_onto_its_snapshot(tmp_path, monkeypatch):
+    state_path = tmp_path / "state.json"
+    assert load_state(state_path) is None
+    checkpoint_state(state_path, {**STATE, "beats": 0})
+    snapshot = state_path.read_text()
+
+    for i in range(1, 4):
+        assert append_state_delta(state_path, {"beats": i})
+    with open(state_journal_path(state_path), "a") as f:
+        f.write('{"base": "other", "set": {"beats": 99}}\n{"base": ')  # Stale and torn lines
+    assert state_path.read_text() == snapshot
+    assert load_state(state_path)["beats"] == 3
+
+    # Phase boundaries fold the journal into a new snapshot
+    compare_and_set(state_path, {"phase": "implementation"}, lambda s: {**s, "phase": "review"})
+    assert not state_journal_path(state_path).exists()
+    assert load_state(state_path) == json.loads(state_path.read_text())
+    assert (load_state(state_path)["phase"], load_state(state_path)["beats"]) == ("review", 3)
+
+    # So does a journal that grows past its budget
+    monkeypatch.setattr("scripts.ralph_phase.STATE_JOURNAL_MAX_BYTES", 200)
+    for i in range(20):
+        append_state_delta(state_path, {"beats": i})
+    journal = state_journal_path(state_path)
+    assert not journal.exists() or journal.stat().st_size < 200
+    assert load_state(state_path)["beats"] == 19
+
+
+def test_protocol_journals_heartbeats_and_checkpoints_phases(tmp_path):
+    from scripts.ralph import RalphProtocol, RalphState
+
+    protocol = RalphProtocol(base_dir=tmp_path)
+    state = RalphState(session_id="s-1", task="t", total_agents=2, max_iterations=3,
+                       started_at="2026-01-01T00:00:00+00:00")
+    assert protocol.write_state(state)
+    backups = protocol.state_path.parent / "backups"
+    snapshot = protocol.state_path.read_text()
+
+    for i in range(5):
+        state.last_heartbeat = f"2026-01-01T00:0{i}:00+00:00"
+        state.process_pids = [100 + i]
+        assert protocol.write_state(state)
+    assert protocol.state_path.read_text() == snapshot
+    assert not backups.exists()
+    assert protocol.read_state().to_dict() == state.to_dict()
+
+    state.phase = "review"
+    assert protocol.write_state(state)
+    assert not state_journal_path(protocol.state_path).exists()
+    assert len(list(backups.glob("state_*.json"))) == 1
+    assert json.loads(protocol.state_path.read_text())["process_pids"] == [104]
+    assert protocol.read_state().to_dict() == state.to_dict()
+
+
+def test_activity_log_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr("scripts.ralph_phase.ACTIVITY_MAX_BYTES", 2000)
+    for i in range(200):
+        append_activity({"event": "agent_completed", "i": i}, tmp_path)
+    events = read_activity(tmp_path, limit=1000)
+    assert sum(p.stat().st_size for p in tmp_path.glob("activity.jsonl*")) < 2 * 2000 + 100
+    assert events[-1]["i"] == 199
+    assert [e["i"] for e in events] == list(range(events[0]["i"], 200))
+
+
+def test_activity_rotation_loses_no_concurrent_events(tmp_path, monkeypatch):
+    monkeypatch.setattr("scripts.ralph_phase.ACTIVITY_MAX_BYTES", 12000)
+
+    def writer(w):
+        for i in range(50):
+            append_activity({"event": "agent_completed", "w": w, "i": i}, tmp_path)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(writer, range(8)))
+    # ~17 KiB in all: one rotation, so every event is still in the two segments
+    assert (tmp_path / "activity.jsonl.1").exists()
+    events = read_activity(tmp_path, limit=1000)
+    assert sorted((e["w"], e["i"]) for e in events) == [(w, i) for w in range(8) for i in range(50)]
+
+
+def _tracker(cwd: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "ralph.py"), "agent-tracker"],
+        input=json.dumps({"tool_name": "Task"}), capture_output=True, text=True, cwd=cwd, timeout=30,
+    )
+    return json.loads(result.stdout) if result.stdout.strip() else {}
+
+
+def test_parallel_agent_tracker_transitions_exactly_once(tmp_path):
+    from datetime import datetime, timezone
+
+    state_path = tmp_path / ".claude" / "ralph" / "state.json"
+    state_path.parent.mkdir(parents=True)
+    state_path.write_text(json.dumps({
+        "phase": "implementation", "agents": 6, "startedAt": datetime.now(timezone.utc).isoformat(),
+        "verify_fix": {"agents": 2}, "review": {"agents": 2},
+    }))
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        outputs = list(pool.map(lambda _: _tracker(tmp_path), range(6)))
+    transitions = [o for o in outputs if "Verify+Fix" in o.get("hookSpecificOutput", {}).get("additionalContext", "")]
+    assert len(transitions) == 1
+    state = json.loads(state_path.read_text())
+    assert (state["phase"], state["phaseEpoch"]) == ("verify_fix", 1)
+
+    events = read_activity(state_path.parent)
+    assert sum(e["event"] == "agent_completed" for e in events) == 6
+    assert [e["to"] for e in events if e["event"] == "phase_transition"] == ["verify_fix"]
@@ -0,0 +1,84 @@
+"""Tests for the batch queue APIs (apply, claim_many, add_tasks, complete_many) and plan import."""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts import ralph_queue
+from scripts.ralph_queue import QueueTask, import_markdown_tasks, open_queue
+
+
+@pytest.fixture(params=["json", "markdown", "sqlite"])
+def queue(request, tmp_path):
+    return open_queue("plan", "plans/p.md", base_dir=tmp_path, backend=request.param)
+
+
+def test_batch_calls_take_one_lock_and_one_save(tmp_path, monkeypatch):
+    queue = open_queue("plan", "", base_dir=tmp_path, backend="json")
+    saves = []
+    original_save = queue.save
+    monkeypatch.setattr(queue, "save", lambda q: saves.append(1) or original_save(q))
+
+    added = queue.add_tasks([("a", "first"), QueueTask(id="b", blocked_by=["a"]), ("c",)])
+    assert [t.id for t in added] == ["a", "b", "c"] and len(saves) == 1
+    assert queue.add_tasks([]) == [] and len(saves) == 1
+
+    claimed = queue.claim_many("agent-0", 5)
+    assert [t.id for t in claimed] == ["a", "c"] and len(saves) == 2
+
+
+def test_apply_sees_earlier_ops(queue):
+    queue.add_tasks([("a", "first"), ("b", "needs a", ["a"])])
+    results = queue.apply([
+        ("claim", "agent-0"),
+        ("claim", "agent-1"),      # b still blocked
+        ("complete", "a"),
+        ("claim", "agent-1"),      # now b is ready
+        ("release", "missing"),
+        ("reclaim",),
+    ])
+    assert results[0].id == "a" and results[1] is None
+    assert results[2] is True and results[3].id == "b"
+    assert results[4] is False and results[5] == []
+    assert queue.get_status()["completed"] == 1
+
+    assert queue.complete_many(["b", "nope"]) == [True, False]
+    assert queue.add_task("a", "duplicate").description == "first"  # Existing id wins
+    assert queue.get_status()["total_tasks"] == 2
+    with pytest.raises(ValueError):
+        queue.apply([("explode",)])
+
+
+def test_import_markdown_resolves_dependencies(tmp_path, capsys, monkeypatch):
+    plan = tmp_path / "plan.md"
+    plan.write_text(
+        "# Tasks\n"
+        "- [ ] P1: Create schema\n"
+        "- [ ] P2: Write API - blocked by: Create schema\n"
+        "- [x] P3: Write docs\n"
+        "- [ ] P3: Ship it - depends on: Write API, Launch party\n",
+        encoding="utf-8",
+    )
+    queue = open_queue("plan", str(plan), base_dir=tmp_path, backend="sqlite")
+    tasks, unresolved = import_markdown_tasks(queue, plan.read_text(encoding="utf-8"))
+    assert len(tasks) == 4 and unresolved == ["Launch party"]
+    assert tasks[1].blocked_by == [tasks[0].id]
+    assert queue.claim_next_task("agent-0").id == tasks[0].id
+
+    again, _ = import_markdown_tasks(queue, plan.read_text(encoding="utf-8") + "- [ ] P2: Create schema\n")
+    assert [t.id for t in again[:4]] == [t.id for t in tasks]  # Re-import adds nothing twice
+    assert queue.get_status()["total_tasks"] == 5
+
+    monkeypatch.setattr(sys, "argv", ["ralph_queue.py", "import", "other", str(plan), "--project", str(tmp_path)])
+    ralph_queue.main()
+    out = capsys.readouterr().out
+    assert "Imported 4 tasks" in out and "'Launch party' matches no task" in out
+
+
+def test_bench_smoke(capsys):
+    ralph_queue.bench(tasks=20, agents=2, backends=("json", "sqlite"))
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 5 and "claim storm" in lines[-1]
@@ -0,0 +1,103 @@
+"""Tests for scripts/ralph_queue_sqlite.py (SQLite WorkStealingQueue backend)."""
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts.ralph_lease import heartbeat_path
+from scripts.ralph_queue import WorkStealingQueue, open_queue
+from scripts.ralph_queue_sqlite import SqliteWorkStealingQueue, migrate_file_queues
+
+
+def test_claims_respect_blockers_and_order(tmp_path):
+    queue = SqliteWorkStealingQueue("plan", "plans/p.md", base_dir=tmp_path)
+    queue.add_task("a", "first")
+    queue.add_task("b", "needs a", blocked_by=["a"])
+    queue.add_task("c", "needs missing", blocked_by=["zz"])
+    queue.add_task("a", "duplicate ignored")
+
+    first = queue.claim_next_task("agent-0")
+    assert (first.id, first.claimed_by, first.iterations) == ("a", "agent-0", 1)
+    assert queue.claim_next_task("agent-1") is None  # b blocked by a, c by a missing task
+
+    assert queue.complete_task("a")
+    second = queue.claim_next_task("agent-1")
+    assert second.id == "b" and second.blocked_by == ["a"]
+
+    # Re-opening a completed blocker re-blocks its dependents
+    assert queue.release_task("b")
+    queue._update_task("a", status="pending", claimed_by=None)
+    assert queue.claim_next_task("agent-2").id == "a"
+    assert queue.claim_next_task("agent-2") is None
+
+    assert queue.get_status() == {
+        "plan_id": "plan", "total_tasks": 3, "pending": 2, "in_progress": 1, "completed": 0,
+    }
+
+
+def test_concurrent_claims_are_exclusive(tmp_path):
+    setup = SqliteWorkStealingQueue("plan", "", base_dir=tmp_path)
+    for i in range(40):
+        setup.add_task(f"t{i}")
+    setup.close()
+
+    claimed: list[str] = []
+
+    def worker(n: int) -> None:
+        queue = SqliteWorkStealingQueue("plan", "", base_dir=tmp_path)
+        while (task := queue.claim_next_task(f"agent-{n}")) is not None:
+            claimed.append(task.id)
+        queue.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(f"t{i}" for i in range(40))
+
+
+def test_reclaim_stale_tasks(tmp_path):
+    queue = SqliteWorkStealingQueue("plan", "", base_dir=tmp_path)
+    queue.add_task("old")
+    queue.add_task("new")
+    queue.claim_next_task("agent-0")
+    queue.claim_next_task("agent-1")
+    stale = datetime.now() - timedelta(minutes=10)
+    queue._update_task("old", lease_expires_at=stale.isoformat())
+    heartbeat_file = heartbeat_path("agent-0", tmp_path)
+    os.utime(heartbeat_file, (stale.timestamp(), stale.timestamp()))  # agent-0 went quiet
+
+    assert queue.reclaim_stale_tasks(timeout_seconds=300) == ["old"]
+    assert queue.claim_next_task("agent-2").id == "old"
+
+
+def test_migration_export_and_backend_selection(tmp_path, monkeypatch):
+    md = WorkStealingQueue("md-plan", "plans/md.md", base_dir=tmp_path)
+    md.add_task("1", "Write schema")
+    md.add_task("2", "Use schema", blocked_by=["1"])
+    md.complete_task("1")
+    js = WorkStealingQueue("js-plan", "plans/js.md", base_dir=tmp_path, format="json")
+    js.add_task("x", "Only task")
+
+    assert migrate_file_queues(tmp_path) == {"js-plan": 1, "md-plan": 2}
+    assert migrate_file_queues(tmp_path) == {}  # One-shot: existing databases are skipped
+    assert (tmp_path / ".claude" / "task-queue-md-plan.md").exists()
+
+    monkeypatch.delenv("RALPH_QUEUE_BACKEND", raising=False)
+    queue = open_queue("md-plan", "plans/md.md", base_dir=tmp_path)
+    assert isinstance(queue, SqliteWorkStealingQueue)
+    assert queue.claim_next_task("agent-0").id == "2"  # Blocker completed before migration
+
+    export = queue.export_markdown()
+    text = export.read_text(encoding="utf-8")
+    assert "edits here are not read back" in text
+    assert "- [x] Task 1: Write schema" in text and "- [/] Task 2: Use schema (agent-0)" in text
+    assert migrate_file_queues(tmp_path) == {}  # The export is never mistaken for a queue
+
+    monkeypatch.setenv("RALPH_QUEUE_BACKEND", "json")
+    assert isinstance(open_queue("md-plan", "", base_dir=tmp_path), WorkStealingQueue)
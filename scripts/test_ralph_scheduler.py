@@ -0,0 +1,72 @@
+"""Tests for scripts/ralph_scheduler.py (critical-path ready-set scheduler)."""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts.ralph_queue import QueueTask, WorkStealingQueue
+from scripts.ralph_queue_sqlite import SqliteWorkStealingQueue
+from scripts.ralph_scheduler import ReadyScheduler
+
+
+def _tasks():
+    # "quick" is a short standalone task listed first; c1 -> c2 -> c3 is a chain
+    return [
+        QueueTask(id="quick", description="Quick rename"),
+        QueueTask(id="c1", description="Refactor the storage layer"),
+        QueueTask(id="c2", description="Migrate callers", blocked_by=["c1"]),
+        QueueTask(id="c3", description="Rewrite reports", blocked_by=["c2"]),
+        QueueTask(id="gated", description="Needs a task nobody added", blocked_by=["ghost"]),
+    ]
+
+
+def test_claims_follow_critical_path_and_unblock_incrementally():
+    scheduler = ReadyScheduler(_tasks())
+    assert scheduler.critical_path() == ["c1", "c2", "c3"]
+    assert [t.id for t in scheduler.ready()] == ["c1", "quick"]
+
+    first = scheduler.claim("agent-0")
+    assert (first.id, first.status, first.claimed_by) == ("c1", "in_progress", "agent-0")
+    assert scheduler.claim("agent-1").id == "quick"
+    assert scheduler.claim("agent-2") is None
+
+    scheduler.complete("c1")
+    assert scheduler.claim("agent-2").id == "c2"
+    scheduler.release("c2")
+    assert scheduler.peek().id == "c2"
+
+
+def test_add_raises_blocker_rank_and_explain():
+    scheduler = ReadyScheduler([
+        QueueTask(id="a", description="Small fix"),
+        QueueTask(id="b", description="Small fix"),
+    ])
+    assert scheduler.peek().id == "a"  # Equal rank: file order
+    scheduler.add(QueueTask(id="after-b", description="Overhaul everything", blocked_by=["b"]))
+    assert scheduler.peek().id == "b"
+
+    scheduler.add(QueueTask(id="ghost", description="Late blocker", status="completed"))
+    assert scheduler.explain("after-b")["reason"] == "waiting on b"
+    ready = scheduler.explain("b")
+    assert ready["ready"] and ready["reason"] == "ready (position 1 of 2)"
+    assert ready["unblocks"] == ["after-b"] and ready["critical_path"] > ready["cost"]
+    assert scheduler.explain("nope") == {"id": "nope", "known": False, "ready": False, "reason": "not in queue"}
+
+    cyclic = ReadyScheduler([QueueTask(id="x", blocked_by=["y"]), QueueTask(id="y", blocked_by=["x"])])
+    assert cyclic.claim("agent-0") is None
+    assert cyclic.explain("x")["reason"] == "dependency cycle; waiting on y"
+
+
+def test_queue_backends_claim_in_critical_path_order(tmp_path):
+    for queue in (
+        WorkStealingQueue("md", "", base_dir=tmp_path),
+        SqliteWorkStealingQueue("db", "", base_dir=tmp_path),
+    ):
+        for task in _tasks():
+            queue.add_task(task.id, task.description, blocked_by=task.blocked_by)
+        claimed = [queue.claim_next_task("agent-0").id, queue.claim_next_task("agent-1").id]
+        assert claimed == ["c1", "quick"], type(queue).__name__
+        assert queue.claim_next_task("agent-2") is None
+        queue.complete_task("c1")
+        assert queue.claim_next_task("agent-2").id == "c2"
@@ -0,0 +1,81 @@
+"""Tests for hooks/receipt_journal.py (append-only change-tracker receipts)."""
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from hooks.receipt_journal import ReceiptJournal, read_receipts
+
+
+def _receipt(i: int) -> dict:
+    return {"timestamp": f"2026-01-01T00:00:{i:02d}+00:00", "path": f"f{i}.py", "action": "modify", "sha256": "x"}
+
+
+def test_compaction_appends_to_archive_after_legacy_array(tmp_path):
+    legacy = json.dumps([_receipt(0)], indent=2)
+    (tmp_path / "receipts.json").write_text(legacy)  # Pre-journal history
+    journal = ReceiptJournal(tmp_path, compact_bytes=300, chain=False, seal_grace=0.0)
+    for i in range(1, 21):
+        journal.append(_receipt(i))
+
+    assert [r["path"] for r in read_receipts(tmp_path)] == [f"f{i}.py" for i in range(21)]
+    assert journal.archive.exists()
+
+    journal.compact()
+    journal.compact()
+    assert not journal.sealed() and not journal.journal.exists()
+    assert len(journal.archive.read_text().splitlines()) == 20
+    assert (tmp_path / "receipts.json").read_text() == legacy  # Never rewritten
+
+
+def test_fold_cut_short_is_not_archived_twice(tmp_path):
+    journal = ReceiptJournal(tmp_path, chain=False, seal_grace=0.0)
+    journal.append(_receipt(1))
+    journal.compact()
+    journal.append(_receipt(2))
+    journal.compact()  # Folds f1, seals f2
+    sealed = journal.sealed()[0]
+    size = journal.archive.stat().st_size
+    with open(journal.archive, "ab") as f:
+        f.write(sealed.read_bytes()[:10])  # Crash mid-append...
+    journal.fold_marker.write_text(f"{sealed.name} {size}")  # ...before the journal was dropped
+
+    journal.compact()
+    assert [r["path"] for r in read_receipts(tmp_path)] == ["f1.py", "f2.py"]
+    assert not journal.fold_marker.exists()
+
+
+def test_recent_sealed_journal_is_not_folded(tmp_path):
+    journal = ReceiptJournal(tmp_path, chain=False, seal_grace=3600)
+    journal.append(_receipt(1))
+    journal.compact()
+    journal.compact()
+    assert len(journal.sealed()) == 1 and not journal.archive.exists()
+    assert [r["path"] for r in read_receipts(tmp_path)] == ["f1.py"]
+
+
+def test_torn_line_is_skipped(tmp_path):
+    journal = ReceiptJournal(tmp_path, chain=False)
+    journal.append(_receipt(1))
+    with open(journal.journal, "a", encoding="utf-8") as f:
+        f.write('{"path": "torn')
+    assert [r["path"] for r in read_receipts(tmp_path)] == ["f1.py"]
+
+
+def test_hash_chain_survives_compaction_and_detects_tampering(tmp_path):
+    journal = ReceiptJournal(tmp_path, compact_bytes=400, chain=True, seal_grace=0.0)
+    for i in range(12):
+        journal.append(_receipt(i))
+    journal.compact()
+    journal.compact()
+    journal.append(_receipt(12))
+    assert journal.verify() == (True, 13)
+
+    lines = journal.archive.read_text().splitlines()
+    forged = json.loads(lines[3])
+    forged["sha256"] = "forged"
+    lines[3] = json.dumps(forged)
+    journal.archive.write_text("\n".join(lines) + "\n")
+    assert journal.verify() == (False, 3)
@@ -0,0 +1,115 @@
+"""Tests for scripts/receipt_log.py (segmented receipt store) and audit-receipts.py."""
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts.receipt_log import ReceiptLog
+
+
+def _receipt(i: int, agent: str = "agent-1", action: str = "file_edit") -> dict:
+    return {
+        "id": f"{i:08d}-aaaa",
+        "timestamp": f"2026-02-06T12:{i // 60:02d}:{i % 60:02d}+00:00",
+        "agent_id": agent,
+        "action": action,
+        "details": {"i": i},
+        "session_id": "s1",
+    }
+
+
+def test_buffered_append_rotates_and_index_points_at_receipts(tmp_path):
+    log = ReceiptLog(tmp_path / "log", segment_bytes=400, buffer_size=4)
+    for i in range(20):
+        log.append(_receipt(i, agent=f"agent-{i % 2}"))
+    assert len(log._buffer) == 0  # 20 is a multiple of buffer_size
+    assert len(log.segments()) > 1
+
+    newest = list(log.entries(limit=3))
+    assert [log.read(e)["details"]["i"] for e in newest] == [19, 18, 17]
+
+    odd = list(log.entries(agent="agent-1", newest_first=False))
+    assert [e.id for e in odd] == [f"{i:08d}-aaaa" for i in range(1, 20, 2)]
+    assert all(log.read(e)["agent_id"] == "agent-1" for e in odd)
+
+    assert [log.read(e)["details"]["i"] for e in log.find("00000007")] == [7]
+
+
+def test_flush_on_demand_and_torn_index_line(tmp_path):
+    log = ReceiptLog(tmp_path / "log", buffer_size=100)
+    log.append(_receipt(1))
+    assert list(log.entries()) == []
+    assert log.flush() == 1
+
+    with open(log.index_path(1), "a", encoding="utf-8") as f:
+        f.write("123.0\tpartial")  # Crashed writer
+    assert [e.id for e in log.entries()] == ["00000001-aaaa"]
+
+
+def test_write_receipt_is_on_disk_before_exit(tmp_path, monkeypatch):
+    from scripts import ralph, receipt_log
+
+    monkeypatch.setattr(receipt_log, "_log", ReceiptLog(tmp_path / "log"))
+    assert ralph.write_receipt("agent-1", "file_edit", {"file": "app.py"}, session_id="s1")
+    assert [e.agent_id for e in ReceiptLog(tmp_path / "log").entries()] == ["agent-1"]
+
+
+def test_import_legacy_is_idempotent(tmp_path):
+    legacy = tmp_path / "receipts"
+    legacy.mkdir()
+    for i in (3, 1, 2):
+        (legacy / f"r{i}.json").write_text(json.dumps(_receipt(i)), encoding="utf-8")
+    (legacy / "broken.json").write_text("{", encoding="utf-8")
+
+    log = ReceiptLog(legacy / "log")
+    assert log.import_legacy(legacy) == 3
+    assert log.import_legacy(legacy) == 0
+    assert [e.id[:8] for e in log.entries(newest_first=False)] == ["00000001", "00000002", "00000003"]
+
+    log.import_legacy(legacy, remove=True)
+    assert [p.name for p in legacy.glob("*.json")] == ["broken.json"]  # Unreadable files are left alone
+
+
+def test_drop_before_keeps_active_and_recent_segments(tmp_path):
+    log = ReceiptLog(tmp_path / "log", segment_bytes=1, buffer_size=1)
+    for i in range(3):
+        log.append(_receipt(i))
+    assert log.segments() == [1, 2, 3]
+
+    cutoff = log._index(2)[0].ts  # Receipt 1's time: only segment 1 is older
+    assert log.drop_before(cutoff, dry_run=True) == [(1, 1)]
+    assert log.segments() == [1, 2, 3]
+    log.drop_before(cutoff)
+    assert log.segments() == [2, 3]
+
+
+def test_audit_receipts_list_and_report_use_index(tmp_path, monkeypatch, capsys):
+    spec = importlib.util.spec_from_file_location("audit_receipts", ROOT / "scripts" / "audit-receipts.py")
+    audit = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(audit)
+    monkeypatch.setattr(audit.receipt_log, "LOG_DIR", tmp_path / "log")
+    monkeypatch.setattr(audit.receipt_log, "RECEIPTS_DIR", tmp_path)
+    monkeypatch.setattr(audit.receipt_log, "legacy_receipts_exist", lambda *a: False)
+
+    log = ReceiptLog(tmp_path / "log")
+    log.append(_receipt(1, agent="agent-1", action="file_edit"))
+    log.append(_receipt(2, agent="agent-2", action="agent_error"))
+    log.flush()
+    # Corrupt receipt 1's body: list/report must not need it
+    seg = log.segment_path(1)
+    data = seg.read_bytes()
+    seg.write_bytes(b"X" + data[1:])
+
+    audit.list_receipts(agent_filter="agent-2")
+    out = capsys.readouterr().out
+    assert "agent_error" in out and "00000002" in out and "Showing 1 receipt(s)" in out
+
+    audit.generate_report(by_agent=True)
+    out = capsys.readouterr().out
+    assert "Total: 2 receipt(s)" in out and "agent-1:" in out
+
+    audit.show_receipt("00000002")
+    assert "i: 2" in capsys.readouterr().out
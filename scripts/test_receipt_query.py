@@ -0,0 +1,118 @@
+"""Tests for scripts/receipt_query.py (indexed receipt queries and aggregation)."""
+import importlib.util
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts.receipt_log import ReceiptLog
+from scripts.receipt_query import ReceiptQuery
+
+BASE = 1_790_000_000  # An hour boundary in UTC
+
+
+def _receipt(i: int, ts: float, agent: str, action: str, session: str = "s1") -> dict:
+    stamp = datetime.fromtimestamp(ts, timezone.utc)
+    return {"id": f"{i:08d}", "timestamp": stamp.isoformat(), "agent_id": agent,
+            "action": action, "details": {}, "session_id": session}
+
+
+@pytest.fixture
+def query(tmp_path) -> ReceiptQuery:
+    log = ReceiptLog(tmp_path / "log", segment_bytes=250, buffer_size=2)
+    events = [
+        (0, "agent-1", "agent_start"), (60, "agent-1", "file_edit"), (120, "agent-1", "agent_complete"),
+        (30, "agent-2", "agent_start"), (90, "agent-2", "agent_error"),
+        (3600, "agent-1", "agent_start"), (3700, "agent-1", "agent_complete"),
+        (3800, "agent-2", "file_edit"),
+    ]
+    events.sort()
+    for i, (offset, agent, action) in enumerate(events):
+        log.append(_receipt(i, BASE + offset, agent, action))
+    log.flush()
+    assert len(log.segments()) > 2
+    return ReceiptQuery(log)
+
+
+def test_filters_match_a_full_scan_and_build_summaries(query):
+    log = query.log
+    full = list(log.entries(newest_first=False))
+    for kwargs in ({"agent": "agent-2"}, {"action": "agent_start"}, {"since": BASE + 100},
+                   {"agent": "agent-1", "until": BASE + 3600}, {"session": "nope"}):
+        expected = [e for e in full
+                    if all(getattr(e, {"agent": "agent_id", "action": "action", "session": "session_id"}[k]) == v
+                           for k, v in kwargs.items() if k in ("agent", "action", "session"))
+                    and e.ts >= kwargs.get("since", 0) and e.ts < kwargs.get("until", float("inf"))]
+        assert list(query.entries(**kwargs)) == expected, kwargs
+
+    sealed = [seq for seq in log.segments() if seq < log.head()]
+    summary = json.loads(log.summary_path(sealed[0]).read_text())
+    assert summary["count"] == len(log._index(sealed[0]))
+    assert set(summary["agent_id"]) <= {"agent-1", "agent-2"}
+
+
+def test_stale_summary_is_rebuilt(query):
+    log = query.log
+    list(query.entries())
+    log.summary_path(1).write_text(json.dumps({"idx_bytes": -1}))
+    assert len(list(query.entries())) == 8
+
+
+def test_aggregate_counts_errors_and_durations(query):
+    rows = query.aggregate(["agent", "hour"])
+    by_key = {(r["agent"], r["hour"]): r for r in rows}
+    first_hour = sorted({r["hour"] for r in rows})[0]
+
+    agent1 = by_key[("agent-1", first_hour)]
+    assert (agent1["count"], agent1["errors"], agent1["runs"], agent1["avg_duration_s"]) == (3, 0, 1, 120.0)
+    agent2 = by_key[("agent-2", first_hour)]
+    assert (agent2["count"], agent2["errors"], agent2["error_rate"]) == (2, 1, 0.5)
+    assert agent2["max_duration_s"] == 60.0
+
+    with pytest.raises(ValueError):
+        query.aggregate(["colour"])
+
+
+def test_report_group_by_json(query, monkeypatch, capsys):
+    spec = importlib.util.spec_from_file_location("audit_receipts", ROOT / "scripts" / "audit-receipts.py")
+    audit = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(audit)
+    monkeypatch.setattr(audit.receipt_log, "LOG_DIR", query.log.directory)
+    monkeypatch.setattr(audit.receipt_log, "legacy_receipts_exist", lambda *a: False)
+
+    audit.generate_report(group_by=["action"], since=BASE + 3600, as_json=True)
+    rows = json.loads(capsys.readouterr().out)
+    assert {r["action"]: r["count"] for r in rows} == {"agent_start": 1, "agent_complete": 1, "file_edit": 1}
+
+
+def test_json_output_stays_json_without_receipts(tmp_path, monkeypatch, capsys):
+    spec = importlib.util.spec_from_file_location("audit_receipts", ROOT / "scripts" / "audit-receipts.py")
+    audit = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(audit)
+    monkeypatch.setattr(audit.receipt_log, "LOG_DIR", tmp_path / "empty")
+    monkeypatch.setattr(audit.receipt_log, "legacy_receipts_exist", lambda *a: False)
+
+    audit.list_receipts(since=BASE, as_json=True)
+    assert json.loads(capsys.readouterr().out) == []
+    audit.generate_report(group_by=["agent"], as_json=True)
+    assert json.loads(capsys.readouterr().out) == []
+    audit.generate_report(as_json=True)
+    assert json.loads(capsys.readouterr().out)["total"] == 0
+
+
+def test_rollup_path_matches_a_full_scan(query):
+    from collections import Counter
+
+    expected = Counter((e.agent_id, e.action) for e in query.log.entries())
+    rows = query.aggregate(["agent", "action"], since=BASE)  # Every sealed segment is wholly inside
+    got = Counter({(r["agent"], r["action"]): r["count"] for r in rows})
+    assert got == expected
+    assert sum(r["runs"] for r in rows) == 3
+
+    cut = query.aggregate(["agent", "action"], since=BASE + 60)  # First segment is scanned
+    assert sum(r["count"] for r in cut) == sum(1 for e in query.log.entries() if e.ts >= BASE + 60)
@@ -0,0 +1,99 @@
+"""Tests for hooks/segment_log.py (segmented audit log used by security-gate)."""
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from hooks.segment_log import SegmentedLog
+
+
+def _log(tmp_path, **kwargs) -> SegmentedLog:
+    kwargs.setdefault("segment_bytes", 200)
+    kwargs.setdefault("compress", False)
+    return SegmentedLog(tmp_path / "audit", **kwargs)
+
+
+def test_rotation_and_count_retention(tmp_path):
+    log = _log(tmp_path, max_segments=3)
+    for i in range(40):
+        log.append({"i": i, "pad": "x" * 20})
+
+    manifest = log.manifest()
+    assert len(manifest["segments"]) == 3
+    files = sorted(p.name for p in log.directory.glob("seg-*"))
+    assert files == [s["file"] for s in manifest["segments"]]
+
+    # Newest records survive, in order, with no gaps inside retained segments
+    indexes = [r["i"] for r in reversed(list(log.records()))]
+    assert indexes[-1] == 39
+    assert indexes == list(range(indexes[0], 40))
+    assert [r["i"] for r in log.tail(3)] == [37, 38, 39]
+
+
+def test_age_retention_and_since_selection(tmp_path, monkeypatch):
+    log = _log(tmp_path, max_age_days=1)
+    log.append({"i": 0})
+    log.rotate()
+    manifest = log.manifest()
+    manifest["segments"][0]["last_ts"] = time.time() - 3 * 86400  # Pretend it is old
+    log._save_manifest(manifest)
+
+    log.append({"i": 1})
+    log.rotate()
+    assert [s["seq"] for s in log.manifest()["segments"]] == [2]
+    assert not (log.directory / "seg-00000001.jsonl").exists()
+
+    # since= skips sealed segments that end before the cutoff
+    read = []
+    monkeypatch.setattr(SegmentedLog, "_read_lines", staticmethod(lambda p: read.append(p.name) or []))
+    list(log.records(since=time.time() + 60))
+    assert read == ["active.jsonl"]
+
+
+def test_compress_sealed_segments(tmp_path):
+    log = _log(tmp_path)
+    for i in range(20):
+        log.append({"i": i, "pad": "y" * 20})
+    assert log.compress_sealed() >= 1
+    assert all(s["file"].endswith(".gz") for s in log.manifest()["segments"])
+    assert not list(log.directory.glob("seg-*.jsonl"))
+    assert [r["i"] for r in reversed(list(log.records()))] == list(range(20))
+
+
+def test_adopts_legacy_single_file_without_reading_it(tmp_path):
+    legacy = tmp_path / "audit.jsonl"
+    legacy.write_text("".join(json.dumps({"i": i}) + "\n" for i in range(5)))
+    (tmp_path / "audit.jsonl.old").write_text(json.dumps({"i": -1}) + "\n")
+
+    log = _log(tmp_path, segment_bytes=1 << 20, legacy_file=legacy)
+    assert [r["i"] for r in log.tail(2)] == [3, 4]  # Readable before migration
+
+    log.append({"i": 5})
+    assert not legacy.exists()
+    assert [s["file"] for s in log.manifest()["segments"]] == ["seg-00000001.jsonl", "seg-00000002.jsonl"]
+    assert [r["i"] for r in reversed(list(log.records()))] == [-1, 0, 1, 2, 3, 4, 5]
+
+
+def test_security_gate_audit_commands(tmp_path, monkeypatch, capsys):
+    import importlib.util
+
+    monkeypatch.setattr(sys, "stdin", open(__file__))  # Import arms a stdin timeout
+    monkeypatch.setenv("HOME", str(tmp_path))
+    spec = importlib.util.spec_from_file_location("security_gate", ROOT / "hooks" / "security-gate.py")
+    gate = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gate)
+    audit = tmp_path / "security" / "audit.jsonl"
+    monkeypatch.setattr(gate, "AUDIT_LOG", audit)
+
+    gate.log_security_event("pre_check", None, "ls", "allowed", audit)
+    gate.log_security_event("pre_check", {"threat_type": "secret_leak"}, "x", "pending_approval", audit)
+    assert not audit.exists() and (tmp_path / "security" / "audit" / "active.jsonl").exists()
+
+    gate.cmd_stats(days=1)
+    out = capsys.readouterr().out
+    assert "Total checks:     2" in out and "secret_leak: 1" in out
+    gate.cmd_audit()
+    assert "pending_approval" in capsys.readouterr().out
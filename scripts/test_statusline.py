@@ -520,6 +520,38 @@ def test_read_task_list_progress_missing_dir(tmp_path: Path, monkeypatch):
     assert result is None
 
 
+def test_read_task_list_progress_rereads_only_changed_files(tmp_path: Path, monkeypatch):
+    """Test _read_task_list_progress memoizes statuses and re-reads only changed task files."""
+    import os
+
+    import scripts.statusline as statusline
+
+    monkeypatch.setattr("scripts.statusline.CACHE_DIR", tmp_path)
+    tasks_dir = tmp_path / "tasks" / "ralph-impl"
+    tasks_dir.mkdir(parents=True)
+    for i in range(5):
+        (tasks_dir / f"task-{i}.json").write_text(json.dumps({"status": "pending"}))
+    os.utime(tasks_dir, ns=(10**18, 10**18))  # Outside the racy window
+
+    assert statusline._read_task_list_progress("ralph-impl")["total"] == 5
+
+    reads = []
+    real = statusline._task_status
+    monkeypatch.setattr(statusline, "_task_status", lambda path: reads.append(path.name) or real(path))
+
+    # Unchanged directory: served from the memo without listing it
+    assert statusline._read_task_list_progress("ralph-impl")["total"] == 5
+    assert reads == []
+
+    # Atomic replace of one task: only that file is re-read
+    tmp = tasks_dir / "task-3.json.tmp"
+    tmp.write_text(json.dumps({"status": "completed"}))
+    os.replace(tmp, tasks_dir / "task-3.json")
+    result = statusline._read_task_list_progress("ralph-impl")
+    assert result["completed"] == 1 and result["total"] == 5
+    assert reads == ["task-3.json"]
+
+
 def test_team_config_model_mix(tmp_path: Path, monkeypatch):
     """Test _read_team_config with opus and sonnet model mix."""
     from scripts.statusline import _read_team_config
@@ -550,6 +582,49 @@ def test_team_config_model_mix(tmp_path: Path, monkeypatch):
     assert result["model_mix"]["sonnet"] == 2
 
 
+def test_read_team_config_uses_session_index(tmp_path: Path, monkeypatch):
+    """Test _read_team_config serves lookups from the index and re-reads only changed configs."""
+    import os
+
+    import scripts.statusline as statusline
+
+    monkeypatch.setenv("CLAUDE_CODE_EXPERIMENTAL_AGENT_TEAMS", "1")
+    monkeypatch.setattr("scripts.statusline.CACHE_DIR", tmp_path)
+    session = "5b47e9a3-ba2a-4a3a-b91c-49aa1768909d"
+
+    for i in range(10):  # Old teams of other sessions
+        team_dir = tmp_path / "teams" / f"old-{i}"
+        team_dir.mkdir(parents=True)
+        (team_dir / "config.json").write_text(json.dumps(
+            {"name": f"old-{i}", "leadSessionId": f"session-{i}", "members": [{"name": "a"}]}))
+    mine = tmp_path / "teams" / "mine"
+    mine.mkdir()
+    (mine / "config.json").write_text(json.dumps(
+        {"name": "mine", "leadSessionId": session, "members": [{"name": "a"}]}))
+    os.utime(tmp_path / "teams", ns=(10**18, 10**18))  # Outside the racy window
+
+    assert statusline._read_team_config(session)["member_count"] == 1
+
+    reads = []
+    real = statusline.locked_read_json
+    monkeypatch.setattr(statusline, "locked_read_json",
+                        lambda path, **kw: reads.append(path.parent.name) or real(path, **kw))
+
+    assert statusline._read_team_config(session)["team_name"] == "mine"
+    assert statusline._read_team_config("session-3")["team_name"] == "old-3"
+    assert statusline._read_team_config("unknown") is None
+    assert reads == []
+
+    # A member joins: only the matched team's config is re-read
+    (mine / "config.json").write_text(json.dumps(
+        {"name": "mine", "leadSessionId": session,
+         "members": [{"name": "a"}, {"name": "b", "model": "haiku"}]}))
+    result = statusline._read_team_config(session)
+    assert result["member_count"] == 2
+    assert result["model_mix"]["haiku"] == 1
+    assert reads == ["mine"]
+
+
 # ============================================================================
 # P2: _short_model tests
 # ============================================================================
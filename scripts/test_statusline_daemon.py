@@ -0,0 +1,102 @@
+"""Tests for scripts/statusline_daemon.py (resident statusline renderer + thin client)."""
+import io
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts import statusline
+from scripts import statusline_daemon as sd
+
+ENV = {"CLAUDE_CODE_EFFORT_LEVEL": "high"}
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch) -> Path:
+    home = tmp_path / "home"
+    home.mkdir()
+    (home / ".model-info").write_text(json.dumps({"display": "Opus 4.6"}))
+    monkeypatch.setattr(statusline, "CACHE_DIR", home)
+    monkeypatch.setattr(statusline, "fetch_usage_data", statusline.read_usage_cache)
+    cwd = tmp_path / "project"
+    (cwd / ".claude" / "ralph").mkdir(parents=True)
+    return cwd
+
+
+def _progress(cwd: Path, completed: int) -> None:
+    (cwd / ".claude" / "ralph" / "progress.json").write_text(json.dumps({
+        "total": 4, "impl": {"total": 4, "completed": completed}, "model_mix": {"opus": 4},
+    }))
+
+
+def _input(cwd: Path) -> dict:
+    return {"cwd": str(cwd), "session_id": "s-1", "context_window": {"used_percentage": 40},
+            "cost": {"total_cost_usd": 1.5}}
+
+
+def test_watched_render_matches_direct_render(workspace):
+    _progress(workspace, 1)
+    sources = sd.WatchedSources(statusline)
+    direct = statusline.render(_input(workspace), env=ENV)
+    assert statusline.render(_input(workspace), sources, ENV) == direct
+    assert statusline.render(_input(workspace), sources, ENV) == direct  # From memory
+    assert "1" in direct and "O4.6" in direct
+
+
+def test_segments_refresh_only_when_their_files_change(workspace, monkeypatch):
+    _progress(workspace, 1)
+    sources = sd.WatchedSources(statusline)
+    reads = []
+    real = statusline._read_ralph_progress
+    monkeypatch.setattr(statusline, "_read_ralph_progress", lambda cwd: reads.append(cwd) or real(cwd))
+
+    assert sources.ralph_progress(str(workspace))["impl"]["completed"] == 1
+    generation = sources.generation
+    sources.poll()
+    assert len(reads) == 1 and sources.generation == generation
+
+    _progress(workspace, 3)
+    assert sources.poll() is True
+    assert sources.ralph_progress(str(workspace))["impl"]["completed"] == 3
+    assert len(reads) == 2 and sources.generation > generation
+
+
+def test_client_leaves_stdin_alone_without_daemon(tmp_path, monkeypatch):
+    monkeypatch.setattr(sd, "SOCKET_PATH", tmp_path / "missing.sock")
+    stdin = io.StringIO("{}")
+    monkeypatch.setattr(sys, "stdin", stdin)
+    assert sd.client_render() is None
+    assert stdin.read() == "{}"
+
+
+@pytest.mark.skipif(not sd.HAS_UNIX_SOCKETS, reason="AF_UNIX not available")
+def test_client_prints_daemon_render(workspace, tmp_path, monkeypatch, capsysbinary):
+    _progress(workspace, 2)
+    sock_path = tmp_path / "statuslined.sock"
+    monkeypatch.setattr(sd, "SOCKET_PATH", sock_path)
+    monkeypatch.setattr(statusline, "save_last_output", lambda line: None)
+    for key, value in ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.delenv("CLAUDE_STATUSLINED_DISABLE", raising=False)
+
+    server = sd._server_class()(socket_path=sock_path, idle_seconds=30, stats_file=None)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(50):
+        if sock_path.exists():
+            break
+        thread.join(0.05)
+
+    raw = json.dumps(_input(workspace))
+    monkeypatch.setattr(sys, "stdin", io.StringIO(raw))
+    with pytest.raises(SystemExit):
+        sd.client_render()
+    assert capsysbinary.readouterr().out.decode("utf-8") == statusline.render(_input(workspace), env=ENV)
+    assert server.stats()["hooks"]["render"]["calls"] == 1
+
+    sd._request({"op": "shutdown"}, timeout=2.0, socket_path=sock_path)
+    thread.join(5)
+    assert not thread.is_alive()